@@ -18,9 +18,17 @@ def load_env_file(path=".env"):
 
 load_env_file(os.path.join(os.path.dirname(__file__), ".env"))
 
+import time  # noqa: E402
+from contextlib import asynccontextmanager  # noqa: E402
+
 from fastapi import FastAPI  # noqa: E402
 from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
 
+from services.startup import get_orchestrator, register_default_components, start_warmup  # noqa: E402
+from services.upload_registry import start_upload_reaper  # noqa: E402
+
+_routes_import_started = time.perf_counter()
+
 from routes.diag import router as diag_router  # noqa: E402
 from routes.export import router as export_router  # noqa: E402
 from routes.generate import router as generate_router  # noqa: E402
@@ -44,7 +52,19 @@ from routes.billing import router as billing_router  # noqa: E402
 from routes.profile import router as profile_router  # noqa: E402
 from routes.system import router as system_router  # noqa: E402
 
-app = FastAPI(title="EduCator Backend")
+get_orchestrator().record("routes", time.perf_counter() - _routes_import_started)
+register_default_components()
+
+
+@asynccontextmanager
+async def lifespan(_app):
+    # Heavy models and clients are warmed in a background thread so the server accepts traffic immediately.
+    start_warmup()
+    start_upload_reaper()
+    yield
+
+
+app = FastAPI(title="EduCator Backend", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -77,15 +97,6 @@ app.include_router(billing_router)
 app.include_router(profile_router)
 app.include_router(system_router)
 
-from services.llm.factory import verify_provider_startup
-
-startup_warnings = verify_provider_startup()
-for warning in startup_warnings:
-    import logging
-
-    logger = logging.getLogger("services.llm.startup")
-    logger.warning(warning)
-
 if __name__ == "__main__":
     import uvicorn
 
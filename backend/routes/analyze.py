@@ -7,6 +7,7 @@ from fastapi.responses import JSONResponse
 
 from utils.extractors import extract_docx_text, extract_pdf_text, extract_pptx_text, extract_txt_text
 from services.gemini_service import generate_items_from_source
+from services.upload_registry import resolve_upload
 
 router = APIRouter()
 
@@ -15,13 +16,7 @@ os.makedirs(TEMP_UPLOAD_DIR, exist_ok=True)
 
 
 def _resolve_temp_upload(file_id: str) -> str:
-    if not file_id:
-        return ""
-    prefix = f"{file_id}__"
-    for name in os.listdir(TEMP_UPLOAD_DIR):
-        if name.startswith(prefix):
-            return os.path.join(TEMP_UPLOAD_DIR, name)
-    return ""
+    return resolve_upload(file_id)
 
 
 def _extract_text_from_file_bytes(filename: str, data: bytes):
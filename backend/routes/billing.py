@@ -7,15 +7,25 @@ from fastapi.responses import JSONResponse
 from services.entitlement_service import get_user_entitlement, set_user_entitlement
 from services.firestore_service import ensure_firestore_initialized
 
-try:
-    import stripe
-except Exception:  # pragma: no cover
-    stripe = None
+from services.startup import lazy_import
 
-try:
-    from firebase_admin import auth as firebase_auth
-except Exception:  # pragma: no cover
-    firebase_auth = None
+# Both SDKs are slow to import, so they are loaded on first use (or by the startup warm-up).
+stripe = None
+firebase_auth = None
+
+
+def _load_stripe():
+    global stripe
+    if stripe is None:
+        stripe = lazy_import("stripe")
+    return stripe
+
+
+def _load_firebase_auth():
+    global firebase_auth
+    if firebase_auth is None:
+        firebase_auth = lazy_import("firebase_admin.auth")
+    return firebase_auth
 
 
 router = APIRouter()
@@ -72,7 +82,7 @@ PLAN_CATALOG = {
 
 
 def _require_stripe():
-    if stripe is None:
+    if _load_stripe() is None:
         raise RuntimeError("stripe package is not installed on backend")
     if not STRIPE_SECRET_KEY:
         raise RuntimeError("Stripe checkout is not configured. Add STRIPE_SECRET_KEY to backend/.env and restart the backend.")
@@ -88,7 +98,7 @@ def _get_bearer_token(request: Request) -> str:
 
 
 def _require_firebase_user(request: Request):
-    if firebase_auth is None:
+    if _load_firebase_auth() is None:
         raise RuntimeError("firebase_admin is not installed/configured on backend")
     ensure_firestore_initialized()
     token = _get_bearer_token(request)
@@ -247,7 +257,7 @@ async def confirm_checkout(request: Request):
 @router.post("/api/billing/webhook")
 async def stripe_webhook(request: Request):
     try:
-        if stripe is None:
+        if _load_stripe() is None:
             return JSONResponse(content={"error": "stripe package is not installed on backend"}, status_code=502)
         if not STRIPE_SECRET_KEY:
             return JSONResponse(content={"error": "STRIPE_SECRET_KEY is missing"}, status_code=502)
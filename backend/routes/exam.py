@@ -5,6 +5,7 @@ from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse
 
 from services.exam_service import generate_mock_exam
+from services.upload_registry import resolve_upload
 from routes.generate import get_source_text_from_request
 from utils.extractors import extract_docx_text, extract_pdf_text, extract_pptx_text, extract_txt_text
 
@@ -14,16 +15,7 @@ TEMP_UPLOAD_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..",
 
 
 def _resolve_temp_upload(file_id: str) -> str:
-    if not file_id:
-        return ""
-    prefix = f"{file_id}__"
-    try:
-        for name in os.listdir(TEMP_UPLOAD_DIR):
-            if name.startswith(prefix):
-                return os.path.join(TEMP_UPLOAD_DIR, name)
-    except FileNotFoundError:
-        return ""
-    return ""
+    return resolve_upload(file_id)
 
 
 def _extract_text_from_file_bytes(filename: str, data: bytes) -> str:
@@ -1,25 +1,36 @@
+import asyncio
 import hashlib
 import json
 import logging
 import os
 import re
+import sqlite3
+import time
 import uuid
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from fastapi import APIRouter, BackgroundTasks, Body, Request
 from fastapi.responses import JSONResponse
 
+from services.extracted_text_cache import extracted_text_cache as _extracted_text_cache, make_key as make_extracted_text_key
+from services.generation_cache import generation_flights as _generation_flights, get_generation_store as _get_generation_store
 from services.mcq_session import get_mcq_session, store_mcq_session, update_mcq_session
+from services.rag.cache import acquire_lock, release_lock
 from services.rag.generation import (
+    agenerate_flashcards as agenerate_flashcards_from_rag,
+    agenerate_mcqs as agenerate_mcqs_from_rag,
+    agenerate_summary as agenerate_summary_from_rag,
     generate_fill_blanks as generate_fill_blanks_from_rag,
     generate_flashcards as generate_flashcards_from_rag,
     generate_mcqs as generate_mcqs_from_rag,
     generate_summary as generate_summary_from_rag,
     generate_true_false as generate_true_false_from_rag,
 )
-from services.rag.ingestion import ingest_document
+from services.rag.ingestion import ingest_document, ingest_pages, remove_document
 from services.rag.vectordb import list_documents
-from utils.extractors import extract_docx_text, extract_pdf_text, extract_pptx_text, extract_txt_text
+from services.upload_registry import lookup_upload, on_upload_deleted, register_upload
+from services.upload_stream import UploadTooLarge, check_content_length, iter_upload_file, save_stream
+from utils.extractors import extract_docx_text, extract_pdf_text, extract_pptx_text, extract_txt_text, iter_pdf_pages
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -28,7 +39,9 @@ TEMP_UPLOAD_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..",
 os.makedirs(TEMP_UPLOAD_DIR, exist_ok=True)
 
 REFILL_POOL_SIZE = int(os.getenv("REFILL_POOL_SIZE", "10"))
-GENERATION_CACHE_PATH = os.path.join(TEMP_UPLOAD_DIR, "generation_cache.json")
+GENERATION_LOCK_TTL_SECONDS = float(os.getenv("GENERATION_LOCK_TTL_SECONDS", "180"))
+GENERATION_LOCK_WAIT_SECONDS = float(os.getenv("GENERATION_LOCK_WAIT_SECONDS", "120"))
+GENERATION_LOCK_POLL_SECONDS = float(os.getenv("GENERATION_LOCK_POLL_SECONDS", "0.5"))
 
 from services.gemini_service import (
     generate_items_from_source,
@@ -53,45 +66,70 @@ def _make_generation_cache_key(feature, source_text, count=None, difficulty=None
     return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
 
 
-def _load_generation_cache():
-    if not os.path.exists(GENERATION_CACHE_PATH):
-        return {}
-    try:
-        with open(GENERATION_CACHE_PATH, "r", encoding="utf-8") as handle:
-            return json.load(handle) or {}
-    except Exception:
-        return {}
-
-
-def _save_generation_cache(cache):
-    with open(GENERATION_CACHE_PATH, "w", encoding="utf-8") as handle:
-        json.dump(cache, handle)
-
-
 def _get_cached_generation_payload(feature, source_text, count=None, difficulty=None):
     if not source_text:
         return None
-    cache = _load_generation_cache()
-    return cache.get(_make_generation_cache_key(feature, source_text, count=count, difficulty=difficulty))
+    try:
+        return _get_generation_store().get(_make_generation_cache_key(feature, source_text, count=count, difficulty=difficulty))
+    except sqlite3.Error as exc:
+        logger.warning("Generation cache read failed: %s", exc)
+        return None
 
 
 def _set_cached_generation_payload(feature, source_text, payload, count=None, difficulty=None):
     if not source_text or payload is None:
         return payload
-    cache = _load_generation_cache()
-    cache[_make_generation_cache_key(feature, source_text, count=count, difficulty=difficulty)] = payload
-    _save_generation_cache(cache)
+    try:
+        _get_generation_store().set(_make_generation_cache_key(feature, source_text, count=count, difficulty=difficulty), payload, feature=feature)
+    except sqlite3.Error as exc:
+        logger.warning("Generation cache write failed: %s", exc)
     return payload
 
 
-def _resolve_temp_upload(file_id):
-    if not file_id:
-        return ""
-    prefix = f"{file_id}__"
-    for name in os.listdir(TEMP_UPLOAD_DIR):
-        if name.startswith(prefix):
-            return os.path.join(TEMP_UPLOAD_DIR, name)
-    return ""
+async def _generate_once_across_workers(cache_key, feature, source_text, compute, count=None, difficulty=None):
+    """Run ``compute`` unless another worker holding the Redis lock produces the payload first."""
+    deadline = time.monotonic() + GENERATION_LOCK_WAIT_SECONDS
+    lock_key = f"generation:{cache_key}"
+    while True:
+        cached = await asyncio.to_thread(_get_cached_generation_payload, feature, source_text, count, difficulty)
+        if cached is not None:
+            return cached
+        token = await asyncio.to_thread(acquire_lock, lock_key, GENERATION_LOCK_TTL_SECONDS)
+        if token is not None:
+            break
+        if time.monotonic() >= deadline:
+            logger.warning("Timed out waiting for %s generation in another worker; generating locally", feature)
+            break
+        await asyncio.sleep(GENERATION_LOCK_POLL_SECONDS)
+
+    try:
+        payload = await compute()
+        await asyncio.to_thread(_set_cached_generation_payload, feature, source_text, payload, count, difficulty)
+        return payload
+    finally:
+        await asyncio.to_thread(release_lock, lock_key, token)
+
+
+async def _get_or_generate(feature, source_text, compute, count=None, difficulty=None):
+    """Return the cached payload, or compute it once for all concurrent identical requests.
+
+    Requests in this process share one in-flight computation per generation cache key;
+    with Redis configured, other workers wait on a lock instead of generating in parallel.
+    """
+    cached = await asyncio.to_thread(_get_cached_generation_payload, feature, source_text, count, difficulty)
+    if cached is not None:
+        return cached
+    if not source_text:
+        return await compute()
+    cache_key = _make_generation_cache_key(feature, source_text, count=count, difficulty=difficulty)
+    return await _generation_flights.ado(
+        cache_key,
+        lambda: _generate_once_across_workers(cache_key, feature, source_text, compute, count=count, difficulty=difficulty),
+    )
+
+
+def _lookup_temp_upload(file_id):
+    return lookup_upload(file_id)
 
 
 def _extract_text_from_file_bytes(filename, data):
@@ -119,6 +157,41 @@ def _extract_text_from_file_bytes(filename, data):
     return extracted_text, source_type
 
 
+def _extract_text_from_path(filename, path):
+    """Extract a file on disk; PDF/DOCX/PPTX extractors read it from the path without loading it whole."""
+    if filename.lower().endswith(".txt"):
+        with open(path, "rb") as handle:
+            return _extract_text_from_file_bytes(filename, handle.read())
+    return _extract_text_from_file_bytes(filename, path)
+
+
+def _extract_stored_upload_text(path, filename, digest=None):
+    """Extract a stored upload, reading the file only when its text is not cached."""
+    key = make_extracted_text_key(digest or _extracted_text_cache.digest_for_path(path), filename)
+    cached = _extracted_text_cache.get(key)
+    if cached is not None:
+        return cached
+    if not os.path.getsize(path):
+        raise ValueError("Uploaded file is empty")
+    extracted_text, source_type = _extract_text_from_path(filename, path)
+    if extracted_text:
+        _extracted_text_cache.set(key, extracted_text, source_type)
+    return extracted_text, source_type
+
+
+def invalidate_extracted_text(record):
+    """Drop the cached text of a deleted upload.
+
+    The file is already removed when delete listeners run, so the recorded hash identifies it.
+    """
+    _extracted_text_cache.invalidate_path(record["path"], record["filename"], digest=record["sha256"])
+
+
+on_upload_deleted(invalidate_extracted_text)
+# Stored uploads are indexed under their file id, so reaping one also frees its RAG index entries.
+on_upload_deleted(lambda record: remove_document(record["file_id"]))
+
+
 def _should_background_ingest() -> bool:
     return str(os.getenv("RAG_BACKGROUND_INGESTION", "false")).strip().lower() in {"1", "true", "yes"}
 
@@ -140,14 +213,8 @@ def _index_uploaded_document(document_id, filename, source_type, raw_text):
         logger.info("Skipping RAG ingestion for %s because extracted text was shorter than 100 characters", filename)
         return None
 
-    try:
-        existing_documents = list_documents() or []
-        for item in existing_documents:
-            if str(item.get("document_id", "")) == str(document_id):
-                logger.info("Document already indexed for document_id=%s", document_id)
-                return None
-    except Exception as exc:
-        logger.warning("Unable to check existing RAG documents for %s: %s", document_id, exc)
+    if _is_already_indexed(document_id):
+        return None
 
     logger.info("Upload completed for %s", filename)
     logger.info("Extracted %s characters for document_id=%s", len(cleaned_text), document_id)
@@ -159,47 +226,120 @@ def _index_uploaded_document(document_id, filename, source_type, raw_text):
             source_type=source_type,
             raw_text=cleaned_text,
         )
-        if result.get("success"):
-            logger.info("Created %s chunks for document_id=%s", result.get("number_of_chunks", 0), document_id)
-            logger.info("Stored %s embeddings for document_id=%s", result.get("number_of_chunks", 0), document_id)
-            logger.info("ChromaDB indexing completed for document_id=%s", document_id)
-        else:
-            logger.warning("RAG indexing skipped for document_id=%s: %s", document_id, result.get("error", "unknown error"))
+        _log_ingestion_result(document_id, result)
         return result
     except Exception as exc:
         logger.exception("RAG ingestion failed for document_id=%s", document_id)
         return None
 
 
+def _is_already_indexed(document_id):
+    try:
+        existing_documents = list_documents() or []
+        for item in existing_documents:
+            if str(item.get("document_id", "")) == str(document_id):
+                logger.info("Document already indexed for document_id=%s", document_id)
+                return True
+    except Exception as exc:
+        logger.warning("Unable to check existing RAG documents for %s: %s", document_id, exc)
+    return False
+
+
+def _log_ingestion_result(document_id, result):
+    if result.get("success"):
+        logger.info("Created %s chunks for document_id=%s", result.get("number_of_chunks", 0), document_id)
+        logger.info(
+            "Stored %s embeddings for document_id=%s (%s shared with other documents, %s reused, %s deleted)",
+            result.get("added_chunks", 0),
+            document_id,
+            result.get("shared_embeddings", 0),
+            result.get("reused_chunks", 0),
+            result.get("deleted_chunks", 0),
+        )
+        logger.info("ChromaDB indexing completed for document_id=%s", document_id)
+    else:
+        logger.warning("RAG indexing skipped for document_id=%s: %s", document_id, result.get("error", "unknown error"))
+
+
+def _index_uploaded_pdf(document_id, filename, path, digest=None):
+    """Index a stored PDF while it is extracted, so chunking and embedding overlap later pages."""
+    if not document_id or _is_already_indexed(document_id):
+        return None
+    pages = []
+
+    def collect_pages():
+        for page in iter_pdf_pages(path):
+            pages.append(page)
+            yield page
+
+    result = ingest_pages(document_id, filename, "pdf", collect_pages(), min_characters=100)
+    logger.info("Extracted %s pages for document_id=%s", result.get("pages", 0), document_id)
+    _log_ingestion_result(document_id, result)
+    if digest and pages and result.get("pages") == len(pages):
+        # Same text extract_pdf_text would return, so later generate calls skip extraction.
+        _extracted_text_cache.set(make_extracted_text_key(digest, filename), "\n".join(pages).strip(), "pdf")
+    return result
+
+
+async def _store_upload(filename, chunks, background_tasks):
+    file_id = uuid.uuid4().hex
+    stored_name = f"{file_id}__{filename}"
+    path = os.path.join(TEMP_UPLOAD_DIR, stored_name)
+    size, digest = await save_stream(chunks, path)
+    if not size:
+        os.remove(path)
+        return JSONResponse(content={"error": "Uploaded file is empty"}, status_code=400)
+
+    register_upload(file_id, filename, path, size, digest)
+    try:
+        if filename.lower().endswith(".pdf"):
+            if _should_background_ingest():
+                background_tasks.add_task(_index_uploaded_pdf, file_id, filename, path, digest)
+            else:
+                await asyncio.to_thread(_index_uploaded_pdf, file_id, filename, path, digest)
+        else:
+            extracted_text, source_type = await asyncio.to_thread(_extract_stored_upload_text, path, filename, digest)
+            if _should_background_ingest():
+                background_tasks.add_task(_index_uploaded_document, file_id, filename, source_type, extracted_text)
+            else:
+                await asyncio.to_thread(_index_uploaded_document, file_id, filename, source_type, extracted_text)
+    except Exception as exc:
+        logger.warning("Skipping RAG indexing for upload %s due to extraction error: %s", filename, exc)
+
+    return {"fileId": file_id, "fileName": filename, "size": size}
+
+
 @router.post("/api/source/upload")
 async def upload_source_file(request: Request, background_tasks: BackgroundTasks):
     try:
+        check_content_length(request.headers)
         form = await request.form()
         upload = form.get("file")
         if not upload or not hasattr(upload, "filename"):
             return JSONResponse(content={"error": "file is required"}, status_code=400)
 
         filename = os.path.basename(str(upload.filename or "uploaded.file"))
-        data = await upload.read()
-        if not data:
-            return JSONResponse(content={"error": "Uploaded file is empty"}, status_code=400)
+        return await _store_upload(filename, iter_upload_file(upload), background_tasks)
+    except UploadTooLarge as exc:
+        return JSONResponse(content={"error": str(exc)}, status_code=413)
+    except Exception as exc:
+        return JSONResponse(content={"error": f"Unexpected server error: {exc}"}, status_code=500)
 
-        file_id = uuid.uuid4().hex
-        stored_name = f"{file_id}__{filename}"
-        path = os.path.join(TEMP_UPLOAD_DIR, stored_name)
-        with open(path, "wb") as handle:
-            handle.write(data)
 
-        try:
-            extracted_text, source_type = _extract_text_from_file_bytes(filename, data)
-            if _should_background_ingest():
-                background_tasks.add_task(_index_uploaded_document, file_id, filename, source_type, extracted_text)
-            else:
-                _index_uploaded_document(file_id, filename, source_type, extracted_text)
-        except Exception as exc:
-            logger.warning("Skipping RAG indexing for upload %s due to extraction error: %s", filename, exc)
+@router.post("/api/source/upload/stream")
+async def upload_source_stream(request: Request, background_tasks: BackgroundTasks):
+    """Raw-body upload: the file is written to disk as it arrives, with no multipart spooling.
 
-        return {"fileId": file_id, "fileName": filename, "size": len(data)}
+    The filename comes from the ``filename`` query parameter or the ``X-File-Name`` header.
+    """
+    try:
+        check_content_length(request.headers)
+        filename = os.path.basename(str(request.query_params.get("filename") or request.headers.get("x-file-name") or "").strip())
+        if not filename:
+            return JSONResponse(content={"error": "filename is required"}, status_code=400)
+        return await _store_upload(filename, request.stream(), background_tasks)
+    except UploadTooLarge as exc:
+        return JSONResponse(content={"error": str(exc)}, status_code=413)
     except Exception as exc:
         return JSONResponse(content={"error": f"Unexpected server error: {exc}"}, status_code=500)
 
@@ -475,15 +615,15 @@ async def get_source_text_from_request(request: Request):
         previews.append(txt[:80] or "Text source")
 
     for file_id in file_ids:
-        path = _resolve_temp_upload(file_id)
+        record = _lookup_temp_upload(file_id)
+        path = record["path"] if record else ""
         if not path or not os.path.exists(path):
             raise ValueError("Uploaded file not found. Please re-upload.")
         filename = os.path.basename(path).split("__", 1)[-1] or "uploaded.file"
-        with open(path, "rb") as handle:
-            data = handle.read()
-        if not data:
+        size = os.path.getsize(path)
+        if not size:
             raise ValueError("Uploaded file is empty")
-        extracted_text, source_type = _extract_text_from_file_bytes(filename, data)
+        extracted_text, source_type = _extract_stored_upload_text(path, filename, record["sha256"])
         if not extracted_text:
             raise ValueError("Unable to extract text from the uploaded file")
         _index_uploaded_document(file_id, filename, source_type, extracted_text)
@@ -491,17 +631,22 @@ async def get_source_text_from_request(request: Request):
         previews.append(filename)
         if source_type == "pdf" and not file_meta["pdfFileName"]:
             file_meta["pdfFileName"] = filename
-            file_meta["pdfSizeBytes"] = len(data)
+            file_meta["pdfSizeBytes"] = size
         if source_type == "pptx" and not file_meta["pptFileName"]:
             file_meta["pptFileName"] = filename
-            file_meta["pptSizeBytes"] = len(data)
+            file_meta["pptSizeBytes"] = size
 
     if upload and hasattr(upload, "filename"):
         filename = str(upload.filename or "uploaded.file")
-        data = await upload.read()
-        if not data:
-            raise ValueError("Uploaded file is empty")
-        extracted_text, source_type = _extract_text_from_file_bytes(filename, data)
+        spool_path = os.path.join(TEMP_UPLOAD_DIR, f".request-{uuid.uuid4().hex}__{os.path.basename(filename)}")
+        try:
+            size, digest = await save_stream(iter_upload_file(upload), spool_path)
+            if not size:
+                raise ValueError("Uploaded file is empty")
+            extracted_text, source_type = _extract_stored_upload_text(spool_path, filename, digest)
+        finally:
+            if os.path.exists(spool_path):
+                os.remove(spool_path)
         if not extracted_text:
             raise ValueError("Unable to extract text from the uploaded file")
         _index_uploaded_document("upload:" + filename, filename, source_type, extracted_text)
@@ -509,10 +654,10 @@ async def get_source_text_from_request(request: Request):
         previews.append(filename)
         if source_type == "pdf" and not file_meta["pdfFileName"]:
             file_meta["pdfFileName"] = filename
-            file_meta["pdfSizeBytes"] = len(data)
+            file_meta["pdfSizeBytes"] = size
         if source_type == "pptx" and not file_meta["pptFileName"]:
             file_meta["pptFileName"] = filename
-            file_meta["pptSizeBytes"] = len(data)
+            file_meta["pptSizeBytes"] = size
 
     combined_text = "\n\n---\n\n".join([chunk for chunk in combined_chunks if chunk]).strip()
     if not combined_text:
@@ -529,118 +674,128 @@ async def get_source_text_from_request(request: Request):
     }
 
 
-@router.post("/api/generate/study-set")
-async def generate_study_set(request: Request):
-    try:
-        initial_count = 10
-        source_text, source_meta = await get_source_text_from_request(request)
-        difficulty = str(source_meta.get("difficulty", "medium")).strip().lower() or "medium"
+def _generate_study_set_parts(source_text, difficulty, initial_count):
+    difficulty_hint = (
+        "Difficulty: easy = basic recall/definitions; medium = conceptual and moderately challenging; "
+        "hard = advanced reasoning, nuanced distractors, and deeper understanding.\n"
+        f"Selected difficulty: {difficulty}.\n"
+    )
 
-        cached_result = _get_cached_generation_payload("study_set", source_text, count=initial_count, difficulty=difficulty)
-        if cached_result is not None:
-            mcqs = _normalize_mcq_items(cached_result.get("mcqs", []))
-            flashcards = cached_result.get("flashcards", [])
-            summary = cached_result.get("summary", "")
-            mcq_set_id = str(cached_result.get("mcqSetId", "") or "").strip()
-            if not mcq_set_id:
-                mcq_set_id = store_mcq_session(mcqs)
-            update_mcq_session(mcq_set_id, items=mcqs, flashcards=flashcards, source_text=source_text)
-            return {
-                "mcqs": mcqs,
-                "flashcards": flashcards,
-                "summary": summary,
-                "mcqSetId": mcq_set_id,
-            }
+    instructions = {
+        "mcqs": (
+            f"{difficulty_hint}"
+            "Create exactly 10 MCQs from the provided content. "
+            "Each item must be: "
+            "{\"question\":\"...\",\"options\":[\"A\",\"B\",\"C\",\"D\"],\"answer\":\"...\",\"explanation\":\"...\",\"topic\":\"...\"}. "
+            "The explanation should briefly explain why the correct answer is right."
+        ),
+        "flashcards": (
+            f"{difficulty_hint}"
+            "Create exactly 10 flashcards from the provided content. "
+            "Each item must be: {\"front\":\"...\",\"back\":\"...\",\"topic\":\"...\"}"
+        ),
+    }
 
-        try:
-            summary_payload, _ = generate_summary_from_rag(source_text)
-            mcq_payload, _ = generate_mcqs_from_rag(source_text)
-            flashcard_payload, _ = generate_flashcards_from_rag(source_text)
-
-            summary_text = str(summary_payload.get("summary", "") if isinstance(summary_payload, dict) else summary_payload).strip()
-            mcqs = _normalize_mcq_items(mcq_payload or [])
-            flashcards = flashcard_payload or []
-            if not mcqs:
-                mcqs = _fallback_mcqs(source_text, count=initial_count)
-            if not flashcards:
-                flashcards = _fallback_flashcards(source_text, count=initial_count)
-            if not summary_text:
-                summary_text = _fallback_summary(source_text)
+    results = {}
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = {
+            executor.submit(generate_items_from_source, source_text, instruction, initial_count): key
+            for key, instruction in instructions.items()
+        }
+        futures[executor.submit(generate_summary_from_source, source_text)] = "summary"
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except RuntimeError:
+                if key == "summary":
+                    results[key] = _fallback_summary(source_text)
+                elif key == "mcqs":
+                    results[key] = _fallback_mcqs(source_text, count=initial_count)
+                elif key == "flashcards":
+                    results[key] = _fallback_flashcards(source_text, count=initial_count)
+                else:
+                    raise
+    return results
+
+
+def _study_set_response(payload, source_text):
+    mcqs = _normalize_mcq_items(payload.get("mcqs", []))
+    flashcards = payload.get("flashcards", [])
+    summary = payload.get("summary", "")
+    mcq_set_id = str(payload.get("mcqSetId", "") or "").strip()
+    if not mcq_set_id:
+        mcq_set_id = store_mcq_session(mcqs)
+    update_mcq_session(mcq_set_id, items=mcqs, flashcards=flashcards, source_text=source_text)
+    return {
+        "mcqs": mcqs,
+        "flashcards": flashcards,
+        "summary": summary,
+        "mcqSetId": mcq_set_id,
+    }
 
-            mcq_set_id = store_mcq_session(mcqs)
-            update_mcq_session(mcq_set_id, items=mcqs, flashcards=flashcards, source_text=source_text)
-            response_payload = {
-                "mcqs": mcqs,
-                "flashcards": flashcards,
-                "summary": summary_text,
-                "mcqSetId": mcq_set_id,
-            }
-            _set_cached_generation_payload("study_set", source_text, response_payload, count=initial_count, difficulty=difficulty)
-            return response_payload
-        except Exception:
-            # Fallback to independent generation when the shared RAG engine returns unusable output.
-            pass
 
-        difficulty_hint = (
-            "Difficulty: easy = basic recall/definitions; medium = conceptual and moderately challenging; "
-            "hard = advanced reasoning, nuanced distractors, and deeper understanding.\n"
-            f"Selected difficulty: {difficulty}.\n"
+async def _compute_study_set(source_text, difficulty, initial_count):
+    try:
+        (summary_payload, _), (mcq_payload, _), (flashcard_payload, _) = await asyncio.gather(
+            agenerate_summary_from_rag(source_text),
+            agenerate_mcqs_from_rag(source_text),
+            agenerate_flashcards_from_rag(source_text),
         )
 
-        instructions = {
-            "mcqs": (
-                f"{difficulty_hint}"
-                "Create exactly 10 MCQs from the provided content. "
-                "Each item must be: "
-                "{\"question\":\"...\",\"options\":[\"A\",\"B\",\"C\",\"D\"],\"answer\":\"...\",\"explanation\":\"...\",\"topic\":\"...\"}. "
-                "The explanation should briefly explain why the correct answer is right."
-            ),
-            "flashcards": (
-                f"{difficulty_hint}"
-                "Create exactly 10 flashcards from the provided content. "
-                "Each item must be: {\"front\":\"...\",\"back\":\"...\",\"topic\":\"...\"}"
-            ),
-        }
+        summary_text = str(summary_payload.get("summary", "") if isinstance(summary_payload, dict) else summary_payload).strip()
+        mcqs = _normalize_mcq_items(mcq_payload or [])
+        flashcards = flashcard_payload or []
+        if not mcqs:
+            mcqs = _fallback_mcqs(source_text, count=initial_count)
+        if not flashcards:
+            flashcards = _fallback_flashcards(source_text, count=initial_count)
+        if not summary_text:
+            summary_text = _fallback_summary(source_text)
 
-        results = {}
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            futures = {
-                executor.submit(generate_items_from_source, source_text, instruction, initial_count): key
-                for key, instruction in instructions.items()
-            }
-            futures[executor.submit(generate_summary_from_source, source_text)] = "summary"
-            for future in as_completed(futures):
-                key = futures[future]
-                try:
-                    results[key] = future.result()
-                except RuntimeError:
-                    if key == "summary":
-                        results[key] = _fallback_summary(source_text)
-                    elif key == "mcqs":
-                        results[key] = _fallback_mcqs(source_text, count=initial_count)
-                    elif key == "flashcards":
-                        results[key] = _fallback_flashcards(source_text, count=initial_count)
-                    else:
-                        raise
-
-        mcqs = _normalize_mcq_items(results["mcqs"])
-        flashcards = results["flashcards"]
-        summary = results.get("summary", "")
         mcq_set_id = store_mcq_session(mcqs)
-        update_mcq_session(mcq_set_id, items=mcqs, flashcards=flashcards, source_text=source_text)
-        response_payload = {
+        return {
             "mcqs": mcqs,
             "flashcards": flashcards,
-            "summary": summary,
+            "summary": summary_text,
             "mcqSetId": mcq_set_id,
         }
-        _set_cached_generation_payload("study_set", source_text, response_payload, count=initial_count, difficulty=difficulty)
-        return response_payload
+    except Exception:
+        # Fallback to independent generation when the shared RAG engine returns unusable output.
+        pass
+
+    results = await asyncio.to_thread(_generate_study_set_parts, source_text, difficulty, initial_count)
+
+    mcqs = _normalize_mcq_items(results["mcqs"])
+    mcq_set_id = store_mcq_session(mcqs)
+    return {
+        "mcqs": mcqs,
+        "flashcards": results["flashcards"],
+        "summary": results.get("summary", ""),
+        "mcqSetId": mcq_set_id,
+    }
+
+
+@router.post("/api/generate/study-set")
+async def generate_study_set(request: Request):
+    try:
+        initial_count = 10
+        source_text, source_meta = await get_source_text_from_request(request)
+        difficulty = str(source_meta.get("difficulty", "medium")).strip().lower() or "medium"
+
+        payload = await _get_or_generate(
+            "study_set",
+            source_text,
+            lambda: _compute_study_set(source_text, difficulty, initial_count),
+            count=initial_count,
+            difficulty=difficulty,
+        )
+        return _study_set_response(payload, source_text)
     except ValueError as exc:
         return JSONResponse(content={"error": str(exc)}, status_code=400)
     except RuntimeError as exc:
         try:
-            mcqs = _normalize_mcq_items(_fallback_mcqs(source_text, count=count))
+            mcqs = _normalize_mcq_items(_fallback_mcqs(source_text, count=initial_count))
             mcq_set_id = store_mcq_session(mcqs)
             update_mcq_session(mcq_set_id, items=mcqs, flashcards=[], source_text=source_text)
             return {"mcqs": mcqs, "mcqSetId": mcq_set_id, "fallback": True, "warning": str(exc)}
@@ -650,6 +805,14 @@ async def generate_study_set(request: Request):
         return JSONResponse(content={"error": f"Unexpected server error: {exc}"}, status_code=500)
 
 
+async def _compute_mcqs(source_text, count):
+    mcq_payload, _ = await asyncio.to_thread(generate_mcqs_from_rag, source_text)
+    mcqs = _normalize_mcq_items(mcq_payload or [])
+    if not mcqs:
+        mcqs = _fallback_mcqs(source_text, count=count)
+    return mcqs
+
+
 @router.post("/api/generate/mcqs")
 async def generate_mcqs(request: Request):
     try:
@@ -657,18 +820,8 @@ async def generate_mcqs(request: Request):
         source_text, source_meta = await get_source_text_from_request(request)
         difficulty = str(source_meta.get("difficulty", "medium")).strip().lower() or "medium"
 
-        cached_mcqs = _get_cached_generation_payload("mcqs", source_text, count=count, difficulty=difficulty)
-        if cached_mcqs is not None:
-            mcqs = _normalize_mcq_items(cached_mcqs)
-            mcq_set_id = store_mcq_session(mcqs)
-            update_mcq_session(mcq_set_id, items=mcqs, flashcards=[], source_text=source_text)
-            return {"mcqs": mcqs, "mcqSetId": mcq_set_id}
-
-        mcq_payload, _ = generate_mcqs_from_rag(source_text)
-        mcqs = _normalize_mcq_items(mcq_payload or [])
-        if not mcqs:
-            mcqs = _fallback_mcqs(source_text, count=count)
-        _set_cached_generation_payload("mcqs", source_text, mcqs, count=count, difficulty=difficulty)
+        mcqs = await _get_or_generate("mcqs", source_text, lambda: _compute_mcqs(source_text, count), count=count, difficulty=difficulty)
+        mcqs = _normalize_mcq_items(mcqs)
         mcq_set_id = store_mcq_session(mcqs)
         update_mcq_session(mcq_set_id, items=mcqs, flashcards=[], source_text=source_text)
         return {"mcqs": mcqs, "mcqSetId": mcq_set_id}
@@ -680,6 +833,11 @@ async def generate_mcqs(request: Request):
         return JSONResponse(content={"error": f"Unexpected server error: {exc}"}, status_code=500)
 
 
+async def _compute_flashcards(source_text, count):
+    flashcard_payload, _ = await asyncio.to_thread(generate_flashcards_from_rag, source_text)
+    return flashcard_payload or _fallback_flashcards(source_text, count=count)
+
+
 @router.post("/api/generate/flashcards")
 async def generate_flashcards(request: Request):
     try:
@@ -687,15 +845,9 @@ async def generate_flashcards(request: Request):
         source_text, source_meta = await get_source_text_from_request(request)
         difficulty = str(source_meta.get("difficulty", "medium")).strip().lower() or "medium"
 
-        cached_flashcards = _get_cached_generation_payload("flashcards", source_text, count=count, difficulty=difficulty)
-        if cached_flashcards is not None:
-            return {"flashcards": cached_flashcards}
-
-        flashcard_payload, _ = generate_flashcards_from_rag(source_text)
-        flashcards = flashcard_payload or []
-        if not flashcards:
-            flashcards = _fallback_flashcards(source_text, count=count)
-        _set_cached_generation_payload("flashcards", source_text, flashcards, count=count, difficulty=difficulty)
+        flashcards = await _get_or_generate(
+            "flashcards", source_text, lambda: _compute_flashcards(source_text, count), count=count, difficulty=difficulty
+        )
         return {"flashcards": flashcards}
     except ValueError as exc:
         return JSONResponse(content={"error": str(exc)}, status_code=400)
@@ -705,6 +857,11 @@ async def generate_flashcards(request: Request):
         return JSONResponse(content={"error": f"Unexpected server error: {exc}"}, status_code=500)
 
 
+async def _compute_rag_items(generate_fn, source_text):
+    items, _ = await asyncio.to_thread(generate_fn, source_text)
+    return items or []
+
+
 @router.post("/api/generate/fill-blanks")
 async def generate_fill_blanks(request: Request):
     try:
@@ -712,14 +869,13 @@ async def generate_fill_blanks(request: Request):
         source_text, source_meta = await get_source_text_from_request(request)
         difficulty = str(source_meta.get("difficulty", "medium")).strip().lower() or "medium"
 
-        cached_items = _get_cached_generation_payload("fill_blanks", source_text, count=count, difficulty=difficulty)
-        if cached_items is not None:
-            return {"fillBlanks": cached_items}
-
-        items, _ = generate_fill_blanks_from_rag(source_text)
-        if not items:
-            items = []
-        _set_cached_generation_payload("fill_blanks", source_text, items, count=count, difficulty=difficulty)
+        items = await _get_or_generate(
+            "fill_blanks",
+            source_text,
+            lambda: _compute_rag_items(generate_fill_blanks_from_rag, source_text),
+            count=count,
+            difficulty=difficulty,
+        )
         return {"fillBlanks": items}
     except ValueError as exc:
         return JSONResponse(content={"error": str(exc)}, status_code=400)
@@ -736,14 +892,13 @@ async def generate_true_false(request: Request):
         source_text, source_meta = await get_source_text_from_request(request)
         difficulty = str(source_meta.get("difficulty", "medium")).strip().lower() or "medium"
 
-        cached_items = _get_cached_generation_payload("true_false", source_text, count=count, difficulty=difficulty)
-        if cached_items is not None:
-            return {"trueFalse": cached_items}
-
-        items, _ = generate_true_false_from_rag(source_text)
-        if not items:
-            items = []
-        _set_cached_generation_payload("true_false", source_text, items, count=count, difficulty=difficulty)
+        items = await _get_or_generate(
+            "true_false",
+            source_text,
+            lambda: _compute_rag_items(generate_true_false_from_rag, source_text),
+            count=count,
+            difficulty=difficulty,
+        )
         return {"trueFalse": items}
     except ValueError as exc:
         return JSONResponse(content={"error": str(exc)}, status_code=400)
@@ -753,20 +908,18 @@ async def generate_true_false(request: Request):
         return JSONResponse(content={"error": f"Unexpected server error: {exc}"}, status_code=500)
 
 
+async def _compute_summary(source_text):
+    summary_payload, _ = await asyncio.to_thread(generate_summary_from_rag, source_text)
+    summary = str(summary_payload.get("summary", "") if isinstance(summary_payload, dict) else summary_payload).strip()
+    return summary or _fallback_summary(source_text)
+
+
 @router.post("/api/generate/summary")
 async def generate_summary(request: Request):
     try:
         source_text, _source_meta = await get_source_text_from_request(request)
 
-        cached_summary = _get_cached_generation_payload("summary", source_text)
-        if cached_summary is not None:
-            return {"summary": cached_summary}
-
-        summary_payload, _ = generate_summary_from_rag(source_text)
-        summary = str(summary_payload.get("summary", "") if isinstance(summary_payload, dict) else summary_payload).strip()
-        if not summary:
-            summary = _fallback_summary(source_text)
-        _set_cached_generation_payload("summary", source_text, summary)
+        summary = await _get_or_generate("summary", source_text, lambda: _compute_summary(source_text))
         return {"summary": summary}
     except ValueError as exc:
         return JSONResponse(content={"error": str(exc)}, status_code=400)
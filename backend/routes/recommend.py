@@ -4,6 +4,7 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from fastapi import APIRouter, Body, Request
 from fastapi.responses import JSONResponse
 
+from services.llm.response_cache import llm_cache_feature
 from services.mcq_session import get_mcq_session
 from utils.mcq_utils import is_correct_option, resolve_correct_index, resolve_selected_index
 
@@ -103,7 +104,8 @@ def _generate_topic_recommendation(topic_context, topic):
             "- Keep each bullet short but specific.\n"
             'Return only a strict JSON array of strings (each string is one bullet).'
         )
-        items = generate_items_from_source(focused_source, instruction, expected_count=10)
+        with llm_cache_feature("topic_recommendation"):
+            items = generate_items_from_source(focused_source, instruction, expected_count=10)
         bullets = []
         for item in items:
             if isinstance(item, str):
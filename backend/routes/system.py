@@ -1,7 +1,19 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 
+from services.extracted_text_cache import get_extracted_text_cache_stats
+from services.generation_cache import get_generation_cache_stats, get_generation_singleflight_stats
 from services.llm.factory import create_provider, get_active_provider_name, get_fallback_provider_name
+from services.llm.http_pool import get_pool_stats
+from services.llm.response_cache import get_response_cache_stats
+from services.rag.cache import get_cache_stats as get_retrieval_cache_stats
+from services.rag.chunk_store import get_chunk_store_stats
+from services.rag.embeddings import get_embedding_stats
+from services.rag.lexical_index import get_lexical_index_stats
+from services.rag.reranker import get_reranker_stats
 from services.rag.vectordb import health_check as get_rag_health
+from services.startup import get_readiness
+from services.upload_registry import get_upload_registry_stats
 
 router = APIRouter()
 
@@ -16,6 +28,8 @@ def get_providers_status():
         "fallback_provider": get_fallback_provider_name(),
         "available_providers": ["gemini", "ollama", "openai", "groq"],
         "status": status,
+        "connection_pools": get_pool_stats(),
+        "response_cache": get_response_cache_stats(),
     }
 
 
@@ -24,4 +38,19 @@ def get_rag_status():
     status = get_rag_health()
     return {
         "status": status,
+        "embeddings": get_embedding_stats(),
+        "chunk_store": get_chunk_store_stats(),
+        "lexical_index": get_lexical_index_stats(),
+        "reranker": get_reranker_stats(),
+        "retrieval_cache": get_retrieval_cache_stats(),
+        "generation_cache": get_generation_cache_stats(),
+        "generation_singleflight": get_generation_singleflight_stats(),
+        "extracted_text_cache": get_extracted_text_cache_stats(),
+        "uploads": get_upload_registry_stats(),
     }
+
+
+@router.get("/api/system/readiness")
+def get_readiness_status():
+    readiness = get_readiness()
+    return JSONResponse(content=readiness, status_code=200 if readiness["ready"] else 503)
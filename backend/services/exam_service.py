@@ -2,6 +2,7 @@ import json
 import re
 
 from services.gemini_service import GEMINI_MAX_TOKENS, call_gemini, extract_gemini_text
+from services.llm.response_cache import llm_cache_accept, llm_cache_feature
 from utils.mcq_utils import (
     _aggressive_quote_repair,
     _repair_json_text,
@@ -11,8 +12,73 @@ from utils.mcq_utils import (
 GEMINI_EXAM_MAX_TOKENS = max(GEMINI_MAX_TOKENS, 3000)
 
 
+def _coerce_json_object(raw: str):
+    """
+    Gemini sometimes returns:
+    - Markdown fences
+    - JSON wrapped in a quoted string
+    - Slightly malformed JSON (smart quotes, stray commas, etc.)
+    Try progressively stronger repairs before giving up.
+    """
+    # Strip common fences/backticks
+    cleaned = re.sub(r"^```json|```$", "", raw, flags=re.MULTILINE).strip()
+
+    # Remove common invisible/bom chars that break json at early positions
+    cleaned = cleaned.lstrip("\ufeff\u200b\u200c\u200d")
+    # Drop other ASCII control chars (except whitespace that JSON allows between tokens)
+    cleaned = re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f]", " ", cleaned)
+
+    # Unwrap if the whole payload is a quoted JSON string
+    if cleaned.startswith('"') and cleaned.endswith('"'):
+        try:
+            decoded = json.loads(cleaned)
+            if isinstance(decoded, str):
+                cleaned = decoded.strip()
+        except Exception:
+            pass
+
+    # If stray text before/after JSON, clip to first '{' ... last '}'
+    if "{" in cleaned and "}" in cleaned:
+        start = cleaned.find("{")
+        end = cleaned.rfind("}")
+        cleaned = cleaned[start : end + 1]
+
+    # 1) Normal path (strict)
+    try:
+        return extract_json_object(cleaned)
+    except Exception:
+        pass
+
+    # 1b) Allow control chars inside strings
+    try:
+        parsed = json.loads(cleaned, strict=False)
+        if isinstance(parsed, dict):
+            return parsed
+    except Exception:
+        pass
+
+    # 2) Repair common JSON issues (smart quotes, trailing commas)
+    try:
+        repaired = _repair_json_text(cleaned)
+        parsed = json.loads(repaired, strict=False)
+        if isinstance(parsed, dict):
+            return parsed
+    except Exception:
+        pass
+
+    # 3) Aggressive repair (drop backslashes before quotes)
+    repaired_aggressive = _aggressive_quote_repair(cleaned)
+    return json.loads(repaired_aggressive, strict=False)
+
+
+def _has_exam_questions(body):
+    result = _coerce_json_object(extract_gemini_text(json.loads(body)).strip())
+    return isinstance(result, dict) and bool(result.get("questions"))
+
+
 def _call_gemini_exam(prompt, max_output_tokens=GEMINI_EXAM_MAX_TOKENS):
-    return call_gemini(prompt, max_output_tokens=max_output_tokens, response_mime_type="application/json")
+    with llm_cache_feature("mock_exam"), llm_cache_accept(_has_exam_questions):
+        return call_gemini(prompt, max_output_tokens=max_output_tokens, response_mime_type="application/json")
 
 
 def _sanitize_sections(sections):
@@ -95,64 +161,6 @@ Sections requested (use these names; adjust plannedQuestions so the sum is exact
         raise RuntimeError("Gemini returned empty mock exam response")
     text = text.strip()
 
-    def _coerce_json_object(raw: str):
-        """
-        Gemini sometimes returns:
-        - Markdown fences
-        - JSON wrapped in a quoted string
-        - Slightly malformed JSON (smart quotes, stray commas, etc.)
-        Try progressively stronger repairs before giving up.
-        """
-        # Strip common fences/backticks
-        cleaned = re.sub(r"^```json|```$", "", raw, flags=re.MULTILINE).strip()
-
-        # Remove common invisible/bom chars that break json at early positions
-        cleaned = cleaned.lstrip("\ufeff\u200b\u200c\u200d")
-        # Drop other ASCII control chars (except whitespace that JSON allows between tokens)
-        cleaned = re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f]", " ", cleaned)
-
-        # Unwrap if the whole payload is a quoted JSON string
-        if cleaned.startswith('"') and cleaned.endswith('"'):
-            try:
-                decoded = json.loads(cleaned)
-                if isinstance(decoded, str):
-                    cleaned = decoded.strip()
-            except Exception:
-                pass
-
-        # If stray text before/after JSON, clip to first '{' ... last '}'
-        if "{" in cleaned and "}" in cleaned:
-            start = cleaned.find("{")
-            end = cleaned.rfind("}")
-            cleaned = cleaned[start : end + 1]
-
-        # 1) Normal path (strict)
-        try:
-            return extract_json_object(cleaned)
-        except Exception:
-            pass
-
-        # 1b) Allow control chars inside strings
-        try:
-            parsed = json.loads(cleaned, strict=False)
-            if isinstance(parsed, dict):
-                return parsed
-        except Exception:
-            pass
-
-        # 2) Repair common JSON issues (smart quotes, trailing commas)
-        try:
-            repaired = _repair_json_text(cleaned)
-            parsed = json.loads(repaired, strict=False)
-            if isinstance(parsed, dict):
-                return parsed
-        except Exception:
-            pass
-
-        # 3) Aggressive repair (drop backslashes before quotes)
-        repaired_aggressive = _aggressive_quote_repair(cleaned)
-        return json.loads(repaired_aggressive, strict=False)
-
     try:
         result = _coerce_json_object(text)
     except Exception as exc:  # pragma: no cover
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+_TEMP_UPLOAD_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "temp_uploads"))
+EXTRACTED_TEXT_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTED_TEXT_CACHE_MAX_ENTRIES", "256"))
+EXTRACTED_TEXT_CACHE_MAX_CHARS = int(os.getenv("EXTRACTED_TEXT_CACHE_MAX_CHARS", str(64 * 1024 * 1024)))
+EXTRACTED_TEXT_CACHE_DISK = str(os.getenv("EXTRACTED_TEXT_CACHE_DISK", "false")).strip().lower() in {"1", "true", "yes"}
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_key(digest: str, filename: str) -> str:
+    """Identical bytes are extracted differently depending on the extension, so both form the key."""
+    extension = os.path.splitext(str(filename or ""))[1].lower()
+    return f"{digest}{extension}"
+
+
+class ExtractedTextCache:
+    """Text extracted from uploads, keyed by SHA-256 of the file bytes plus the extension.
+
+    Entries live in an in-process LRU bounded by ``max_entries`` and ``max_chars``. When
+    ``disk_dir`` is set they are also written there as JSON, so other workers and restarts
+    reuse them. File paths are mapped to their digest by ``(size, mtime)`` so unchanged
+    stored uploads are not re-hashed.
+    """
+
+    def __init__(self, max_entries: int = 256, max_chars: int = 64 * 1024 * 1024, disk_dir: Optional[str] = None):
+        self.max_entries = max(1, int(max_entries))
+        self.max_chars = max(1, int(max_chars))
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        self._chars = 0
+        self._path_digests: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _remember(self, key: str, value: Tuple[str, str]) -> None:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._chars -= len(previous[0])
+        self._entries[key] = value
+        self._chars += len(value[0])
+        while self._entries and (len(self._entries) > self.max_entries or self._chars > self.max_chars):
+            _, evicted = self._entries.popitem(last=False)
+            self._chars -= len(evicted[0])
+
+    def digest_for_path(self, path: str) -> str:
+        stat = os.stat(path)
+        with self._lock:
+            known = self._path_digests.get(path)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+        digest = hash_file(path)
+        with self._lock:
+            self._path_digests[path] = (stat.st_size, stat.st_mtime_ns, digest)
+        return digest
+
+    def get(self, key: str) -> Optional[Tuple[str, str]]:
+        """Return ``(text, source_type)`` for a key, or ``None``."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), "r", encoding="utf-8") as handle:
+                    stored = json.load(handle)
+                value = (str(stored["text"]), str(stored["source_type"]))
+            except (OSError, ValueError, KeyError, TypeError):
+                value = None
+            if value is not None:
+                with self._lock:
+                    self._remember(key, value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, text: str, source_type: str) -> None:
+        value = (str(text or ""), str(source_type or ""))
+        with self._lock:
+            self._remember(key, value)
+        if self.disk_dir:
+            temp_path = f"{self._disk_path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(temp_path, "w", encoding="utf-8") as handle:
+                    json.dump({"text": value[0], "source_type": value[1]}, handle, ensure_ascii=False)
+                os.replace(temp_path, self._disk_path(key))
+            except OSError as exc:
+                logger.warning("Failed to write extracted text cache entry %s: %s", key, exc)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            value = self._entries.pop(key, None)
+            if value is not None:
+                self._chars -= len(value[0])
+        if self.disk_dir:
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+
+    def invalidate_path(self, path: str, filename: Optional[str] = None, digest: Optional[str] = None) -> None:
+        """Forget a stored upload that is being deleted, along with its extracted text.
+
+        Pass ``digest`` when it is known: the file may already be gone, so it cannot be re-hashed.
+        """
+        with self._lock:
+            known = self._path_digests.pop(path, None)
+        if not digest and known is not None:
+            digest = known[2]
+        if not digest:
+            try:
+                digest = hash_file(path)
+            except OSError:
+                return
+        self.invalidate(make_key(digest, filename or os.path.basename(path)))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "chars": self._chars,
+                "max_entries": self.max_entries,
+                "max_chars": self.max_chars,
+                "disk": bool(self.disk_dir),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+extracted_text_cache = ExtractedTextCache(
+    max_entries=EXTRACTED_TEXT_CACHE_MAX_ENTRIES,
+    max_chars=EXTRACTED_TEXT_CACHE_MAX_CHARS,
+    disk_dir=os.path.join(_TEMP_UPLOAD_DIR, ".extracted_text") if EXTRACTED_TEXT_CACHE_DISK else None,
+)
+
+
+def get_extracted_text_cache_stats() -> Dict[str, Any]:
+    return extracted_text_cache.stats()
@@ -1,15 +1,16 @@
 import os
+import threading
 import time
 from datetime import datetime, timezone
 import json
 
-try:
-    import firebase_admin
-    from firebase_admin import credentials, firestore
-except ImportError:  # pragma: no cover
-    firebase_admin = None
-    credentials = None
-    firestore = None
+# firebase_admin pulls in the Google Cloud client stack, so it is imported on first use
+# (or by the startup warm-up) rather than when this module is imported.
+firebase_admin = None
+credentials = None
+firestore = None
+_FIREBASE_IMPORT_LOCK = threading.Lock()
+_FIREBASE_IMPORT_ATTEMPTED = False
 
 FIREBASE_PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID", "")
 FIREBASE_SERVICE_ACCOUNT_PATH = os.getenv("FIREBASE_SERVICE_ACCOUNT_PATH", "")
@@ -23,11 +24,27 @@ FIREBASE_DB = None
 FIREBASE_INIT_ERROR = ""
 
 
+def _import_firebase_admin():
+    global firebase_admin, credentials, firestore, _FIREBASE_IMPORT_ATTEMPTED
+    if _FIREBASE_IMPORT_ATTEMPTED:
+        return firebase_admin
+    with _FIREBASE_IMPORT_LOCK:
+        if not _FIREBASE_IMPORT_ATTEMPTED:
+            try:
+                import firebase_admin as firebase_admin_module
+                from firebase_admin import credentials as credentials_module, firestore as firestore_module
+            except ImportError:  # pragma: no cover
+                firebase_admin_module = credentials_module = firestore_module = None
+            firebase_admin, credentials, firestore = firebase_admin_module, credentials_module, firestore_module
+            _FIREBASE_IMPORT_ATTEMPTED = True
+    return firebase_admin
+
+
 def get_firestore_db():
     global FIREBASE_DB, FIREBASE_INIT_ERROR
     if FIREBASE_DB is not None:
         return FIREBASE_DB
-    if firebase_admin is None:
+    if _import_firebase_admin() is None:
         FIREBASE_INIT_ERROR = "firebase_admin is not installed"
         return None
 
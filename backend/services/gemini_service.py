@@ -2,11 +2,14 @@ import json
 import os
 import re
 import time
+from contextlib import nullcontext
 from urllib import error as urlerror
 from urllib import request as urlrequest
 
 from services.llm.factory import create_provider
+from services.llm.response_cache import bypass_llm_cache, llm_cache_accept, llm_cache_feature
 from utils.mcq_utils import extract_json_array, extract_json_object
+from utils.text import truncate_text
 
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
@@ -56,9 +59,21 @@ def _is_truncated_generation(data, text):
 
 
 def _trim_source_text(source_text):
-    if len(source_text) <= GEMINI_SOURCE_CHAR_LIMIT:
-        return source_text
-    return source_text[:GEMINI_SOURCE_CHAR_LIMIT]
+    return truncate_text(source_text, GEMINI_SOURCE_CHAR_LIMIT)
+
+
+def _is_complete_text(body):
+    data = json.loads(body)
+    text = extract_gemini_text(data).strip()
+    return bool(text) and not (_is_truncated_generation(data, text) or _looks_truncated(text))
+
+
+def _has_json_array(body):
+    return isinstance(extract_json_array(extract_gemini_text(json.loads(body))), list)
+
+
+def _has_json_object(body):
+    return isinstance(extract_json_object(extract_gemini_text(json.loads(body)).strip()), dict)
 
 
 def call_gemini(prompt, max_output_tokens=GEMINI_MAX_TOKENS, response_mime_type="application/json", api_key=None):
@@ -102,7 +117,9 @@ def generate_items_from_source(source_text, instruction, expected_count=10, api_
         else:
             max_tokens = max(GEMINI_MAX_TOKENS, 5000 if remaining > 10 else 1800)
 
-        body = call_gemini(prompt, max_output_tokens=max_tokens, response_mime_type="application/json", api_key=api_key)
+        # A retry repeats a prompt whose cached answer was unusable, so it must reach the model.
+        with bypass_llm_cache() if attempt_index else nullcontext(), llm_cache_accept(_has_json_array):
+            body = call_gemini(prompt, max_output_tokens=max_tokens, response_mime_type="application/json", api_key=api_key)
         data = json.loads(body)
         text = extract_gemini_text(data)
         if not text:
@@ -222,12 +239,13 @@ def generate_summary_from_source(source_text):
     ]
     text = ""
     for token_budget in token_budgets:
-        body = call_gemini(
-            prompt,
-            max_output_tokens=token_budget,
-            response_mime_type="text/plain",
-            api_key=key,
-        )
+        with llm_cache_feature("summary"), llm_cache_accept(_is_complete_text):
+            body = call_gemini(
+                prompt,
+                max_output_tokens=token_budget,
+                response_mime_type="text/plain",
+                api_key=key,
+            )
         data = json.loads(body)
         text = extract_gemini_text(data).strip()
         if text and not (_is_truncated_generation(data, text) or _looks_truncated(text)):
@@ -269,11 +287,12 @@ def generate_study_set_from_source(source_text, expected_count=10, difficulty="m
     result = None
     last_parse_error = None
     for token_budget in token_budgets:
-        body = call_gemini(
-            prompt,
-            max_output_tokens=token_budget,
-            response_mime_type="application/json",
-        )
+        with llm_cache_feature("study_set"), llm_cache_accept(_has_json_object):
+            body = call_gemini(
+                prompt,
+                max_output_tokens=token_budget,
+                response_mime_type="application/json",
+            )
         data = json.loads(body)
         text = extract_gemini_text(data).strip()
         if not text:
@@ -323,7 +342,8 @@ def answer_question_from_source(source_text, question, api_key=None):
     if not key:
         raise RuntimeError("GEMINI_API_KEY is required for text assistant")
     for attempt in range(2):
-        body = call_gemini(prompt, max_output_tokens=max_tokens, response_mime_type="text/plain", api_key=key)
+        with llm_cache_feature("qa"), llm_cache_accept(_is_complete_text):
+            body = call_gemini(prompt, max_output_tokens=max_tokens, response_mime_type="text/plain", api_key=key)
         data = json.loads(body)
         text = extract_gemini_text(data).strip()
         if not text:
@@ -0,0 +1,190 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+_TEMP_UPLOAD_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "temp_uploads"))
+GENERATION_CACHE_PATH = os.getenv("GENERATION_CACHE_PATH", os.path.join(_TEMP_UPLOAD_DIR, "generation_cache.sqlite3"))
+GENERATION_CACHE_MAX_ENTRIES = int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", "5000"))
+GENERATION_CACHE_MAX_BYTES = int(os.getenv("GENERATION_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+GENERATION_CACHE_TTL_SECONDS = int(os.getenv("GENERATION_CACHE_TTL_SECONDS", str(7 * 86400)))
+LEGACY_GENERATION_CACHE_PATH = os.path.join(_TEMP_UPLOAD_DIR, "generation_cache.json")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS generation_cache (
+    key TEXT PRIMARY KEY,
+    feature TEXT NOT NULL DEFAULT '',
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_generation_cache_last_access ON generation_cache (last_access);
+CREATE INDEX IF NOT EXISTS idx_generation_cache_expires_at ON generation_cache (expires_at);
+"""
+
+
+class GenerationCacheStore:
+    """Keyed generation cache in SQLite (WAL mode), shared safely by all uvicorn workers.
+
+    Lookups and stores touch a single row by primary key. Expired rows and the least
+    recently used rows beyond ``max_entries``/``max_bytes`` are evicted every
+    ``evict_every`` stores.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_entries: int = 5000,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl_seconds: int = 7 * 86400,
+        evict_every: int = 32,
+    ):
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.ttl_seconds = int(ttl_seconds)
+        self.evict_every = max(1, int(evict_every))
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        connection = self._connect()
+        row = connection.execute("SELECT value, expires_at FROM generation_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if now >= expires_at:
+            connection.execute("DELETE FROM generation_cache WHERE key = ? AND expires_at <= ?", (key, now))
+            return None
+        connection.execute("UPDATE generation_cache SET last_access = ? WHERE key = ?", (now, key))
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+
+    def set(self, key: str, value: Any, feature: str = "", ttl_seconds: Optional[int] = None) -> None:
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else int(ttl_seconds)
+        encoded = json.dumps(value, ensure_ascii=False)
+        self._connect().execute(
+            "INSERT OR REPLACE INTO generation_cache (key, feature, value, size, created_at, expires_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, feature, encoded, len(encoded.encode("utf-8")), now, now + ttl, now),
+        )
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes % self.evict_every == 0
+        if due:
+            self.evict()
+
+    def delete(self, key: str) -> None:
+        self._connect().execute("DELETE FROM generation_cache WHERE key = ?", (key,))
+
+    def evict(self) -> int:
+        """Drop expired rows, then the least recently used rows until both limits hold."""
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            removed = connection.execute("DELETE FROM generation_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+            count, total = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM generation_cache").fetchone()
+            if count > self.max_entries or total > self.max_bytes:
+                rows = connection.execute("SELECT key, size FROM generation_cache ORDER BY last_access ASC").fetchall()
+                stale = []
+                for key, size in rows:
+                    if count <= self.max_entries and total <= self.max_bytes:
+                        break
+                    stale.append((key,))
+                    count -= 1
+                    total -= size
+                connection.executemany("DELETE FROM generation_cache WHERE key = ?", stale)
+                removed += len(stale)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return removed
+
+    def import_json_file(self, json_path: str) -> int:
+        """Load entries from the legacy ``generation_cache.json`` file and rename it out of the way."""
+        try:
+            with open(json_path, "r", encoding="utf-8") as handle:
+                legacy = json.load(handle) or {}
+        except (OSError, ValueError):
+            return 0
+        for key, value in legacy.items():
+            if self.get(key) is None:
+                self.set(key, value)
+        try:
+            os.replace(json_path, f"{json_path}.migrated")
+        except OSError:
+            pass
+        return len(legacy)
+
+    def stats(self) -> Dict[str, Any]:
+        count, total = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM generation_cache").fetchone()
+        return {
+            "entries": count,
+            "size_bytes": total,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+# Concurrent identical generations in this process share one computation per cache key.
+generation_flights = SingleFlight()
+_store: Optional[GenerationCacheStore] = None
+_store_lock = threading.Lock()
+
+
+def get_generation_store() -> GenerationCacheStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = GenerationCacheStore(
+                GENERATION_CACHE_PATH,
+                max_entries=GENERATION_CACHE_MAX_ENTRIES,
+                max_bytes=GENERATION_CACHE_MAX_BYTES,
+                ttl_seconds=GENERATION_CACHE_TTL_SECONDS,
+            )
+            if os.path.exists(LEGACY_GENERATION_CACHE_PATH):
+                imported = _store.import_json_file(LEGACY_GENERATION_CACHE_PATH)
+                logger.info("Imported %s entries from %s", imported, LEGACY_GENERATION_CACHE_PATH)
+        return _store
+
+
+def get_generation_cache_stats() -> Dict[str, Any]:
+    try:
+        return get_generation_store().stats()
+    except sqlite3.Error as exc:
+        return {"error": str(exc)}
+
+
+def get_generation_singleflight_stats() -> Dict[str, Any]:
+    return generation_flights.stats()
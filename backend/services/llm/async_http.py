@@ -0,0 +1,38 @@
+import asyncio
+import threading
+import weakref
+from typing import Dict
+
+import httpx
+
+from services.llm.config import get_pool_idle_timeout_seconds, get_pool_max_per_host, get_pool_size
+
+# httpx.AsyncClient connections belong to the event loop that opened them, so clients are kept per loop.
+_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = weakref.WeakKeyDictionary()
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_async_client(provider_name: str) -> httpx.AsyncClient:
+    """Return the shared non-blocking HTTP client for a provider on the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _CLIENTS_LOCK:
+        clients = _CLIENTS.setdefault(loop, {})
+        client = clients.get(provider_name)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=get_pool_max_per_host(provider_name),
+                    max_keepalive_connections=get_pool_size(provider_name),
+                    keepalive_expiry=get_pool_idle_timeout_seconds(provider_name),
+                )
+            )
+            clients[provider_name] = client
+        return client
+
+
+async def aclose_async_clients() -> None:
+    loop = asyncio.get_running_loop()
+    with _CLIENTS_LOCK:
+        clients = _CLIENTS.pop(loop, {})
+    for client in clients.values():
+        await client.aclose()
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, Optional
 
 
 class BaseLLMProvider(ABC):
@@ -26,5 +27,21 @@ class BaseLLMProvider(ABC):
     def get_model_name(self) -> str:
         raise NotImplementedError
 
+    async def agenerate(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> str:
+        """Async ``generate``; providers without a native client run the blocking call in a worker thread."""
+        return await asyncio.to_thread(self.generate, prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type)
+
+    async def astream_generate(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> AsyncIterator[str]:
+        iterator = iter(self.stream_generate(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type))
+        sentinel = object()
+        while True:
+            chunk = await asyncio.to_thread(next, iterator, sentinel)
+            if chunk is sentinel:
+                break
+            yield chunk
+
+    async def ahealth_check(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.health_check)
+
     def format_prompt(self, prompt: str, response_mime_type: str = "application/json") -> str:
         return str(prompt or "").strip()
@@ -6,6 +6,7 @@ from typing import Dict, List
 
 from services.llm.factory import create_provider, get_supported_providers
 from services.llm.config import get_env_provider, get_active_provider_name
+from services.llm.response_cache import bypass_llm_cache
 
 SAMPLE_PROMPTS = {
     "qa": "Explain the concept of photosynthesis in simple terms.",
@@ -19,7 +20,8 @@ def measure_provider(provider_name: str, model: str, prompt: str, iterations: in
     results: List[Dict[str, object]] = []
     for index in range(iterations):
         start = time.perf_counter()
-        output = provider.generate(prompt, max_output_tokens=200, response_mime_type="text/plain")
+        with bypass_llm_cache():
+            output = provider.generate(prompt, max_output_tokens=200, response_mime_type="text/plain")
         elapsed_ms = (time.perf_counter() - start) * 1000
         prompt_size = len(prompt.encode("utf-8"))
         completion_size = len(str(output or "").encode("utf-8"))
@@ -3,6 +3,10 @@ from typing import List, Optional
 
 SUPPORTED_PROVIDERS = ["gemini", "ollama", "openai", "groq"]
 
+# Prompt context budgets, in estimated tokens, for features not configured by environment.
+CONTEXT_TOKEN_DEFAULTS = {"qa": 1500, "summary": 3000}
+DEFAULT_CONTEXT_TOKENS = 2500
+
 PROVIDER_ALIASES = {
     "gemini": "gemini",
     "google": "gemini",
@@ -83,6 +87,23 @@ def get_max_output_tokens(provider_name: str) -> int:
     return int(os.getenv(f"{provider_key}_MAX_TOKENS", os.getenv("LLM_MAX_TOKENS", "800")) or 800)
 
 
+def get_context_token_budget(provider_name: str, feature: str) -> int:
+    """Context budget for ``feature``; the most specific of ``{PROVIDER}_CONTEXT_TOKENS_{FEATURE}``,
+    ``{PROVIDER}_CONTEXT_TOKENS``, ``LLM_CONTEXT_TOKENS_{FEATURE}`` and ``LLM_CONTEXT_TOKENS`` wins."""
+    provider_key = normalize_provider(provider_name).upper()
+    feature_key = str(feature or "").strip().upper()
+    for name in (
+        f"{provider_key}_CONTEXT_TOKENS_{feature_key}",
+        f"{provider_key}_CONTEXT_TOKENS",
+        f"LLM_CONTEXT_TOKENS_{feature_key}",
+        "LLM_CONTEXT_TOKENS",
+    ):
+        value = os.getenv(name, "")
+        if value.strip():
+            return int(value)
+    return CONTEXT_TOKEN_DEFAULTS.get(str(feature or "").strip().lower(), DEFAULT_CONTEXT_TOKENS)
+
+
 def get_base_url(provider_name: str) -> str:
     provider_key = normalize_provider(provider_name).upper()
     return str(os.getenv(f"{provider_key}_BASE_URL", os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"))).rstrip("/")
@@ -90,3 +111,18 @@ def get_base_url(provider_name: str) -> str:
 
 def get_supported_providers() -> List[str]:
     return list(SUPPORTED_PROVIDERS)
+
+
+def get_pool_size(provider_name: str) -> int:
+    provider_key = normalize_provider(provider_name).upper()
+    return int(os.getenv(f"{provider_key}_POOL_SIZE", os.getenv("LLM_POOL_SIZE", "10")) or 10)
+
+
+def get_pool_max_per_host(provider_name: str) -> int:
+    provider_key = normalize_provider(provider_name).upper()
+    return int(os.getenv(f"{provider_key}_POOL_MAX_PER_HOST", os.getenv("LLM_POOL_MAX_PER_HOST", "20")) or 20)
+
+
+def get_pool_idle_timeout_seconds(provider_name: str) -> float:
+    provider_key = normalize_provider(provider_name).upper()
+    return float(os.getenv(f"{provider_key}_POOL_IDLE_TIMEOUT_SECONDS", os.getenv("LLM_POOL_IDLE_TIMEOUT_SECONDS", "60")) or 60)
@@ -1,5 +1,6 @@
+import asyncio
 import logging
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 from services.llm.base import BaseLLMProvider
 from services.llm.config import (
@@ -14,6 +15,7 @@ from services.llm.groq_provider import GroqProvider
 from services.llm.ollama_provider import OllamaProvider
 from services.llm.openai_provider import OpenAIProvider
 from services.llm.provider import ProviderError
+from services.llm.response_cache import CachingProvider, is_cache_enabled, note_fallback_response
 
 
 _PROVIDER_CACHE: dict = {}
@@ -50,17 +52,41 @@ class LLMProviderManager(BaseLLMProvider):
             if not self.fallback:
                 raise
             try:
-                return self.fallback.generate(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type)
+                response = self.fallback.generate(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type)
             except Exception as fallback_exc:
-                raise ProviderError(
-                    f"Both primary ({self.primary.name}) and fallback ({self.fallback.name}) providers failed.",
-                    provider=self.primary.name,
-                    status_code=getattr(fallback_exc, "status_code", None),
-                    details={
-                        "primary_error": str(primary_exc),
-                        "fallback_error": str(fallback_exc),
-                    },
-                ) from fallback_exc
+                raise self._both_failed_error(primary_exc, fallback_exc) from fallback_exc
+            note_fallback_response()
+            return response
+
+    async def agenerate(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> str:
+        try:
+            return await self.primary.agenerate(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type)
+        except Exception as primary_exc:
+            _logger.warning(
+                "Primary provider failed: provider=%s model=%s error=%s",
+                self.primary.name,
+                self.primary.get_model_name(),
+                str(primary_exc),
+            )
+            if not self.fallback:
+                raise
+            try:
+                response = await self.fallback.agenerate(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type)
+            except Exception as fallback_exc:
+                raise self._both_failed_error(primary_exc, fallback_exc) from fallback_exc
+            note_fallback_response()
+            return response
+
+    def _both_failed_error(self, primary_exc: Exception, fallback_exc: Exception) -> ProviderError:
+        return ProviderError(
+            f"Both primary ({self.primary.name}) and fallback ({self.fallback.name}) providers failed.",
+            provider=self.primary.name,
+            status_code=getattr(fallback_exc, "status_code", None),
+            details={
+                "primary_error": str(primary_exc),
+                "fallback_error": str(fallback_exc),
+            },
+        )
 
     def stream_generate(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> any:
         started = False
@@ -79,9 +105,37 @@ class LLMProviderManager(BaseLLMProvider):
             )
             yield from self.fallback.stream_generate(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type)
 
+    async def astream_generate(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> AsyncIterator[str]:
+        started = False
+        try:
+            async for chunk in self.primary.astream_generate(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type):
+                started = True
+                yield chunk
+            return
+        except Exception as primary_exc:
+            if started or not self.fallback:
+                raise
+            _logger.warning(
+                "Primary provider streaming failed before output; falling back to %s: %s",
+                self.fallback.name,
+                str(primary_exc),
+            )
+        async for chunk in self.fallback.astream_generate(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type):
+            yield chunk
+
     def health_check(self) -> dict:
         primary_status = self.primary.health_check()
         fallback_status = self.fallback.health_check() if self.fallback else None
+        return self._combined_status(primary_status, fallback_status)
+
+    async def ahealth_check(self) -> dict:
+        if self.fallback:
+            primary_status, fallback_status = await asyncio.gather(self.primary.ahealth_check(), self.fallback.ahealth_check())
+        else:
+            primary_status, fallback_status = await self.primary.ahealth_check(), None
+        return self._combined_status(primary_status, fallback_status)
+
+    def _combined_status(self, primary_status: dict, fallback_status: Optional[dict]) -> dict:
         ok = bool(primary_status.get("ok")) or bool(fallback_status and fallback_status.get("ok"))
         return {
             "ok": ok,
@@ -112,7 +166,8 @@ def create_provider(provider_name: Optional[str] = None, model: Optional[str] =
     selected_provider = normalize_provider(provider_name or get_active_provider_name())
     selected_model = model or get_model_for_provider(selected_provider)
     fallback_name = get_fallback_provider_name()
-    cache_key = (selected_provider, selected_model, fallback_name)
+    use_response_cache = is_cache_enabled()
+    cache_key = (selected_provider, selected_model, fallback_name, use_response_cache)
 
     if provider_name is None and model is None and cache_key in _PROVIDER_CACHE:
         return _PROVIDER_CACHE[cache_key]
@@ -123,6 +178,8 @@ def create_provider(provider_name: Optional[str] = None, model: Optional[str] =
         fallback = _instantiate_provider(fallback_name)
 
     provider = LLMProviderManager(primary, fallback) if fallback else primary
+    if use_response_cache:
+        provider = CachingProvider(provider)
 
     if provider_name is None and model is None:
         _PROVIDER_CACHE[cache_key] = provider
@@ -139,7 +196,7 @@ def verify_provider_startup() -> list[str]:
     try:
         status = provider.health_check()
         if not status.get("ok"):
-            if isinstance(provider, LLMProviderManager):
+            if isinstance(getattr(provider, "inner", provider), LLMProviderManager):
                 primary = status.get("primary", {})
                 fallback = status.get("fallback", {})
                 if not primary.get("ok"):
@@ -1,12 +1,16 @@
+import asyncio
 import json
 import os
 import re
 import time
 from typing import Any, Dict, Optional
-from urllib import error as urlerror
-from urllib import request as urlrequest
 
+import httpx
+
+from services.llm import http_pool
+from services.llm.async_http import get_async_client
 from services.llm.base import BaseLLMProvider
+from services.llm.config import get_temperature
 from services.llm.provider import LLMProviderMixin, ProviderError
 
 
@@ -18,66 +22,111 @@ class GeminiProvider(BaseLLMProvider, LLMProviderMixin):
         self.api_key = str(os.getenv("GEMINI_API_KEY", "") or "").strip()
         self.max_retries = int(os.getenv("GEMINI_MAX_RETRIES", "1"))
         self.timeout_seconds = int(os.getenv("GEMINI_TIMEOUT_SECONDS", "90"))
+        self.temperature = get_temperature("gemini")
 
-    def _request(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> str:
-        if not self.api_key:
-            raise self._build_error("GEMINI_API_KEY is missing in backend environment", status_code=500)
+    def _endpoint(self, api_key: str) -> str:
+        return f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent?key={api_key}"
 
-        endpoint = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent?key={self.api_key}"
-        payload = {
+    def _payload(self, prompt: str, *, max_output_tokens: int, response_mime_type: str) -> Dict[str, Any]:
+        return {
             "contents": [{"parts": [{"text": prompt}]}],
             "generationConfig": {
-                "temperature": 0.3,
+                "temperature": self.temperature,
                 "maxOutputTokens": max_output_tokens,
                 "responseMimeType": response_mime_type,
             },
         }
-        payload_bytes = json.dumps(payload).encode("utf-8")
+
+    def _retry_delay(self, status_code: int, error_body: str, attempt: int, state: Dict[str, Any]) -> float:
+        """Return the seconds to wait before the next attempt, or raise the error for this response."""
+        last_error = f"Gemini HTTP {status_code}: {error_body}"
+        if status_code == 429 and re.search(r"quota", error_body, flags=re.IGNORECASE):
+            global_key = str(os.getenv("GEMINI_API_KEY", "") or "").strip()
+            if global_key and global_key != state["key"] and not state["tried_global_fallback"]:
+                state["tried_global_fallback"] = True
+                state["key"] = global_key
+                return 0.0
+            raise self._build_error("Gemini quota exceeded on provided key. Wait for quota reset or use a paid key.", status_code=429, details={"raw_error": last_error})
+        if status_code == 429 and attempt < self.max_retries:
+            retry_after = 1.5
+            retry_match = re.search(r"retry in ([0-9.]+)s", error_body, flags=re.IGNORECASE)
+            if retry_match:
+                retry_after = float(retry_match.group(1))
+            return max(1.0, retry_after)
+        raise self._build_error(last_error, status_code=status_code, details={"raw_error": last_error})
+
+    def _request(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> str:
+        if not self.api_key:
+            raise self._build_error("GEMINI_API_KEY is missing in backend environment", status_code=500)
+
+        payload_bytes = json.dumps(self._payload(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type)).encode("utf-8")
 
         last_error = None
-        tried_global_fallback = False
-        current_key = self.api_key
-        current_endpoint = endpoint
+        state = {"key": self.api_key, "tried_global_fallback": False}
         for attempt in range(self.max_retries + 1):
-            req = urlrequest.Request(current_endpoint, data=payload_bytes, headers={"Content-Type": "application/json"}, method="POST")
             try:
                 started = time.perf_counter()
-                with urlrequest.urlopen(req, timeout=self.timeout_seconds) as response:
-                    body = response.read().decode("utf-8")
-                    self._log("provider=%s model=%s status=ok latency_ms=%.0f", self.name, self.model, (time.perf_counter() - started) * 1000)
-                    return body
-            except urlerror.HTTPError as exc:
-                error_body = exc.read().decode("utf-8", errors="ignore")
+                response = http_pool.request(
+                    self.name,
+                    "POST",
+                    self._endpoint(state["key"]),
+                    body=payload_bytes,
+                    headers={"Content-Type": "application/json"},
+                    timeout=self.timeout_seconds,
+                )
+                body = response.raise_for_status().text()
+                self._log("provider=%s model=%s status=ok latency_ms=%.0f", self.name, self.model, (time.perf_counter() - started) * 1000)
+                return body
+            except http_pool.HTTPStatusError as exc:
+                error_body = exc.body_text()
                 last_error = f"Gemini HTTP {exc.code}: {error_body}"
-                if exc.code == 429 and re.search(r"quota", error_body, flags=re.IGNORECASE):
-                    global_key = str(os.getenv("GEMINI_API_KEY", "") or "").strip()
-                    if global_key and global_key != current_key and not tried_global_fallback:
-                        tried_global_fallback = True
-                        current_key = global_key
-                        current_endpoint = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent?key={current_key}"
-                        continue
-                    raise self._build_error("Gemini quota exceeded on provided key. Wait for quota reset or use a paid key.", status_code=429, details={"raw_error": last_error}) from exc
-                if exc.code == 429 and attempt < self.max_retries:
-                    retry_after = 1.5
-                    retry_match = re.search(r"retry in ([0-9.]+)s", error_body, flags=re.IGNORECASE)
-                    if retry_match:
-                        retry_after = float(retry_match.group(1))
-                    time.sleep(max(1.0, retry_after))
-                    continue
-                raise self._build_error(last_error, status_code=exc.code, details={"raw_error": last_error}) from exc
+                delay = self._retry_delay(exc.code, error_body, attempt, state)
+                if delay:
+                    time.sleep(delay)
+                continue
             except Exception as exc:
                 raise self._build_error(str(exc), status_code=500, details={"raw_error": str(exc)}) from exc
 
         raise self._build_error(last_error or "Gemini request failed", status_code=500, details={"raw_error": last_error or "Gemini request failed"})
 
+    async def _arequest(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> str:
+        if not self.api_key:
+            raise self._build_error("GEMINI_API_KEY is missing in backend environment", status_code=500)
+
+        payload = self._payload(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type)
+
+        last_error = None
+        state = {"key": self.api_key, "tried_global_fallback": False}
+        for attempt in range(self.max_retries + 1):
+            try:
+                started = time.perf_counter()
+                response = await get_async_client(self.name).post(self._endpoint(state["key"]), json=payload, timeout=self.timeout_seconds)
+            except httpx.HTTPError as exc:
+                raise self._build_error(str(exc), status_code=500, details={"raw_error": str(exc)}) from exc
+            if response.status_code < 400:
+                self._log("provider=%s model=%s status=ok latency_ms=%.0f", self.name, self.model, (time.perf_counter() - started) * 1000)
+                return response.text
+            last_error = f"Gemini HTTP {response.status_code}: {response.text}"
+            delay = self._retry_delay(response.status_code, response.text, attempt, state)
+            if delay:
+                await asyncio.sleep(delay)
+
+        raise self._build_error(last_error or "Gemini request failed", status_code=500, details={"raw_error": last_error or "Gemini request failed"})
+
     def generate(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> str:
         return self._request(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type)
 
+    async def agenerate(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> str:
+        return await self._arequest(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type)
+
     def stream_generate(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> Any:
         raise NotImplementedError("Streaming is not implemented for Gemini provider")
 
     def health_check(self) -> Dict[str, Any]:
         return {"ok": bool(self.api_key), "provider": self.name, "model": self.model}
 
+    async def ahealth_check(self) -> Dict[str, Any]:
+        return self.health_check()
+
     def get_model_name(self) -> str:
         return self.model
@@ -1,8 +1,15 @@
+import json
 import os
 import time
+from http.client import HTTPException
 from typing import Any, Dict, Optional
 
+import httpx
+
+from services.llm import http_pool
+from services.llm.async_http import get_async_client
 from services.llm.base import BaseLLMProvider
+from services.llm.config import get_timeout_seconds
 from services.llm.provider import LLMProviderMixin
 
 
@@ -12,24 +19,62 @@ class GroqProvider(BaseLLMProvider, LLMProviderMixin):
     def __init__(self, model: Optional[str] = None):
         super().__init__(model or os.getenv("LLM_MODEL", "llama-3.1-8b-instant"))
         self.api_key = str(os.getenv("GROQ_API_KEY", "") or "").strip()
+        self.base_url = str(os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")).rstrip("/")
+        self.timeout_seconds = get_timeout_seconds("groq")
+
+    def _payload(self, prompt: str, *, max_output_tokens: int) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_output_tokens,
+        }
+
+    def _extract_text(self, data: Dict[str, Any]) -> str:
+        choices = data.get("choices") or [{}]
+        return str((choices[0].get("message") or {}).get("content") or "")
 
     def generate(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> str:
         if not self.api_key:
             raise self._build_error("GROQ_API_KEY is missing in backend environment", status_code=500)
 
+        payload = self._payload(prompt, max_output_tokens=max_output_tokens)
+        started = time.perf_counter()
         try:
-            from groq import Groq
-        except ImportError as exc:
-            raise self._build_error("groq package is not installed", status_code=500, details={"raw_error": str(exc)}) from exc
+            response = http_pool.post_json(
+                self.name,
+                f"{self.base_url}/chat/completions",
+                payload,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.timeout_seconds,
+            )
+            data = response.raise_for_status().json()
+        except http_pool.HTTPStatusError as exc:
+            raise self._build_error(f"Groq HTTP {exc.code}: {exc.body_text()}", status_code=exc.code, details={"raw_error": exc.body_text()}) from exc
+        except (OSError, HTTPException, json.JSONDecodeError) as exc:
+            raise self._build_error(str(exc), status_code=503, details={"raw_error": str(exc)}) from exc
+        text = self._extract_text(data)
+        self._log("provider=%s model=%s status=ok latency_ms=%.0f", self.name, self.model, (time.perf_counter() - started) * 1000)
+        return str(text)
+
+    async def agenerate(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> str:
+        if not self.api_key:
+            raise self._build_error("GROQ_API_KEY is missing in backend environment", status_code=500)
 
-        client = Groq(api_key=self.api_key)
         started = time.perf_counter()
-        response = client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=max_output_tokens,
-        )
-        text = response.choices[0].message.content or ""
+        try:
+            response = await get_async_client(self.name).post(
+                f"{self.base_url}/chat/completions",
+                json=self._payload(prompt, max_output_tokens=max_output_tokens),
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.timeout_seconds,
+            )
+            response.raise_for_status()
+            data = response.json()
+        except httpx.HTTPStatusError as exc:
+            raise self._build_error(f"Groq HTTP {exc.response.status_code}: {exc.response.text}", status_code=exc.response.status_code, details={"raw_error": exc.response.text}) from exc
+        except (httpx.HTTPError, json.JSONDecodeError) as exc:
+            raise self._build_error(str(exc), status_code=503, details={"raw_error": str(exc)}) from exc
+        text = self._extract_text(data)
         self._log("provider=%s model=%s status=ok latency_ms=%.0f", self.name, self.model, (time.perf_counter() - started) * 1000)
         return str(text)
 
@@ -39,5 +84,8 @@ class GroqProvider(BaseLLMProvider, LLMProviderMixin):
     def health_check(self) -> Dict[str, Any]:
         return {"ok": bool(self.api_key), "provider": self.name, "model": self.model}
 
+    async def ahealth_check(self) -> Dict[str, Any]:
+        return self.health_check()
+
     def get_model_name(self) -> str:
         return self.model
@@ -0,0 +1,298 @@
+import http.client
+import json
+import logging
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+from services.llm.config import get_pool_idle_timeout_seconds, get_pool_max_per_host, get_pool_size
+
+logger = logging.getLogger("services.llm")
+
+# Errors raised by a kept-alive connection that the server closed while it sat idle.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+class HTTPStatusError(OSError):
+    """Raised for HTTP responses with a status code of 400 or above."""
+
+    def __init__(self, status: int, reason: str, body: bytes):
+        super().__init__(f"HTTP Error {status}: {reason}")
+        self.code = status
+        self.reason = reason
+        self.body = body or b""
+
+    def body_text(self) -> str:
+        return self.body.decode("utf-8", errors="ignore")
+
+
+class PooledResponse:
+    def __init__(self, status: int, reason: str, headers: Mapping[str, str], data: bytes):
+        self.status = status
+        self.reason = reason
+        self.headers = dict(headers)
+        self.data = data
+
+    def text(self) -> str:
+        return self.data.decode("utf-8")
+
+    def json(self) -> Any:
+        return json.loads(self.text())
+
+    def raise_for_status(self) -> "PooledResponse":
+        if self.status >= 400:
+            raise HTTPStatusError(self.status, self.reason, self.data)
+        return self
+
+
+class HTTPConnectionPool:
+    """Thread-safe pool of keep-alive connections to a single scheme/host/port."""
+
+    def __init__(
+        self,
+        scheme: str,
+        host: str,
+        port: Optional[int] = None,
+        *,
+        maxsize: int = 10,
+        max_per_host: int = 10,
+        idle_timeout: float = 60.0,
+    ):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.maxsize = max(1, int(maxsize))
+        self.max_per_host = max(1, int(max_per_host))
+        self.idle_timeout = float(idle_timeout)
+        self._idle: List[Tuple[http.client.HTTPConnection, float]] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_per_host)
+        self._ssl_context = ssl.create_default_context() if scheme == "https" else None
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+
+    def _new_connection(self, timeout: float) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=timeout, context=self._ssl_context)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def _get_connection(self, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            now = time.monotonic()
+            while self._idle:
+                connection, last_used = self._idle.pop()
+                if now - last_used > self.idle_timeout:
+                    connection.close()
+                    self.discarded += 1
+                    continue
+                self.hits += 1
+                connection.timeout = timeout
+                if connection.sock is not None:
+                    connection.sock.settimeout(timeout)
+                return connection, True
+            self.misses += 1
+        return self._new_connection(timeout), False
+
+    def _release_connection(self, connection: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self.maxsize:
+                self._idle.append((connection, time.monotonic()))
+                return
+            self.discarded += 1
+        connection.close()
+
+    def _acquire_slot(self, timeout: float) -> None:
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"Timed out waiting for a free connection to {self.host} (max_per_host={self.max_per_host})")
+
+    def _open(self, method: str, path: str, body: Optional[bytes], headers: Mapping[str, str], timeout: float):
+        for attempt in range(2):
+            connection, reused = self._get_connection(timeout)
+            try:
+                connection.request(method, path, body=body, headers=dict(headers))
+                return connection, connection.getresponse()
+            except _STALE_CONNECTION_ERRORS:
+                connection.close()
+                if reused and attempt == 0:
+                    with self._lock:
+                        self.discarded += 1
+                    continue
+                raise
+            except Exception:
+                connection.close()
+                raise
+        raise ConnectionError(f"Unable to open a connection to {self.host}")
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        body: Optional[bytes] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: float = 30,
+    ) -> PooledResponse:
+        self._acquire_slot(timeout)
+        try:
+            connection, response = self._open(method, path, body, headers or {}, timeout)
+            try:
+                data = response.read()
+            except Exception:
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self._release_connection(connection)
+            return PooledResponse(response.status, response.reason, response.getheaders(), data)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def stream(
+        self,
+        method: str,
+        path: str,
+        *,
+        body: Optional[bytes] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: float = 30,
+    ) -> Iterator[http.client.HTTPResponse]:
+        """Yield the raw response; the connection is only reused if the body was fully consumed."""
+        self._acquire_slot(timeout)
+        try:
+            connection, response = self._open(method, path, body, headers or {}, timeout)
+            try:
+                if response.status >= 400:
+                    raise HTTPStatusError(response.status, response.reason, response.read())
+                yield response
+            except BaseException:
+                connection.close()
+                raise
+            if not response.isclosed() and response.length == 0:
+                # Line iteration stops at the end of a Content-Length body without closing it.
+                response.close()
+            if response.isclosed() and not response.will_close:
+                self._release_connection(connection)
+            else:
+                connection.close()
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            connection.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            idle = len(self._idle)
+            hits, misses, discarded = self.hits, self.misses, self.discarded
+        total = hits + misses
+        return {
+            "host": self.host,
+            "port": self.port,
+            "scheme": self.scheme,
+            "idle_connections": idle,
+            "max_size": self.maxsize,
+            "max_per_host": self.max_per_host,
+            "idle_timeout_seconds": self.idle_timeout,
+            "hits": hits,
+            "misses": misses,
+            "discarded": discarded,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+
+
+_POOLS: Dict[Tuple[str, str, str, Optional[int]], HTTPConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _split_url(url: str) -> Tuple[str, str, Optional[int], str]:
+    parts = urlsplit(url)
+    scheme = (parts.scheme or "http").lower()
+    if scheme not in {"http", "https"}:
+        raise ValueError(f"Unsupported URL scheme for connection pool: {url}")
+    path = parts.path or "/"
+    if parts.query:
+        path = f"{path}?{parts.query}"
+    return scheme, parts.hostname or "", parts.port, path
+
+
+def get_pool(provider_name: str, url: str) -> HTTPConnectionPool:
+    """Return the shared connection pool for a provider and the host of ``url``."""
+    scheme, host, port, _ = _split_url(url)
+    key = (provider_name, scheme, host, port)
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = HTTPConnectionPool(
+                scheme,
+                host,
+                port,
+                maxsize=get_pool_size(provider_name),
+                max_per_host=get_pool_max_per_host(provider_name),
+                idle_timeout=get_pool_idle_timeout_seconds(provider_name),
+            )
+            _POOLS[key] = pool
+        return pool
+
+
+def request(
+    provider_name: str,
+    method: str,
+    url: str,
+    *,
+    body: Optional[bytes] = None,
+    headers: Optional[Mapping[str, str]] = None,
+    timeout: float = 30,
+) -> PooledResponse:
+    _, _, _, path = _split_url(url)
+    return get_pool(provider_name, url).request(method, path, body=body, headers=headers, timeout=timeout)
+
+
+def post_json(provider_name: str, url: str, payload: Any, *, headers: Optional[Mapping[str, str]] = None, timeout: float = 30) -> PooledResponse:
+    request_headers = {"Content-Type": "application/json"}
+    request_headers.update(headers or {})
+    return request(provider_name, "POST", url, body=json.dumps(payload).encode("utf-8"), headers=request_headers, timeout=timeout)
+
+
+@contextmanager
+def stream(
+    provider_name: str,
+    method: str,
+    url: str,
+    *,
+    body: Optional[bytes] = None,
+    headers: Optional[Mapping[str, str]] = None,
+    timeout: float = 30,
+) -> Iterator[http.client.HTTPResponse]:
+    _, _, _, path = _split_url(url)
+    with get_pool(provider_name, url).stream(method, path, body=body, headers=headers, timeout=timeout) as response:
+        yield response
+
+
+def get_pool_stats() -> List[Dict[str, Any]]:
+    with _POOLS_LOCK:
+        pools = list(_POOLS.items())
+    return [{"provider": key[0], **pool.stats()} for key, pool in pools]
+
+
+def close_all_pools() -> None:
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.close()
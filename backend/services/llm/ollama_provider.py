@@ -1,14 +1,20 @@
+import asyncio
 import json
 import os
 import time
-from typing import Any, Dict, Generator, Optional
-from urllib import error as urlerror
-from urllib import request as urlrequest
+from http.client import HTTPException
+from typing import Any, AsyncIterator, Dict, Generator, Optional
 
+import httpx
+
+from services.llm import http_pool
+from services.llm.async_http import get_async_client
 from services.llm.base import BaseLLMProvider
 from services.llm.config import get_base_url, get_model_for_provider, get_retry_count, get_timeout_seconds
 from services.llm.provider import LLMProviderMixin, ProviderError
 
+_STREAM_DONE = object()
+
 
 class OllamaProvider(BaseLLMProvider, LLMProviderMixin):
     name = "ollama"
@@ -42,16 +48,31 @@ class OllamaProvider(BaseLLMProvider, LLMProviderMixin):
             return json.dumps(data, ensure_ascii=False)
         return str(data)
 
-    def _send_request(self, payload: Dict[str, Any], stream: bool = False) -> Any:
+    def _send_request(self, payload: Dict[str, Any]) -> Any:
         endpoint = f"{self.base_url}/api/generate"
-        payload_bytes = json.dumps(payload).encode("utf-8")
-        req = urlrequest.Request(endpoint, data=payload_bytes, headers={"Content-Type": "application/json"}, method="POST")
-        if stream:
-            response = urlrequest.urlopen(req, timeout=self.timeout_seconds)
-            return response
-        with urlrequest.urlopen(req, timeout=self.timeout_seconds) as response:
-            body = response.read().decode("utf-8")
-            return json.loads(body)
+        response = http_pool.post_json(self.name, endpoint, payload, timeout=self.timeout_seconds)
+        return response.raise_for_status().json()
+
+    async def _asend_request(self, payload: Dict[str, Any]) -> Any:
+        response = await get_async_client(self.name).post(f"{self.base_url}/api/generate", json=payload, timeout=self.timeout_seconds)
+        response.raise_for_status()
+        return response.json()
+
+    def _parse_stream_line(self, raw_line: Any) -> Any:
+        """Return the text of one streamed line, ``None`` to skip it, or ``_STREAM_DONE``."""
+        if not raw_line:
+            return None
+        line = raw_line.decode("utf-8", errors="ignore").strip() if isinstance(raw_line, bytes) else str(raw_line).strip()
+        if not line:
+            return None
+        if line.startswith("data:"):
+            line = line[5:].strip()
+        if line in {"[DONE]", "done"}:
+            return _STREAM_DONE
+        try:
+            return self._extract_text(json.loads(line)) or None
+        except json.JSONDecodeError:
+            return line
 
     def _is_retryable(self, exc: Exception) -> bool:
         message = str(exc).lower()
@@ -63,7 +84,7 @@ class OllamaProvider(BaseLLMProvider, LLMProviderMixin):
         for attempt in range(self.max_retries + 1):
             started = time.perf_counter()
             try:
-                data = self._send_request(payload, stream=False)
+                data = self._send_request(payload)
                 text = self._extract_text(data)
                 self._log(
                     "provider=%s model=%s status=ok latency_ms=%.0f",
@@ -72,7 +93,7 @@ class OllamaProvider(BaseLLMProvider, LLMProviderMixin):
                     (time.perf_counter() - started) * 1000,
                 )
                 return text
-            except (urlerror.URLError, ConnectionError, json.JSONDecodeError) as exc:
+            except (OSError, HTTPException, json.JSONDecodeError) as exc:
                 last_error = exc
                 if attempt < self.max_retries and self._is_retryable(exc):
                     time.sleep(1.0)
@@ -84,71 +105,121 @@ class OllamaProvider(BaseLLMProvider, LLMProviderMixin):
                 ) from exc
         raise self._build_error("Ollama provider request failed", status_code=503, details={"raw_error": str(last_error)})
 
+    async def _arequest(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> str:
+        payload = self._build_payload(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type, stream=False)
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                data = await self._asend_request(payload)
+                text = self._extract_text(data)
+                self._log(
+                    "provider=%s model=%s status=ok latency_ms=%.0f",
+                    self.name,
+                    self.model,
+                    (time.perf_counter() - started) * 1000,
+                )
+                return text
+            except (httpx.HTTPError, json.JSONDecodeError) as exc:
+                last_error = exc
+                if attempt < self.max_retries and self._is_retryable(exc):
+                    await asyncio.sleep(1.0)
+                    continue
+                raise self._build_error(
+                    f"Ollama provider request failed: {exc}",
+                    status_code=503,
+                    details={"raw_error": str(exc)},
+                ) from exc
+        raise self._build_error("Ollama provider request failed", status_code=503, details={"raw_error": str(last_error)})
+
     def generate(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> str:
         return self._request(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type)
 
+    async def agenerate(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> str:
+        return await self._arequest(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type)
+
     def stream_generate(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> Generator[str, None, None]:
         payload = self._build_payload(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type, stream=True)
-        req = urlrequest.Request(
-            f"{self.base_url}/api/generate",
-            data=json.dumps(payload).encode("utf-8"),
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
         try:
-            with urlrequest.urlopen(req, timeout=self.timeout_seconds) as response:
+            with http_pool.stream(
+                self.name,
+                "POST",
+                f"{self.base_url}/api/generate",
+                body=json.dumps(payload).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+                timeout=self.timeout_seconds,
+            ) as response:
                 for raw_line in response:
-                    if not raw_line:
-                        continue
-                    line = raw_line.decode("utf-8", errors="ignore").strip()
-                    if not line:
-                        continue
-                    if line.startswith("data:"):
-                        line = line[5:].strip()
-                    if line in {"[DONE]", "done"}:
+                    text = self._parse_stream_line(raw_line)
+                    if text is _STREAM_DONE:
+                        break
+                    if text:
+                        yield text
+        except (OSError, HTTPException) as exc:
+            raise self._build_error(
+                f"Ollama streaming unavailable: {exc}",
+                status_code=503,
+                details={"raw_error": str(exc)},
+            ) from exc
+
+    async def astream_generate(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> AsyncIterator[str]:
+        payload = self._build_payload(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type, stream=True)
+        try:
+            async with get_async_client(self.name).stream("POST", f"{self.base_url}/api/generate", json=payload, timeout=self.timeout_seconds) as response:
+                response.raise_for_status()
+                async for raw_line in response.aiter_lines():
+                    text = self._parse_stream_line(raw_line)
+                    if text is _STREAM_DONE:
                         break
-                    try:
-                        chunk = json.loads(line)
-                        text = self._extract_text(chunk)
-                        if text:
-                            yield text
-                    except json.JSONDecodeError:
-                        yield line
-        except (urlerror.URLError, ConnectionError) as exc:
+                    if text:
+                        yield text
+        except httpx.HTTPError as exc:
             raise self._build_error(
                 f"Ollama streaming unavailable: {exc}",
                 status_code=503,
                 details={"raw_error": str(exc)},
             ) from exc
 
+    def _health_status(self, data: Any, started: float) -> Dict[str, Any]:
+        models = data if isinstance(data, list) else data.get("models", [])
+        has_model = any(str(item).strip().lower() == self.model.lower() for item in models)
+        latency_ms = round((time.perf_counter() - started) * 1000)
+        return {
+            "ok": bool(has_model),
+            "provider": self.name,
+            "model": self.model,
+            "base_url": self.base_url,
+            "latency_ms": latency_ms,
+            "model_available": bool(has_model),
+            "model_list": models,
+        }
+
+    def _health_error(self, exc: Exception) -> Dict[str, Any]:
+        return {
+            "ok": False,
+            "provider": self.name,
+            "model": self.model,
+            "base_url": self.base_url,
+            "error": str(exc),
+        }
+
     def health_check(self) -> Dict[str, Any]:
         endpoint = f"{self.base_url}/api/models"
         started = time.perf_counter()
         try:
-            req = urlrequest.Request(endpoint, headers={"Content-Type": "application/json"})
-            with urlrequest.urlopen(req, timeout=self.timeout_seconds) as response:
-                body = response.read().decode("utf-8")
-                data = json.loads(body)
-                models = data if isinstance(data, list) else data.get("models", [])
-                has_model = any(str(item).strip().lower() == self.model.lower() for item in models)
-                latency_ms = round((time.perf_counter() - started) * 1000)
-                return {
-                    "ok": bool(has_model),
-                    "provider": self.name,
-                    "model": self.model,
-                    "base_url": self.base_url,
-                    "latency_ms": latency_ms,
-                    "model_available": bool(has_model),
-                    "model_list": models,
-                }
+            response = http_pool.request(self.name, "GET", endpoint, headers={"Content-Type": "application/json"}, timeout=self.timeout_seconds)
+            return self._health_status(response.raise_for_status().json(), started)
+        except Exception as exc:
+            return self._health_error(exc)
+
+    async def ahealth_check(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            response = await get_async_client(self.name).get(f"{self.base_url}/api/models", timeout=self.timeout_seconds)
+            response.raise_for_status()
+            return self._health_status(response.json(), started)
         except Exception as exc:
-            return {
-                "ok": False,
-                "provider": self.name,
-                "model": self.model,
-                "base_url": self.base_url,
-                "error": str(exc),
-            }
+            return self._health_error(exc)
 
     def get_model_name(self) -> str:
         return self.model
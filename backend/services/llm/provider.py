@@ -22,11 +22,11 @@ class LLMProviderMixin:
     def _build_error(self, message: str, *, status_code: Optional[int] = None, details: Optional[Dict[str, Any]] = None) -> ProviderError:
         return ProviderError(message, provider=self.name, status_code=status_code, details=details or {})
 
-    def _log(self, message: str, **kwargs: Any) -> None:
+    def _log(self, message: str, *args: Any, **kwargs: Any) -> None:
         import logging
 
         logger = logging.getLogger("services.llm")
-        logger.info(message, **kwargs)
+        logger.info(message, *args, **kwargs)
 
     def _format_response(self, text: str, *, provider: str, model: str, latency_ms: int, prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None) -> Dict[str, Any]:
         return {
@@ -0,0 +1,443 @@
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Tuple
+
+from services.llm.base import BaseLLMProvider
+
+logger = logging.getLogger("services.llm")
+
+try:
+    import redis
+except ImportError:  # pragma: no cover
+    redis = None
+
+_DEFAULT_DISK_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "temp_uploads", "llm_cache"))
+
+_current_feature: contextvars.ContextVar[str] = contextvars.ContextVar("llm_cache_feature", default="")
+_bypass: contextvars.ContextVar[bool] = contextvars.ContextVar("llm_cache_bypass", default=False)
+_accept: contextvars.ContextVar[Optional[Callable[[str], Any]]] = contextvars.ContextVar("llm_cache_accept", default=None)
+_fallback_served: contextvars.ContextVar[bool] = contextvars.ContextVar("llm_cache_fallback_served", default=False)
+
+
+def is_cache_enabled() -> bool:
+    return str(os.getenv("LLM_CACHE_ENABLED", "false")).strip().lower() in {"1", "true", "yes"}
+
+
+def _bypassed_features() -> set:
+    raw = os.getenv("LLM_CACHE_BYPASS_FEATURES", "")
+    return {item.strip().lower() for item in raw.split(",") if item.strip()}
+
+
+@contextmanager
+def llm_cache_feature(feature: str) -> Iterator[None]:
+    """Tag LLM calls made inside the block with a feature name for metrics and per-feature bypass."""
+    token = _current_feature.set(str(feature or "").strip().lower())
+    try:
+        yield
+    finally:
+        _current_feature.reset(token)
+
+
+@contextmanager
+def llm_cache_accept(accept: Callable[[str], Any]) -> Iterator[None]:
+    """Only cache responses made inside the block that ``accept`` takes.
+
+    ``accept`` is usually the feature's parser: if it raises or returns a falsy value, the
+    response is still returned to the caller but not stored, so a retry reaches the model again.
+    """
+    token = _accept.set(accept)
+    try:
+        yield
+    finally:
+        _accept.reset(token)
+
+
+def note_fallback_response() -> None:
+    """Mark the current call as answered by a fallback provider, so its response is not cached.
+
+    Cache keys name the primary provider and model, which did not produce this response.
+    """
+    _fallback_served.set(True)
+
+
+@contextmanager
+def bypass_llm_cache() -> Iterator[None]:
+    """Skip the response cache for LLM calls made inside the block."""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def build_cache_key(
+    provider: str,
+    model: str,
+    prompt: str,
+    max_output_tokens: int,
+    response_mime_type: str,
+    temperature: Optional[float],
+) -> str:
+    payload = {
+        "provider": provider,
+        "model": model,
+        "prompt_sha256": hashlib.sha256(str(prompt or "").encode("utf-8")).hexdigest(),
+        "max_output_tokens": max_output_tokens,
+        "response_mime_type": response_mime_type,
+        "temperature": temperature,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class _RedisTier:
+    name = "redis"
+
+    def __init__(self, url: str):
+        self.url = url
+        self._client = None
+
+    def _get_client(self) -> Optional[Any]:
+        if redis is None or not self.url:
+            return None
+        if self._client is None:
+            self._client = redis.from_url(self.url, decode_responses=True)
+        return self._client
+
+    def get(self, key: str) -> Optional[str]:
+        client = self._get_client()
+        return client.get(f"llm_cache:{key}") if client else None
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        client = self._get_client()
+        if client:
+            client.set(f"llm_cache:{key}", value, ex=ttl_seconds)
+
+
+class _DiskTier:
+    name = "disk"
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                entry = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if time.time() >= float(entry.get("expires_at", 0)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry.get("value")
+
+    def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump({"expires_at": time.time() + ttl_seconds, "value": value}, handle)
+        os.replace(temp_path, path)
+        self._writes += 1
+        if self._writes % 50 == 0:
+            self._prune()
+
+    def _prune(self) -> None:
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+
+
+class LLMResponseCache:
+    """Memory LRU tier with an optional Redis or disk tier behind it."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 1000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: int = 86400,
+        backend: Optional[Any] = None,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self.ttl_seconds = int(ttl_seconds)
+        self.backend = backend
+        self._entries: "OrderedDict[str, Tuple[float, str, int]]" = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "backend_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "stores": 0,
+            "evictions": 0,
+            "bytes_saved": 0,
+            "backend_errors": 0,
+            "rejected": 0,
+        }
+        self._feature_stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, name: str, feature: str, amount: int = 1) -> None:
+        self._stats[name] += amount
+        if feature:
+            bucket = self._feature_stats.setdefault(feature, {"hits": 0, "misses": 0, "bypassed": 0, "bytes_saved": 0})
+            if name in bucket:
+                bucket[name] += amount
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous:
+            self._size_bytes -= previous[2]
+        self._entries[key] = (expires_at, value, size)
+        self._size_bytes += size
+        while len(self._entries) > self.max_entries or self._size_bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._size_bytes -= evicted_size
+            self._stats["evictions"] += 1
+
+    def record_bypass(self, feature: str = "") -> None:
+        with self._lock:
+            self._count("bypassed", feature)
+
+    def record_rejected(self) -> None:
+        with self._lock:
+            self._stats["rejected"] += 1
+
+    def get(self, key: str, feature: str = "") -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value, size = entry
+                if now < expires_at:
+                    self._entries.move_to_end(key)
+                    self._count("hits", feature)
+                    self._stats["memory_hits"] += 1
+                    self._count("bytes_saved", feature, size)
+                    return value
+                self._entries.pop(key, None)
+                self._size_bytes -= size
+
+        value = None
+        if self.backend is not None:
+            try:
+                value = self.backend.get(key)
+            except Exception as exc:
+                logger.warning("LLM cache %s read failed: %s", self.backend.name, exc)
+                with self._lock:
+                    self._stats["backend_errors"] += 1
+
+        with self._lock:
+            if value is None:
+                self._count("misses", feature)
+                return None
+            self._count("hits", feature)
+            self._stats["backend_hits"] += 1
+            self._count("bytes_saved", feature, len(value.encode("utf-8")))
+            self._remember(key, value, now + self.ttl_seconds)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        if value is None:
+            return
+        value = str(value)
+        with self._lock:
+            self._remember(key, value, time.time() + self.ttl_seconds)
+            self._stats["stores"] += 1
+        if self.backend is not None:
+            try:
+                self.backend.set(key, value, self.ttl_seconds)
+            except Exception as exc:
+                logger.warning("LLM cache %s write failed: %s", self.backend.name, exc)
+                with self._lock:
+                    self._stats["backend_errors"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "size_bytes": self._size_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "backend": self.backend.name if self.backend is not None else "memory",
+                "features": {name: dict(values) for name, values in self._feature_stats.items()},
+            }
+
+
+_CACHE: Optional[LLMResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def _build_backend() -> Optional[Any]:
+    backend = str(os.getenv("LLM_CACHE_BACKEND", "") or "").strip().lower()
+    if backend == "redis":
+        url = os.getenv("REDIS_URL", "").strip()
+        if redis is None or not url:
+            logger.warning("LLM_CACHE_BACKEND=redis but redis or REDIS_URL is unavailable; using memory only")
+            return None
+        return _RedisTier(url)
+    if backend == "disk":
+        directory = os.getenv("LLM_CACHE_DIR", _DEFAULT_DISK_DIR)
+        max_bytes = int(os.getenv("LLM_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)) or 512 * 1024 * 1024)
+        return _DiskTier(directory, max_bytes)
+    return None
+
+
+def get_response_cache() -> LLMResponseCache:
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = LLMResponseCache(
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000") or 1000),
+                max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)) or 64 * 1024 * 1024),
+                ttl_seconds=int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400") or 86400),
+                backend=_build_backend(),
+            )
+        return _CACHE
+
+
+def get_response_cache_stats() -> Dict[str, Any]:
+    if _CACHE is None:
+        return {"enabled": is_cache_enabled()}
+    return {"enabled": is_cache_enabled(), **_CACHE.stats()}
+
+
+class CachingProvider(BaseLLMProvider):
+    """Serve repeated identical prompts from the response cache instead of the wrapped provider."""
+
+    def __init__(self, inner: BaseLLMProvider, cache: Optional[LLMResponseCache] = None):
+        super().__init__(inner.model)
+        self.inner = inner
+        self.name = inner.name
+        self.cache = cache or get_response_cache()
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self.__dict__["inner"], item)
+
+    def _provider_identity(self) -> Tuple[str, str, Optional[float]]:
+        # Keys name the primary provider; responses served by a fallback are never stored under them.
+        target = getattr(self.inner, "primary", self.inner)
+        return str(target.name), target.get_model_name(), getattr(target, "temperature", None)
+
+    def _lookup_key(self, prompt: str, max_output_tokens: int, response_mime_type: str) -> Tuple[Optional[str], str]:
+        feature = _current_feature.get()
+        if _bypass.get() or (feature and feature in _bypassed_features()):
+            self.cache.record_bypass(feature)
+            return None, feature
+        provider, model, temperature = self._provider_identity()
+        return build_cache_key(provider, model, prompt, max_output_tokens, response_mime_type, temperature), feature
+
+    def _should_store(self, response: str, from_fallback: bool) -> bool:
+        if not response:
+            return False
+        accept = _accept.get()
+        try:
+            accepted = not from_fallback and (accept is None or bool(accept(response)))
+        except Exception:
+            accepted = False
+        if not accepted:
+            self.cache.record_rejected()
+        return accepted
+
+    def generate(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> str:
+        key, feature = self._lookup_key(prompt, max_output_tokens, response_mime_type)
+        if key is not None:
+            cached = self.cache.get(key, feature)
+            if cached is not None:
+                return cached
+        token = _fallback_served.set(False)
+        try:
+            response = self.inner.generate(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type)
+            from_fallback = _fallback_served.get()
+        finally:
+            _fallback_served.reset(token)
+        if key is not None and self._should_store(response, from_fallback):
+            self.cache.set(key, response)
+        return response
+
+    async def agenerate(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> str:
+        key, feature = self._lookup_key(prompt, max_output_tokens, response_mime_type)
+        if key is not None:
+            cached = await asyncio.to_thread(self.cache.get, key, feature) if self.cache.backend is not None else self.cache.get(key, feature)
+            if cached is not None:
+                return cached
+        token = _fallback_served.set(False)
+        try:
+            response = await self.inner.agenerate(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type)
+            from_fallback = _fallback_served.get()
+        finally:
+            _fallback_served.reset(token)
+        if key is not None and self._should_store(response, from_fallback):
+            if self.cache.backend is not None:
+                await asyncio.to_thread(self.cache.set, key, response)
+            else:
+                self.cache.set(key, response)
+        return response
+
+    def stream_generate(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> Any:
+        return self.inner.stream_generate(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type)
+
+    async def astream_generate(self, prompt: str, *, max_output_tokens: int = 800, response_mime_type: str = "application/json") -> AsyncIterator[str]:
+        async for chunk in self.inner.astream_generate(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type):
+            yield chunk
+
+    def health_check(self) -> Dict[str, Any]:
+        return self.inner.health_check()
+
+    async def ahealth_check(self) -> Dict[str, Any]:
+        return await self.inner.ahealth_check()
+
+    def get_model_name(self) -> str:
+        return self.inner.get_model_name()
+
+    def format_prompt(self, prompt: str, response_mime_type: str = "application/json") -> str:
+        return self.inner.format_prompt(prompt, response_mime_type=response_mime_type)
@@ -1,7 +1,20 @@
 from services.rag.chunking import chunk_text
 from services.rag.embeddings import embed_documents, embed_query, embed_text, load_model
-from services.rag.generation import generate_answer, generate_fill_blanks, generate_flashcards, generate_mcqs, generate_summary, generate_true_false
-from services.rag.ingestion import ingest_document
+from services.rag.generation import (
+    agenerate_answer,
+    agenerate_fill_blanks,
+    agenerate_flashcards,
+    agenerate_mcqs,
+    agenerate_summary,
+    agenerate_true_false,
+    generate_answer,
+    generate_fill_blanks,
+    generate_flashcards,
+    generate_mcqs,
+    generate_summary,
+    generate_true_false,
+)
+from services.rag.ingestion import ingest_document, ingest_pages, remove_document
 from services.rag.parser import parse_fill_blanks, parse_flashcards, parse_json, parse_mcqs, parse_true_false
 from services.rag.prompts import (
     FILL_BLANK_PROMPT_TEMPLATE,
@@ -12,7 +25,16 @@ from services.rag.prompts import (
     TRUE_FALSE_PROMPT_TEMPLATE,
 )
 from services.rag.retriever import retrieve_chunks
-from services.rag.vectordb import add_documents, delete_document, get_collection, initialize, list_documents, search
+from services.rag.vectordb import (
+    add_documents,
+    delete_chunks,
+    delete_document,
+    get_collection,
+    get_document_chunks,
+    initialize,
+    list_documents,
+    search,
+)
 
 __all__ = [
     "chunk_text",
@@ -21,12 +43,20 @@ __all__ = [
     "embed_text",
     "load_model",
     "ingest_document",
+    "ingest_pages",
+    "remove_document",
     "generate_answer",
     "generate_summary",
     "generate_mcqs",
     "generate_flashcards",
     "generate_true_false",
     "generate_fill_blanks",
+    "agenerate_answer",
+    "agenerate_summary",
+    "agenerate_mcqs",
+    "agenerate_flashcards",
+    "agenerate_true_false",
+    "agenerate_fill_blanks",
     "parse_json",
     "parse_mcqs",
     "parse_flashcards",
@@ -43,6 +73,8 @@ __all__ = [
     "get_collection",
     "add_documents",
     "delete_document",
+    "delete_chunks",
+    "get_document_chunks",
     "search",
     "list_documents",
 ]
@@ -0,0 +1,180 @@
+import logging
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows assigned per batch, to bound the (rows x nlist) distance matrix.
+_ASSIGN_BLOCK_ROWS = 65536
+
+
+def default_nlist(rows: int) -> int:
+    """About 4 * sqrt(rows) lists, the usual starting point for IVF."""
+    return int(min(max(1, rows), max(16, round(4 * np.sqrt(max(1, rows))))))
+
+
+def _nearest_centroids(vectors: np.ndarray, centroids: np.ndarray, centroid_norms: np.ndarray) -> np.ndarray:
+    assigned = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), _ASSIGN_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + _ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        # ||x||^2 is the same for every centroid, so it does not change the argmin.
+        assigned[start:start + len(block)] = np.argmin(centroid_norms - 2.0 * (block @ centroids.T), axis=1)
+    return assigned
+
+
+class IVFIndex:
+    """Inverted-file (IVF-Flat) index: k-means centroids plus one inverted list per centroid.
+
+    ``assignments[row]`` is the list a row belongs to, or -1 while it is unassigned. A search
+    scores every row in the ``nprobe`` lists nearest to the query, with exact distances.
+    Unassigned rows are always scored too. Rows are never removed from the index; callers pass
+    an ``alive`` mask for tombstones and rebuild with ``compact`` when rows are renumbered.
+    """
+
+    def __init__(self, centroids: np.ndarray, assignments: np.ndarray, trained_rows: int = 0):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.centroid_norms = np.einsum("ij,ij->i", self.centroids, self.centroids)
+        self.assignments = assignments
+        self.trained_rows = int(trained_rows or len(assignments))
+        self._lists: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def train(
+        cls,
+        vectors: np.ndarray,
+        nlist: int,
+        iterations: int = 10,
+        sample: Optional[int] = None,
+        seed: int = 0,
+        rows: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Return k-means centroids trained on a random sample of ``vectors`` (or of ``rows`` of it)."""
+        rng = np.random.default_rng(seed)
+        pool = np.arange(len(vectors)) if rows is None else np.asarray(rows)
+        nlist = max(1, min(int(nlist), len(pool)))
+        # 40 training points per list, just above the 39 FAISS recommends as a minimum.
+        sample = min(len(pool), sample or nlist * 40)
+        picked = np.sort(rng.choice(pool, size=sample, replace=False))
+        data = np.asarray(vectors[picked], dtype=np.float32)
+        centroids = data[rng.choice(len(data), size=nlist, replace=False)].copy()
+        for _ in range(max(1, iterations)):
+            assigned = _nearest_centroids(data, centroids, np.einsum("ij,ij->i", centroids, centroids))
+            counts = np.bincount(assigned, minlength=nlist)
+            filled = counts > 0
+            # Sum each cluster's members with one reduceat over the rows sorted by cluster.
+            order = np.argsort(assigned, kind="stable")
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+            centroids[filled] = np.add.reduceat(data[order], starts, axis=0) / counts[filled, None]
+            empty = np.flatnonzero(~filled)
+            if len(empty):
+                centroids[empty] = data[rng.choice(len(data), size=len(empty), replace=False)]
+        return centroids
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, nlist: Optional[int] = None, alive: Optional[np.ndarray] = None, **train_options) -> "IVFIndex":
+        """Train centroids on the live rows of ``vectors`` and assign every row to a list."""
+        live = np.flatnonzero(alive) if alive is not None else np.arange(len(vectors))
+        centroids = cls.train(vectors, nlist or default_nlist(len(live)), rows=live, **train_options)
+        index = cls(centroids, np.empty(0, dtype=np.int32), trained_rows=len(live))
+        index.assignments = index.assign(vectors)
+        return index
+
+    def assign(self, vectors: np.ndarray) -> np.ndarray:
+        return _nearest_centroids(vectors, self.centroids, self.centroid_norms)
+
+    def add(self, vectors: np.ndarray) -> np.ndarray:
+        """Assign new rows, appended after the existing ones, and return their list ids."""
+        assigned = self.assign(vectors)
+        self.assignments = np.concatenate([np.asarray(self.assignments), assigned])
+        self._lists = None
+        return assigned
+
+    def resize(self, rows: int) -> None:
+        """Truncate the assignments to ``rows``, or pad them with unassigned (-1) rows."""
+        assignments = np.asarray(self.assignments)
+        if len(assignments) < rows:
+            assignments = np.concatenate([assignments, np.full(rows - len(assignments), -1, dtype=np.int32)])
+        self.assignments = assignments[:rows]
+        self._lists = None
+
+    def compact(self, kept_rows: np.ndarray) -> None:
+        """Keep only ``kept_rows`` (old row numbers, in their new order) after the matrix was rewritten."""
+        self.assignments = np.asarray(self.assignments)[kept_rows]
+        self._lists = None
+
+    def _inverted_lists(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._lists is None:
+            assignments = np.asarray(self.assignments)
+            assigned = np.flatnonzero(assignments >= 0)
+            order = assigned[np.argsort(assignments[assigned], kind="stable")]
+            offsets = np.zeros(self.nlist + 1, dtype=np.int64)
+            np.cumsum(np.bincount(assignments[assigned], minlength=self.nlist), out=offsets[1:])
+            self._lists = (order, offsets)
+        return self._lists
+
+    def candidates(self, query: np.ndarray, nprobe: int, total_rows: Optional[int] = None) -> np.ndarray:
+        """Rows in the ``nprobe`` nearest lists, plus rows beyond the assigned ones."""
+        order, offsets = self._inverted_lists()
+        nprobe = max(1, min(int(nprobe), self.nlist))
+        distances = self.centroid_norms - 2.0 * (self.centroids @ query)
+        probed = np.argpartition(distances, nprobe - 1)[:nprobe] if nprobe < self.nlist else np.arange(self.nlist)
+        parts = [order[offsets[list_id]:offsets[list_id + 1]] for list_id in probed]
+        assigned = len(self.assignments)
+        if total_rows is not None and total_rows > assigned:
+            parts.append(np.arange(assigned, total_rows))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        nprobe: int,
+        matrix: np.ndarray,
+        norms: Optional[np.ndarray] = None,
+        alive: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Top ``k`` rows of ``matrix`` by squared L2 distance among the probed lists."""
+        query = np.asarray(query, dtype=np.float32)
+        rows = np.sort(self.candidates(query, nprobe, total_rows=len(matrix)))
+        if alive is not None and len(rows):
+            rows = rows[alive[rows]]
+        if not len(rows):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        vectors = np.asarray(matrix[rows])
+        row_norms = np.asarray(norms[rows]) if norms is not None else np.einsum("ij,ij->i", vectors, vectors)
+        distances = row_norms + float(query @ query) - 2.0 * (vectors @ query)
+        if len(rows) > k:
+            keep = np.argpartition(distances, k - 1)[:k]
+            rows, distances = rows[keep], distances[keep]
+        order = np.argsort(distances, kind="stable")
+        return rows[order], distances[order]
+
+    def save(self, directory: str) -> None:
+        """Write the index; each file is replaced atomically so readers never see a partial one."""
+        os.makedirs(directory, exist_ok=True)
+        for name, array in (("centroids.npy", self.centroids), ("assignments.npy", np.asarray(self.assignments, dtype=np.int32))):
+            path = os.path.join(directory, name)
+            with open(f"{path}.tmp", "wb") as handle:
+                np.save(handle, array)
+            os.replace(f"{path}.tmp", path)
+        with open(os.path.join(directory, "trained_rows.tmp"), "w", encoding="utf-8") as handle:
+            handle.write(str(self.trained_rows))
+        os.replace(os.path.join(directory, "trained_rows.tmp"), os.path.join(directory, "trained_rows"))
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> Optional["IVFIndex"]:
+        """Load a saved index, or return ``None`` if there is none."""
+        try:
+            centroids = np.load(os.path.join(directory, "centroids.npy"))
+            assignments = np.load(os.path.join(directory, "assignments.npy"), mmap_mode="r" if mmap else None)
+            with open(os.path.join(directory, "trained_rows"), "r", encoding="utf-8") as handle:
+                trained_rows = int(handle.read().strip() or 0)
+        except (OSError, ValueError):
+            return None
+        return cls(centroids, assignments, trained_rows=trained_rows)
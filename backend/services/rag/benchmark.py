@@ -0,0 +1,379 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from services.rag.ann_index import IVFIndex, default_nlist
+from services.rag.chunking import PAGE_BREAK, SUPPORTED_UNITS, chunk_text
+from services.rag.embedding_backends import SUPPORTED_BACKENDS, create_backend
+from services.rag.numpy_store import NumpyVectorCollection
+from utils.extractors import extract_docx_text, extract_pptx_text
+from utils.text import CHARS_PER_TOKEN
+
+BACKEND_ROOT = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+SAMPLE_SENTENCES = [
+    "Photosynthesis converts light energy into chemical energy stored in glucose.",
+    "The mitochondria is the site of aerobic respiration in eukaryotic cells.",
+    "Newton's second law states that force equals mass times acceleration.",
+    "Supply and demand determine the equilibrium price in a competitive market.",
+    "The French Revolution began in 1789 and reshaped European politics.",
+    "An algorithm's time complexity describes how its running time grows with input size.",
+    "Osmosis is the diffusion of water across a selectively permeable membrane.",
+    "The Pythagorean theorem relates the sides of a right-angled triangle.",
+]
+
+
+def _cold_start_seconds(backend: str) -> float:
+    """Import and load a backend in a fresh interpreter, as a new worker would."""
+    script = (
+        "import time; started = time.perf_counter();"
+        "from services.rag.embedding_backends import create_backend;"
+        f"create_backend({backend!r}).encode(['warm up']);"
+        "print(time.perf_counter() - started)"
+    )
+    output = subprocess.run([sys.executable, "-c", script], cwd=BACKEND_ROOT, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def measure_embedding_backend(backend: str, documents: int = 512, iterations: int = 3) -> Dict[str, object]:
+    texts = [SAMPLE_SENTENCES[index % len(SAMPLE_SENTENCES)] + f" ({index})" for index in range(documents)]
+    cold_start = _cold_start_seconds(backend)
+    model = create_backend(backend)
+    model.encode(texts[:8])
+    timings: List[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        model.encode(texts)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    return {
+        "backend": backend,
+        "cold_start_seconds": round(cold_start, 3),
+        "documents": documents,
+        "docs_per_second": round(documents / best, 1),
+    }
+
+
+def compare_embedding_backends(reference: str = "torch", others: Optional[List[str]] = None) -> Dict[str, float]:
+    """Mean cosine agreement of each backend's vectors with the reference backend."""
+    others = others or [name for name in SUPPORTED_BACKENDS if name != reference]
+    reference_vectors = np.asarray(create_backend(reference).encode(SAMPLE_SENTENCES), dtype=np.float32)
+    agreement = {}
+    for name in others:
+        vectors = np.asarray(create_backend(name).encode(SAMPLE_SENTENCES), dtype=np.float32)
+        agreement[name] = round(float(np.mean(np.sum(reference_vectors * vectors, axis=1))), 5)
+    return agreement
+
+
+def benchmark_embeddings(backends: List[str], documents: int, iterations: int) -> Dict[str, object]:
+    report: Dict[str, object] = {"benchmarks": []}
+    for backend in backends:
+        try:
+            report["benchmarks"].append(measure_embedding_backend(backend, documents=documents, iterations=iterations))
+        except Exception as exc:
+            report["benchmarks"].append({"backend": backend, "error": str(exc)})
+    try:
+        report["cosine_vs_torch"] = compare_embedding_backends("torch", [name for name in backends if name != "torch"])
+    except Exception as exc:
+        report["cosine_vs_torch"] = {"error": str(exc)}
+    return report
+
+
+_WORD_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_DRAWING_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+_SLIDE_NS = "http://schemas.openxmlformats.org/presentationml/2006/main"
+
+
+def synthetic_docx(paragraphs: int) -> bytes:
+    body = []
+    for index in range(paragraphs):
+        sentence = SAMPLE_SENTENCES[index % len(SAMPLE_SENTENCES)]
+        if index % 25 == 0:
+            body.append(f'<w:p><w:pPr><w:pStyle w:val="Heading1"/></w:pPr><w:r><w:t>Section {index // 25 + 1}</w:t></w:r></w:p>')
+        body.append(f"<w:p><w:r><w:t>{sentence} </w:t></w:r><w:r><w:t>({index})</w:t></w:r></w:p>")
+    document = f'<w:document xmlns:w="{_WORD_NS}"><w:body>{"".join(body)}</w:body></w:document>'
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+
+def synthetic_pptx(slides: int, paragraphs_per_slide: int = 12) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for slide in range(1, slides + 1):
+            paragraphs = "".join(
+                f"<a:p><a:r><a:t>{SAMPLE_SENTENCES[(slide + index) % len(SAMPLE_SENTENCES)]}</a:t></a:r></a:p>"
+                for index in range(paragraphs_per_slide)
+            )
+            archive.writestr(
+                f"ppt/slides/slide{slide}.xml",
+                f'<p:sld xmlns:p="{_SLIDE_NS}" xmlns:a="{_DRAWING_NS}"><p:cSld><p:spTree><p:sp><p:txBody>{paragraphs}</p:txBody></p:sp></p:spTree></p:cSld></p:sld>',
+            )
+    return buffer.getvalue()
+
+
+def _dom_extract(data: bytes, names: List[str]) -> str:
+    """The previous extraction strategy: parse each XML part into a full tree, then walk it."""
+    texts = []
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for name in names:
+            root = ET.fromstring(archive.read(name))
+            texts.extend(node.text.strip() for node in root.iter() if node.tag.endswith("}t") and node.text and node.text.strip())
+    return "\n".join(texts)
+
+
+def _measure(extract, data: bytes) -> Dict[str, float]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    extract(data)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(elapsed, 4), "peak_mb": round(peak / (1024 * 1024), 2)}
+
+
+def benchmark_office_extraction(paragraphs: int, slides: int) -> Dict[str, object]:
+    docx = synthetic_docx(paragraphs)
+    pptx = synthetic_pptx(slides)
+    slide_names = [f"ppt/slides/slide{index}.xml" for index in range(1, slides + 1)]
+    return {
+        "docx": {
+            "paragraphs": paragraphs,
+            "size_mb": round(len(docx) / (1024 * 1024), 2),
+            "iterparse": _measure(extract_docx_text, docx),
+            "dom": _measure(lambda data: _dom_extract(data, ["word/document.xml"]), docx),
+        },
+        "pptx": {
+            "slides": slides,
+            "size_mb": round(len(pptx) / (1024 * 1024), 2),
+            "iterparse": _measure(extract_pptx_text, pptx),
+            "dom": _measure(lambda data: _dom_extract(data, slide_names), pptx),
+        },
+    }
+
+
+def _synthetic_vectors(count: int, dim: int, seed: int) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _fill_collection(collection, vectors: np.ndarray, chunks_per_document: int, batch: int) -> float:
+    started_at = time.perf_counter()
+    for start in range(0, len(vectors), batch):
+        stop = min(len(vectors), start + batch)
+        ids = [f"chunk-{row}" for row in range(start, stop)]
+        collection.upsert(
+            ids=ids,
+            embeddings=vectors[start:stop],
+            documents=ids,
+            metadatas=[{"document_id": f"doc-{row // chunks_per_document}", "chunk_id": row % chunks_per_document} for row in range(start, stop)],
+        )
+    return round(time.perf_counter() - started_at, 2)
+
+
+def _query_latency(search: Callable[[np.ndarray], List[str]], queries: np.ndarray) -> Dict[str, object]:
+    timings = []
+    found = []
+    for query in queries:
+        started_at = time.perf_counter()
+        found.append(search(query))
+        timings.append((time.perf_counter() - started_at) * 1000)
+    return {
+        "p50_ms": round(float(np.percentile(timings, 50)), 3),
+        "p95_ms": round(float(np.percentile(timings, 95)), 3),
+        "results": found,
+    }
+
+
+def _recall(found: List[List[str]], exact: List[List[str]]) -> float:
+    hits = sum(len(set(ids) & set(truth)) for ids, truth in zip(found, exact))
+    return round(hits / max(1, sum(len(truth) for truth in exact)), 4)
+
+
+def benchmark_vector_search(sizes: List[int], dim: int, queries: int, top_k: int, chunks_per_document: int) -> Dict[str, object]:
+    """Build each store at every size and time global and per-document top-k queries.
+
+    The NumPy store is exact, so its results are the ground truth for Chroma's recall.
+    """
+    try:
+        import chromadb
+    except ImportError:
+        chromadb = None
+
+    report: Dict[str, object] = {}
+    for size in sizes:
+        vectors = _synthetic_vectors(size, dim, seed=size)
+        probes = _synthetic_vectors(queries, dim, seed=size + 1)
+        documents = max(1, size // chunks_per_document)
+        targets = [f"doc-{index % documents}" for index in range(queries)]
+        entry: Dict[str, object] = {"chunks": size, "dim": dim, "documents": documents}
+        with tempfile.TemporaryDirectory() as directory:
+            store = NumpyVectorCollection(os.path.join(directory, "numpy"))
+            build_seconds = _fill_collection(store, vectors, chunks_per_document, batch=chunks_per_document)
+            whole = _query_latency(lambda query: store.query(query, top_k)["ids"][0], probes)
+            target_iter = iter(targets)
+            scoped = _query_latency(lambda query: store.query(query, top_k, where={"document_id": next(target_iter)})["ids"][0], probes)
+            entry["numpy"] = {
+                "build_seconds": build_seconds,
+                "size_mb": round(store.stats()["size_bytes"] / (1024 * 1024), 1),
+                "query": {key: value for key, value in whole.items() if key != "results"},
+                "document_query": {key: value for key, value in scoped.items() if key != "results"},
+            }
+
+            if chromadb is None:
+                entry["chroma"] = {"error": "chromadb is not installed"}
+            else:
+                client = chromadb.PersistentClient(path=os.path.join(directory, "chroma"))
+                collection = client.get_or_create_collection(name="benchmark")
+                build_seconds = _fill_collection(collection, vectors, chunks_per_document, batch=min(5000, client.get_max_batch_size()))
+                chroma_whole = _query_latency(lambda query: collection.query(query_embeddings=[query.tolist()], n_results=top_k)["ids"][0], probes)
+                target_iter = iter(targets)
+                chroma_scoped = _query_latency(
+                    lambda query: collection.query(query_embeddings=[query.tolist()], n_results=top_k, where={"document_id": next(target_iter)})["ids"][0],
+                    probes,
+                )
+                entry["chroma"] = {
+                    "build_seconds": build_seconds,
+                    "query": {key: value for key, value in chroma_whole.items() if key != "results"},
+                    "document_query": {key: value for key, value in chroma_scoped.items() if key != "results"},
+                    "recall_at_k": _recall(chroma_whole["results"], whole["results"]),
+                    "document_recall_at_k": _recall(chroma_scoped["results"], scoped["results"]),
+                }
+        report[str(size)] = entry
+    return report
+
+
+def _clustered_vectors(count: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    """Normalised vectors around random topic centres; real embeddings cluster, uniform noise does not."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, count)] + 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def benchmark_ann(rows: int, dim: int, queries: int, top_k: int, nprobes: List[int], nlist: Optional[int] = None) -> Dict[str, object]:
+    """Recall@k and latency of the IVF index at each ``nprobe``, against exact brute-force search."""
+    vectors = _clustered_vectors(rows, dim, clusters=max(8, rows // 1000), seed=rows)
+    probes = _clustered_vectors(queries, dim, clusters=max(8, rows // 1000), seed=rows)
+    norms = np.einsum("ij,ij->i", vectors, vectors)
+
+    def exact(query: np.ndarray) -> List[int]:
+        distances = norms - 2.0 * (vectors @ query)
+        keep = np.argpartition(distances, top_k - 1)[:top_k]
+        return keep[np.argsort(distances[keep])].tolist()
+
+    brute_force = _query_latency(exact, probes)
+    started_at = time.perf_counter()
+    index = IVFIndex.build(vectors, nlist or default_nlist(rows))
+    build_seconds = round(time.perf_counter() - started_at, 2)
+
+    curve = []
+    for nprobe in nprobes:
+        measured = _query_latency(lambda query: index.search(query, top_k, nprobe, vectors, norms)[0].tolist(), probes)
+        curve.append({
+            "nprobe": nprobe,
+            "recall_at_k": _recall(measured["results"], brute_force["results"]),
+            "p50_ms": measured["p50_ms"],
+            "p95_ms": measured["p95_ms"],
+        })
+    return {
+        "rows": rows,
+        "dim": dim,
+        "nlist": index.nlist,
+        "build_seconds": build_seconds,
+        "brute_force": {key: value for key, value in brute_force.items() if key != "results"},
+        "ivf": curve,
+    }
+
+
+def synthetic_study_text(megabytes: float, seed: int = 0) -> str:
+    """Headed sections of repeated sample sentences, with page breaks, paragraphs and bullet lists."""
+    rng = np.random.default_rng(seed)
+    parts: List[str] = []
+    size = 0
+    section = 0
+    while size < megabytes * 1024 * 1024:
+        section += 1
+        lines = [f"Chapter {section} Revision notes"]
+        for _ in range(int(rng.integers(2, 6))):
+            sentences = rng.choice(SAMPLE_SENTENCES, size=int(rng.integers(3, 9)))
+            lines.append("")
+            lines.append(" ".join(sentences))
+        lines.append("")
+        lines.extend(f"- {sentence}" for sentence in rng.choice(SAMPLE_SENTENCES, size=3))
+        part = "\n".join(lines)
+        parts.append(part)
+        size += len(part) + 1
+    return PAGE_BREAK.join(parts)
+
+
+def benchmark_chunking(megabytes: List[float], chunk_size: int, chunk_overlap: int) -> Dict[str, object]:
+    """Chunking throughput on multi-MB inputs; a constant ms/MB across sizes shows it is linear."""
+    report: Dict[str, object] = {"chunk_size": chunk_size, "chunk_overlap": chunk_overlap, "inputs": []}
+    for size in megabytes:
+        text = synthetic_study_text(size)
+        for unit in SUPPORTED_UNITS:
+            # Token sizes are scaled so both units aim at chunks of about the same length.
+            scale = 1 if unit == "chars" else CHARS_PER_TOKEN
+            started_at = time.perf_counter()
+            chunks = chunk_text(text, chunk_size=chunk_size // scale, chunk_overlap=chunk_overlap // scale, unit=unit)
+            seconds = time.perf_counter() - started_at
+            report["inputs"].append({
+                "megabytes": size,
+                "unit": unit,
+                "chunks": len(chunks),
+                "seconds": round(seconds, 3),
+                "ms_per_mb": round(seconds * 1000 / size, 1),
+                "mean_chunk_chars": round(sum(len(chunk["text"]) for chunk in chunks) / max(1, len(chunks)), 1),
+            })
+    return report
+
+
+SUITES = {
+    "embeddings": lambda: benchmark_embeddings(
+        [name.strip() for name in os.getenv("RAG_BENCH_BACKENDS", ",".join(SUPPORTED_BACKENDS)).split(",") if name.strip()],
+        documents=int(os.getenv("RAG_BENCH_DOCUMENTS", "512")),
+        iterations=int(os.getenv("RAG_BENCH_ITERATIONS", "3")),
+    ),
+    "chunking": lambda: benchmark_chunking(
+        [float(size) for size in os.getenv("RAG_BENCH_CHUNK_MB", "1,4,16").split(",") if size.strip()],
+        chunk_size=int(os.getenv("RAG_CHUNK_SIZE", "700")),
+        chunk_overlap=int(os.getenv("RAG_CHUNK_OVERLAP", "100")),
+    ),
+    "office": lambda: benchmark_office_extraction(
+        paragraphs=int(os.getenv("RAG_BENCH_DOCX_PARAGRAPHS", "50000")),
+        slides=int(os.getenv("RAG_BENCH_PPTX_SLIDES", "500")),
+    ),
+    "vector_search": lambda: benchmark_vector_search(
+        [int(size) for size in os.getenv("RAG_BENCH_VECTOR_SIZES", "10000,100000,1000000").split(",") if size.strip()],
+        dim=int(os.getenv("RAG_BENCH_VECTOR_DIM", "384")),
+        queries=int(os.getenv("RAG_BENCH_QUERIES", "200")),
+        top_k=int(os.getenv("RAG_BENCH_TOP_K", "5")),
+        chunks_per_document=int(os.getenv("RAG_BENCH_CHUNKS_PER_DOCUMENT", "500")),
+    ),
+    "ann": lambda: benchmark_ann(
+        rows=int(os.getenv("RAG_BENCH_ANN_ROWS", "200000")),
+        dim=int(os.getenv("RAG_BENCH_VECTOR_DIM", "384")),
+        queries=int(os.getenv("RAG_BENCH_QUERIES", "200")),
+        top_k=int(os.getenv("RAG_BENCH_TOP_K", "5")),
+        nprobes=[int(value) for value in os.getenv("RAG_BENCH_NPROBES", "1,2,4,8,16,32,64").split(",") if value.strip()],
+        nlist=int(os.getenv("RAG_ANN_NLIST", "0")) or None,
+    ),
+}
+
+
+if __name__ == "__main__":
+    selected = sys.argv[1:] or list(SUITES)
+    report = {name: SUITES[name]() for name in selected}
+    print(json.dumps(report, indent=2, ensure_ascii=False))
@@ -3,114 +3,337 @@ import logging
 import os
 import threading
 import time
-from typing import Any, Dict, Optional
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
 _CACHE_TTL_SECONDS = int(os.getenv("RAG_CACHE_TTL_SECONDS", "300") or 300)
 _REDIS_URL = os.getenv("REDIS_URL", "").strip()
+# In-process L1 in front of Redis. Other workers' invalidations reach it only when its entries expire.
+_L1_TTL_SECONDS = float(os.getenv("RAG_CACHE_L1_TTL_SECONDS", "5") or 5)
+_L1_MAX_ENTRIES = int(os.getenv("RAG_CACHE_L1_MAX_ENTRIES", "2048") or 2048)
+# Empty values, e.g. a retrieval that found nothing, are kept for less time: the document may still be indexing.
+NEGATIVE_TTL_SECONDS = int(os.getenv("RAG_CACHE_NEGATIVE_TTL_SECONDS", "30") or 30)
+# One pooled client per process. Timeouts keep a hung Redis from stalling requests; after
+# FAILURE_THRESHOLD consecutive connection failures the circuit opens and the cache runs
+# locally for COOLDOWN_SECONDS before Redis is tried again.
+_REDIS_MAX_CONNECTIONS = int(os.getenv("RAG_CACHE_REDIS_MAX_CONNECTIONS", "32") or 32)
+_REDIS_SOCKET_TIMEOUT = float(os.getenv("RAG_CACHE_REDIS_SOCKET_TIMEOUT", "0.5") or 0.5)
+_REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv("RAG_CACHE_REDIS_HEALTH_CHECK_INTERVAL", "30") or 30)
+_REDIS_FAILURE_THRESHOLD = int(os.getenv("RAG_CACHE_REDIS_FAILURE_THRESHOLD", "3") or 3)
+_REDIS_COOLDOWN_SECONDS = float(os.getenv("RAG_CACHE_REDIS_COOLDOWN_SECONDS", "30") or 30)
 
-_local_cache: Dict[str, Dict[str, Any]] = {}
+# Tag for entries that depend on every document, such as searches across all uploads.
+GLOBAL_TAG = "*"
+
+# Stands in the L1 for a key Redis does not have, so repeated misses skip the round trip.
+_MISSING = object()
+
+_local_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_local_tags: Dict[str, Set[str]] = {}
 _cache_lock = threading.Lock()
+_stats = {"l1_hits": 0, "l1_negative_hits": 0, "redis_hits": 0, "misses": 0, "invalidated_entries": 0}
+
+_redis_client: Optional[Any] = None
+_redis_lock = threading.Lock()
+_breaker = {"failures": 0, "open_until": 0.0, "trips": 0, "skipped": 0}
 
 try:
     import redis
 except ImportError:  # pragma: no cover
     redis = None
 
+# Errors that mean Redis is unreachable, as opposed to a bad command or payload.
+_REDIS_DOWN_ERRORS = (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError, OSError) if redis else (OSError,)
+
 
 def _build_cache_key(key: str) -> str:
     return f"rag_cache:{key}"
 
 
+def _build_tag_key(tag: str) -> str:
+    return f"rag_cache_tag:{tag}"
+
+
 def _redis_available() -> bool:
     return bool(redis and _REDIS_URL)
 
 
 def _get_redis_client() -> Optional[Any]:
+    """Return the shared pooled client, or ``None`` without Redis or while the circuit is open.
+
+    The client is built on first use and never pinged up front: the pool checks idle connections
+    itself (``health_check_interval``), and failed operations report back via ``_redis_failed``.
+    """
+    global _redis_client
     if not _redis_available():
         return None
-    try:
-        client = redis.from_url(_REDIS_URL, decode_responses=True)
-        client.ping()
-        return client
-    except Exception as exc:
-        logger.warning("Redis cache unavailable: %s", exc)
-        return None
+    with _redis_lock:
+        if time.monotonic() < _breaker["open_until"]:
+            _breaker["skipped"] += 1
+            return None
+        if _redis_client is None:
+            try:
+                _redis_client = redis.Redis.from_url(
+                    _REDIS_URL,
+                    decode_responses=True,
+                    max_connections=_REDIS_MAX_CONNECTIONS,
+                    socket_timeout=_REDIS_SOCKET_TIMEOUT,
+                    socket_connect_timeout=_REDIS_SOCKET_TIMEOUT,
+                    health_check_interval=_REDIS_HEALTH_CHECK_INTERVAL,
+                )
+            except Exception as exc:
+                logger.warning("Redis cache client could not be created: %s", exc)
+                return None
+        return _redis_client
+
+
+def _redis_succeeded() -> None:
+    if _breaker["failures"]:
+        with _redis_lock:
+            _breaker["failures"] = 0
+
+
+def _redis_failed(operation: str, exc: Exception) -> None:
+    """Log a failed Redis operation and open the circuit if Redis looks unreachable."""
+    if not isinstance(exc, _REDIS_DOWN_ERRORS):
+        logger.warning("Redis cache %s failed: %s", operation, exc)
+        return
+    with _redis_lock:
+        # The count is only reset by a success, so a failed first call after a cool-down reopens at once.
+        _breaker["failures"] += 1
+        if _breaker["failures"] < _REDIS_FAILURE_THRESHOLD:
+            logger.warning("Redis cache %s failed: %s", operation, exc)
+            return
+        _breaker["open_until"] = time.monotonic() + _REDIS_COOLDOWN_SECONDS
+        _breaker["trips"] += 1
+    logger.warning("Redis cache unreachable (%s: %s); using the local cache for %ss", operation, exc, _REDIS_COOLDOWN_SECONDS)
+
+
+# Delete the lock only if it still holds our token, so an expired lock re-acquired by another worker is left alone.
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Delete every entry listed in the tag sets, then the sets, atomically so no entry is tagged in between.
+_INVALIDATE_TAGS_SCRIPT = """
+local removed = 0
+for _, tag in ipairs(KEYS) do
+    local members = redis.call("smembers", tag)
+    for index = 1, #members, 500 do
+        removed = removed + redis.call("del", unpack(members, index, math.min(index + 499, #members)))
+    end
+    redis.call("del", tag)
+end
+return removed
+"""
+
+LOCAL_LOCK_TOKEN = "local"
 
 
 def _normalize_value(value: Any) -> str:
     return json.dumps(value, sort_keys=True, ensure_ascii=False)
 
 
-def get_cache(key: str) -> Optional[Any]:
-    full_key = _build_cache_key(key)
-    client = _get_redis_client()
-    if client:
-        try:
-            cached = client.get(full_key)
-            if cached is None:
-                return None
-            return json.loads(cached)
-        except Exception as exc:
-            logger.warning("Redis cache read failed for %s: %s", full_key, exc)
-            return None
+def _is_empty(value: Any) -> bool:
+    return value is None or value == [] or value == {}
 
+
+def _local_get(full_key: str) -> Tuple[bool, Any]:
     with _cache_lock:
         entry = _local_cache.get(full_key)
-        if not entry:
-            return None
+        if entry is None:
+            return False, None
         if time.time() >= entry["expires_at"]:
-            del _local_cache[full_key]
-            return None
-        return entry["value"]
+            _local_drop(full_key)
+            return False, None
+        _local_cache.move_to_end(full_key)
+        if entry["value"] is _MISSING:
+            _stats["l1_negative_hits"] += 1
+            return True, None
+        _stats["l1_hits"] += 1
+        return True, entry["value"]
+
+
+def _local_drop(full_key: str) -> bool:
+    """Remove an entry and its tag memberships; the caller holds ``_cache_lock``."""
+    entry = _local_cache.pop(full_key, None)
+    if entry is None:
+        return False
+    for tag in entry["tags"]:
+        members = _local_tags.get(tag)
+        if members is not None:
+            members.discard(full_key)
+            if not members:
+                del _local_tags[tag]
+    return True
+
+
+def _local_set(full_key: str, value: Any, ttl: float, tags: Sequence[str]) -> None:
+    with _cache_lock:
+        _local_drop(full_key)
+        _local_cache[full_key] = {"expires_at": time.time() + ttl, "value": value, "tags": tuple(tags)}
+        for tag in tags:
+            _local_tags.setdefault(tag, set()).add(full_key)
+        while len(_local_cache) > _L1_MAX_ENTRIES:
+            _local_drop(next(iter(_local_cache)))
+
 
+def get_cache(key: str) -> Optional[Any]:
+    """Look ``key`` up in the in-process L1, then in Redis when it is configured."""
+    full_key = _build_cache_key(key)
+    found, value = _local_get(full_key)
+    if found:
+        return value
+
+    client = _get_redis_client()
+    if not client:
+        with _cache_lock:
+            _stats["misses"] += 1
+        return None
+    try:
+        cached = client.get(full_key)
+    except Exception as exc:
+        _redis_failed("read", exc)
+        return None
+    _redis_succeeded()
+    try:
+        payload = json.loads(cached) if cached is not None else None
+    except ValueError:
+        payload = None
+    # Entries are stored as {"value", "tags"}; anything else predates tagging and is treated as a miss.
+    if not isinstance(payload, dict) or "value" not in payload:
+        with _cache_lock:
+            _stats["misses"] += 1
+        _local_set(full_key, _MISSING, _L1_TTL_SECONDS, ())
+        return None
+    with _cache_lock:
+        _stats["redis_hits"] += 1
+    _local_set(full_key, payload["value"], _L1_TTL_SECONDS, payload.get("tags") or ())
+    return payload["value"]
+
+
+def set_cache(key: str, value: Any, ttl_seconds: Optional[int] = None, tags: Sequence[str] = ()) -> None:
+    """Store ``value`` under ``key``, tagged with the document ids it depends on.
 
-def set_cache(key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+    ``invalidate_document_cache`` drops exactly the entries tagged with that document (and those
+    tagged ``GLOBAL_TAG``). Empty values are kept for at most ``NEGATIVE_TTL_SECONDS``.
+    """
     full_key = _build_cache_key(key)
     ttl = ttl_seconds if ttl_seconds is not None else _CACHE_TTL_SECONDS
+    if _is_empty(value):
+        ttl = min(ttl, NEGATIVE_TTL_SECONDS)
+    tags = [str(tag) for tag in tags if tag]
     client = _get_redis_client()
     if client:
         try:
-            client.set(full_key, _normalize_value(value), ex=ttl)
+            pipeline = client.pipeline(transaction=False)
+            pipeline.set(full_key, _normalize_value({"value": value, "tags": tags}), ex=ttl)
+            for tag in tags:
+                pipeline.sadd(_build_tag_key(tag), full_key)
+                # Tag sets outlive their entries, so a shorter-lived entry never shortens a set.
+                pipeline.expire(_build_tag_key(tag), max(ttl, _CACHE_TTL_SECONDS))
+            pipeline.execute()
+            _redis_succeeded()
+            _local_set(full_key, value, min(ttl, _L1_TTL_SECONDS), tags)
             return
         except Exception as exc:
-            logger.warning("Redis cache write failed for %s: %s", full_key, exc)
+            _redis_failed("write", exc)
 
-    with _cache_lock:
-        _local_cache[full_key] = {
-            "expires_at": time.time() + ttl,
-            "value": value,
-        }
+    _local_set(full_key, value, ttl, tags)
 
 
 def invalidate_cache(key: str) -> None:
     full_key = _build_cache_key(key)
+    with _cache_lock:
+        _local_drop(full_key)
     client = _get_redis_client()
     if client:
         try:
             client.delete(full_key)
-            return
+            _redis_succeeded()
         except Exception as exc:
-            logger.warning("Redis cache delete failed for %s: %s", full_key, exc)
-
-    with _cache_lock:
-        _local_cache.pop(full_key, None)
+            _redis_failed("delete", exc)
 
 
 def invalidate_document_cache(document_id: str) -> None:
+    """Drop the entries tagged with ``document_id`` and the ``GLOBAL_TAG`` entries, in both levels.
+
+    The cost is proportional to those entries; other documents' entries are untouched.
+    """
     if not document_id:
         return
+    tags = [str(document_id), GLOBAL_TAG]
+    with _cache_lock:
+        removed = 0
+        for tag in tags:
+            for full_key in list(_local_tags.get(tag, ())):
+                removed += _local_drop(full_key)
+        _stats["invalidated_entries"] += removed
+
     client = _get_redis_client()
     if client:
         try:
-            for key in client.scan_iter(match="rag_cache:*"):
-                client.delete(key)
+            removed = client.eval(_INVALIDATE_TAGS_SCRIPT, len(tags), *(_build_tag_key(tag) for tag in tags))
+            _redis_succeeded()
+            with _cache_lock:
+                _stats["invalidated_entries"] += int(removed or 0)
         except Exception as exc:
-            logger.warning("Redis cache document invalidation failed for %s: %s", document_id, exc)
-        return
+            _redis_failed("document invalidation", exc)
 
+
+def get_cache_stats() -> Dict[str, Any]:
+    with _redis_lock:
+        open_for = max(0.0, _breaker["open_until"] - time.monotonic())
+        redis_stats = {
+            "circuit": "open" if open_for else "closed",
+            "open_for_seconds": round(open_for, 1),
+            "consecutive_failures": _breaker["failures"],
+            "trips": _breaker["trips"],
+            "skipped_operations": _breaker["skipped"],
+        }
     with _cache_lock:
-        keys_to_remove = [key for key in _local_cache if key.startswith("rag_cache:")]
-        for key in keys_to_remove:
-            _local_cache.pop(key, None)
+        return {
+            "backend": "redis" if _redis_available() else "local",
+            "l1_entries": len(_local_cache),
+            "l1_tags": len(_local_tags),
+            **_stats,
+            **({"redis": redis_stats} if _redis_available() else {}),
+        }
+
+
+def acquire_lock(key: str, ttl_seconds: float) -> Optional[str]:
+    """Try to take a cross-worker lock; return its token, or ``None`` if another worker holds it.
+
+    Without Redis there is nothing to coordinate with, so ``LOCAL_LOCK_TOKEN`` is returned
+    and in-process deduplication is left to the caller.
+    """
+    client = _get_redis_client()
+    if not client:
+        return LOCAL_LOCK_TOKEN
+    token = uuid.uuid4().hex
+    try:
+        acquired = client.set(f"rag_lock:{key}", token, nx=True, px=max(1, int(ttl_seconds * 1000)))
+    except Exception as exc:
+        _redis_failed("lock acquire", exc)
+        return LOCAL_LOCK_TOKEN
+    _redis_succeeded()
+    return token if acquired else None
+
+
+def release_lock(key: str, token: Optional[str]) -> None:
+    if not token or token == LOCAL_LOCK_TOKEN:
+        return
+    client = _get_redis_client()
+    if not client:
+        return
+    try:
+        client.eval(_RELEASE_LOCK_SCRIPT, 1, f"rag_lock:{key}", token)
+        _redis_succeeded()
+    except Exception as exc:
+        _redis_failed("lock release", exc)
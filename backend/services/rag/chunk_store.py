@@ -0,0 +1,182 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_STORE_PATH = os.getenv(
+    "RAG_CHUNK_STORE_PATH",
+    os.path.join(os.path.dirname(__file__), ".chroma_db", "chunk_embeddings.sqlite3"),
+)
+_DEDUP_ENABLED = str(os.getenv("RAG_CHUNK_DEDUP", "true")).strip().lower() in {"1", "true", "yes"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunk_embeddings (
+    content_hash TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (content_hash, namespace)
+);
+CREATE TABLE IF NOT EXISTS chunk_refs (
+    content_hash TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    PRIMARY KEY (content_hash, document_id)
+);
+CREATE INDEX IF NOT EXISTS idx_chunk_refs_document_id ON chunk_refs (document_id);
+"""
+
+
+class ChunkEmbeddingStore:
+    """Embeddings shared across documents, keyed by chunk content hash (SQLite, WAL mode).
+
+    Each document holds one reference per distinct chunk hash in ``chunk_refs``. An embedding
+    is dropped only when its last reference is released, so deleting one document never
+    removes vectors another document still uses.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get_many(self, namespace: str, hashes: Iterable[str]) -> Dict[str, np.ndarray]:
+        wanted = list(dict.fromkeys(hashes))
+        found: Dict[str, np.ndarray] = {}
+        connection = self._connect()
+        # Stay well below SQLite's bound-parameter limit.
+        for start in range(0, len(wanted), 500):
+            batch = wanted[start:start + 500]
+            placeholders = ",".join("?" for _ in batch)
+            rows = connection.execute(
+                f"SELECT content_hash, vector FROM chunk_embeddings WHERE namespace = ? AND content_hash IN ({placeholders})",
+                (namespace, *batch),
+            ).fetchall()
+            for content_hash, vector in rows:
+                found[content_hash] = np.frombuffer(vector, dtype=np.float32).copy()
+        with self._counter_lock:
+            self.hits += len(found)
+            self.misses += len(wanted) - len(found)
+        return found
+
+    def put_many(self, namespace: str, vectors: Mapping[str, np.ndarray]) -> None:
+        now = time.time()
+        rows = []
+        for content_hash, vector in vectors.items():
+            array = np.asarray(vector, dtype=np.float32).ravel()
+            rows.append((content_hash, namespace, int(array.shape[0]), array.tobytes(), now))
+        self._connect().executemany(
+            "INSERT OR IGNORE INTO chunk_embeddings (content_hash, namespace, dim, vector, created_at) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+
+    def _collect_orphans(self, connection: sqlite3.Connection, hashes: Iterable[str]) -> int:
+        removed = 0
+        for content_hash in hashes:
+            removed += connection.execute(
+                "DELETE FROM chunk_embeddings WHERE content_hash = ? "
+                "AND NOT EXISTS (SELECT 1 FROM chunk_refs WHERE chunk_refs.content_hash = ?)",
+                (content_hash, content_hash),
+            ).rowcount
+        return removed
+
+    def set_document_refs(self, document_id: str, hashes: Iterable[str]) -> int:
+        """Make ``hashes`` the document's references; returns the number of embeddings freed."""
+        document_id = str(document_id)
+        wanted = set(hashes)
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            current = {row[0] for row in connection.execute("SELECT content_hash FROM chunk_refs WHERE document_id = ?", (document_id,))}
+            released = current - wanted
+            connection.executemany(
+                "DELETE FROM chunk_refs WHERE content_hash = ? AND document_id = ?",
+                [(content_hash, document_id) for content_hash in released],
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO chunk_refs (content_hash, document_id) VALUES (?, ?)",
+                [(content_hash, document_id) for content_hash in wanted - current],
+            )
+            removed = self._collect_orphans(connection, released)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return removed
+
+    def release_document(self, document_id: str) -> int:
+        return self.set_document_refs(document_id, ())
+
+    def refcount(self, content_hash: str) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM chunk_refs WHERE content_hash = ?", (content_hash,)).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        connection = self._connect()
+        references, unique_chunks, documents = connection.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT content_hash), COUNT(DISTINCT document_id) FROM chunk_refs"
+        ).fetchone()
+        embeddings, size = connection.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM chunk_embeddings").fetchone()
+        with self._counter_lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "documents": documents,
+            "references": references,
+            "unique_chunks": unique_chunks,
+            "embeddings": embeddings,
+            "size_bytes": size,
+            "dedup_ratio": round(references / unique_chunks, 4) if unique_chunks else 0.0,
+            "embedding_hits": hits,
+            "embedding_misses": misses,
+            "embedding_hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_STORE: Optional[ChunkEmbeddingStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_chunk_store() -> Optional[ChunkEmbeddingStore]:
+    """Return the shared store, or ``None`` when ``RAG_CHUNK_DEDUP`` is off or the file cannot be opened."""
+    global _STORE
+    if not _DEDUP_ENABLED:
+        return None
+    with _STORE_LOCK:
+        if _STORE is None:
+            try:
+                _STORE = ChunkEmbeddingStore(_STORE_PATH)
+            except (OSError, sqlite3.Error) as exc:
+                logger.warning("Chunk embedding store unavailable at %s: %s", _STORE_PATH, exc)
+                return None
+        return _STORE
+
+
+def get_chunk_store_stats() -> Dict[str, Any]:
+    store = get_chunk_store()
+    if store is None:
+        return {"enabled": False}
+    try:
+        return {"enabled": True, **store.stats()}
+    except sqlite3.Error as exc:
+        return {"enabled": True, "error": str(exc)}
@@ -1,14 +1,162 @@
 import logging
-from typing import Any, Dict, List, Optional
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.text import CHARS_PER_TOKEN
 
 logger = logging.getLogger(__name__)
 
+CHUNK_SIZE = int(os.getenv("RAG_CHUNK_SIZE", "700") or 700)
+CHUNK_OVERLAP = int(os.getenv("RAG_CHUNK_OVERLAP", "100") or 100)
+CHUNK_UNIT = os.getenv("RAG_CHUNK_UNIT", "chars").strip().lower() or "chars"
+SUPPORTED_UNITS = ("chars", "tokens")
+
+# Separates pages when text is assembled page by page (``ingest_pages``); a hard section boundary.
+PAGE_BREAK = "\f"
+
+# Strength of the boundary in front of a unit: a line wrap is no boundary at all.
+_WRAP, _SENTENCE, _PARAGRAPH, _SECTION = 0, 1, 2, 3
+# A heading or page starts a new chunk once the current one is this full, a blank line once it is this full.
+_SECTION_MIN_FILL = 0.25
+_PARAGRAPH_MIN_FILL = 0.6
+_HEADING_MAX_CHARS = 120
+_HEADING_MAX_WORDS = 12
+
+# Every candidate boundary in one pass: a whitespace run containing a newline or page break, or the
+# spaces after sentence-ending punctuation (optionally closed by a quote or bracket) before a capital.
+# The lookbehind makes a whitespace run match only from its first character, which keeps this linear.
+_BOUNDARY = re.compile(
+    r"(?<![ \t\r])[ \t\r]*[\n\f]\s*"
+    r"|(?:(?<=[.!?])|(?<=[.!?][\"')\]]))[ \t]+(?=[\"'(\[]?[A-Z0-9])"
+)
+_HEADING_PREFIX = re.compile(r"#{1,6}\s|(?:chapter|section|unit|lesson|part|module|topic)\s+\w|\d+(?:\.\d+)+\.?\s+\S", re.IGNORECASE)
+_BULLET = re.compile(r"[ \t]*(?:[-*•▪‣●]|\d{1,3}[.)])\s")
+_WORD = re.compile(r"\S+")
+# Words and punctuation marks, the pieces BERT-style tokenizers split text into before WordPiece.
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+# Unbroken runs this long (URLs, hashes, base64) are not one vocabulary word; WordPiece splits them
+# into many pieces, estimated at ``CHARS_PER_TOKEN`` characters each.
+_LONG_WORD = re.compile(r"\w{21,}")
+
+
+def count_tokens(text: str, start: int = 0, end: Optional[int] = None) -> int:
+    """Approximate token count: words plus punctuation marks, a lower bound for WordPiece tokenizers.
+
+    Words longer than 20 characters count as one token per ``CHARS_PER_TOKEN`` characters.
+    """
+    end = len(text) if end is None else end
+    count = len(_TOKEN.findall(text, start, end))
+    for match in _LONG_WORD.finditer(text, start, end):
+        count += -(-len(match.group()) // CHARS_PER_TOKEN) - 1
+    return count
+
+
+def _is_heading(text: str, start: int, after_blank_line: bool) -> bool:
+    stop = text.find("\n", start, start + _HEADING_MAX_CHARS + 1)
+    if stop == -1:
+        if len(text) - start > _HEADING_MAX_CHARS:
+            return False
+        stop = len(text)
+    line = text[start:stop].strip()
+    if not line:
+        return False
+    if _HEADING_PREFIX.match(line):
+        return True
+    return (
+        after_blank_line
+        and len(line.split()) <= _HEADING_MAX_WORDS
+        and line[-1] not in ".!?,;:"
+        and (line[0].isupper() or line[0].isdigit())
+    )
+
+
+def _segment(text: str) -> List[Tuple[int, int, int]]:
+    """Split ``text`` into sentence-like units ``(start, end, boundary strength in front)``.
+
+    Units never include the whitespace around them, so chunk offsets come straight from them.
+    """
+    units: List[Tuple[int, int, int]] = []
+    position = 0
+    strength = _SECTION
+    for match in _BOUNDARY.finditer(text):
+        gap = match.group()
+        if PAGE_BREAK in gap:
+            found = _SECTION
+        elif "\n" not in gap:
+            found = _SENTENCE
+        else:
+            blank_line = gap.count("\n") >= 2
+            if _is_heading(text, match.end(), blank_line):
+                found = _SECTION
+            elif blank_line:
+                found = _PARAGRAPH
+            elif (match.start() and text[match.start() - 1] in ".!?:;") or _BULLET.match(text, match.end()):
+                found = _SENTENCE
+            else:
+                found = _WRAP
+        if found == _WRAP:
+            continue
+        if match.start() > position:
+            units.append((position, match.start(), strength))
+            strength = found
+        else:
+            strength = max(strength, found)
+        position = match.end()
+    if position < len(text):
+        units.append((position, len(text), strength))
+    return units
+
+
+def _split_long_unit(text: str, unit: Tuple[int, int, int], chunk_size: int, tokens: bool) -> List[Tuple[int, int, int]]:
+    """Split a unit longer than ``chunk_size`` at word boundaries (and inside over-long words).
+
+    In token mode an over-long word is cut every ``chunk_size * CHARS_PER_TOKEN`` characters,
+    which ``count_tokens`` counts as at most ``chunk_size`` tokens.
+    """
+    start, end, strength = unit
+    max_word_chars = chunk_size * CHARS_PER_TOKEN if tokens else chunk_size
+    words: List[Tuple[int, int]] = []
+    for match in _WORD.finditer(text, start, end):
+        word_start, word_end = match.span()
+        while word_end - word_start > max_word_chars or (tokens and count_tokens(text, word_start, word_end) > chunk_size):
+            cut = min(word_start + max_word_chars, word_end)
+            if tokens:
+                # Punctuation inside the word counts too, so back off until the piece fits.
+                while cut - word_start > 1 and count_tokens(text, word_start, cut) > chunk_size:
+                    cut = word_start + (cut - word_start) // 2
+            words.append((word_start, cut))
+            word_start = cut
+        words.append((word_start, word_end))
+
+    pieces: List[Tuple[int, int, int]] = []
+    piece_start, piece_end, piece_tokens = words[0][0], words[0][1], count_tokens(text, *words[0]) if tokens else 0
+    for word_start, word_end in words[1:]:
+        word_tokens = count_tokens(text, word_start, word_end) if tokens else 0
+        too_long = piece_tokens + word_tokens > chunk_size if tokens else word_end - piece_start > chunk_size
+        if too_long:
+            pieces.append((piece_start, piece_end, strength if not pieces else _WRAP))
+            piece_start, piece_tokens = word_start, 0
+        piece_end = word_end
+        piece_tokens += word_tokens
+    pieces.append((piece_start, piece_end, strength if not pieces else _WRAP))
+    return pieces
+
 
-def chunk_text(text: str, chunk_size: int = 700, chunk_overlap: int = 100) -> List[Dict[str, Any]]:
-    """Split text into overlapping chunks.
+def chunk_text(
+    text: str,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    unit: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Split text into overlapping chunks that follow the document's structure.
 
-    The function prefers ``langchain_text_splitters.RecursiveCharacterTextSplitter``
-    when available, and falls back to a simple overlapping sliding-window splitter.
+    Chunks are built from whole sentences, found with one pass over precomputed boundaries.
+    A new chunk starts at a heading or page break once the current chunk is a quarter full, and
+    at a blank line once it is 60% full; otherwise chunks fill up to ``chunk_size``. The overlap
+    is whole sentences and never reaches back across a heading or page break. Sentences longer
+    than a chunk are split between words. ``unit`` measures sizes in ``"chars"`` or ``"tokens"``
+    (``count_tokens``). ``start``/``end`` are offsets into the stripped text.
     """
     if text is None:
         return []
@@ -17,78 +165,67 @@ def chunk_text(text: str, chunk_size: int = 700, chunk_overlap: int = 100) -> Li
     if not normalized_text:
         return []
 
+    chunk_size = CHUNK_SIZE if chunk_size is None else chunk_size
+    chunk_overlap = CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap
+    unit = (unit or CHUNK_UNIT).strip().lower()
     if chunk_size <= 0:
         raise ValueError("chunk_size must be greater than zero")
     if chunk_overlap < 0:
         raise ValueError("chunk_overlap must be non-negative")
     if chunk_overlap >= chunk_size:
         raise ValueError("chunk_overlap must be smaller than chunk_size")
+    if unit not in SUPPORTED_UNITS:
+        raise ValueError(f"unit must be one of {', '.join(SUPPORTED_UNITS)}")
+
+    tokens = unit == "tokens"
+    units: List[Tuple[int, int, int]] = []
+    for item in _segment(normalized_text):
+        oversized = count_tokens(normalized_text, item[0], item[1]) > chunk_size if tokens else item[1] - item[0] > chunk_size
+        units.extend(_split_long_unit(normalized_text, item, chunk_size, tokens) if oversized else [item])
+
+    starts = [item[0] for item in units]
+    ends = [item[1] for item in units]
+    strengths = [item[2] for item in units]
+    # In token mode the whitespace between units holds no tokens, so lengths add up by prefix sums.
+    prefix = [0]
+    if tokens:
+        for start, end in zip(starts, ends):
+            prefix.append(prefix[-1] + count_tokens(normalized_text, start, end))
+
+    def length(first: int, last: int) -> int:
+        return prefix[last + 1] - prefix[first] if tokens else ends[last] - starts[first]
 
-    try:
-        from langchain_text_splitters import RecursiveCharacterTextSplitter
-    except Exception:
-        RecursiveCharacterTextSplitter = None
-
-    if RecursiveCharacterTextSplitter is not None:
-        try:
-            splitter = RecursiveCharacterTextSplitter(
-                chunk_size=chunk_size,
-                chunk_overlap=chunk_overlap,
-                separators=["\n\n", "\n", " ", ""],
-                keep_separator=False,
-            )
-            raw_chunks = splitter.split_text(normalized_text)
-            return _build_chunk_records(raw_chunks, normalized_text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-        except Exception as exc:  # pragma: no cover - defensive fallback
-            logger.warning("RecursiveCharacterTextSplitter failed, falling back to simple chunking: %s", exc)
-
-    return _fallback_chunk_text(normalized_text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-
-
-def _build_chunk_records(raw_chunks: List[str], text: str, chunk_size: int, chunk_overlap: int) -> List[Dict[str, Any]]:
-    records: List[Dict[str, Any]] = []
-    cursor = 0
-    for index, chunk_text in enumerate(raw_chunks):
-        if not chunk_text.strip():
-            continue
-        start = text.find(chunk_text, cursor)
-        if start == -1:
-            start = cursor
-        end = start + len(chunk_text)
-        records.append(
-            {
-                "chunk_id": index,
-                "text": chunk_text.strip(),
-                "start": start,
-                "end": end,
-            }
-        )
-        cursor = max(cursor + 1, end - chunk_overlap)
-    return records
-
-
-def _fallback_chunk_text(text: str, chunk_size: int, chunk_overlap: int) -> List[Dict[str, Any]]:
     chunks: List[Dict[str, Any]] = []
-    start = 0
-    index = 0
-    text_length = len(text)
-
-    while start < text_length:
-        end = min(text_length, start + chunk_size)
-        chunk_text = text[start:end].strip()
-        if not chunk_text:
-            break
-        chunks.append(
-            {
-                "chunk_id": index,
-                "text": chunk_text,
-                "start": start,
-                "end": end,
-            }
-        )
-        index += 1
-        if end >= text_length:
+    first = 0
+    while first < len(units):
+        last = first
+        while last + 1 < len(units) and length(first, last + 1) <= chunk_size:
+            filled = length(first, last)
+            if strengths[last + 1] == _SECTION and filled >= chunk_size * _SECTION_MIN_FILL:
+                break
+            if strengths[last + 1] == _PARAGRAPH and filled >= chunk_size * _PARAGRAPH_MIN_FILL:
+                break
+            last += 1
+
+        start, end = starts[first], ends[last]
+        chunks.append({
+            "chunk_id": len(chunks),
+            # Pages merged into one chunk keep their offsets; only the page break reads as a newline.
+            "text": normalized_text[start:end].replace(PAGE_BREAK, "\n"),
+            "start": start,
+            "end": end,
+        })
+        if last + 1 >= len(units):
             break
-        start = max(start + 1, end - chunk_overlap)
+
+        following = last + 1
+        if strengths[following] != _SECTION:
+            candidate = last
+            while candidate > first and length(candidate, last) <= chunk_overlap and length(candidate, last + 1) <= chunk_size:
+                following = candidate
+                if strengths[candidate] == _SECTION:
+                    break
+                candidate -= 1
+        first = following
 
     return chunks
@@ -0,0 +1,116 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from services.rag.chunking import CHUNK_OVERLAP, CHUNK_UNIT
+from utils.text import CHARS_PER_TOKEN, estimate_tokens, truncate_text
+
+# Neighbouring chunks share at most ``RAG_CHUNK_OVERLAP`` units of whole sentences. In token
+# units, a word or punctuation mark plus its space rarely takes more than this many characters.
+_MAX_CHARS_PER_CHUNK_TOKEN = 8
+_MAX_OVERLAP_CHARS = CHUNK_OVERLAP * (_MAX_CHARS_PER_CHUNK_TOKEN if CHUNK_UNIT == "tokens" else 1)
+# Shorter suffix/prefix matches are too likely to be coincidental.
+_MIN_OVERLAP_CHARS = 16
+
+
+def overlap_length(previous: str, following: str) -> int:
+    """Length of the longest suffix of ``previous`` that is also a prefix of ``following``."""
+    window = min(len(previous), len(following), _MAX_OVERLAP_CHARS)
+    if window < _MIN_OVERLAP_CHARS:
+        return 0
+    seed = following[:_MIN_OVERLAP_CHARS]
+    position = previous.find(seed, len(previous) - window)
+    while position != -1:
+        length = len(previous) - position
+        if following.startswith(previous[position:]):
+            return length
+        position = previous.find(seed, position + 1)
+    return 0
+
+
+def _position(chunk: Dict[str, Any]) -> Optional[Tuple[str, int]]:
+    metadata = chunk.get("metadata") or {}
+    document_id, chunk_id = metadata.get("document_id"), metadata.get("chunk_id")
+    if document_id in (None, "") or chunk_id is None:
+        return None
+    try:
+        return str(document_id), int(chunk_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def pack_chunks(chunks: Sequence[Dict[str, Any]], budget_tokens: int) -> Tuple[List[Dict[str, Any]], str, Dict[str, Any]]:
+    """Pack retrieved chunks into a prompt context of at most ``budget_tokens``.
+
+    Chunks are taken best score first. Neighbouring chunks of the same document (consecutive
+    ``chunk_id``) are merged in source order with their shared overlap removed, so the overlap
+    is neither paid for nor repeated. Merged runs are ordered by their best chunk. A chunk that
+    does not fit is skipped in favour of smaller ones; if even the best chunk does not fit, it is
+    cut at a sentence boundary. Returns the packed chunks, the context and a size report.
+    """
+    budget_tokens = max(1, int(budget_tokens))
+    entries: List[Tuple[int, Dict[str, Any], str]] = []
+    seen_texts = set()
+    for order, chunk in enumerate(chunks):
+        text = str(chunk.get("text", "")).strip()
+        if text and text not in seen_texts:
+            seen_texts.add(text)
+            entries.append((order, chunk, text))
+    input_tokens = sum(estimate_tokens(str(chunk.get("text", "")).strip()) for chunk in chunks)
+    entries.sort(key=lambda entry: (-float(entry[1].get("score", 0.0) or 0.0), entry[0]))
+
+    texts: Dict[int, str] = {}
+    positions: Dict[Tuple[str, int], int] = {}
+    used = 0
+    overlap_removed = 0
+    for order, chunk, text in entries:
+        position = _position(chunk)
+        shared = 0
+        if position is not None:
+            document_id, chunk_id = position
+            before, after = positions.get((document_id, chunk_id - 1)), positions.get((document_id, chunk_id + 1))
+            shared += overlap_length(texts[before], text) if before is not None else 0
+            shared += overlap_length(text, texts[after]) if after is not None else 0
+        cost = estimate_tokens(text) - estimate_tokens(text[:shared])
+        if used + cost > budget_tokens:
+            if texts:
+                continue
+            text = truncate_text(text, budget_tokens * CHARS_PER_TOKEN)
+            cost, shared = estimate_tokens(text), 0
+        texts[order] = text
+        used += cost
+        overlap_removed += estimate_tokens(text[:shared])
+        if position is not None:
+            positions[position] = order
+
+    # Group the packed chunks into runs of consecutive chunk ids within one document.
+    runs: List[List[int]] = []
+    located = sorted((position, order) for position, order in positions.items())
+    for index, (position, order) in enumerate(located):
+        if index and located[index - 1][0] == (position[0], position[1] - 1):
+            runs[-1].append(order)
+        else:
+            runs.append([order])
+    located_orders = set(positions.values())
+    runs.extend([order] for order in texts if order not in located_orders)
+    rank = {order: index for index, (order, _, _) in enumerate(entries)}
+    runs.sort(key=lambda run: min(rank[order] for order in run))
+
+    parts: List[str] = []
+    packed: List[Dict[str, Any]] = []
+    for run in runs:
+        merged = texts[run[0]]
+        for order in run[1:]:
+            shared = overlap_length(merged, texts[order])
+            merged = f"{merged}{texts[order][shared:]}" if shared else f"{merged} {texts[order]}"
+        parts.append(merged)
+        packed.extend(chunks[order] for order in run)
+
+    context = "\n\n".join(parts)
+    return packed, context, {
+        "budget_tokens": budget_tokens,
+        "tokens": estimate_tokens(context),
+        "input_tokens": input_tokens,
+        "overlap_tokens_removed": overlap_removed,
+        "chunks_packed": len(packed),
+        "chunks_dropped": len(chunks) - len(packed),
+        "merged_runs": sum(1 for run in runs if len(run) > 1),
+    }
@@ -0,0 +1,140 @@
+import logging
+import os
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+MAX_SEQ_LENGTH = 256
+
+SUPPORTED_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# ONNX exports published in the model repository; the quint8 AVX2 build runs on any x86-64 CPU.
+_ONNX_FILES = {
+    "onnx": "onnx/model.onnx",
+    "onnx-int8": "onnx/model_quint8_avx2.onnx",
+}
+
+
+class TorchEmbeddingBackend:
+    """The sentence-transformers PyTorch model."""
+
+    name = "torch"
+
+    def __init__(self, model_name: str = MODEL_NAME):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as exc:
+            raise RuntimeError(
+                "sentence-transformers is required. Install it in the backend environment."
+            ) from exc
+
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts: Sequence[str], normalize_embeddings: bool = True, convert_to_numpy: bool = True) -> np.ndarray:
+        return self.model.encode(list(texts), normalize_embeddings=normalize_embeddings, convert_to_numpy=True)
+
+
+class OnnxEmbeddingBackend:
+    """ONNX Runtime inference with the model's own tokenizer, mean pooling and L2 normalization.
+
+    Produces the same vectors as ``TorchEmbeddingBackend`` without importing torch.
+    """
+
+    def __init__(
+        self,
+        name: str = "onnx",
+        model_name: str = MODEL_NAME,
+        model_dir: Optional[str] = None,
+        onnx_file: Optional[str] = None,
+        session: Optional[Any] = None,
+        tokenizer: Optional[Any] = None,
+        batch_size: int = 32,
+    ):
+        self.name = name
+        self.batch_size = max(1, int(batch_size))
+        self.onnx_file = onnx_file or _ONNX_FILES.get(name, _ONNX_FILES["onnx"])
+        self.tokenizer = tokenizer or self._load_tokenizer(model_name, model_dir)
+        self.session = session or self._load_session(model_name, model_dir, self.onnx_file)
+        self.input_names = {item.name for item in self.session.get_inputs()}
+
+    @staticmethod
+    def _resolve(model_name: str, model_dir: Optional[str], filename: str) -> str:
+        if model_dir:
+            return os.path.join(model_dir, filename)
+        try:
+            from huggingface_hub import hf_hub_download
+        except ImportError as exc:
+            raise RuntimeError("huggingface_hub is required to download ONNX embedding files; set RAG_EMBED_MODEL_DIR instead.") from exc
+        return hf_hub_download(model_name, filename)
+
+    def _load_tokenizer(self, model_name: str, model_dir: Optional[str]) -> Any:
+        try:
+            from tokenizers import Tokenizer
+        except ImportError as exc:
+            raise RuntimeError("tokenizers is required for the ONNX embedding backend.") from exc
+
+        tokenizer = Tokenizer.from_file(self._resolve(model_name, model_dir, "tokenizer.json"))
+        tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        tokenizer.enable_padding()
+        return tokenizer
+
+    def _load_session(self, model_name: str, model_dir: Optional[str], onnx_file: str) -> Any:
+        try:
+            import onnxruntime
+        except ImportError as exc:
+            raise RuntimeError("onnxruntime is required for RAG_EMBED_BACKEND=onnx/onnx-int8. Install onnxruntime.") from exc
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = int(os.getenv("RAG_EMBED_ONNX_THREADS", "0") or 0)
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        return onnxruntime.InferenceSession(
+            self._resolve(model_name, model_dir, onnx_file),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([item.ids for item in encodings], dtype=np.int64)
+        attention_mask = np.array([item.attention_mask for item in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        token_embeddings = self.session.run(None, {key: value for key, value in feeds.items() if key in self.input_names})[0]
+
+        mask = attention_mask[..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        return summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, texts: Sequence[str], normalize_embeddings: bool = True, convert_to_numpy: bool = True) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, 384), dtype=np.float32)
+        pooled = np.concatenate([self._encode_batch(texts[start:start + self.batch_size]) for start in range(0, len(texts), self.batch_size)])
+        if normalize_embeddings:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+
+def get_backend_name() -> str:
+    name = str(os.getenv("RAG_EMBED_BACKEND", "torch") or "torch").strip().lower()
+    if name not in SUPPORTED_BACKENDS:
+        logger.warning("Invalid RAG_EMBED_BACKEND=%s, falling back to torch", name)
+        return "torch"
+    return name
+
+
+def create_backend(name: Optional[str] = None) -> Any:
+    name = name or get_backend_name()
+    if name == "torch":
+        return TorchEmbeddingBackend()
+    return OnnxEmbeddingBackend(
+        name=name,
+        model_dir=os.getenv("RAG_EMBED_MODEL_DIR") or None,
+        onnx_file=os.getenv("RAG_EMBED_ONNX_FILE") or None,
+    )
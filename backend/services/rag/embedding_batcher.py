@@ -0,0 +1,136 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+_LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class Histogram:
+    """Fixed-bucket histogram; ``counts[i]`` holds observations ``<= buckets[i]``, the last slot the overflow."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += 1
+        self.sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"le_{bound:g}" for bound in self.buckets] + ["inf"]
+        return {
+            "count": self.total,
+            "mean": round(self.sum / self.total, 3) if self.total else 0.0,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class EmbeddingBatcher:
+    """Collect concurrent embedding requests into micro-batches for one ``encode`` call each.
+
+    A batch is closed when it holds ``max_batch_size`` texts or ``max_wait_ms`` has passed
+    since its first request arrived. A single request larger than the batch size is encoded
+    on its own.
+    """
+
+    def __init__(self, encode: Callable[[List[str]], np.ndarray], *, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.encode = encode
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_seconds = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue: "queue.Queue[Tuple[List[str], Future, float]]" = queue.Queue()
+        self._carry: Optional[Tuple[List[str], Future, float]] = None
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batch_sizes = Histogram(_BATCH_SIZE_BUCKETS)
+        self.request_latency_ms = Histogram(_LATENCY_BUCKETS_MS)
+        self.encode_latency_ms = Histogram(_LATENCY_BUCKETS_MS)
+        self.batches = 0
+        self.requests = 0
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def submit(self, texts: Sequence[str]) -> Future:
+        future: Future = Future()
+        self._queue.put((list(texts), future, time.perf_counter()))
+        self._ensure_worker()
+        return future
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return self.submit(texts).result()
+
+    def _collect(self) -> List[Tuple[List[str], Future, float]]:
+        first, self._carry = self._carry, None
+        batch = [first if first is not None else self._queue.get()]
+        size = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait_seconds
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if size + len(item[0]) > self.max_batch_size:
+                # Start the next batch with it instead of overfilling this one.
+                self._carry = item
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            texts = [text for item_texts, _, _ in batch for text in item_texts]
+            started = time.perf_counter()
+            try:
+                vectors = np.asarray(self.encode(texts), dtype=np.float32)
+            except Exception as exc:
+                for _, future, _ in batch:
+                    future.set_exception(exc)
+                continue
+            finished = time.perf_counter()
+
+            offset = 0
+            with self._stats_lock:
+                self.batches += 1
+                self.requests += len(batch)
+                self.batch_sizes.observe(len(texts))
+                self.encode_latency_ms.observe((finished - started) * 1000)
+                for item_texts, _, enqueued_at in batch:
+                    self.request_latency_ms.observe((finished - enqueued_at) * 1000)
+            for item_texts, future, _ in batch:
+                future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_seconds * 1000,
+                "queued": self._queue.qsize(),
+                "batches": self.batches,
+                "requests": self.requests,
+                "batch_size": self.batch_sizes.snapshot(),
+                "request_latency_ms": self.request_latency_ms.snapshot(),
+                "encode_latency_ms": self.encode_latency_ms.snapshot(),
+            }
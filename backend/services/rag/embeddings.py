@@ -1,29 +1,71 @@
 import logging
-from typing import Any, Iterable, List, Sequence, Union
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
 
 import numpy as np
 
+from services.rag.embedding_backends import MODEL_NAME, create_backend, get_backend_name
+from services.rag.embedding_batcher import EmbeddingBatcher
+from services.rag.query_cache import get_query_embedding_cache
+
 logger = logging.getLogger(__name__)
 
-_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+_MODEL_NAME = MODEL_NAME
 _MODEL = None
+_MODEL_LOCK = threading.Lock()
+
+_BATCHING_ENABLED = str(os.getenv("RAG_EMBED_BATCHING", "true")).strip().lower() in {"1", "true", "yes"}
+_MAX_BATCH_SIZE = int(os.getenv("RAG_EMBED_MAX_BATCH_SIZE", "32") or 32)
+_MAX_WAIT_MS = float(os.getenv("RAG_EMBED_MAX_WAIT_MS", "5") or 5)
+_BATCHER: Optional[EmbeddingBatcher] = None
+_BATCHER_LOCK = threading.Lock()
 
 
 def load_model() -> Any:
-    """Load the sentence-transformers model once and reuse it."""
+    """Load the embedding backend selected by ``RAG_EMBED_BACKEND`` once and reuse it."""
     global _MODEL
     if _MODEL is None:
-        try:
-            from sentence_transformers import SentenceTransformer
-        except ImportError as exc:
-            raise RuntimeError(
-                "sentence-transformers is required. Install it in the backend environment."
-            ) from exc
-
-        _MODEL = SentenceTransformer(_MODEL_NAME)
+        with _MODEL_LOCK:
+            if _MODEL is None:
+                _MODEL = create_backend()
+                logger.info("Loaded %s embedding backend for %s", _MODEL.name, _MODEL_NAME)
     return _MODEL
 
 
+def get_embedding_namespace() -> str:
+    # Quantized backends produce slightly different vectors, so they must not share cached entries.
+    return f"{_MODEL_NAME}:{get_backend_name()}"
+
+
+def _encode(texts: List[str]) -> np.ndarray:
+    model = load_model()
+    return model.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    global _BATCHER
+    with _BATCHER_LOCK:
+        if _BATCHER is None:
+            _BATCHER = EmbeddingBatcher(_encode, max_batch_size=_MAX_BATCH_SIZE, max_wait_ms=_MAX_WAIT_MS)
+        return _BATCHER
+
+
+def _encode_texts(texts: List[str]) -> np.ndarray:
+    """Encode through the shared micro-batcher so concurrent callers share ``encode`` calls."""
+    if _BATCHING_ENABLED:
+        return get_embedding_batcher().embed(texts)
+    return np.asarray(_encode(texts), dtype=np.float32)
+
+
+def get_embedding_stats() -> Dict[str, Any]:
+    query_cache = get_query_embedding_cache(get_embedding_namespace()).stats()
+    backend = {"backend": get_backend_name(), "loaded": _MODEL is not None}
+    if not _BATCHING_ENABLED:
+        return {**backend, "batching": False, "query_cache": query_cache}
+    return {**backend, "batching": True, **get_embedding_batcher().stats(), "query_cache": query_cache}
+
+
 def embed_text(text: str) -> np.ndarray:
     """Return a single embedding vector for a string."""
     if text is None:
@@ -33,8 +75,7 @@ def embed_text(text: str) -> np.ndarray:
     if not cleaned_text:
         return np.zeros(384, dtype=np.float32)
 
-    model = load_model()
-    embedding = model.encode([cleaned_text], normalize_embeddings=True, convert_to_numpy=True)
+    embedding = _encode_texts([cleaned_text])
     return np.asarray(embedding[0], dtype=np.float32)
 
 
@@ -54,11 +95,19 @@ def embed_documents(chunks: Sequence[Union[str, dict]]) -> np.ndarray:
     if not any(texts):
         return np.empty((0, 384), dtype=np.float32)
 
-    model = load_model()
-    embeddings = model.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+    embeddings = _encode_texts(texts)
     return np.asarray(embeddings, dtype=np.float32)
 
 
 def embed_query(question: str) -> np.ndarray:
-    """Return an embedding vector for a query string."""
-    return embed_text(question)
+    """Return an embedding vector for a query string, reusing cached vectors for repeated questions."""
+    if question is None or not str(question).strip():
+        return embed_text(question)
+
+    query_cache = get_query_embedding_cache(get_embedding_namespace())
+    cached = query_cache.get(question)
+    if cached is not None:
+        return cached
+    vector = embed_text(question)
+    query_cache.set(question, vector)
+    return vector
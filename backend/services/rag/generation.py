@@ -1,10 +1,13 @@
+import asyncio
 import json
 import logging
 import os
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
+from services.llm.config import get_active_provider_name, get_context_token_budget
 from services.llm.factory import create_provider
+from services.llm.response_cache import llm_cache_accept, llm_cache_feature
 from services.rag.parser import parse_flashcards, parse_fill_blanks, parse_json, parse_mcqs, parse_true_false
 from services.rag.prompts import (
     FILL_BLANK_PROMPT_TEMPLATE,
@@ -14,6 +17,8 @@ from services.rag.prompts import (
     SUMMARY_PROMPT_TEMPLATE,
     TRUE_FALSE_PROMPT_TEMPLATE,
 )
+from services.rag import reranker
+from services.rag.context_packer import pack_chunks
 from services.rag.retriever import retrieve_chunks
 
 logger = logging.getLogger(__name__)
@@ -22,8 +27,9 @@ TOP_K = int(os.getenv("RAG_QA_TOP_K", "5"))
 MIN_SCORE = float(os.getenv("RAG_QA_MIN_SCORE", "0.15"))
 
 
-def _build_context(chunks: List[Dict[str, Any]]) -> str:
-    return "\n\n".join(str(item.get("text", "")).strip() for item in chunks if str(item.get("text", "")).strip())
+def _build_context(chunks: List[Dict[str, Any]], feature: str = "qa") -> Tuple[List[Dict[str, Any]], str, Dict[str, Any]]:
+    """Pack ``chunks`` into the active provider's context budget for ``feature``."""
+    return pack_chunks(chunks, get_context_token_budget(get_active_provider_name(), feature))
 
 
 def _prepare_context(
@@ -32,19 +38,33 @@ def _prepare_context(
     document_id: Optional[str] = None,
     top_k: Optional[int] = None,
     min_score: Optional[float] = None,
-) -> Tuple[List[Dict[str, Any]], str, List[float]]:
+    feature: str = "qa",
+) -> Tuple[List[Dict[str, Any]], str, List[float], Dict[str, Any]]:
+    """Retrieve and pack the context chunks; the last item reports re-ranking and packing."""
+    started_at = time.perf_counter()
     selected_top_k = top_k if top_k is not None else TOP_K
     selected_min_score = min_score if min_score is not None else MIN_SCORE
+    info: Dict[str, Any] = {}
+    results: List[Dict[str, Any]] = []
 
     if document_id:
-        results = retrieve_chunks(question, top_k=selected_top_k, document_id=document_id, min_score=selected_min_score)
+        results = retrieve_chunks(question, top_k=reranker.candidate_count(selected_top_k), document_id=document_id, min_score=selected_min_score)
+        results, rerank_info = reranker.rerank(question, results, selected_top_k, started_at=started_at)
+        if rerank_info is not None:
+            info["rerank"] = rerank_info
     elif source_text:
         from services.rag.qa import _fallback_retrieve_from_text as fallback_retrieve
 
         chunks, scores = fallback_retrieve(source_text, question, selected_top_k)
-        return [{"text": chunk, "score": score} for chunk, score in zip(chunks, scores)], _build_context([{"text": chunk, "score": score} for chunk, score in zip(chunks, scores)]), scores
+        results = [{"text": chunk, "score": score} for chunk, score in zip(chunks, scores)]
+
+    packed, context, info["context"] = _build_context(results, feature)
+    return packed, context, [float(item.get("score", 0.0) or 0.0) for item in packed], info
 
-    return results, _build_context(results), [float(item.get("score", 0.0) or 0.0) for item in results]
+
+def _with_retrieval_info(result: Tuple[Any, Dict[str, Any]], info: Dict[str, Any]) -> Tuple[Any, Dict[str, Any]]:
+    result[1].update(info)
+    return result
 
 
 def _prompt_text(feature: str, context: str, question: Optional[str] = None) -> str:
@@ -63,9 +83,16 @@ def _prompt_text(feature: str, context: str, question: Optional[str] = None) ->
     raise ValueError(f"Unsupported feature: {feature}")
 
 
-def _call_llm(prompt: str, feature: str, max_output_tokens: int = 1200) -> str:
-    provider = create_provider()
-    response = provider.generate(prompt, max_output_tokens=max_output_tokens, response_mime_type="application/json")
+def _llm_request(feature: str, context: str, question: Optional[str] = None) -> Tuple[str, int, str]:
+    """Return the prompt, token budget and response type for a feature's LLM call."""
+    if feature == "qa":
+        return QA_PROMPT_TEMPLATE.format(context=context, question=question or ""), 900, "text/plain"
+    return _prompt_text(feature, context, question), 1200, "application/json"
+
+
+def _normalize_llm_output(feature: str, response: str) -> str:
+    if feature == "qa":
+        return response
     data = parse_json(response)
     if isinstance(data, dict):
         return str(data.get("text") or "")
@@ -88,78 +115,75 @@ def _safe_parse(feature: str, payload: str) -> Any:
     raise ValueError(f"Unsupported feature: {feature}")
 
 
-def _run_generation(
-    feature: str,
-    question: Optional[str] = None,
-    source_text: Optional[str] = None,
-    document_id: Optional[str] = None,
-    top_k: Optional[int] = None,
-    min_score: Optional[float] = None,
-) -> Tuple[Any, Dict[str, Any]]:
-    started_at = time.perf_counter()
-    retrieval_started = time.perf_counter()
+def _parses_as(feature: str) -> Callable[[str], Any]:
+    """Cache check for ``llm_cache_accept``: only responses that parse into a result are stored."""
+    return lambda response: _safe_parse(feature, _normalize_llm_output(feature, response))
 
-    chunks, context, scores = _prepare_context(question or "", source_text, document_id, top_k, min_score)
-    retrieval_time = time.perf_counter() - retrieval_started
 
-    if not context:
-        if feature == "qa":
-            payload = "I couldn't find this information in the uploaded study material."
-        elif feature == "summary":
-            payload = {"summary": ""}
-        elif feature == "mcq":
-            payload = []
-        elif feature == "flashcard":
-            payload = []
-        elif feature == "true_false":
-            payload = []
-        elif feature == "fill_blank":
-            payload = []
-        else:
-            payload = None
+def _empty_context_result(feature: str, started_at: float, retrieval_time: float) -> Tuple[Any, Dict[str, Any]]:
+    if feature == "qa":
+        payload = "I couldn't find this information in the uploaded study material."
+    elif feature == "summary":
+        payload = {"summary": ""}
+    elif feature == "mcq":
+        payload = []
+    elif feature == "flashcard":
+        payload = []
+    elif feature == "true_false":
+        payload = []
+    elif feature == "fill_blank":
+        payload = []
+    else:
+        payload = None
 
-        return (
-            payload,
-            {
-                "feature": feature,
-                "retrieved_chunk_count": 0,
-                "scores": [],
-                "retrieval_time": round(retrieval_time, 4),
-                "llm_time": 0.0,
-                "total_time": round(time.perf_counter() - started_at, 4),
-                "error": "No relevant context was found.",
-            },
-        )
+    return (
+        payload,
+        {
+            "feature": feature,
+            "retrieved_chunk_count": 0,
+            "scores": [],
+            "retrieval_time": round(retrieval_time, 4),
+            "llm_time": 0.0,
+            "total_time": round(time.perf_counter() - started_at, 4),
+            "error": "No relevant context was found.",
+        },
+    )
 
-    prompt = _prompt_text(feature, context, question)
-    prompt_length = len(prompt)
 
-    llm_started = time.perf_counter()
-    try:
-        if feature == "qa":
-            provider = create_provider()
-            llm_output = provider.generate(
-                QA_PROMPT_TEMPLATE.format(context=context, question=question or ""),
-                max_output_tokens=900,
-                response_mime_type="text/plain",
-            )
-        else:
-            llm_output = _call_llm(prompt, feature)
-    except Exception as exc:
-        logger.exception("LLM generation failed for feature=%s", feature)
-        return (
-            None,
-            {
-                "feature": feature,
-                "retrieved_chunk_count": len(chunks),
-                "scores": scores,
-                "retrieval_time": round(retrieval_time, 4),
-                "llm_time": round(time.perf_counter() - llm_started, 4),
-                "total_time": round(time.perf_counter() - started_at, 4),
-                "error": str(exc),
-            },
-        )
+def _llm_failure_result(
+    feature: str,
+    exc: Exception,
+    chunks: List[Dict[str, Any]],
+    scores: List[float],
+    started_at: float,
+    retrieval_time: float,
+    llm_started: float,
+) -> Tuple[Any, Dict[str, Any]]:
+    logger.exception("LLM generation failed for feature=%s", feature)
+    return (
+        None,
+        {
+            "feature": feature,
+            "retrieved_chunk_count": len(chunks),
+            "scores": scores,
+            "retrieval_time": round(retrieval_time, 4),
+            "llm_time": round(time.perf_counter() - llm_started, 4),
+            "total_time": round(time.perf_counter() - started_at, 4),
+            "error": str(exc),
+        },
+    )
+
 
+def _finish_generation(
+    feature: str,
+    llm_output: str,
+    chunks: List[Dict[str, Any]],
+    scores: List[float],
+    prompt_length: int,
+    started_at: float,
+    retrieval_time: float,
+    llm_started: float,
+) -> Tuple[Any, Dict[str, Any]]:
     llm_time = time.perf_counter() - llm_started
     parsing_started = time.perf_counter()
 
@@ -206,8 +230,77 @@ def _run_generation(
     )
 
 
-def generate_answer(question: str, document_id: Optional[str] = None, top_k: Optional[int] = None, min_score: Optional[float] = None) -> Tuple[str, Dict[str, Any]]:
-    return _run_generation("qa", question=question, document_id=document_id, top_k=top_k, min_score=min_score)
+def _run_generation(
+    feature: str,
+    question: Optional[str] = None,
+    source_text: Optional[str] = None,
+    document_id: Optional[str] = None,
+    top_k: Optional[int] = None,
+    min_score: Optional[float] = None,
+) -> Tuple[Any, Dict[str, Any]]:
+    started_at = time.perf_counter()
+    retrieval_started = time.perf_counter()
+
+    chunks, context, scores, retrieval_info = _prepare_context(question or "", source_text, document_id, top_k, min_score, feature)
+    retrieval_time = time.perf_counter() - retrieval_started
+
+    if not context:
+        return _with_retrieval_info(_empty_context_result(feature, started_at, retrieval_time), retrieval_info)
+
+    prompt, max_output_tokens, response_mime_type = _llm_request(feature, context, question)
+
+    llm_started = time.perf_counter()
+    try:
+        provider = create_provider()
+        with llm_cache_feature(feature), llm_cache_accept(_parses_as(feature)):
+            response = provider.generate(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type)
+        llm_output = _normalize_llm_output(feature, response)
+    except Exception as exc:
+        return _with_retrieval_info(_llm_failure_result(feature, exc, chunks, scores, started_at, retrieval_time, llm_started), retrieval_info)
+
+    return _with_retrieval_info(_finish_generation(feature, llm_output, chunks, scores, len(prompt), started_at, retrieval_time, llm_started), retrieval_info)
+
+
+async def _arun_generation(
+    feature: str,
+    question: Optional[str] = None,
+    source_text: Optional[str] = None,
+    document_id: Optional[str] = None,
+    top_k: Optional[int] = None,
+    min_score: Optional[float] = None,
+) -> Tuple[Any, Dict[str, Any]]:
+    """Async ``_run_generation``: retrieval runs in a worker thread and the LLM call awaits ``agenerate``."""
+    started_at = time.perf_counter()
+    retrieval_started = time.perf_counter()
+
+    chunks, context, scores, retrieval_info = await asyncio.to_thread(_prepare_context, question or "", source_text, document_id, top_k, min_score, feature)
+    retrieval_time = time.perf_counter() - retrieval_started
+
+    if not context:
+        return _with_retrieval_info(_empty_context_result(feature, started_at, retrieval_time), retrieval_info)
+
+    prompt, max_output_tokens, response_mime_type = _llm_request(feature, context, question)
+
+    llm_started = time.perf_counter()
+    try:
+        provider = create_provider()
+        with llm_cache_feature(feature), llm_cache_accept(_parses_as(feature)):
+            response = await provider.agenerate(prompt, max_output_tokens=max_output_tokens, response_mime_type=response_mime_type)
+        llm_output = _normalize_llm_output(feature, response)
+    except Exception as exc:
+        return _with_retrieval_info(_llm_failure_result(feature, exc, chunks, scores, started_at, retrieval_time, llm_started), retrieval_info)
+
+    return _with_retrieval_info(_finish_generation(feature, llm_output, chunks, scores, len(prompt), started_at, retrieval_time, llm_started), retrieval_info)
+
+
+def generate_answer(
+    question: str,
+    document_id: Optional[str] = None,
+    top_k: Optional[int] = None,
+    min_score: Optional[float] = None,
+    source_text: Optional[str] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    return _run_generation("qa", question=question, source_text=source_text, document_id=document_id, top_k=top_k, min_score=min_score)
 
 
 def generate_summary(source_text: Optional[str] = None, document_id: Optional[str] = None, top_k: Optional[int] = None, min_score: Optional[float] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
@@ -228,3 +321,33 @@ def generate_true_false(source_text: Optional[str] = None, document_id: Optional
 
 def generate_fill_blanks(source_text: Optional[str] = None, document_id: Optional[str] = None, top_k: Optional[int] = None, min_score: Optional[float] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     return _run_generation("fill_blank", source_text=source_text, document_id=document_id, top_k=top_k, min_score=min_score)
+
+
+async def agenerate_answer(
+    question: str,
+    document_id: Optional[str] = None,
+    top_k: Optional[int] = None,
+    min_score: Optional[float] = None,
+    source_text: Optional[str] = None,
+) -> Tuple[str, Dict[str, Any]]:
+    return await _arun_generation("qa", question=question, source_text=source_text, document_id=document_id, top_k=top_k, min_score=min_score)
+
+
+async def agenerate_summary(source_text: Optional[str] = None, document_id: Optional[str] = None, top_k: Optional[int] = None, min_score: Optional[float] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    return await _arun_generation("summary", source_text=source_text, document_id=document_id, top_k=top_k, min_score=min_score)
+
+
+async def agenerate_mcqs(source_text: Optional[str] = None, document_id: Optional[str] = None, top_k: Optional[int] = None, min_score: Optional[float] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    return await _arun_generation("mcq", source_text=source_text, document_id=document_id, top_k=top_k, min_score=min_score)
+
+
+async def agenerate_flashcards(source_text: Optional[str] = None, document_id: Optional[str] = None, top_k: Optional[int] = None, min_score: Optional[float] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    return await _arun_generation("flashcard", source_text=source_text, document_id=document_id, top_k=top_k, min_score=min_score)
+
+
+async def agenerate_true_false(source_text: Optional[str] = None, document_id: Optional[str] = None, top_k: Optional[int] = None, min_score: Optional[float] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    return await _arun_generation("true_false", source_text=source_text, document_id=document_id, top_k=top_k, min_score=min_score)
+
+
+async def agenerate_fill_blanks(source_text: Optional[str] = None, document_id: Optional[str] = None, top_k: Optional[int] = None, min_score: Optional[float] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    return await _arun_generation("fill_blank", source_text=source_text, document_id=document_id, top_k=top_k, min_score=min_score)
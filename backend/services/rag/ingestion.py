@@ -1,13 +1,214 @@
 import logging
+import os
+import sqlite3
 import time
-from typing import Any, Dict, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
-from services.rag.chunking import chunk_text
-from services.rag.embeddings import embed_documents
+import numpy as np
+
+from services.rag.chunking import PAGE_BREAK, chunk_text
+from services.rag.chunk_store import get_chunk_store
+from services.rag.embeddings import embed_documents, get_embedding_namespace
+from services.rag.lexical_index import get_lexical_index
 from services.rag import cache, vectordb
 
 logger = logging.getLogger(__name__)
 
+_POSITION_FIELDS = ("filename", "chunk_id", "source_type", "total_chunks", "upload_ts")
+
+# Characters of streamed text to accumulate before chunking and embedding what is complete.
+STREAM_WINDOW_CHARS = int(os.getenv("RAG_STREAM_WINDOW_CHARS", "8000") or 8000)
+
+
+def _content_addressed_ids(document_id: str, chunks: Sequence[Mapping[str, Any]]) -> Tuple[List[str], List[str]]:
+    """Derive stable chunk ids from chunk content, numbering repeated texts within the document."""
+    ids: List[str] = []
+    hashes: List[str] = []
+    occurrences: Dict[str, int] = {}
+    for chunk in chunks:
+        content_hash = vectordb.chunk_content_hash(chunk["text"])
+        occurrence = occurrences.get(content_hash, 0)
+        occurrences[content_hash] = occurrence + 1
+        ids.append(f"{document_id}::{content_hash[:32]}::{occurrence}")
+        hashes.append(content_hash)
+    return ids, hashes
+
+
+def _embed_with_store(chunks: Sequence[Mapping[str, Any]], hashes: Sequence[str]) -> Tuple[np.ndarray, int]:
+    """Embed chunks, reusing vectors any document already computed for the same text.
+
+    Returns the embeddings and how many of them came from the shared chunk store.
+    """
+    store = get_chunk_store()
+    if store is None:
+        return embed_documents(chunks), 0
+
+    namespace = get_embedding_namespace()
+    try:
+        known = store.get_many(namespace, hashes)
+    except sqlite3.Error as exc:
+        logger.warning("Chunk embedding store read failed: %s", exc)
+        return embed_documents(chunks), 0
+
+    missing = [index for index, content_hash in enumerate(hashes) if content_hash not in known]
+    if missing:
+        computed = embed_documents([chunks[index] for index in missing])
+        fresh = {hashes[index]: computed[position] for position, index in enumerate(missing)}
+        try:
+            store.put_many(namespace, fresh)
+        except sqlite3.Error as exc:
+            logger.warning("Chunk embedding store write failed: %s", exc)
+        known = {**known, **fresh}
+    vectors = np.asarray([known[content_hash] for content_hash in hashes], dtype=np.float32)
+    return vectors, len(hashes) - len(missing)
+
+
+def _set_document_refs(document_id: str, hashes: Sequence[str]) -> None:
+    store = get_chunk_store()
+    if store is None:
+        return
+    try:
+        store.set_document_refs(document_id, hashes)
+    except sqlite3.Error as exc:
+        logger.warning("Chunk embedding store reference update failed for %s: %s", document_id, exc)
+
+
+def _update_lexical_index(
+    document_id: str,
+    added: Sequence[Tuple[str, str, Mapping[str, Any]]] = (),
+    moved: Tuple[Sequence[str], Sequence[Mapping[str, Any]]] = ((), ()),
+    stale: Sequence[str] = (),
+    remove: bool = False,
+) -> None:
+    index = get_lexical_index()
+    if index is None:
+        return
+    try:
+        if remove:
+            index.delete_document(document_id)
+            return
+        if added:
+            index.add_chunks(document_id, added)
+        index.update_metadata(*moved)
+        index.delete_chunks(stale)
+    except sqlite3.Error as exc:
+        logger.warning("Lexical index update failed for %s: %s", document_id, exc)
+
+
+def _failure(started_at: float, error: str) -> Dict[str, Any]:
+    return {
+        "number_of_chunks": 0,
+        "success": False,
+        "processing_time": round(time.time() - started_at, 4),
+        "error": error,
+    }
+
+
+def _index_chunks(
+    document_id: str,
+    filename: str,
+    source_type: str,
+    chunks: Sequence[Dict[str, Any]],
+    started_at: float,
+    prepared: Optional[Mapping[str, np.ndarray]] = None,
+    prepared_shared: int = 0,
+) -> Dict[str, Any]:
+    """Diff ``chunks`` against the stored ones and apply the changes to the vector store.
+
+    ``prepared`` holds embeddings already computed for some content hashes (see ``ingest_pages``).
+    """
+    prepared = prepared or {}
+    ids, hashes = _content_addressed_ids(document_id, chunks)
+    vectordb.initialize()
+    existing = vectordb.get_document_chunks(document_id)
+    wanted = set(ids)
+    stale_ids = [chunk_id for chunk_id in existing if chunk_id not in wanted]
+    new_positions = [
+        index
+        for index, chunk_id in enumerate(ids)
+        if existing.get(chunk_id, {}).get("content_hash") != hashes[index]
+    ]
+    new_set = set(new_positions)
+
+    # Reused chunks keep their embedding; only refresh metadata whose position or filename moved.
+    moved_ids: List[str] = []
+    moved_metadatas: List[Dict[str, Any]] = []
+    for index, chunk_id in enumerate(ids):
+        if index in new_set:
+            continue
+        stored = existing[chunk_id]
+        metadata = vectordb.chunk_metadata(
+            document_id,
+            filename,
+            source_type,
+            stored.get("upload_time") or "",
+            chunk_id=chunks[index].get("chunk_id", index),
+            total_chunks=len(chunks),
+            content_hash=hashes[index],
+        )
+        if any(stored.get(field) != metadata[field] for field in _POSITION_FIELDS):
+            moved_ids.append(chunk_id)
+            moved_metadatas.append(metadata)
+
+    if new_positions or stale_ids or moved_ids:
+        cache.invalidate_document_cache(document_id)
+
+    added_count = 0
+    shared_count = prepared_shared
+    added_entries: List[Tuple[str, str, Mapping[str, Any]]] = []
+    if new_positions:
+        new_chunks = [chunks[index] for index in new_positions]
+        new_hashes = [hashes[index] for index in new_positions]
+        unprepared = [position for position, content_hash in enumerate(new_hashes) if content_hash not in prepared]
+        vectors: Dict[str, np.ndarray] = dict(prepared)
+        if unprepared:
+            computed, shared = _embed_with_store([new_chunks[position] for position in unprepared], [new_hashes[position] for position in unprepared])
+            shared_count += shared
+            vectors.update((new_hashes[position], computed[offset]) for offset, position in enumerate(unprepared))
+        upload_time = vectordb.format_upload_time()
+        added_count = vectordb.add_documents(
+            chunks=new_chunks,
+            embeddings=np.asarray([vectors[content_hash] for content_hash in new_hashes], dtype=np.float32),
+            document_id=document_id,
+            filename=filename,
+            source_type=source_type,
+            upload_time=upload_time,
+            ids=[ids[index] for index in new_positions],
+            total_chunks=len(chunks),
+        )
+        added_entries = [
+            (
+                ids[index],
+                str(chunks[index]["text"]).strip(),
+                vectordb.chunk_metadata(
+                    document_id,
+                    filename,
+                    source_type,
+                    upload_time,
+                    chunk_id=chunks[index].get("chunk_id", index),
+                    total_chunks=len(chunks),
+                    content_hash=hashes[index],
+                ),
+            )
+            for index in new_positions
+            if str(chunks[index]["text"]).strip()
+        ]
+    vectordb.update_chunk_metadata(moved_ids, moved_metadatas)
+    vectordb.delete_chunks(stale_ids)
+    _set_document_refs(document_id, hashes)
+    _update_lexical_index(document_id, added_entries, (moved_ids, moved_metadatas), stale_ids)
+
+    return {
+        "number_of_chunks": len(chunks),
+        "reused_chunks": len(chunks) - len(new_positions),
+        "added_chunks": added_count,
+        "deleted_chunks": len(stale_ids),
+        "shared_embeddings": shared_count,
+        "success": True,
+        "processing_time": round(time.time() - started_at, 4),
+    }
+
 
 def ingest_document(
     document_id: str,
@@ -15,52 +216,109 @@ def ingest_document(
     source_type: str,
     raw_text: str,
 ) -> Dict[str, Any]:
-    """Chunk, embed, and index a document into the vector store."""
+    """Chunk, embed, and index a document into the vector store.
+
+    Re-ingesting a document only embeds chunks whose content hash is not already stored for it;
+    unchanged chunks are reused and chunks that no longer occur are deleted.
+    """
     started_at = time.time()
     if raw_text is None:
         raw_text = ""
 
     cleaned_text = str(raw_text).strip()
     if not cleaned_text:
-        return {
-            "number_of_chunks": 0,
-            "success": False,
-            "processing_time": round(time.time() - started_at, 4),
-            "error": "Empty text provided for ingestion",
-        }
+        return _failure(started_at, "Empty text provided for ingestion")
 
     try:
-        chunks = chunk_text(cleaned_text)
+        chunks = [chunk for chunk in chunk_text(cleaned_text) if str(chunk.get("text") or "").strip()]
         if not chunks:
-            return {
-                "number_of_chunks": 0,
-                "success": False,
-                "processing_time": round(time.time() - started_at, 4),
-                "error": "No chunks produced from the provided text",
-            }
-
-        embeddings = embed_documents(chunks)
-        vectordb.initialize()
-        cache.invalidate_document_cache(document_id)
-        vectordb.delete_document(document_id)
-        added_count = vectordb.add_documents(
-            chunks=chunks,
-            embeddings=embeddings,
-            document_id=document_id,
-            filename=filename,
-            source_type=source_type,
-        )
+            return _failure(started_at, "No chunks produced from the provided text")
+        return _index_chunks(document_id, filename, source_type, chunks, started_at)
+    except Exception as exc:  # pragma: no cover - defensive logging
+        logger.exception("RAG ingestion failed for document %s", document_id)
+        return _failure(started_at, str(exc))
 
-        return {
-            "number_of_chunks": added_count,
-            "success": True,
-            "processing_time": round(time.time() - started_at, 4),
-        }
+
+def ingest_pages(
+    document_id: str,
+    filename: str,
+    source_type: str,
+    pages: Iterable[str],
+    min_characters: int = 0,
+) -> Dict[str, Any]:
+    """Index a document whose text arrives page by page, e.g. from ``iter_pdf_pages``.
+
+    Text is chunked once ``STREAM_WINDOW_CHARS`` characters have accumulated, and completed
+    chunks are embedded on a background thread while later pages are still being extracted.
+    The last chunk of each window is carried over, since the next page may continue it. Pages are
+    joined with ``PAGE_BREAK``, so the chunker treats each new page as a section boundary.
+    """
+    started_at = time.time()
+    try:
+        vectordb.initialize()
+        stored_hashes = {metadata.get("content_hash") for metadata in vectordb.get_document_chunks(document_id).values()}
     except Exception as exc:  # pragma: no cover - defensive logging
         logger.exception("RAG ingestion failed for document %s", document_id)
-        return {
-            "number_of_chunks": 0,
-            "success": False,
-            "processing_time": round(time.time() - started_at, 4),
-            "error": str(exc),
-        }
+        return _failure(started_at, str(exc))
+
+    chunks: List[Dict[str, Any]] = []
+    jobs: List[Tuple[List[str], Future]] = []
+    buffer = ""
+    characters = 0
+    page_count = 0
+
+    def emit(ready: List[Dict[str, Any]]) -> None:
+        pending: List[Dict[str, Any]] = []
+        for chunk in ready:
+            chunks.append({**chunk, "chunk_id": len(chunks)})
+            if vectordb.chunk_content_hash(chunk["text"]) not in stored_hashes:
+                pending.append(chunk)
+        if pending:
+            hashes = [vectordb.chunk_content_hash(chunk["text"]) for chunk in pending]
+            jobs.append((hashes, embedder.submit(_embed_with_store, pending, hashes)))
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-ingest-embed") as embedder:
+        try:
+            for page in pages:
+                page = str(page or "").strip()
+                if not page:
+                    continue
+                page_count += 1
+                characters += len(page)
+                buffer = f"{buffer}{PAGE_BREAK}{page}" if buffer else page
+                if len(buffer) < STREAM_WINDOW_CHARS:
+                    continue
+                pieces = [chunk for chunk in chunk_text(buffer) if chunk["text"].strip()]
+                if len(pieces) > 1:
+                    emit(pieces[:-1])
+                    buffer = buffer[pieces[-1]["start"]:].strip()
+            if not characters or characters < min_characters:
+                for _, job in jobs:
+                    job.cancel()
+                error = "Extracted text is too short for ingestion" if characters else "Empty text provided for ingestion"
+                return {**_failure(started_at, error), "pages": page_count}
+            emit([chunk for chunk in chunk_text(buffer) if chunk["text"].strip()])
+
+            prepared: Dict[str, np.ndarray] = {}
+            prepared_shared = 0
+            for hashes, job in jobs:
+                vectors, shared = job.result()
+                prepared.update(zip(hashes, vectors))
+                prepared_shared += shared
+            if not chunks:
+                return {**_failure(started_at, "No chunks produced from the provided text"), "pages": page_count}
+            result = _index_chunks(document_id, filename, source_type, chunks, started_at, prepared, prepared_shared)
+            return {**result, "pages": page_count}
+        except Exception as exc:
+            logger.exception("RAG ingestion failed for document %s", document_id)
+            return {**_failure(started_at, str(exc)), "pages": page_count}
+
+
+def remove_document(document_id: str) -> None:
+    """Delete a document's chunks and release its references to shared chunk embeddings."""
+    if not document_id:
+        return
+    cache.invalidate_document_cache(document_id)
+    vectordb.delete_document(document_id)
+    _set_document_refs(document_id, ())
+    _update_lexical_index(document_id, remove=True)
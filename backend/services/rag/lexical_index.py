@@ -0,0 +1,284 @@
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from services.rag.vectordb import matches_where
+
+logger = logging.getLogger(__name__)
+
+_INDEX_PATH = os.getenv(
+    "RAG_LEXICAL_INDEX_PATH",
+    os.path.join(os.path.dirname(__file__), ".chroma_db", "lexical_index.sqlite3"),
+)
+_INDEX_ENABLED = str(os.getenv("RAG_LEXICAL_INDEX", "true")).strip().lower() in {"1", "true", "yes"}
+BM25_K1 = float(os.getenv("RAG_BM25_K1", "1.2"))
+BM25_B = float(os.getenv("RAG_BM25_B", "0.75"))
+
+_TOKEN_PATTERN = re.compile(r"[A-Za-z0-9]{3,}")
+# Words so common their postings would dominate query cost while adding almost no score.
+_STOPWORDS = frozenset(
+    "the and for are but not you all any can had her was one our out has him his how its may "
+    "who did get let say she too use that with have this will your from they been were said "
+    "each which their there what about would these other into than then them some could".split()
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lexical_chunks (
+    chunk_id TEXT PRIMARY KEY,
+    document_id TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_lexical_chunks_document_id ON lexical_chunks (document_id);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    chunk_id TEXT NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, document_id, chunk_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_postings_chunk_id ON postings (chunk_id);
+CREATE TABLE IF NOT EXISTS document_stats (
+    document_id TEXT PRIMARY KEY,
+    chunks INTEGER NOT NULL,
+    total_length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_PATTERN.findall(str(text or "").lower()) if token not in _STOPWORDS]
+
+
+class LexicalIndex:
+    """Persistent inverted index over chunk text with BM25 scoring (SQLite, WAL mode).
+
+    Postings are keyed by ``(term, document_id, chunk_id)``, so a query reads only the
+    postings of its own terms, and a query scoped to one document reads only that
+    document's partition. Document frequencies and lengths come from the same partition
+    the query searches.
+    """
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = float(k1)
+        self.b = float(b)
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _remove(self, connection: sqlite3.Connection, chunk_ids: Iterable[str]) -> None:
+        for chunk_id in chunk_ids:
+            row = connection.execute("SELECT document_id, length FROM lexical_chunks WHERE chunk_id = ?", (chunk_id,)).fetchone()
+            if row is None:
+                continue
+            connection.execute("DELETE FROM postings WHERE chunk_id = ?", (chunk_id,))
+            connection.execute("DELETE FROM lexical_chunks WHERE chunk_id = ?", (chunk_id,))
+            connection.execute(
+                "UPDATE document_stats SET chunks = chunks - 1, total_length = total_length - ? WHERE document_id = ?",
+                (row[1], row[0]),
+            )
+        connection.execute("DELETE FROM document_stats WHERE chunks <= 0")
+
+    def _write(self, operation, *args) -> None:
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            operation(connection, *args)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def add_chunks(self, document_id: str, chunks: Sequence[Tuple[str, str, Mapping[str, Any]]]) -> None:
+        """Index ``(chunk_id, text, metadata)`` entries for a document, replacing chunks with the same ids."""
+        self._write(self._add_chunks, str(document_id), chunks)
+
+    def _add_chunks(self, connection: sqlite3.Connection, document_id: str, chunks: Sequence[Tuple[str, str, Mapping[str, Any]]]) -> None:
+        self._remove(connection, [chunk_id for chunk_id, _, _ in chunks])
+        total_length = 0
+        for chunk_id, text, metadata in chunks:
+            counts = Counter(tokenize(text))
+            length = sum(counts.values())
+            total_length += length
+            connection.execute(
+                "INSERT INTO lexical_chunks (chunk_id, document_id, length, text, metadata) VALUES (?, ?, ?, ?, ?)",
+                (chunk_id, document_id, length, text, json.dumps(dict(metadata), ensure_ascii=False)),
+            )
+            connection.executemany(
+                "INSERT INTO postings (term, document_id, chunk_id, tf) VALUES (?, ?, ?, ?)",
+                [(term, document_id, chunk_id, tf) for term, tf in counts.items()],
+            )
+        connection.execute(
+            "INSERT INTO document_stats (document_id, chunks, total_length) VALUES (?, ?, ?) "
+            "ON CONFLICT (document_id) DO UPDATE SET chunks = chunks + excluded.chunks, total_length = total_length + excluded.total_length",
+            (document_id, len(chunks), total_length),
+        )
+
+    def update_metadata(self, chunk_ids: Sequence[str], metadatas: Sequence[Mapping[str, Any]]) -> None:
+        self._connect().executemany(
+            "UPDATE lexical_chunks SET metadata = ? WHERE chunk_id = ?",
+            [(json.dumps(dict(metadata), ensure_ascii=False), chunk_id) for chunk_id, metadata in zip(chunk_ids, metadatas)],
+        )
+
+    def delete_chunks(self, chunk_ids: Sequence[str]) -> None:
+        if chunk_ids:
+            self._write(self._remove, list(chunk_ids))
+
+    def delete_document(self, document_id: str) -> None:
+        self._write(self._delete_document, str(document_id))
+
+    def _delete_document(self, connection: sqlite3.Connection, document_id: str) -> None:
+        connection.execute("DELETE FROM postings WHERE chunk_id IN (SELECT chunk_id FROM lexical_chunks WHERE document_id = ?)", (document_id,))
+        connection.execute("DELETE FROM lexical_chunks WHERE document_id = ?", (document_id,))
+        connection.execute("DELETE FROM document_stats WHERE document_id = ?", (document_id,))
+
+    def search(
+        self,
+        question: str,
+        top_k: int = 5,
+        document_id: Optional[str] = None,
+        where: Optional[Mapping[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return up to ``top_k`` chunks by BM25 score as ``{"text", "score", "metadata"}``."""
+        terms = list(dict.fromkeys(tokenize(question)))
+        if not terms:
+            return []
+        connection = self._connect()
+        if document_id:
+            stats = connection.execute("SELECT chunks, total_length FROM document_stats WHERE document_id = ?", (str(document_id),)).fetchone()
+        else:
+            stats = connection.execute("SELECT SUM(chunks), SUM(total_length) FROM document_stats").fetchone()
+        total_chunks, total_length = stats or (0, 0)
+        if not total_chunks:
+            return []
+        average_length = max(1.0, total_length / total_chunks)
+
+        scores: Dict[str, float] = {}
+        for term in terms:
+            if document_id:
+                postings = connection.execute(
+                    "SELECT p.chunk_id, p.tf, c.length FROM postings p JOIN lexical_chunks c ON c.chunk_id = p.chunk_id "
+                    "WHERE p.term = ? AND p.document_id = ?",
+                    (term, str(document_id)),
+                ).fetchall()
+            else:
+                postings = connection.execute(
+                    "SELECT p.chunk_id, p.tf, c.length FROM postings p JOIN lexical_chunks c ON c.chunk_id = p.chunk_id WHERE p.term = ?",
+                    (term,),
+                ).fetchall()
+            if not postings:
+                continue
+            idf = math.log(1.0 + (total_chunks - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf, length in postings:
+                norm = tf + self.k1 * (1.0 - self.b + self.b * length / average_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1.0) / norm
+
+        ranked = heapq.nlargest(len(scores) if where else max(1, top_k), scores.items(), key=lambda item: item[1])
+        results: List[Dict[str, Any]] = []
+        for start in range(0, len(ranked), max(1, top_k)):
+            batch = ranked[start:start + max(1, top_k)]
+            placeholders = ",".join("?" for _ in batch)
+            rows = {
+                chunk_id: (text, json.loads(metadata))
+                for chunk_id, text, metadata in connection.execute(
+                    f"SELECT chunk_id, text, metadata FROM lexical_chunks WHERE chunk_id IN ({placeholders})", [chunk_id for chunk_id, _ in batch]
+                )
+            }
+            for chunk_id, score in batch:
+                if chunk_id in rows and matches_where(rows[chunk_id][1], where):
+                    results.append({"text": rows[chunk_id][0], "score": round(score, 4), "metadata": rows[chunk_id][1]})
+            if len(results) >= top_k:
+                break
+        return results[:top_k]
+
+    def is_backfilled(self) -> bool:
+        return self._connect().execute("SELECT 1 FROM meta WHERE key = 'backfilled'").fetchone() is not None
+
+    def mark_backfilled(self) -> None:
+        self._connect().execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('backfilled', '1')")
+
+    def stats(self) -> Dict[str, Any]:
+        connection = self._connect()
+        documents, chunks, total_length = connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(chunks), 0), COALESCE(SUM(total_length), 0) FROM document_stats"
+        ).fetchone()
+        return {
+            "documents": documents,
+            "chunks": chunks,
+            "average_chunk_tokens": round(total_length / chunks, 1) if chunks else 0.0,
+        }
+
+
+_INDEX: Optional[LexicalIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def _backfill(index: LexicalIndex) -> None:
+    """Index chunks stored before the lexical index existed, once."""
+    from services.rag import vectordb
+
+    results = vectordb.get_collection().get(include=["documents", "metadatas"])
+    grouped: Dict[str, List[Tuple[str, str, Mapping[str, Any]]]] = {}
+    for chunk_id, text, metadata in zip(results.get("ids", []) or [], results.get("documents", []) or [], results.get("metadatas", []) or []):
+        metadata = metadata or {}
+        grouped.setdefault(str(metadata.get("document_id", "")), []).append((str(chunk_id), str(text or ""), metadata))
+    for document_id, chunks in grouped.items():
+        index.add_chunks(document_id, chunks)
+    index.mark_backfilled()
+    if grouped:
+        logger.info("Built lexical index for %s existing documents", len(grouped))
+
+
+def get_lexical_index() -> Optional[LexicalIndex]:
+    """Return the shared index, or ``None`` when ``RAG_LEXICAL_INDEX`` is off or it cannot be opened."""
+    global _INDEX
+    if not _INDEX_ENABLED:
+        return None
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            try:
+                index = LexicalIndex(_INDEX_PATH, k1=BM25_K1, b=BM25_B)
+            except (OSError, sqlite3.Error) as exc:
+                logger.warning("Lexical index unavailable at %s: %s", _INDEX_PATH, exc)
+                return None
+            if not index.is_backfilled():
+                try:
+                    _backfill(index)
+                except Exception as exc:
+                    logger.warning("Lexical index backfill failed: %s", exc)
+            _INDEX = index
+        return _INDEX
+
+
+def get_lexical_index_stats() -> Dict[str, Any]:
+    index = get_lexical_index()
+    if index is None:
+        return {"enabled": False}
+    try:
+        return {"enabled": True, **index.stats()}
+    except sqlite3.Error as exc:
+        return {"enabled": True, "error": str(exc)}
@@ -0,0 +1,490 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ann_index import IVFIndex
+from .vectordb import matches_where
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per matmul when searching the whole store, to bound temporary memory.
+_SEARCH_BLOCK_ROWS = 131072
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    row INTEGER PRIMARY KEY,
+    id TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    document TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    alive INTEGER NOT NULL DEFAULT 1
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_rows_live_id ON rows (id) WHERE alive = 1;
+CREATE INDEX IF NOT EXISTS idx_rows_document ON rows (document_id, alive);
+CREATE TABLE IF NOT EXISTS documents (
+    document_id TEXT PRIMARY KEY,
+    start INTEGER NOT NULL,
+    stop INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _document_filter(where: Optional[Mapping[str, Any]]) -> Optional[str]:
+    """The ``document_id`` a where clause pins results to, if any, so only its row range is scored."""
+    if not where:
+        return None
+    value = where.get("document_id")
+    if isinstance(value, Mapping):
+        value = value.get("$eq")
+    if value is not None:
+        return str(value)
+    for condition in where.get("$and", []):
+        found = _document_filter(condition)
+        if found is not None:
+            return found
+    return None
+
+
+class NumpyVectorCollection:
+    """Chunk embeddings in a float32 matrix memory-mapped from disk, behind Chroma's collection API.
+
+    Each document's chunks occupy one contiguous row range, so a search restricted to a
+    ``document_id`` is a single matmul over that slice followed by ``argpartition``. Texts,
+    metadata and the row ranges live in SQLite. Re-ingesting a document appends a new range
+    and tombstones the old rows; ``compact`` rewrites the matrix without dead rows.
+    Distances are squared L2, like Chroma's default space. Other ``where`` conditions are
+    checked on the nearest candidates, and ``vectordb.search`` over-fetches when they remove
+    too many.
+
+    With ``ann="ivf"``, searches across all documents go through an IVF index (see
+    ``IVFIndex``) once the store holds ``ann_min_rows`` live rows. New rows are assigned to
+    its lists as they are written. The index is retrained when the store has grown
+    ``ann_rebuild_factor`` times past the rows it was trained on. ``nprobe`` trades recall
+    for latency and can be changed at any time.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        compact_dead_rows: int = 10000,
+        ann: str = "none",
+        ann_min_rows: int = 50000,
+        nlist: Optional[int] = None,
+        nprobe: int = 16,
+        ann_rebuild_factor: float = 4.0,
+    ):
+        self.directory = directory
+        self.compact_dead_rows = max(1, int(compact_dead_rows))
+        self.ann = str(ann or "none").strip().lower()
+        self.ann_min_rows = max(1, int(ann_min_rows))
+        self.nlist = nlist
+        self.nprobe = max(1, int(nprobe))
+        self.ann_rebuild_factor = max(1.0, float(ann_rebuild_factor))
+        self.ann_path = os.path.join(directory, "ivf")
+        self._ann: Optional[IVFIndex] = None
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.norms_path = os.path.join(directory, "norms.f32")
+        self.index_path = os.path.join(directory, "rows.sqlite3")
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        self._version: Optional[str] = None
+        self._dim = 0
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._norms = np.empty(0, dtype=np.float32)
+        self._alive = np.empty(0, dtype=bool)
+        self._ranges: Dict[str, Tuple[int, int]] = {}
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _meta(self, connection: sqlite3.Connection, key: str, default: str = "") -> str:
+        row = connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, connection: sqlite3.Connection, key: str, value: Any) -> None:
+        connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _bump_version(self, connection: sqlite3.Connection) -> str:
+        version = str(int(self._meta(connection, "version", "0")) + 1)
+        self._set_meta(connection, "version", version)
+        return version
+
+    def _remap(self, dim: int, rows: int) -> None:
+        if dim and rows:
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, dim))
+            self._norms = np.memmap(self.norms_path, dtype=np.float32, mode="r", shape=(rows,))
+        else:
+            self._matrix = np.empty((0, dim), dtype=np.float32)
+            self._norms = np.empty(0, dtype=np.float32)
+        self._dim = dim
+
+    def _refresh(self) -> None:
+        """Remap the matrix and reload row state when another writer (or process) changed it."""
+        connection = self._connect()
+        version = self._meta(connection, "version", "0")
+        if version == self._version:
+            return
+        with self._lock:
+            rows = int(self._meta(connection, "rows", "0"))
+            self._remap(int(self._meta(connection, "dim", "0")), rows)
+            alive = np.zeros(rows, dtype=bool)
+            live_rows = np.fromiter((row for (row,) in connection.execute("SELECT row FROM rows WHERE alive = 1")), dtype=np.int64)
+            alive[live_rows] = True
+            self._alive = alive
+            self._ranges = {document_id: (start, stop) for document_id, start, stop in connection.execute("SELECT document_id, start, stop FROM documents")}
+            self._ann = IVFIndex.load(self.ann_path) if self.ann == "ivf" else None
+            self._version = version
+
+    def _apply_write(self, version: str, rows: int, killed: Sequence[int], ranges: Mapping[str, Optional[Tuple[int, int]]]) -> None:
+        """Bring this instance up to date with a write it just committed, without a full reload."""
+        self._remap(self._dim, rows)
+        alive = np.zeros(rows, dtype=bool)
+        alive[: len(self._alive)] = self._alive
+        alive[len(self._alive):] = True
+        alive[np.asarray(killed, dtype=np.int64)] = False
+        self._alive = alive
+        for document_id, span in ranges.items():
+            if span is None:
+                self._ranges.pop(document_id, None)
+            else:
+                self._ranges[document_id] = span
+        self._version = version
+
+    def _write_rows(self, connection: sqlite3.Connection, start: int, vectors: np.ndarray, assign: bool = True) -> None:
+        if assign and self._ann is not None:
+            # Rows written while the index was missing (e.g. by a worker without it) stay unassigned.
+            self._ann.resize(start)
+            self._ann.add(vectors)
+        for path, payload in ((self.vectors_path, vectors), (self.norms_path, np.einsum("ij,ij->i", vectors, vectors))):
+            with open(path, "r+b" if os.path.exists(path) else "w+b") as handle:
+                handle.seek(start * payload[0:1].nbytes)
+                handle.write(np.ascontiguousarray(payload, dtype=np.float32).tobytes())
+        self._set_meta(connection, "rows", start + len(vectors))
+
+    # -- Chroma collection API ---------------------------------------------------------
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM rows WHERE alive = 1").fetchone()[0]
+
+    def add(self, ids, embeddings, documents=None, metadatas=None) -> None:
+        self.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None) -> None:
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        documents = list(documents) if documents is not None else [""] * len(ids)
+        metadatas = [dict(item or {}) for item in metadatas] if metadatas is not None else [{} for _ in ids]
+        grouped: Dict[str, List[int]] = {}
+        for index, metadata in enumerate(metadatas):
+            grouped.setdefault(str(metadata.get("document_id", "")), []).append(index)
+
+        connection = self._connect()
+        with self._lock:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._refresh()
+                self._dim = self._dim or vectors.shape[1]
+                if vectors.shape[1] != self._dim:
+                    raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the store's {self._dim}")
+                self._set_meta(connection, "dim", self._dim)
+                next_row = len(self._alive)
+                killed: List[int] = []
+                ranges: Dict[str, Optional[Tuple[int, int]]] = {}
+                for document_id, positions in grouped.items():
+                    start = next_row
+                    next_row, replaced = self._rewrite_document(connection, document_id, start, [
+                        (str(ids[index]), vectors[index], str(documents[index] or ""), metadatas[index]) for index in positions
+                    ])
+                    killed.extend(replaced)
+                    ranges[document_id] = (start, next_row)
+                if self._ann is not None:
+                    self._ann.save(self.ann_path)
+                version = self._bump_version(connection)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                self._version = None
+                self._ann = None
+                raise
+            self._apply_write(version, next_row, killed, ranges)
+            self._maybe_compact()
+            self._maybe_build_ann()
+
+    def _rewrite_document(
+        self,
+        connection: sqlite3.Connection,
+        document_id: str,
+        start: int,
+        items: List[Tuple[str, np.ndarray, str, Dict[str, Any]]],
+    ) -> Tuple[int, List[int]]:
+        """Append the document's live rows merged with ``items`` as one new contiguous range.
+
+        Returns the next free row and the rows that were tombstoned.
+        """
+        merged: Dict[str, Tuple[np.ndarray, str, Dict[str, Any]]] = {}
+        for row, chunk_id, document, metadata in connection.execute(
+            "SELECT row, id, document, metadata FROM rows WHERE document_id = ? AND alive = 1 ORDER BY row", (document_id,)
+        ):
+            merged[chunk_id] = (np.asarray(self._matrix[row]), document, json.loads(metadata))
+        for chunk_id, vector, document, metadata in items:
+            merged[chunk_id] = (vector, document, metadata)
+
+        # Two indexed lookups; an OR across both columns would scan the whole table.
+        placeholders = ",".join("?" for _ in items)
+        killed = sorted(
+            {row for (row,) in connection.execute("SELECT row FROM rows WHERE document_id = ? AND alive = 1", (document_id,))}
+            | {row for (row,) in connection.execute(f"SELECT row FROM rows WHERE alive = 1 AND id IN ({placeholders})", [item[0] for item in items])}
+        )
+        connection.executemany("UPDATE rows SET alive = 0 WHERE row = ?", [(row,) for row in killed])
+        self._write_rows(connection, start, np.stack([value[0] for value in merged.values()]))
+        connection.executemany(
+            "INSERT INTO rows (row, id, document_id, document, metadata, alive) VALUES (?, ?, ?, ?, ?, 1)",
+            [
+                (start + offset, chunk_id, document_id, document, json.dumps(metadata, ensure_ascii=False))
+                for offset, (chunk_id, (_, document, metadata)) in enumerate(merged.items())
+            ],
+        )
+        connection.execute("INSERT OR REPLACE INTO documents (document_id, start, stop) VALUES (?, ?, ?)", (document_id, start, start + len(merged)))
+        return start + len(merged), killed
+
+    def update(self, ids, metadatas=None, documents=None) -> None:
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for index, chunk_id in enumerate(ids):
+                if metadatas is not None:
+                    connection.execute("UPDATE rows SET metadata = ? WHERE id = ? AND alive = 1", (json.dumps(dict(metadatas[index]), ensure_ascii=False), chunk_id))
+                if documents is not None:
+                    connection.execute("UPDATE rows SET document = ? WHERE id = ? AND alive = 1", (documents[index], chunk_id))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _select(self, ids: Optional[Sequence[str]], where: Optional[Mapping[str, Any]]) -> List[Tuple[int, str, str, Dict[str, Any]]]:
+        connection = self._connect()
+        query = "SELECT row, id, document, metadata FROM rows WHERE alive = 1"
+        params: List[Any] = []
+        if ids is not None:
+            query += " AND id IN (%s)" % ",".join("?" for _ in ids)
+            params.extend(ids)
+        document_id = _document_filter(where)
+        if document_id is not None:
+            query += " AND document_id = ?"
+            params.append(document_id)
+        selected = []
+        for row, chunk_id, document, metadata in connection.execute(query + " ORDER BY row", params):
+            metadata = json.loads(metadata)
+            if matches_where(metadata, where):
+                selected.append((row, chunk_id, document, metadata))
+        return selected
+
+    def get(self, ids=None, where=None, include=None, limit=None) -> Dict[str, Any]:
+        selected = self._select(list(ids) if ids is not None else None, where)[:limit]
+        return {
+            "ids": [item[1] for item in selected],
+            "documents": [item[2] for item in selected],
+            "metadatas": [item[3] for item in selected],
+        }
+
+    def delete(self, ids=None, where=None) -> None:
+        connection = self._connect()
+        with self._lock:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._refresh()
+                selected = self._select(list(ids) if ids is not None else None, where)
+                if not selected:
+                    connection.execute("COMMIT")
+                    return
+                rows = [item[0] for item in selected]
+                connection.executemany("UPDATE rows SET alive = 0 WHERE row = ?", [(row,) for row in rows])
+                emptied = [
+                    document_id
+                    for document_id in {str(item[3].get("document_id", "")) for item in selected}
+                    if connection.execute("SELECT 1 FROM rows WHERE document_id = ? AND alive = 1 LIMIT 1", (document_id,)).fetchone() is None
+                ]
+                connection.executemany("DELETE FROM documents WHERE document_id = ?", [(document_id,) for document_id in emptied])
+                version = self._bump_version(connection)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                self._version = None
+                raise
+            self._apply_write(version, len(self._alive), rows, {document_id: None for document_id in emptied})
+            self._maybe_compact()
+
+    def query(self, query_embeddings, n_results: int = 10, where=None, include=None, nprobe: Optional[int] = None) -> Dict[str, List[List[Any]]]:
+        self._refresh()
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        output: Dict[str, List[List[Any]]] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for query in queries:
+            rows, distances = self._top_k(query, max(1, int(n_results)), where, nprobe)
+            details = {item[0]: item for item in self._rows(rows)}
+            kept = [(row, distance) for row, distance in zip(rows, distances) if row in details and matches_where(details[row][3], where)]
+            output["ids"].append([details[row][1] for row, _ in kept])
+            output["documents"].append([details[row][2] for row, _ in kept])
+            output["metadatas"].append([details[row][3] for row, _ in kept])
+            output["distances"].append([float(distance) for _, distance in kept])
+        return output
+
+    def _rows(self, rows: Sequence[int]) -> List[Tuple[int, str, str, Dict[str, Any]]]:
+        if not len(rows):
+            return []
+        placeholders = ",".join("?" for _ in rows)
+        return [
+            (row, chunk_id, document, json.loads(metadata))
+            for row, chunk_id, document, metadata in self._connect().execute(
+                f"SELECT row, id, document, metadata FROM rows WHERE alive = 1 AND row IN ({placeholders})", [int(row) for row in rows]
+            )
+        ]
+
+    def _candidate_ranges(self, where: Optional[Mapping[str, Any]]) -> Iterable[Tuple[int, int]]:
+        document_id = _document_filter(where)
+        if document_id is not None:
+            span = self._ranges.get(document_id)
+            return [span] if span else []
+        total = len(self._alive)
+        return [(start, min(total, start + _SEARCH_BLOCK_ROWS)) for start in range(0, total, _SEARCH_BLOCK_ROWS)]
+
+    def _top_k(self, query: np.ndarray, k: int, where: Optional[Mapping[str, Any]], nprobe: Optional[int] = None) -> Tuple[List[int], List[float]]:
+        matrix, norms, alive = self._matrix, self._norms, self._alive
+        if self._ann is not None and _document_filter(where) is None:
+            rows, distances = self._ann.search(query, k, nprobe or self.nprobe, matrix, norms, alive)
+            return rows.tolist(), distances.tolist()
+        query_norm = float(query @ query)
+        best_rows = np.empty(0, dtype=np.int64)
+        best_distances = np.empty(0, dtype=np.float32)
+        for start, stop in self._candidate_ranges(where):
+            distances = norms[start:stop] + query_norm - 2.0 * (matrix[start:stop] @ query)
+            distances = np.where(alive[start:stop], distances, np.inf)
+            if len(distances) > k:
+                keep = np.argpartition(distances, k - 1)[:k]
+            else:
+                keep = np.arange(len(distances))
+            best_rows = np.concatenate([best_rows, keep + start])
+            best_distances = np.concatenate([best_distances, distances[keep]])
+            if len(best_rows) > k:
+                keep = np.argpartition(best_distances, k - 1)[:k]
+                best_rows, best_distances = best_rows[keep], best_distances[keep]
+        order = np.argsort(best_distances, kind="stable")
+        finite = order[np.isfinite(best_distances[order])]
+        return best_rows[finite].tolist(), best_distances[finite].tolist()
+
+    # -- maintenance -------------------------------------------------------------------
+
+    def _maybe_compact(self) -> None:
+        self._refresh()
+        dead = int(len(self._alive) - self._alive.sum())
+        if dead >= self.compact_dead_rows and dead >= self._alive.sum():
+            self.compact()
+
+    def _maybe_build_ann(self) -> None:
+        if self.ann != "ivf":
+            return
+        live = int(self._alive.sum())
+        if live < self.ann_min_rows:
+            return
+        if self._ann is not None and live <= self.ann_rebuild_factor * self._ann.trained_rows:
+            return
+        self.build_ann_index()
+
+    def build_ann_index(self, nlist: Optional[int] = None) -> IVFIndex:
+        """Train the IVF index on the live rows and assign every row; replaces any existing index."""
+        connection = self._connect()
+        with self._lock:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._refresh()
+                index = IVFIndex.build(self._matrix, nlist or self.nlist, alive=self._alive)
+                index.save(self.ann_path)
+                version = self._bump_version(connection)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                self._version = None
+                raise
+            self._ann = index
+            self._version = version
+        logger.info("Built IVF index over %s rows with %s lists", index.trained_rows, index.nlist)
+        return index
+
+    def compact(self) -> int:
+        """Rewrite the matrix with live rows only, keeping each document contiguous."""
+        connection = self._connect()
+        with self._lock:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                self._version = None
+                self._refresh()
+                live = connection.execute("SELECT row, id, document_id, document, metadata FROM rows WHERE alive = 1 ORDER BY document_id, row").fetchall()
+                removed = len(self._alive) - len(live)
+                old_rows = np.asarray([item[0] for item in live], dtype=np.int64)
+                vectors = np.asarray(self._matrix[old_rows]) if len(live) else np.empty((0, self._dim), dtype=np.float32)
+                for path in (self.vectors_path, self.norms_path):
+                    if os.path.exists(f"{path}.compact"):
+                        os.remove(f"{path}.compact")
+                paths = (self.vectors_path, self.norms_path)
+                self.vectors_path, self.norms_path = (f"{path}.compact" for path in paths)
+                try:
+                    if len(live):
+                        self._write_rows(connection, 0, vectors, assign=False)
+                    else:
+                        self._set_meta(connection, "rows", 0)
+                finally:
+                    self.vectors_path, self.norms_path = paths
+                connection.execute("DELETE FROM rows")
+                connection.execute("DELETE FROM documents")
+                connection.executemany(
+                    "INSERT INTO rows (row, id, document_id, document, metadata, alive) VALUES (?, ?, ?, ?, ?, 1)",
+                    [(new_row, chunk_id, document_id, document, metadata) for new_row, (_, chunk_id, document_id, document, metadata) in enumerate(live)],
+                )
+                connection.execute("INSERT INTO documents (document_id, start, stop) SELECT document_id, MIN(row), MAX(row) + 1 FROM rows GROUP BY document_id")
+                if self._ann is not None:
+                    self._ann.resize(len(self._alive))
+                    self._ann.compact(old_rows)
+                    self._ann.save(self.ann_path)
+                for path in paths:
+                    if os.path.exists(f"{path}.compact"):
+                        os.replace(f"{path}.compact", path)
+                self._bump_version(connection)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                self._version = None
+                raise
+        logger.info("Compacted numpy vector store: removed %s dead rows", removed)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        self._refresh()
+        live = int(self._alive.sum())
+        return {
+            "rows": len(self._alive),
+            "live_rows": live,
+            "dead_rows": len(self._alive) - live,
+            "documents": len(self._ranges),
+            "dim": self._dim,
+            "size_bytes": os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0,
+            "ann": {"type": "ivf", "nlist": self._ann.nlist, "nprobe": self.nprobe, "trained_rows": self._ann.trained_rows} if self._ann else None,
+        }
@@ -2,9 +2,12 @@ import logging
 import os
 import re
 import time
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from services.gemini_service import answer_question_from_source
+from services.llm.config import get_active_provider_name, get_context_token_budget
+from services.rag import reranker
+from services.rag.context_packer import pack_chunks
 from services.rag.retriever import retrieve_chunks
 
 logger = logging.getLogger(__name__)
@@ -85,20 +88,24 @@ def generate_answer_from_chunks(
     selected_min_score = min_score if min_score is not None else MIN_SCORE
     retrieval_started = time.perf_counter()
 
-    retrieved_chunks: List[str] = []
-    scores: List[float] = []
+    results: List[Dict[str, Any]] = []
+    rerank_info = None
 
     if document_id:
         results = retrieve_chunks(
             question_text,
-            top_k=selected_top_k,
+            top_k=reranker.candidate_count(selected_top_k),
             document_id=document_id,
             min_score=selected_min_score,
         )
-        retrieved_chunks = [str(item.get("text", "")).strip() for item in results if str(item.get("text", "")).strip()]
-        scores = [float(item.get("score", 0.0)) for item in results]
+        results, rerank_info = reranker.rerank(question_text, results, selected_top_k, started_at=retrieval_started)
     elif source_text:
-        retrieved_chunks, scores = _fallback_retrieve_from_text(source_text, question_text, selected_top_k)
+        chunks, chunk_scores = _fallback_retrieve_from_text(source_text, question_text, selected_top_k)
+        results = [{"text": chunk, "score": score} for chunk, score in zip(chunks, chunk_scores)]
+
+    packed, context, context_info = pack_chunks(results, get_context_token_budget(get_active_provider_name(), "qa"))
+    retrieved_chunks = [str(item.get("text", "")).strip() for item in packed]
+    scores = [float(item.get("score", 0.0)) for item in packed]
 
     retrieval_duration = time.perf_counter() - retrieval_started
 
@@ -121,7 +128,6 @@ def generate_answer_from_chunks(
             },
         )
 
-    context = "\n\n".join(retrieved_chunks)
     prompt = (
         "You are an expert educational tutor.\n"
         "Only answer using the provided context.\n"
@@ -146,10 +152,14 @@ def generate_answer_from_chunks(
         round(total_duration, 4),
     )
 
-    return answer, {
+    metadata = {
         "retrieved_chunk_count": len(retrieved_chunks),
         "scores": scores,
         "retrieval_time": round(retrieval_duration, 4),
         "llm_time": round(llm_duration, 4),
         "total_time": round(total_duration, 4),
+        "context": context_info,
     }
+    if rerank_info is not None:
+        metadata["rerank"] = rerank_info
+    return answer, metadata
@@ -0,0 +1,130 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_CACHE_SIZE = int(os.getenv("RAG_QUERY_EMBED_CACHE_SIZE", "2048") or 2048)
+_REDIS_TTL_SECONDS = int(os.getenv("RAG_QUERY_EMBED_CACHE_TTL_SECONDS", "86400") or 86400)
+_REDIS_ENABLED = str(os.getenv("RAG_QUERY_EMBED_CACHE_REDIS", "false")).strip().lower() in {"1", "true", "yes"}
+_REDIS_URL = os.getenv("REDIS_URL", "").strip()
+
+try:
+    import redis
+except ImportError:  # pragma: no cover
+    redis = None
+
+
+def normalize_query(text: str) -> str:
+    """Collapse whitespace and case; the MiniLM tokenizer is uncased, so this does not change the embedding."""
+    return re.sub(r"\s+", " ", str(text or "")).strip().lower()
+
+
+class QueryEmbeddingCache:
+    """LRU of normalized query text to its float32 embedding, kept as raw bytes."""
+
+    def __init__(self, max_entries: int = 2048, redis_client: Optional[Any] = None, redis_ttl_seconds: int = 86400, model_name: str = ""):
+        self.max_entries = max(1, int(max_entries))
+        self.redis_client = redis_client
+        self.redis_ttl_seconds = int(redis_ttl_seconds)
+        self.model_name = model_name
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def _redis_key(self, normalized: str) -> str:
+        digest = hashlib.sha256(f"{self.model_name}\n{normalized}".encode("utf-8")).hexdigest()
+        return f"rag_qemb:{digest}"
+
+    def _remember(self, normalized: str, payload: bytes) -> None:
+        self._entries[normalized] = payload
+        self._entries.move_to_end(normalized)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        normalized = normalize_query(text)
+        with self._lock:
+            payload = self._entries.get(normalized)
+            if payload is not None:
+                self._entries.move_to_end(normalized)
+                self.hits += 1
+                return np.frombuffer(payload, dtype=np.float32).copy()
+
+        if self.redis_client is not None:
+            try:
+                payload = self.redis_client.get(self._redis_key(normalized))
+            except Exception as exc:
+                logger.warning("Redis query embedding read failed: %s", exc)
+                payload = None
+            if payload is not None:
+                with self._lock:
+                    self._remember(normalized, bytes(payload))
+                    self.hits += 1
+                    self.redis_hits += 1
+                return np.frombuffer(payload, dtype=np.float32).copy()
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, text: str, vector: np.ndarray) -> None:
+        normalized = normalize_query(text)
+        payload = np.asarray(vector, dtype=np.float32).tobytes()
+        with self._lock:
+            self._remember(normalized, payload)
+        if self.redis_client is not None:
+            try:
+                self.redis_client.set(self._redis_key(normalized), payload, ex=self.redis_ttl_seconds)
+            except Exception as exc:
+                logger.warning("Redis query embedding write failed: %s", exc)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "redis": self.redis_client is not None,
+                "hits": self.hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_CACHE: Optional[QueryEmbeddingCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def _build_redis_client() -> Optional[Any]:
+    if not (_REDIS_ENABLED and redis and _REDIS_URL):
+        return None
+    try:
+        # Embeddings are stored as raw float32 bytes, so responses must not be decoded.
+        client = redis.from_url(_REDIS_URL, decode_responses=False)
+        client.ping()
+        return client
+    except Exception as exc:
+        logger.warning("Redis query embedding cache unavailable: %s", exc)
+        return None
+
+
+def get_query_embedding_cache(model_name: str = "") -> QueryEmbeddingCache:
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = QueryEmbeddingCache(_CACHE_SIZE, _build_redis_client(), _REDIS_TTL_SECONDS, model_name)
+        return _CACHE
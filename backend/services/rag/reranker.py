@@ -0,0 +1,241 @@
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from utils.text import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+RERANK_ENABLED = str(os.getenv("RAG_RERANK", "false")).strip().lower() in {"1", "true", "yes"}
+RERANK_MODEL = os.getenv("RAG_RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("RAG_RERANK_CANDIDATES", "20") or 20)
+RERANK_TOP_K = int(os.getenv("RAG_RERANK_TOP_K", "3") or 0)
+RERANK_BATCH_SIZE = int(os.getenv("RAG_RERANK_BATCH_SIZE", "8") or 8)
+RERANK_BUDGET_MS = float(os.getenv("RAG_RERANK_BUDGET_MS", "300") or 300)
+RERANK_MIN_SCORE = float(os.getenv("RAG_RERANK_MIN_SCORE", "0") or 0)
+RERANK_MAX_LENGTH = int(os.getenv("RAG_RERANK_MAX_LENGTH", "256") or 256)
+# After this long without a measurement, one request re-ranks despite an over-budget estimate.
+RERANK_PROBE_SECONDS = float(os.getenv("RAG_RERANK_PROBE_SECONDS", "30") or 30)
+
+# Weight of the newest batch in the moving average of per-pair latency.
+_LATENCY_SMOOTHING = 0.3
+
+_MODEL: Any = None
+_MODEL_LOCK = threading.Lock()
+_LOADING = False
+_LOAD_FAILED = False
+_STATS_LOCK = threading.Lock()
+_STATS: Dict[str, Any] = {"reranked": 0, "skipped": {}, "pair_ms": None, "measured_at": None, "probes": 0, "prompt_tokens_saved": 0}
+_WARMUP_PAIRS = [("warm-up question", "A short passage used to time the cross-encoder before the first request.")] * 4
+
+
+def _prompt_tokens(chunks: Sequence[Dict[str, Any]]) -> int:
+    return sum(estimate_tokens(str(item.get("text", "")).strip()) for item in chunks)
+
+
+def load_model() -> Any:
+    """Load the cross-encoder on the CPU, blocking until it is ready; used by startup warm-up."""
+    global _MODEL, _LOADING, _LOAD_FAILED
+    if _MODEL is not None:
+        return _MODEL
+    try:
+        from sentence_transformers import CrossEncoder
+
+        model = CrossEncoder(RERANK_MODEL, max_length=RERANK_MAX_LENGTH, device="cpu")
+    except Exception as exc:
+        logger.warning("Cross-encoder %s could not be loaded; re-ranking is disabled", RERANK_MODEL, exc_info=True)
+        _LOAD_FAILED = True
+        raise RuntimeError(f"Cross-encoder {RERANK_MODEL} could not be loaded") from exc
+    finally:
+        _LOADING = False
+    with _MODEL_LOCK:
+        _MODEL = _MODEL or model
+    logger.info("Loaded cross-encoder %s for re-ranking", RERANK_MODEL)
+    return _MODEL
+
+
+def warm_up() -> None:
+    """Load the model and time a dummy batch so the latency estimate starts from a warm run.
+
+    The first ``predict`` pays one-off costs (allocations, lazy initialisation) and would make
+    the first real request look far slower than later ones, so only the second run is recorded.
+    """
+    model = load_model()
+    for attempt in range(2):
+        started = time.perf_counter()
+        model.predict(_WARMUP_PAIRS, batch_size=len(_WARMUP_PAIRS), show_progress_bar=False)
+        if attempt:
+            _observe_latency((time.perf_counter() - started) * 1000.0 / len(_WARMUP_PAIRS))
+
+
+def _load_in_background() -> None:
+    try:
+        load_model()
+    except RuntimeError:
+        pass
+
+
+def get_model() -> Any:
+    """Return the cross-encoder, or ``None`` while it loads in the background.
+
+    Loading takes seconds, so requests that arrive first skip re-ranking instead of waiting for it.
+    """
+    global _LOADING
+    if _MODEL is not None or _LOAD_FAILED:
+        return _MODEL
+    with _MODEL_LOCK:
+        if _MODEL is None and not _LOADING and not _LOAD_FAILED:
+            _LOADING = True
+            threading.Thread(target=_load_in_background, name="rerank-model-loader", daemon=True).start()
+    return _MODEL
+
+
+def is_enabled() -> bool:
+    return RERANK_ENABLED and not _LOAD_FAILED
+
+
+def candidate_count(top_k: int) -> int:
+    """How many chunks to retrieve so the re-ranker has ``RAG_RERANK_CANDIDATES`` to choose from."""
+    return max(top_k, RERANK_CANDIDATES) if is_enabled() else top_k
+
+
+def _record(reason: Optional[str], saved: int = 0) -> None:
+    with _STATS_LOCK:
+        if reason is None:
+            _STATS["reranked"] += 1
+            _STATS["prompt_tokens_saved"] += saved
+        else:
+            _STATS["skipped"][reason] = _STATS["skipped"].get(reason, 0) + 1
+
+
+def _observe_latency(pair_ms: float) -> None:
+    with _STATS_LOCK:
+        previous = _STATS["pair_ms"]
+        _STATS["pair_ms"] = pair_ms if previous is None else previous + _LATENCY_SMOOTHING * (pair_ms - previous)
+        _STATS["measured_at"] = time.monotonic()
+
+
+def _claim_probe() -> bool:
+    """Whether this request should re-measure latency instead of trusting an over-budget estimate.
+
+    The estimate only changes while re-ranking runs, so without probes one slow batch would
+    disable re-ranking for good. At most one request per ``RERANK_PROBE_SECONDS`` is let through;
+    it still stops between batches at the deadline.
+    """
+    now = time.monotonic()
+    with _STATS_LOCK:
+        measured_at = _STATS["measured_at"]
+        if measured_at is None or now - measured_at < RERANK_PROBE_SECONDS:
+            return False
+        _STATS["measured_at"] = now
+        _STATS["probes"] += 1
+        return True
+
+
+def _skip(reason: str, candidates: List[Dict[str, Any]], top_k: int) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    _record(reason)
+    selected = candidates[:top_k]
+    tokens = _prompt_tokens(selected)
+    return selected, {
+        "applied": False,
+        "reason": reason,
+        "candidates": len(candidates),
+        "kept": len(selected),
+        "prompt_tokens": tokens,
+        "baseline_prompt_tokens": tokens,
+        "prompt_tokens_saved": 0,
+    }
+
+
+def rerank(
+    question: str,
+    candidates: List[Dict[str, Any]],
+    top_k: int,
+    started_at: Optional[float] = None,
+    budget_ms: Optional[float] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Rescore ``candidates`` with the cross-encoder and keep the best ``top_k``.
+
+    The budget counts from ``started_at`` (the start of retrieval), so a slow vector search leaves
+    less time to re-rank. Re-ranking is skipped when the per-pair latency estimate says it would not
+    fit, and stops between batches once the budget runs out; the candidates scored by then are used
+    if there are at least ``top_k`` of them. Returns the chunks and a report comparing the prompt
+    tokens of the kept chunks with the plain retrieval top-k, or ``None`` when re-ranking is off.
+    """
+    if not is_enabled() or not str(question or "").strip():
+        return candidates[:top_k], None
+    if len(candidates) <= 1:
+        return _skip("too_few_candidates", candidates, top_k)
+
+    model = get_model()
+    if model is None:
+        return _skip("model_loading" if not _LOAD_FAILED else "model_unavailable", candidates, top_k)
+
+    budget = (RERANK_BUDGET_MS if budget_ms is None else budget_ms) / 1000.0
+    deadline = (started_at if started_at is not None else time.perf_counter()) + budget
+    estimate = _STATS["pair_ms"]
+    if estimate is not None and time.perf_counter() + len(candidates) * estimate / 1000.0 > deadline and not _claim_probe():
+        return _skip("over_budget", candidates, top_k)
+
+    rerank_started = time.perf_counter()
+    scores: List[float] = []
+    batch_size = max(1, RERANK_BATCH_SIZE)
+    for start in range(0, len(candidates), batch_size):
+        batch = candidates[start:start + batch_size]
+        batch_started = time.perf_counter()
+        pairs = [(question, str(item.get("text", ""))) for item in batch]
+        scores.extend(float(score) for score in model.predict(pairs, batch_size=batch_size, show_progress_bar=False))
+        now = time.perf_counter()
+        pair_ms = (now - batch_started) * 1000.0 / len(batch)
+        _observe_latency(pair_ms)
+        if len(scores) < len(candidates) and now + min(batch_size, len(candidates) - len(scores)) * pair_ms / 1000.0 > deadline:
+            break
+
+    if len(scores) < min(top_k, len(candidates)):
+        return _skip("budget_exhausted", candidates, top_k)
+
+    ranked = sorted(zip(scores, candidates[:len(scores)]), key=lambda pair: pair[0], reverse=True)
+    keep = min(top_k, RERANK_TOP_K) if RERANK_TOP_K > 0 else top_k
+    selected: List[Dict[str, Any]] = []
+    for logit, item in ranked[:keep]:
+        score = 1.0 / (1.0 + math.exp(-logit))
+        if selected and score < RERANK_MIN_SCORE:
+            break
+        selected.append({**item, "score": round(score, 4), "retrieval_score": item.get("score")})
+
+    baseline_tokens = _prompt_tokens(candidates[:top_k])
+    tokens = _prompt_tokens(selected)
+    saved = baseline_tokens - tokens
+    _record(None, saved=saved)
+    return selected, {
+        "applied": True,
+        "candidates": len(candidates),
+        "scored": len(scores),
+        "kept": len(selected),
+        "rerank_time": round(time.perf_counter() - rerank_started, 4),
+        "prompt_tokens": tokens,
+        "baseline_prompt_tokens": baseline_tokens,
+        "prompt_tokens_saved": saved,
+    }
+
+
+def get_reranker_stats() -> Dict[str, Any]:
+    with _STATS_LOCK:
+        pair_ms = _STATS["pair_ms"]
+        return {
+            "enabled": RERANK_ENABLED,
+            "model": RERANK_MODEL,
+            "loaded": _MODEL is not None,
+            "load_failed": _LOAD_FAILED,
+            "candidates": RERANK_CANDIDATES,
+            "top_k": RERANK_TOP_K,
+            "budget_ms": RERANK_BUDGET_MS,
+            "pair_ms": round(pair_ms, 3) if pair_ms is not None else None,
+            "probes": _STATS["probes"],
+            "reranked": _STATS["reranked"],
+            "skipped": dict(_STATS["skipped"]),
+            "prompt_tokens_saved": _STATS["prompt_tokens_saved"],
+        }
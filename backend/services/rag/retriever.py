@@ -2,32 +2,42 @@ import hashlib
 import json
 import logging
 import os
-import re
-from typing import Any, Dict, List, Optional
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
 
 import numpy as np
 
 from services.rag import cache, vectordb
 from services.rag.embeddings import embed_query
+from services.rag.lexical_index import get_lexical_index
 
 logger = logging.getLogger(__name__)
 
 RETRIEVAL_MODE = os.getenv("RAG_RETRIEVAL_MODE", "vector").strip().lower()
+# Weight of the keyword ranking relative to the vector ranking in reciprocal-rank fusion.
 HYBRID_KEYWORD_WEIGHT = float(os.getenv("RAG_HYBRID_KEYWORD_WEIGHT", "0.35") or 0.35)
+# Keyword matches with a lower BM25 score are dropped before fusion, like vector hits below min_score.
+HYBRID_MIN_LEXICAL_SCORE = float(os.getenv("RAG_HYBRID_MIN_LEXICAL_SCORE", "1.0"))
+RRF_K = int(os.getenv("RAG_RRF_K", "60") or 60)
 
 if RETRIEVAL_MODE not in {"vector", "hybrid"}:
     logger.warning("Invalid RAG_RETRIEVAL_MODE=%s, falling back to vector", RETRIEVAL_MODE)
     RETRIEVAL_MODE = "vector"
 
 
-def _tokenize_text(text: str) -> List[str]:
-    return [token for token in re.findall(r"[A-Za-z0-9]{3,}", str(text or "").lower())]
-
-
-def _build_cache_key(question: str, document_id: Optional[str], top_k: int, min_score: Optional[float], mode: str) -> str:
+def _build_cache_key(
+    question: str,
+    document_id: Optional[str],
+    top_k: int,
+    min_score: Optional[float],
+    mode: str,
+    where: Optional[Mapping[str, Any]] = None,
+) -> str:
     payload = {
         "question": str(question or "").strip(),
         "document_id": str(document_id or ""),
+        "where": where,
         "top_k": top_k,
         "min_score": min_score,
         "mode": mode,
@@ -36,70 +46,65 @@ def _build_cache_key(question: str, document_id: Optional[str], top_k: int, min_
     return f"retrieve:{digest}"
 
 
-def _rank_lexical_matches(question: str, top_k: int = 5, document_id: Optional[str] = None) -> List[Dict[str, Any]]:
-    tokens = set(_tokenize_text(question))
-    if not tokens:
+def _rank_lexical_matches(
+    question: str,
+    top_k: int = 5,
+    document_id: Optional[str] = None,
+    where: Optional[Mapping[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    index = get_lexical_index()
+    if index is None:
+        return []
+    try:
+        return index.search(question, top_k=top_k, document_id=document_id, where=where)
+    except sqlite3.Error as exc:
+        logger.warning("Lexical index search failed: %s", exc)
         return []
-
-    collection = vectordb.get_collection()
-    results = collection.get(include=["documents", "metadatas"])
-    documents = results.get("documents", [[]])[0]
-    metadatas = results.get("metadatas", [[]])[0]
-
-    scored: List[Dict[str, Any]] = []
-    for document, metadata in zip(documents, metadatas):
-        if document_id and str(metadata.get("document_id", "")) != str(document_id):
-            continue
-        text = str(document or "")
-        if not text:
-            continue
-        text_tokens = set(_tokenize_text(text))
-        overlap = len(tokens.intersection(text_tokens))
-        if overlap <= 0:
-            continue
-        density = overlap / max(1, len(text_tokens))
-        score = overlap + density
-        scored.append({"text": text, "score": float(score), "metadata": metadata or {}})
-
-    scored.sort(key=lambda item: item["score"], reverse=True)
-    return scored[:top_k]
 
 
-def _merge_hybrid_results(vector_results: List[Dict[str, Any]], lexical_results: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+def _merge_hybrid_results(
+    vector_results: List[Dict[str, Any]],
+    lexical_results: List[Dict[str, Any]],
+    top_k: int,
+    min_score: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Fuse both rankings with reciprocal-rank fusion.
+
+    Each list contributes ``weight / (RRF_K + rank)``, so cosine and BM25 scores never have
+    to share a scale. The fused score only orders the results: a chunk found by one retriever
+    still scores close to 0.5 after normalisation, so ``min_score`` is applied to the vector
+    scores and ``HYBRID_MIN_LEXICAL_SCORE`` to the BM25 scores before fusing.
+    """
+    if min_score is not None:
+        vector_results = [item for item in vector_results if float(item.get("score", 0.0) or 0.0) >= float(min_score)]
+    lexical_results = [item for item in lexical_results if float(item.get("score", 0.0) or 0.0) >= HYBRID_MIN_LEXICAL_SCORE]
+    weights = ((vector_results, "vector_score", 1.0), (lexical_results, "lexical_score", HYBRID_KEYWORD_WEIGHT))
     merged: Dict[str, Dict[str, Any]] = {}
 
-    for item in vector_results:
-        text = str(item.get("text", "") or "").strip()
-        if not text:
-            continue
-        merged[text] = {
-            "text": text,
-            "metadata": item.get("metadata") or {},
-            "vector_score": float(item.get("score", 0.0) or 0.0),
-            "lexical_score": 0.0,
-            "score": float(item.get("score", 0.0) or 0.0),
-        }
-
-    for item in lexical_results:
-        text = str(item.get("text", "") or "").strip()
-        if not text:
-            continue
-        lexical_score = float(item.get("score", 0.0) or 0.0)
-        if text in merged:
-            merged[text]["lexical_score"] = lexical_score
-            merged[text]["score"] = merged[text]["vector_score"] + HYBRID_KEYWORD_WEIGHT * lexical_score
-        else:
-            merged[text] = {
-                "text": text,
-                "metadata": item.get("metadata") or {},
-                "vector_score": 0.0,
-                "lexical_score": lexical_score,
-                "score": HYBRID_KEYWORD_WEIGHT * lexical_score,
-            }
-
-    sorted_items = sorted(merged.values(), key=lambda item: item["score"], reverse=True)
+    for results, score_field, weight in weights:
+        for rank, item in enumerate(results, start=1):
+            text = str(item.get("text", "") or "").strip()
+            if not text:
+                continue
+            entry = merged.setdefault(
+                text,
+                {"text": text, "metadata": item.get("metadata") or {}, "vector_score": 0.0, "lexical_score": 0.0, "rrf": 0.0},
+            )
+            if entry[score_field]:
+                continue
+            entry[score_field] = float(item.get("score", 0.0) or 0.0)
+            entry["rrf"] += weight / (RRF_K + rank)
+
+    best_possible = sum(weight for _, _, weight in weights) / (RRF_K + 1)
+    sorted_items = sorted(merged.values(), key=lambda item: item["rrf"], reverse=True)
     return [
-        {"text": item["text"], "metadata": item["metadata"], "score": round(item["score"], 4)}
+        {
+            "text": item["text"],
+            "metadata": item["metadata"],
+            "score": round(item["rrf"] / best_possible, 4),
+            "vector_score": item["vector_score"],
+            "lexical_score": item["lexical_score"],
+        }
         for item in sorted_items[:top_k]
     ]
 
@@ -109,8 +114,15 @@ def retrieve_chunks(
     top_k: int = 5,
     document_id: Optional[str] = None,
     min_score: Optional[float] = None,
+    source_type: Union[str, Sequence[str], None] = None,
+    uploaded_after: Union[str, int, float, datetime, None] = None,
+    uploaded_before: Union[str, int, float, datetime, None] = None,
 ) -> List[Dict[str, Any]]:
-    """Retrieve the most relevant chunks for a question without using an LLM."""
+    """Retrieve the most relevant chunks for a question without using an LLM.
+
+    ``document_id``, ``source_type`` and the upload window are applied inside the vector
+    query rather than to its global top-k.
+    """
     if question is None:
         return []
 
@@ -124,28 +136,36 @@ def retrieve_chunks(
     if document_id is None:
         document_id = ""
 
-    cache_key = _build_cache_key(cleaned_question, document_id, top_k, min_score, RETRIEVAL_MODE)
+    filters = {
+        "document_id": document_id or None,
+        "source_type": source_type,
+        "uploaded_after": uploaded_after,
+        "uploaded_before": uploaded_before,
+    }
+    where = vectordb.build_where(**filters)
+    cache_key = _build_cache_key(cleaned_question, document_id, top_k, min_score, RETRIEVAL_MODE, where)
     cached_results = cache.get_cache(cache_key)
     if cached_results is not None:
         return cached_results
 
     query_vector = embed_query(cleaned_question)
     if RETRIEVAL_MODE == "hybrid":
-        vector_results = vectordb.search(query_vector, top_k=max(top_k * 2, 5))
-        lexical_results = _rank_lexical_matches(cleaned_question, top_k=max(top_k * 2, 5), document_id=document_id or None)
-        results = _merge_hybrid_results(vector_results, lexical_results, top_k)
+        vector_results = vectordb.search(query_vector, top_k=max(top_k * 2, 5), **filters)
+        lexical_results = _rank_lexical_matches(cleaned_question, top_k=max(top_k * 2, 5), document_id=document_id or None, where=where)
+        results = _merge_hybrid_results(vector_results, lexical_results, top_k, min_score=min_score)
     else:
-        results = vectordb.search(query_vector, top_k=top_k)
+        results = vectordb.search(query_vector, top_k=top_k, **filters)
 
     filtered_results: List[Dict[str, Any]] = []
     for item in results:
         metadata = item.get("metadata") or {}
-        if document_id and str(metadata.get("document_id", "")) != str(document_id):
+        if not vectordb.matches_where(metadata, where):
             continue
         score = float(item.get("score", 0.0) or 0.0)
-        if min_score is not None and score < float(min_score):
+        # Hybrid results were thresholded on their vector and BM25 scores before fusion.
+        if min_score is not None and RETRIEVAL_MODE != "hybrid" and score < float(min_score):
             continue
         filtered_results.append(item)
 
-    cache.set_cache(cache_key, filtered_results)
+    cache.set_cache(cache_key, filtered_results, tags=[document_id or cache.GLOBAL_TAG])
     return filtered_results
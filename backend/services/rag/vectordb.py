@@ -1,7 +1,10 @@
+import calendar
+import hashlib
 import logging
 import os
 import time
 import uuid
+from datetime import datetime
 from typing import Any, Dict, List, Mapping, Optional, Sequence, Union
 
 import numpy as np
@@ -13,14 +16,53 @@ _COLLECTION_NAME = "edu_rag_chunks"
 _CLIENT = None
 _COLLECTION = None
 
+VECTOR_BACKEND = str(os.getenv("RAG_VECTOR_BACKEND", "chroma")).strip().lower()
+NUMPY_STORE_PATH = os.getenv("RAG_NUMPY_STORE_PATH", os.path.join(_DB_PATH, "numpy_store"))
+# Approximate search: an IVF index for the NumPy store, HNSW parameters for Chroma.
+ANN_INDEX = str(os.getenv("RAG_ANN_INDEX", "none")).strip().lower()
+ANN_MIN_ROWS = int(os.getenv("RAG_ANN_MIN_ROWS", "50000"))
+ANN_NLIST = int(os.getenv("RAG_ANN_NLIST", "0")) or None
+ANN_NPROBE = int(os.getenv("RAG_ANN_NPROBE", "16"))
+HNSW_SETTINGS = {
+    key: int(os.getenv(name))
+    for key, name in (
+        ("hnsw:search_ef", "RAG_HNSW_SEARCH_EF"),
+        ("hnsw:construction_ef", "RAG_HNSW_CONSTRUCTION_EF"),
+        ("hnsw:M", "RAG_HNSW_M"),
+    )
+    if os.getenv(name)
+}
+# Filtered searches that come back short are retried with n_results grown by this factor, up to the cap.
+SEARCH_OVERFETCH_FACTOR = max(2, int(os.getenv("RAG_SEARCH_OVERFETCH_FACTOR", "4")))
+SEARCH_MAX_FETCH = max(1, int(os.getenv("RAG_SEARCH_MAX_FETCH", "200")))
+
+_UPLOAD_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+# Collection metadata flag set once chunks stored before ``upload_ts`` existed have been given one.
+_UPLOAD_TS_BACKFILLED = "edu:upload_ts_backfilled"
+_BACKFILL_BATCH_SIZE = 500
+
 
 def initialize(persist_directory: Optional[str] = None) -> Any:
-    """Create and cache a ChromaDB client and collection."""
+    """Create and cache the vector store collection selected by ``RAG_VECTOR_BACKEND``."""
     global _CLIENT, _COLLECTION
 
     if _COLLECTION is not None and _CLIENT is not None:
         return _COLLECTION
 
+    if VECTOR_BACKEND == "numpy":
+        from .numpy_store import NumpyVectorCollection
+
+        collection = NumpyVectorCollection(
+            persist_directory or NUMPY_STORE_PATH,
+            ann=ANN_INDEX,
+            ann_min_rows=ANN_MIN_ROWS,
+            nlist=ANN_NLIST,
+            nprobe=ANN_NPROBE,
+        )
+        _CLIENT = collection
+        _COLLECTION = collection
+        return _COLLECTION
+
     try:
         import chromadb
     except ImportError as exc:
@@ -29,7 +71,18 @@ def initialize(persist_directory: Optional[str] = None) -> Any:
     db_path = persist_directory or _DB_PATH
     os.makedirs(db_path, exist_ok=True)
     client = chromadb.PersistentClient(path=db_path)
-    collection = client.get_or_create_collection(name=_COLLECTION_NAME)
+    collection = client.get_or_create_collection(name=_COLLECTION_NAME, metadata=HNSW_SETTINGS or None)
+    search_ef = HNSW_SETTINGS.get("hnsw:search_ef")
+    if search_ef and (collection.metadata or {}).get("hnsw:search_ef") != search_ef:
+        # Only the search-time parameter can change on an existing collection.
+        try:
+            collection.modify(metadata={**(collection.metadata or {}), "hnsw:search_ef": search_ef})
+        except Exception as exc:
+            logger.warning("Could not set hnsw:search_ef=%s on %s: %s", search_ef, _COLLECTION_NAME, exc)
+    try:
+        backfill_upload_ts(collection)
+    except Exception as exc:
+        logger.warning("Could not backfill upload_ts on %s: %s", _COLLECTION_NAME, exc)
     _CLIENT = client
     _COLLECTION = collection
     return _COLLECTION
@@ -40,6 +93,149 @@ def get_collection() -> Any:
     return initialize()
 
 
+def chunk_content_hash(text: str) -> str:
+    """Return the SHA-256 of a chunk's stripped text, stored as ``content_hash`` metadata."""
+    return hashlib.sha256(str(text or "").strip().encode("utf-8")).hexdigest()
+
+
+def format_upload_time(timestamp: Optional[float] = None) -> str:
+    """The ``upload_time`` metadata text for a timestamp (default: now)."""
+    return time.strftime(_UPLOAD_TIME_FORMAT, time.gmtime(timestamp))
+
+
+def upload_timestamp(value: Union[str, int, float, datetime, None]) -> int:
+    """Epoch seconds for an upload time given as ``upload_time`` text, a datetime or a number; 0 if unknown."""
+    if value is None or value == "":
+        return 0
+    if isinstance(value, datetime):
+        return int(value.timestamp()) if value.tzinfo else calendar.timegm(value.timetuple())
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        return calendar.timegm(time.strptime(str(value), _UPLOAD_TIME_FORMAT))
+    except ValueError:
+        try:
+            return upload_timestamp(datetime.fromisoformat(str(value)))
+        except ValueError:
+            return 0
+
+
+def backfill_upload_ts(collection: Any, batch_size: int = _BACKFILL_BATCH_SIZE) -> int:
+    """Give chunks stored before ``upload_ts`` existed one derived from ``upload_time``.
+
+    Chroma applies ``where`` clauses itself, so without it an upload-window filter would drop them.
+    Runs once per collection; returns the number of chunks updated.
+    """
+    if (collection.metadata or {}).get(_UPLOAD_TS_BACKFILLED):
+        return 0
+    updated = 0
+    offset = 0
+    while True:
+        page = collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+        ids = page.get("ids", []) or []
+        if not ids:
+            break
+        missing = [(chunk_id, dict(metadata or {})) for chunk_id, metadata in zip(ids, page.get("metadatas", []) or []) if "upload_ts" not in (metadata or {})]
+        if missing:
+            collection.update(
+                ids=[chunk_id for chunk_id, _ in missing],
+                metadatas=[{**metadata, "upload_ts": upload_timestamp(metadata.get("upload_time"))} for _, metadata in missing],
+            )
+            updated += len(missing)
+        offset += len(ids)
+    collection.modify(metadata={**(collection.metadata or {}), _UPLOAD_TS_BACKFILLED: True})
+    if updated:
+        logger.info("Backfilled upload_ts on %s stored chunks", updated)
+    return updated
+
+
+def build_where(
+    document_id: Optional[str] = None,
+    source_type: Union[str, Sequence[str], None] = None,
+    uploaded_after: Union[str, int, float, datetime, None] = None,
+    uploaded_before: Union[str, int, float, datetime, None] = None,
+) -> Optional[Dict[str, Any]]:
+    """Build a Chroma ``where`` clause from retrieval filters, or ``None`` when there are none.
+
+    The upload window is inclusive and compares the numeric ``upload_ts`` metadata, because
+    Chroma only supports range operators on numbers.
+    """
+    conditions: List[Dict[str, Any]] = []
+    if document_id:
+        conditions.append({"document_id": str(document_id)})
+    if source_type:
+        if isinstance(source_type, str):
+            conditions.append({"source_type": source_type})
+        else:
+            conditions.append({"source_type": {"$in": [str(item) for item in source_type]}})
+    if uploaded_after is not None:
+        conditions.append({"upload_ts": {"$gte": upload_timestamp(uploaded_after)}})
+    if uploaded_before is not None:
+        conditions.append({"upload_ts": {"$lte": upload_timestamp(uploaded_before)}})
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+_OPERATORS = {
+    "$eq": lambda value, expected: value == expected,
+    "$ne": lambda value, expected: value != expected,
+    "$gt": lambda value, expected: value is not None and value > expected,
+    "$gte": lambda value, expected: value is not None and value >= expected,
+    "$lt": lambda value, expected: value is not None and value < expected,
+    "$lte": lambda value, expected: value is not None and value <= expected,
+    "$in": lambda value, expected: value in expected,
+    "$nin": lambda value, expected: value not in expected,
+}
+
+
+def matches_where(metadata: Optional[Mapping[str, Any]], where: Optional[Mapping[str, Any]]) -> bool:
+    """Evaluate a Chroma ``where`` clause against one chunk's metadata.
+
+    Chunks stored before ``upload_ts`` existed are compared by their parsed ``upload_time``.
+    """
+    if not where:
+        return True
+    metadata = metadata or {}
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, item) for item in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, item) for item in condition):
+                return False
+        elif isinstance(condition, Mapping):
+            value = metadata.get(key)
+            if key == "upload_ts" and value is None and metadata.get("upload_time"):
+                value = upload_timestamp(metadata["upload_time"])
+            if not all(_OPERATORS[operator](value, expected) for operator, expected in condition.items()):
+                return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+def chunk_metadata(
+    document_id: str,
+    filename: str,
+    source_type: str,
+    upload_time: str,
+    chunk_id: int,
+    total_chunks: int,
+    content_hash: str,
+) -> Dict[str, Any]:
+    return {
+        "document_id": str(document_id),
+        "filename": str(filename or ""),
+        "chunk_id": int(chunk_id),
+        "source_type": str(source_type or ""),
+        "upload_time": upload_time,
+        "upload_ts": upload_timestamp(upload_time),
+        "total_chunks": int(total_chunks),
+        "content_hash": content_hash,
+    }
+
+
 def add_documents(
     chunks: Sequence[Mapping[str, Any]],
     embeddings: Union[np.ndarray, Sequence[Sequence[float]]],
@@ -47,13 +243,15 @@ def add_documents(
     filename: str,
     source_type: str,
     upload_time: Optional[str] = None,
+    ids: Optional[Sequence[str]] = None,
+    total_chunks: Optional[int] = None,
 ) -> int:
-    """Store chunk documents and their embeddings in ChromaDB."""
+    """Store chunk documents and their embeddings in ChromaDB, replacing chunks with the same ids."""
     if not chunks:
         return 0
 
     collection = initialize()
-    upload_time = upload_time or time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    upload_time = upload_time or format_upload_time()
     document_id = str(document_id or uuid.uuid4())
 
     vector_array = np.asarray(embeddings, dtype=np.float32)
@@ -62,8 +260,10 @@ def add_documents(
 
     if len(chunks) != len(vector_array):
         raise ValueError("The number of chunks and embeddings must match")
+    if ids is not None and len(ids) != len(chunks):
+        raise ValueError("The number of chunks and ids must match")
 
-    ids: List[str] = []
+    chunk_ids: List[str] = []
     documents: List[str] = []
     metadatas: List[Dict[str, Any]] = []
     vectors: List[List[float]] = []
@@ -74,28 +274,55 @@ def add_documents(
         if not text:
             continue
 
-        chunk_id = chunk_data.get("chunk_id", index)
-        metadata = {
-            "document_id": document_id,
-            "filename": str(filename or ""),
-            "chunk_id": int(chunk_id),
-            "source_type": str(source_type or ""),
-            "upload_time": upload_time,
-            "total_chunks": len(chunks),
-        }
-
-        ids.append(f"{document_id}::chunk::{index}")
+        chunk_ids.append(str(ids[index]) if ids is not None else f"{document_id}::chunk::{index}")
         documents.append(text)
-        metadatas.append(metadata)
+        metadatas.append(
+            chunk_metadata(
+                document_id,
+                filename,
+                source_type,
+                upload_time,
+                chunk_id=chunk_data.get("chunk_id", index),
+                total_chunks=total_chunks if total_chunks is not None else len(chunks),
+                content_hash=chunk_content_hash(text),
+            )
+        )
         vectors.append(vector_array[index].tolist())
 
     if not documents:
         return 0
 
-    collection.add(ids=ids, documents=documents, embeddings=vectors, metadatas=metadatas)
+    collection.upsert(ids=chunk_ids, documents=documents, embeddings=vectors, metadatas=metadatas)
     return len(documents)
 
 
+def get_document_chunks(document_id: str) -> Dict[str, Dict[str, Any]]:
+    """Return ``{chunk id: metadata}`` for every stored chunk of a document, without embeddings."""
+    if not document_id:
+        return {}
+    collection = initialize()
+    results = collection.get(where={"document_id": str(document_id)}, include=["metadatas"])
+    ids = results.get("ids", []) or []
+    metadatas = results.get("metadatas", []) or []
+    return {str(chunk_id): dict(metadata or {}) for chunk_id, metadata in zip(ids, metadatas)}
+
+
+def update_chunk_metadata(ids: Sequence[str], metadatas: Sequence[Mapping[str, Any]]) -> None:
+    """Rewrite chunk metadata in place; documents and embeddings are left untouched."""
+    if not ids:
+        return
+    collection = initialize()
+    collection.update(ids=list(ids), metadatas=[dict(metadata) for metadata in metadatas])
+
+
+def delete_chunks(ids: Sequence[str]) -> None:
+    """Delete individual chunks by id."""
+    if not ids:
+        return
+    collection = initialize()
+    collection.delete(ids=list(ids))
+
+
 def delete_document(document_id: str) -> None:
     """Delete all chunks belonging to a document from the collection."""
     if not document_id:
@@ -104,8 +331,22 @@ def delete_document(document_id: str) -> None:
     collection.delete(where={"document_id": str(document_id)})
 
 
-def search(query_vector: Union[np.ndarray, Sequence[float]], top_k: int = 5) -> List[Dict[str, Any]]:
-    """Search the vector store for the nearest matching chunks."""
+def search(
+    query_vector: Union[np.ndarray, Sequence[float]],
+    top_k: int = 5,
+    document_id: Optional[str] = None,
+    source_type: Union[str, Sequence[str], None] = None,
+    uploaded_after: Union[str, int, float, datetime, None] = None,
+    uploaded_before: Union[str, int, float, datetime, None] = None,
+) -> List[Dict[str, Any]]:
+    """Search the vector store for the nearest chunks matching the given metadata filters.
+
+    Filters go into the store's ``where`` clause, so a document's chunks are found even when
+    other documents dominate the global top-k. Approximate indexes can still return fewer
+    filtered matches than asked for; the query is then repeated with a larger ``n_results``
+    until ``top_k`` chunks match, the store runs out of candidates or ``SEARCH_MAX_FETCH``
+    is reached.
+    """
     collection = initialize()
     if top_k <= 0:
         top_k = 1
@@ -114,18 +355,35 @@ def search(query_vector: Union[np.ndarray, Sequence[float]], top_k: int = 5) ->
     if vector_array.ndim == 1:
         vector_array = np.expand_dims(vector_array, axis=0)
 
-    results = collection.query(
-        query_embeddings=vector_array.tolist(),
-        n_results=top_k,
-        include=["documents", "metadatas", "distances"],
-    )
-
-    documents = results.get("documents", [[]])[0]
-    metadatas = results.get("metadatas", [[]])[0]
-    distances = results.get("distances", [[]])[0]
+    query: Dict[str, Any] = {
+        "query_embeddings": vector_array if VECTOR_BACKEND == "numpy" else vector_array.tolist(),
+        "include": ["documents", "metadatas", "distances"],
+    }
+    where = build_where(document_id, source_type, uploaded_after, uploaded_before)
+    if where:
+        query["where"] = where
+
+    fetch = top_k
+    returned = -1
+    while True:
+        results = collection.query(n_results=fetch, **query)
+        documents = results.get("documents", [[]])[0]
+        metadatas = results.get("metadatas", [[]])[0]
+        distances = results.get("distances", [[]])[0]
+        matched = [
+            (document, metadata, distance)
+            for document, metadata, distance in zip(documents, metadatas, distances)
+            if matches_where(metadata, where)
+        ]
+        exhausted = len(documents) <= returned
+        if not where or len(matched) >= top_k or exhausted or fetch >= SEARCH_MAX_FETCH:
+            break
+        returned = len(documents)
+        fetch = min(SEARCH_MAX_FETCH, fetch * SEARCH_OVERFETCH_FACTOR)
+        logger.debug("Filtered search returned %s of %s chunks, retrying with n_results=%s", len(matched), top_k, fetch)
 
     scored_results: List[Dict[str, Any]] = []
-    for document, metadata, distance in zip(documents, metadatas, distances):
+    for document, metadata, distance in matched[:top_k]:
         score = max(0.0, 1.0 - float(distance))
         scored_results.append(
             {
@@ -161,20 +419,23 @@ def list_documents() -> List[Dict[str, Any]]:
 
 
 def health_check() -> Dict[str, Any]:
-    """Check the health of the ChromaDB vector store."""
+    """Check the health of the configured vector store."""
     try:
         collection = initialize()
         results = collection.get(include=["metadatas"])
         metadatas = results.get("metadatas", []) or []
         total_documents = len([metadata for metadata in metadatas if metadata])
-        return {
+        status = {
             "ok": True,
-            "provider": "chroma",
+            "provider": VECTOR_BACKEND,
             "document_count": total_documents,
         }
+        if hasattr(collection, "stats"):
+            status["store"] = collection.stats()
+        return status
     except Exception as exc:
         return {
             "ok": False,
-            "provider": "chroma",
+            "provider": VECTOR_BACKEND,
             "error": str(exc),
         }
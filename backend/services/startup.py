@@ -0,0 +1,192 @@
+import importlib
+import logging
+import os
+import threading
+import time
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class StartupOrchestrator:
+    """Track heavy subsystems and warm them in a background thread once the server is up.
+
+    Each component is warmed by a callable that performs the same lazy import/initialization
+    its first real use would, so a request that arrives before warm-up finishes simply does
+    the work itself. Timing and errors are recorded per component for the readiness endpoint.
+    """
+
+    def __init__(self):
+        self._warmers: Dict[str, Callable[[], Any]] = {}
+        self._required: set = set()
+        self._components: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.started_at = time.time()
+
+    def register(self, name: str, warm: Callable[[], Any], required: bool = False) -> None:
+        """Register a warmer; the app is not ready while a ``required`` component has failed."""
+        with self._lock:
+            self._warmers[name] = warm
+            if required:
+                self._required.add(name)
+            self._components.setdefault(name, {"status": PENDING, "duration_ms": None, "error": ""})
+
+    def _update(self, name: str, **fields: Any) -> None:
+        with self._lock:
+            self._components.setdefault(name, {"status": PENDING, "duration_ms": None, "error": ""}).update(fields)
+
+    def record(self, name: str, duration_seconds: float, error: str = "") -> None:
+        """Record a component that was loaded outside the warm-up thread, e.g. during app import."""
+        self._update(name, status=FAILED if error else READY, duration_ms=round(duration_seconds * 1000, 1), error=error)
+
+    def warm(self, name: str) -> bool:
+        with self._lock:
+            warm = self._warmers.get(name)
+            state = self._components.get(name, {})
+            if warm is None or state.get("status") in {READY, WARMING}:
+                return state.get("status") == READY
+            state["status"] = WARMING
+        started = time.perf_counter()
+        try:
+            warm()
+        except Exception as exc:
+            logger.warning("Warm-up of %s failed: %s", name, exc)
+            self.record(name, time.perf_counter() - started, error=str(exc) or exc.__class__.__name__)
+            return False
+        self.record(name, time.perf_counter() - started)
+        logger.info("Warmed %s in %.0f ms", name, (time.perf_counter() - started) * 1000)
+        return True
+
+    def warm_all(self, names: Optional[List[str]] = None, delay_seconds: float = 0.0) -> None:
+        if delay_seconds > 0:
+            time.sleep(delay_seconds)
+        with self._lock:
+            selected = [name for name in self._warmers if names is None or name in names]
+            for name in self._warmers:
+                if name not in selected and self._components[name]["status"] == PENDING:
+                    self._components[name]["status"] = SKIPPED
+        for name in selected:
+            self.warm(name)
+
+    def start_background_warmup(self, names: Optional[List[str]] = None, delay_seconds: float = 0.0) -> threading.Thread:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.warm_all, args=(names, delay_seconds), name="startup-warmup", daemon=True)
+                self._thread.start()
+            return self._thread
+
+    def readiness(self) -> Dict[str, Any]:
+        with self._lock:
+            components = {name: dict(state) for name, state in self._components.items()}
+            required = set(self._required)
+        failed = sorted(name for name, state in components.items() if state["status"] == FAILED)
+        failed_required = [name for name in failed if name in required]
+        ready = not failed_required and all(state["status"] not in {PENDING, WARMING} for state in components.values())
+        return {
+            "ready": ready,
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "warm": sorted(name for name, state in components.items() if state["status"] == READY),
+            "failed": failed,
+            "failed_required": failed_required,
+            "components": components,
+        }
+
+
+_ORCHESTRATOR = StartupOrchestrator()
+_IMPORTS: Dict[str, Optional[ModuleType]] = {}
+_IMPORTS_LOCK = threading.Lock()
+
+
+def get_orchestrator() -> StartupOrchestrator:
+    return _ORCHESTRATOR
+
+
+def lazy_import(module_name: str) -> Optional[ModuleType]:
+    """Import an optional heavy module on first use; returns ``None`` when it is not installed."""
+    if module_name in _IMPORTS:
+        return _IMPORTS[module_name]
+    with _IMPORTS_LOCK:
+        if module_name not in _IMPORTS:
+            try:
+                _IMPORTS[module_name] = importlib.import_module(module_name)
+            except ImportError:
+                _IMPORTS[module_name] = None
+        return _IMPORTS[module_name]
+
+
+def _require_import(module_name: str) -> Callable[[], None]:
+    def warm() -> None:
+        if lazy_import(module_name) is None:
+            raise RuntimeError(f"{module_name} is not installed")
+
+    return warm
+
+
+def _warm_llm_provider() -> None:
+    from services.llm.factory import verify_provider_startup
+
+    for warning in verify_provider_startup():
+        logging.getLogger("services.llm.startup").warning(warning)
+
+
+def _warm_embeddings() -> None:
+    from services.rag.embeddings import embed_documents
+
+    embed_documents(["warm up"])
+
+
+def _warm_vectordb() -> None:
+    from services.rag.vectordb import initialize
+
+    initialize()
+
+
+def _warm_reranker() -> None:
+    from services.rag.reranker import warm_up
+
+    warm_up()
+
+
+def _warm_firestore() -> None:
+    from services import firestore_service
+
+    if firestore_service.get_firestore_db() is None:
+        raise RuntimeError(firestore_service.FIREBASE_INIT_ERROR or "Firestore is not configured")
+
+
+def register_default_components(orchestrator: Optional[StartupOrchestrator] = None) -> StartupOrchestrator:
+    orchestrator = orchestrator or _ORCHESTRATOR
+    orchestrator.register("llm_provider", _warm_llm_provider)
+    orchestrator.register("vectordb", _warm_vectordb, required=True)
+    orchestrator.register("embeddings", _warm_embeddings, required=True)
+    if str(os.getenv("RAG_RERANK", "false")).strip().lower() in {"1", "true", "yes"}:
+        orchestrator.register("reranker", _warm_reranker)
+    orchestrator.register("firestore", _warm_firestore)
+    orchestrator.register("stripe", _require_import("stripe"))
+    orchestrator.register("firebase_auth", _require_import("firebase_admin.auth"))
+    orchestrator.register("gtts", _require_import("gtts"))
+    orchestrator.register("pdf", _require_import("PyPDF2"))
+    return orchestrator
+
+
+def start_warmup() -> Optional[threading.Thread]:
+    """Start background warm-up as configured by ``STARTUP_WARMUP*``; called once the app has started."""
+    if str(os.getenv("STARTUP_WARMUP", "true")).strip().lower() not in {"1", "true", "yes"}:
+        _ORCHESTRATOR.warm_all(names=[])
+        return None
+    raw = os.getenv("STARTUP_WARMUP_COMPONENTS", "").strip()
+    names = [item.strip() for item in raw.split(",") if item.strip()] or None
+    delay = float(os.getenv("STARTUP_WARMUP_DELAY_SECONDS", "1") or 0)
+    return _ORCHESTRATOR.start_background_warmup(names=names, delay_seconds=delay)
+
+
+def get_readiness() -> Dict[str, Any]:
+    return _ORCHESTRATOR.readiness()
@@ -0,0 +1,299 @@
+import logging
+import mimetypes
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from services.extracted_text_cache import hash_file
+
+logger = logging.getLogger(__name__)
+
+TEMP_UPLOAD_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "temp_uploads"))
+UPLOAD_REGISTRY_PATH = os.getenv("UPLOAD_REGISTRY_PATH", os.path.join(TEMP_UPLOAD_DIR, "uploads.sqlite3"))
+UPLOAD_TTL_SECONDS = int(os.getenv("UPLOAD_TTL_SECONDS", str(24 * 3600)))
+UPLOAD_QUOTA_BYTES = int(os.getenv("UPLOAD_QUOTA_BYTES", str(2 * 1024 * 1024 * 1024)))
+UPLOAD_REAP_INTERVAL_SECONDS = float(os.getenv("UPLOAD_REAP_INTERVAL_SECONDS", "600"))
+
+# Stored uploads are named "<32 hex file id>__<original filename>".
+_STORED_NAME = re.compile(r"^([0-9a-f]{32})__(.+)$")
+# last_access is only rewritten when older than this, so hot lookups stay read-only.
+_TOUCH_INTERVAL_SECONDS = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    file_id TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    mime TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_uploads_last_access ON uploads (last_access);
+"""
+
+_COLUMNS = ("file_id", "path", "filename", "size", "sha256", "mime", "created_at", "last_access")
+
+
+class UploadRegistry:
+    """Index of stored uploads by file id (SQLite, WAL mode), shared by all workers and restarts.
+
+    Lookups are a primary-key read instead of a directory scan. ``reap`` deletes uploads not
+    used for ``ttl_seconds``, then the least recently used ones until the total size fits
+    ``quota_bytes``.
+    """
+
+    def __init__(self, path: str, directory: str, *, ttl_seconds: int = 24 * 3600, quota_bytes: int = 2 * 1024 * 1024 * 1024):
+        self.path = path
+        self.directory = directory
+        self.ttl_seconds = int(ttl_seconds)
+        self.quota_bytes = int(quota_bytes)
+        self._local = threading.local()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._reaper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # Set once stored files from before the index existed have been registered.
+        self._imported = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def add_delete_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """Call ``listener(record)`` after a reaped upload's file is removed."""
+        self._listeners.append(listener)
+
+    def register(self, file_id: str, filename: str, path: str, size: int, sha256: str, mime: str = "") -> Dict[str, Any]:
+        now = time.time()
+        record = {
+            "file_id": file_id,
+            "path": path,
+            "filename": filename,
+            "size": int(size),
+            "sha256": sha256,
+            "mime": mime or mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            "created_at": now,
+            "last_access": now,
+        }
+        self._connect().execute(
+            f"INSERT OR REPLACE INTO uploads ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' for _ in _COLUMNS)})",
+            tuple(record[column] for column in _COLUMNS),
+        )
+        return record
+
+    def get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        if not file_id:
+            return None
+        connection = self._connect()
+        row = connection.execute(f"SELECT {', '.join(_COLUMNS)} FROM uploads WHERE file_id = ?", (file_id,)).fetchone()
+        if row is None:
+            return None if self._imported.is_set() else self._import_file(file_id)
+        record = dict(zip(_COLUMNS, row))
+        if not os.path.exists(record["path"]):
+            connection.execute("DELETE FROM uploads WHERE file_id = ?", (file_id,))
+            return None
+        now = time.time()
+        if now - record["last_access"] > _TOUCH_INTERVAL_SECONDS:
+            connection.execute("UPDATE uploads SET last_access = ? WHERE file_id = ?", (now, file_id))
+            record["last_access"] = now
+        return record
+
+    def resolve(self, file_id: str) -> str:
+        record = self.get(file_id)
+        return record["path"] if record else ""
+
+    def _register_existing(self, file_id: str, filename: str, path: str) -> Dict[str, Any]:
+        stat = os.stat(path)
+        record = self.register(file_id, filename, path, stat.st_size, hash_file(path))
+        self._connect().execute(
+            "UPDATE uploads SET created_at = ?, last_access = ? WHERE file_id = ?",
+            (stat.st_mtime, stat.st_mtime, file_id),
+        )
+        record.update(created_at=stat.st_mtime, last_access=stat.st_mtime)
+        return record
+
+    def _import_file(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """Register one stored file on lookup while ``import_directory`` has not finished yet."""
+        prefix = f"{file_id}__"
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                match = _STORED_NAME.match(entry.name)
+                if entry.name.startswith(prefix) and match and entry.is_file():
+                    return self._register_existing(file_id, match.group(2), entry.path)
+        return None
+
+    def import_directory(self) -> int:
+        """Register stored upload files that are not in the index yet, e.g. from before it existed."""
+        known = {row[0] for row in self._connect().execute("SELECT file_id FROM uploads")}
+        imported = 0
+        for name in os.listdir(self.directory):
+            match = _STORED_NAME.match(name)
+            path = os.path.join(self.directory, name)
+            if not match or match.group(1) in known or not os.path.isfile(path):
+                continue
+            self._register_existing(match.group(1), match.group(2), path)
+            imported += 1
+        self._imported.set()
+        return imported
+
+    def _delete(self, records: List[Dict[str, Any]]) -> None:
+        for record in records:
+            try:
+                os.remove(record["path"])
+            except FileNotFoundError:
+                pass
+            except OSError as exc:
+                logger.warning("Failed to delete upload %s: %s", record["path"], exc)
+                continue
+            for listener in self._listeners:
+                try:
+                    listener(record)
+                except Exception as exc:
+                    logger.warning("Upload delete listener failed for %s: %s", record["file_id"], exc)
+
+    def reap(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            rows = connection.execute(f"SELECT {', '.join(_COLUMNS)} FROM uploads ORDER BY last_access ASC").fetchall()
+            records = [dict(zip(_COLUMNS, row)) for row in rows]
+            total = sum(record["size"] for record in records)
+            doomed = []
+            for record in records:
+                if record["last_access"] <= now - self.ttl_seconds or total > self.quota_bytes:
+                    doomed.append(record)
+                    total -= record["size"]
+            connection.executemany("DELETE FROM uploads WHERE file_id = ?", [(record["file_id"],) for record in doomed])
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        self._delete(doomed)
+        if doomed:
+            logger.info("Reaped %s stored uploads", len(doomed))
+        return len(doomed)
+
+    def _run_background(self, interval_seconds: float, import_existing: bool) -> None:
+        if import_existing:
+            try:
+                imported = self.import_directory()
+                if imported:
+                    logger.info("Registered %s existing uploads from %s", imported, self.directory)
+            except (OSError, sqlite3.Error) as exc:
+                logger.warning("Registering existing uploads failed: %s", exc)
+        while interval_seconds > 0 and not self._stop.wait(interval_seconds):
+            try:
+                self.reap()
+            except Exception as exc:
+                logger.warning("Upload reaper failed: %s", exc)
+
+    def start_reaper(self, interval_seconds: float, import_existing: bool = False) -> Optional[threading.Thread]:
+        """Reap every ``interval_seconds`` in a daemon thread, after registering existing files if asked.
+
+        Hashing existing files can take a while, so it runs here rather than before the server
+        accepts traffic; until it finishes, lookups register the file they ask for on a miss.
+        """
+        if interval_seconds <= 0 and not import_existing:
+            return None
+        if self._reaper is None:
+            self._reaper = threading.Thread(
+                target=self._run_background, args=(interval_seconds, import_existing), name="upload-reaper", daemon=True
+            )
+            self._reaper.start()
+        return self._reaper
+
+    def stop_reaper(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        count, total = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM uploads").fetchone()
+        return {
+            "uploads": count,
+            "size_bytes": total,
+            "quota_bytes": self.quota_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "reaper": self._reaper is not None and self._reaper.is_alive(),
+        }
+
+
+_REGISTRY: Optional[UploadRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+_DELETE_LISTENERS: List[Callable[[Dict[str, Any]], None]] = []
+
+
+def on_upload_deleted(listener: Callable[[Dict[str, Any]], None]) -> None:
+    """Register a callback for reaped uploads without opening the registry at import time."""
+    with _REGISTRY_LOCK:
+        _DELETE_LISTENERS.append(listener)
+        if _REGISTRY is not None:
+            _REGISTRY.add_delete_listener(listener)
+
+
+def get_upload_registry() -> UploadRegistry:
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            registry = UploadRegistry(UPLOAD_REGISTRY_PATH, TEMP_UPLOAD_DIR, ttl_seconds=UPLOAD_TTL_SECONDS, quota_bytes=UPLOAD_QUOTA_BYTES)
+            for listener in _DELETE_LISTENERS:
+                registry.add_delete_listener(listener)
+            _REGISTRY = registry
+        return _REGISTRY
+
+
+def resolve_upload(file_id: str) -> str:
+    """Path of a stored upload, or ``""`` when the id is unknown or the file is gone."""
+    if not file_id:
+        return ""
+    try:
+        return get_upload_registry().resolve(file_id)
+    except sqlite3.Error as exc:
+        logger.warning("Upload registry lookup failed for %s: %s", file_id, exc)
+        return ""
+
+
+def lookup_upload(file_id: str) -> Optional[Dict[str, Any]]:
+    """Registry record of a stored upload, or ``None`` when the id is unknown or the file is gone."""
+    if not file_id:
+        return None
+    try:
+        return get_upload_registry().get(file_id)
+    except sqlite3.Error as exc:
+        logger.warning("Upload registry lookup failed for %s: %s", file_id, exc)
+        return None
+
+
+def register_upload(file_id: str, filename: str, path: str, size: int, sha256: str) -> None:
+    try:
+        get_upload_registry().register(file_id, filename, path, size, sha256)
+    except sqlite3.Error as exc:
+        logger.warning("Failed to register upload %s: %s", file_id, exc)
+
+
+def get_upload_registry_stats() -> Dict[str, Any]:
+    try:
+        return get_upload_registry().stats()
+    except sqlite3.Error as exc:
+        return {"error": str(exc)}
+
+
+def start_upload_reaper() -> Optional[threading.Thread]:
+    try:
+        return get_upload_registry().start_reaper(UPLOAD_REAP_INTERVAL_SECONDS, import_existing=True)
+    except sqlite3.Error as exc:
+        logger.warning("Upload reaper not started: %s", exc)
+        return None
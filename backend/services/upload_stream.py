@@ -0,0 +1,87 @@
+import asyncio
+import hashlib
+import logging
+import os
+from typing import AsyncIterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(100 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+UPLOAD_MAX_CONCURRENT = int(os.getenv("UPLOAD_MAX_CONCURRENT", "8"))
+
+
+class UploadTooLarge(ValueError):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Uploaded file exceeds the {max_bytes // (1024 * 1024)} MB limit")
+        self.max_bytes = max_bytes
+
+
+_SLOTS: Optional[asyncio.Semaphore] = None
+
+
+def _upload_slots() -> asyncio.Semaphore:
+    global _SLOTS
+    if _SLOTS is None:
+        _SLOTS = asyncio.Semaphore(max(1, UPLOAD_MAX_CONCURRENT))
+    return _SLOTS
+
+
+def check_content_length(headers, max_bytes: Optional[int] = None) -> None:
+    """Reject a request whose declared body size is already over the limit, before reading it."""
+    max_bytes = UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    try:
+        declared = int(headers.get("content-length") or 0)
+    except ValueError:
+        return
+    if declared > max_bytes:
+        raise UploadTooLarge(max_bytes)
+
+
+async def iter_upload_file(upload, chunk_size: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Read a multipart ``UploadFile`` in fixed-size chunks."""
+    chunk_size = chunk_size or UPLOAD_CHUNK_BYTES
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _write(handle, chunk: bytes) -> None:
+    handle.write(chunk)
+
+
+async def save_stream(chunks: AsyncIterator[bytes], path: str, max_bytes: Optional[int] = None) -> Tuple[int, str]:
+    """Write a byte stream to ``path`` and return ``(size, sha256)``.
+
+    The body is hashed as it arrives and written from a worker thread. The next chunk is
+    only pulled once the previous one is on disk, so a slow disk slows the client down
+    instead of buffering the body in memory. At most ``UPLOAD_MAX_CONCURRENT`` uploads are
+    written at once; the others wait for a slot. Going over ``max_bytes`` stops the
+    transfer immediately with ``UploadTooLarge`` and removes the partial file.
+    """
+    # Dot-prefixed so the upload registry never mistakes a partial file for a stored upload.
+    max_bytes = UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    partial_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.part")
+    digest = hashlib.sha256()
+    size = 0
+    async with _upload_slots():
+        handle = await asyncio.to_thread(open, partial_path, "wb")
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                digest.update(chunk)
+                await asyncio.to_thread(_write, handle, chunk)
+        except BaseException:
+            handle.close()
+            try:
+                os.remove(partial_path)
+            except OSError:
+                pass
+            raise
+        handle.close()
+    os.replace(partial_path, path)
+    return size, digest.hexdigest()
@@ -0,0 +1,152 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from starlette.datastructures import FormData
+
+from services import extracted_text_cache
+from services.extracted_text_cache import ExtractedTextCache, make_key
+
+
+class ExtractedTextCacheTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_key_includes_extension(self):
+        self.assertNotEqual(make_key("abc", "notes.TXT"), make_key("abc", "notes.pdf"))
+        self.assertEqual(make_key("abc", "notes.TXT"), make_key("abc", "other.txt"))
+
+    def test_lru_is_bounded_by_characters(self):
+        cache = ExtractedTextCache(max_entries=10, max_chars=10)
+        cache.set("a", "123456", "text")
+        cache.set("b", "123456", "text")
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), ("123456", "text"))
+        self.assertEqual(cache.stats()["chars"], 6)
+
+    def test_disk_tier_is_shared_and_invalidated_with_the_upload(self):
+        upload = os.path.join(self.directory, "f1__slides.pptx")
+        with open(upload, "wb") as handle:
+            handle.write(b"deck bytes")
+        disk_dir = os.path.join(self.directory, ".extracted_text")
+        first = ExtractedTextCache(disk_dir=disk_dir)
+        key = make_key(first.digest_for_path(upload), "slides.pptx")
+        first.set(key, "Slide text", "pptx")
+
+        second = ExtractedTextCache(disk_dir=disk_dir)
+        self.assertEqual(second.get(key), ("Slide text", "pptx"))
+        self.assertEqual(second.stats()["disk_hits"], 1)
+
+        second.invalidate_path(upload, "slides.pptx")
+        self.assertEqual(os.listdir(disk_dir), [])
+        self.assertIsNone(second.get(key))
+
+    def test_deleted_upload_is_invalidated_by_its_recorded_digest(self):
+        disk_dir = os.path.join(self.directory, ".extracted_text")
+        ExtractedTextCache(disk_dir=disk_dir).set(make_key("d1", "slides.pptx"), "Slide text", "pptx")
+
+        # Another worker, or this one after a restart: the path was never hashed and the file is gone.
+        ExtractedTextCache(disk_dir=disk_dir).invalidate_path(os.path.join(self.directory, "f1__slides.pptx"), "slides.pptx", digest="d1")
+
+        self.assertEqual(os.listdir(disk_dir), [])
+
+    def test_unchanged_file_is_hashed_once(self):
+        upload = os.path.join(self.directory, "upload.pdf")
+        with open(upload, "wb") as handle:
+            handle.write(b"pdf bytes")
+        cache = ExtractedTextCache()
+
+        with patch.object(extracted_text_cache, "hash_file", wraps=extracted_text_cache.hash_file) as hash_file:
+            digest = cache.digest_for_path(upload)
+            self.assertEqual(cache.digest_for_path(upload), digest)
+        self.assertEqual(hash_file.call_count, 1)
+
+
+class StoredUploadExtractionTests(unittest.TestCase):
+    def test_repeated_generate_calls_extract_a_stored_upload_once(self):
+        from routes import generate
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "abc__lecture.pdf")
+        with open(path, "wb") as handle:
+            handle.write(b"%PDF lecture")
+
+        with patch.object(generate, "_extracted_text_cache", ExtractedTextCache()), patch.object(
+            generate, "_extract_text_from_file_bytes", return_value=("Lecture text", "pdf")
+        ) as extract:
+            results = [generate._extract_stored_upload_text(path, "lecture.pdf") for _ in range(3)]
+            self.assertEqual(results, [("Lecture text", "pdf")] * 3)
+            self.assertEqual(extract.call_count, 1)
+
+
+    def test_file_id_requests_use_the_registered_hash(self):
+        from routes import generate
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "abc__lecture.pdf")
+        with open(path, "wb") as handle:
+            handle.write(b"%PDF lecture")
+        record = {"file_id": "abc", "path": path, "filename": "lecture.pdf", "sha256": "d" * 64}
+
+        class _Request:
+            async def form(self):
+                return FormData([("fileId", "abc")])
+
+        cache = ExtractedTextCache()
+        with patch.object(generate, "_extracted_text_cache", cache), patch.object(generate, "_lookup_temp_upload", return_value=record), patch.object(
+            generate, "_index_uploaded_document"
+        ), patch.object(generate, "_extract_text_from_file_bytes", return_value=("Lecture text", "pdf")), patch.object(
+            cache, "digest_for_path", side_effect=AssertionError("stored uploads should not be re-hashed")
+        ):
+            asyncio.run(generate.get_source_text_from_request(_Request()))
+
+        self.assertIsNotNone(cache.get(make_key(record["sha256"], "lecture.pdf")))
+
+    def test_reaping_an_upload_drops_its_cached_text(self):
+        from routes import generate
+        from services import upload_registry
+        from services.upload_registry import UploadRegistry
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "abc__lecture.pdf")
+        with open(path, "wb") as handle:
+            handle.write(b"%PDF lecture")
+        cache = ExtractedTextCache()
+        digest = cache.digest_for_path(path)
+        registry = UploadRegistry(os.path.join(directory.name, "uploads.sqlite3"), directory.name, ttl_seconds=60)
+        registry.add_delete_listener(generate.invalidate_extracted_text)
+        registry.register("abc", "lecture.pdf", path, 12, digest)
+
+        with patch.object(generate, "_extracted_text_cache", cache), patch.object(
+            generate, "_extract_text_from_file_bytes", return_value=("Lecture text", "pdf")
+        ) as extract:
+            generate._extract_stored_upload_text(path, "lecture.pdf", digest)
+            self.assertEqual(registry.reap(now=time.time() + 3600), 1)
+            with open(path, "wb") as handle:
+                handle.write(b"%PDF lecture")
+            generate._extract_stored_upload_text(path, "lecture.pdf", digest)
+
+        self.assertEqual(extract.call_count, 2)
+        self.assertIn(generate.invalidate_extracted_text, upload_registry._DELETE_LISTENERS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from services.generation_cache import GenerationCacheStore
+
+
+class GenerationCacheStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "generation_cache.sqlite3")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trips_json_payloads(self):
+        store = GenerationCacheStore(self.path)
+        payload = {"mcqs": [{"question": "Q?"}], "summary": "S"}
+        store.set("key", payload, feature="study_set")
+
+        self.assertEqual(store.get("key"), payload)
+        self.assertIsNone(store.get("missing"))
+        self.assertEqual(store.stats()["entries"], 1)
+
+    def test_expired_entries_are_not_returned(self):
+        store = GenerationCacheStore(self.path, ttl_seconds=0)
+        store.set("key", "summary")
+
+        self.assertIsNone(store.get("key"))
+        self.assertEqual(store.evict(), 0)
+        self.assertEqual(store.stats()["entries"], 0)
+
+    def test_evicts_least_recently_used_entries_beyond_limits(self):
+        store = GenerationCacheStore(self.path, max_entries=2, evict_every=1)
+        store.set("a", "first")
+        store.set("b", "second")
+        store.get("a")
+        store.set("c", "third")
+
+        self.assertEqual(store.get("a"), "first")
+        self.assertIsNone(store.get("b"))
+        self.assertEqual(store.get("c"), "third")
+
+    def test_concurrent_writers_on_separate_connections_lose_no_updates(self):
+        stores = [GenerationCacheStore(self.path) for _ in range(4)]
+
+        def write(index, store):
+            for item in range(25):
+                store.set(f"{index}-{item}", {"item": item})
+
+        threads = [threading.Thread(target=write, args=(index, store)) for index, store in enumerate(stores)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(stores[0].stats()["entries"], 100)
+        self.assertEqual(stores[1].get("3-24"), {"item": 24})
+
+    def test_imports_legacy_json_cache(self):
+        legacy_path = os.path.join(self.directory.name, "generation_cache.json")
+        with open(legacy_path, "w", encoding="utf-8") as handle:
+            json.dump({"key": {"summary": "cached"}}, handle)
+
+        store = GenerationCacheStore(self.path)
+        self.assertEqual(store.import_json_file(legacy_path), 1)
+        self.assertEqual(store.get("key"), {"summary": "cached"})
+        self.assertFalse(os.path.exists(legacy_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+import asyncio
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from utils.singleflight import SingleFlight
+
+
+class SingleFlightTests(unittest.TestCase):
+    def test_concurrent_threads_share_one_computation(self):
+        flights = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(2)
+            return "payload"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flights.do("key", compute))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join(2)
+
+        self.assertEqual(results, ["payload"] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flights.stats(), {"in_flight": 0, "leaders": 1, "coalesced": 7})
+
+    def test_waiters_receive_the_leader_exception_and_next_call_retries(self):
+        flights = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.05)
+            raise RuntimeError("model down")
+
+        async def run():
+            return await asyncio.gather(flights.ado("key", failing), flights.ado("key", failing), return_exceptions=True)
+
+        errors = asyncio.run(run())
+        self.assertTrue(all(isinstance(error, RuntimeError) for error in errors))
+
+        async def working():
+            return "ok"
+
+        self.assertEqual(asyncio.run(flights.ado("key", working)), "ok")
+        self.assertEqual(flights.stats()["leaders"], 2)
+
+    def test_cancelled_leader_hands_over_to_a_waiter(self):
+        flights = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return "payload"
+
+        async def run():
+            leader = asyncio.create_task(flights.ado("key", compute))
+            await asyncio.sleep(0.01)
+            follower = asyncio.create_task(flights.ado("key", compute))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            return await follower
+
+        self.assertEqual(asyncio.run(run()), "payload")
+        self.assertEqual(len(calls), 2)
+
+
+class GenerationRouteCoalescingTests(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_identical_summary_requests_generate_once(self):
+        from backend.routes import generate as generate_routes
+
+        calls = []
+        stored = {}
+
+        async def fake_get_source_text_from_request(request):
+            return "shared handout", {"difficulty": "medium"}
+
+        def fake_generate_summary(source_text):
+            calls.append(source_text)
+            time.sleep(0.1)
+            return {"summary": "Shared summary"}, {"feature": "summary"}
+
+        def fake_get_cached(feature, source_text, count=None, difficulty=None):
+            return stored.get((feature, source_text))
+
+        def fake_set_cached(feature, source_text, payload, count=None, difficulty=None):
+            stored[(feature, source_text)] = payload
+            return payload
+
+        with patch.object(generate_routes, "get_source_text_from_request", side_effect=fake_get_source_text_from_request), patch.object(
+            generate_routes, "_get_cached_generation_payload", side_effect=fake_get_cached
+        ), patch.object(generate_routes, "_set_cached_generation_payload", side_effect=fake_set_cached), patch.object(
+            generate_routes, "generate_summary_from_rag", side_effect=fake_generate_summary
+        ):
+            responses = await asyncio.gather(*(generate_routes.generate_summary(object()) for _ in range(5)))
+            cached_response = await generate_routes.generate_summary(object())
+
+        self.assertEqual(responses, [{"summary": "Shared summary"}] * 5)
+        self.assertEqual(cached_response, {"summary": "Shared summary"})
+        self.assertEqual(len(calls), 1)
+
+    async def test_waits_for_another_worker_holding_the_redis_lock(self):
+        from backend.routes import generate as generate_routes
+
+        stored = {}
+        lock_attempts = []
+
+        def fake_acquire_lock(key, ttl_seconds):
+            lock_attempts.append(key)
+            if len(lock_attempts) == 2:
+                stored["payload"] = "from other worker"
+            return None
+
+        async def compute():
+            raise AssertionError("should reuse the other worker's result")
+
+        with patch.object(generate_routes, "_get_cached_generation_payload", side_effect=lambda *args, **kwargs: stored.get("payload")), patch.object(
+            generate_routes, "acquire_lock", side_effect=fake_acquire_lock
+        ), patch.object(generate_routes, "GENERATION_LOCK_POLL_SECONDS", 0.01):
+            payload = await generate_routes._get_or_generate("summary", "shared handout", compute)
+
+        self.assertEqual(payload, "from other worker")
+        self.assertEqual(len(lock_attempts), 2)
+
+    async def test_cache_reads_run_off_the_event_loop(self):
+        from backend.routes import generate as generate_routes
+
+        loop_thread = threading.get_ident()
+        read_threads = []
+
+        def fake_get_cached(*args, **kwargs):
+            read_threads.append(threading.get_ident())
+            return "cached"
+
+        async def compute():
+            raise AssertionError("should be served from the cache")
+
+        with patch.object(generate_routes, "_get_cached_generation_payload", side_effect=fake_get_cached):
+            payload = await generate_routes._get_or_generate("summary", "shared handout", compute)
+
+        self.assertEqual(payload, "cached")
+        self.assertNotIn(loop_thread, read_threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
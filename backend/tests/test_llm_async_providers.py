@@ -0,0 +1,111 @@
+import json
+import os
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+
+class _OllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, body, content_type="application/json"):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send(json.dumps({"models": ["gemma3"]}).encode("utf-8"))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", "0"))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if payload.get("stream"):
+            lines = [json.dumps({"response": "Hello"}), json.dumps({"response": " async"}), "[DONE]"]
+            self._send(("\n".join(lines) + "\n").encode("utf-8"), content_type="application/x-ndjson")
+            return
+        self._send(json.dumps({"response": f"echo:{payload.get('prompt')}"}).encode("utf-8"))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _FailingProvider:
+    name = "ollama"
+    model = "broken"
+
+    def get_model_name(self):
+        return "broken"
+
+    async def agenerate(self, prompt, *, max_output_tokens=800, response_mime_type="application/json"):
+        raise RuntimeError("primary down")
+
+    async def astream_generate(self, prompt, *, max_output_tokens=800, response_mime_type="application/json"):
+        raise RuntimeError("primary down")
+        yield ""
+
+
+class _WorkingProvider(_FailingProvider):
+    name = "gemini"
+
+    async def agenerate(self, prompt, *, max_output_tokens=800, response_mime_type="application/json"):
+        return "fallback answer"
+
+    async def astream_generate(self, prompt, *, max_output_tokens=800, response_mime_type="application/json"):
+        for chunk in ["fallback", " stream"]:
+            yield chunk
+
+
+class LlmAsyncProviderTests(unittest.IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _OllamaHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    async def asyncTearDown(self):
+        from services.llm.async_http import aclose_async_clients
+
+        await aclose_async_clients()
+
+    async def test_ollama_async_contract(self):
+        from services.llm.ollama_provider import OllamaProvider
+
+        with patch.dict(os.environ, {"OLLAMA_BASE_URL": self.base_url, "OLLAMA_MODEL": "gemma3"}, clear=False):
+            provider = OllamaProvider()
+
+        self.assertEqual(await provider.agenerate("Hi", response_mime_type="text/plain"), "echo:Hi")
+        chunks = [chunk async for chunk in provider.astream_generate("Hi", response_mime_type="text/plain")]
+        self.assertEqual("".join(chunks), "Hello async")
+        status = await provider.ahealth_check()
+        self.assertTrue(status["ok"])
+
+    async def test_manager_falls_back_in_async_form(self):
+        from services.llm.factory import LLMProviderManager
+
+        manager = LLMProviderManager(_FailingProvider(), _WorkingProvider())
+
+        self.assertEqual(await manager.agenerate("Hi"), "fallback answer")
+        chunks = [chunk async for chunk in manager.astream_generate("Hi")]
+        self.assertEqual("".join(chunks), "fallback stream")
+
+
+if __name__ == "__main__":
+    unittest.main()
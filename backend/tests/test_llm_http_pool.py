@@ -0,0 +1,111 @@
+import json
+import os
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+
+class _OllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send_json({"models": ["gemma3"]})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", "0"))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if payload.get("stream"):
+            lines = [json.dumps({"response": "Hello"}), json.dumps({"response": " world"})]
+            body = ("\n".join(lines) + "\n").encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self._send_json({"response": "pooled answer"})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LlmHttpPoolTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _OllamaHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        from services.llm import http_pool
+
+        http_pool.close_all_pools()
+
+    def test_pool_reuses_keep_alive_connections(self):
+        from services.llm import http_pool
+
+        for _ in range(3):
+            response = http_pool.request("ollama", "GET", f"{self.base_url}/api/models")
+            self.assertEqual(response.json(), {"models": ["gemma3"]})
+
+        stats = http_pool.get_pool_stats()
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]["misses"], 1)
+        self.assertEqual(stats[0]["hits"], 2)
+
+    def test_ollama_provider_uses_shared_pool_for_all_calls(self):
+        from services.llm import http_pool
+        from services.llm.ollama_provider import OllamaProvider
+
+        with patch.dict(os.environ, {"OLLAMA_BASE_URL": self.base_url, "OLLAMA_MODEL": "gemma3"}, clear=False):
+            provider = OllamaProvider()
+
+        self.assertEqual(provider.generate("Hi", response_mime_type="text/plain"), "pooled answer")
+        self.assertEqual("".join(provider.stream_generate("Hi", response_mime_type="text/plain")), "Hello world")
+        self.assertTrue(provider.health_check()["ok"])
+
+        stats = http_pool.get_pool_stats()[0]
+        self.assertEqual(stats["provider"], "ollama")
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 2)
+
+    def test_idle_connections_past_timeout_are_discarded(self):
+        from services.llm.http_pool import HTTPConnectionPool
+
+        pool = HTTPConnectionPool("http", "127.0.0.1", self.server.server_address[1], idle_timeout=0)
+        pool.request("GET", "/api/models")
+        pool.request("GET", "/api/models")
+
+        stats = pool.stats()
+        self.assertEqual(stats["hits"], 0)
+        self.assertEqual(stats["misses"], 2)
+        self.assertEqual(stats["discarded"], 1)
+        pool.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
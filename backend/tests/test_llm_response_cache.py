@@ -0,0 +1,165 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from services.llm.base import BaseLLMProvider
+
+
+class _CountingProvider(BaseLLMProvider):
+    name = "fake"
+    temperature = 0.2
+
+    def __init__(self):
+        super().__init__("fake-model")
+        self.calls = 0
+
+    def generate(self, prompt, *, max_output_tokens=800, response_mime_type="application/json"):
+        self.calls += 1
+        return f"answer {self.calls} to {prompt}"
+
+    def stream_generate(self, prompt, *, max_output_tokens=800, response_mime_type="application/json"):
+        yield "streamed"
+
+    def health_check(self):
+        return {"ok": True, "provider": self.name, "model": self.model}
+
+    def get_model_name(self):
+        return self.model
+
+
+class LlmResponseCacheTests(unittest.TestCase):
+    def _provider(self, **cache_kwargs):
+        from services.llm.response_cache import CachingProvider, LLMResponseCache
+
+        inner = _CountingProvider()
+        return inner, CachingProvider(inner, LLMResponseCache(**cache_kwargs))
+
+    def test_identical_requests_are_served_from_cache(self):
+        inner, provider = self._provider()
+
+        first = provider.generate("Explain osmosis", max_output_tokens=300)
+        second = provider.generate("Explain osmosis", max_output_tokens=300)
+        third = provider.generate("Explain osmosis", max_output_tokens=600)
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, third)
+        self.assertEqual(inner.calls, 2)
+        stats = provider.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+        self.assertEqual(stats["bytes_saved"], len(first.encode("utf-8")))
+
+    def test_async_generate_shares_entries_with_sync_generate(self):
+        inner, provider = self._provider()
+
+        sync_answer = provider.generate("Define entropy")
+        async_answer = asyncio.run(provider.agenerate("Define entropy"))
+
+        self.assertEqual(sync_answer, async_answer)
+        self.assertEqual(inner.calls, 1)
+
+    def test_lru_evicts_least_recently_used_entry(self):
+        inner, provider = self._provider(max_entries=2)
+
+        provider.generate("a")
+        provider.generate("b")
+        provider.generate("a")
+        provider.generate("c")
+        provider.generate("a")
+        provider.generate("b")
+
+        self.assertEqual(inner.calls, 4)
+        self.assertEqual(provider.cache.stats()["evictions"], 2)
+
+    def test_expired_entries_are_regenerated(self):
+        inner, provider = self._provider(ttl_seconds=0)
+
+        provider.generate("Explain osmosis")
+        provider.generate("Explain osmosis")
+
+        self.assertEqual(inner.calls, 2)
+
+    def test_bypass_context_and_feature_list_skip_cache(self):
+        from services.llm.response_cache import bypass_llm_cache, llm_cache_feature
+
+        inner, provider = self._provider()
+        provider.generate("Explain osmosis")
+
+        with bypass_llm_cache():
+            provider.generate("Explain osmosis")
+        with patch.dict(os.environ, {"LLM_CACHE_BYPASS_FEATURES": "qa"}, clear=False):
+            with llm_cache_feature("qa"):
+                provider.generate("Explain osmosis")
+            with llm_cache_feature("summary"):
+                provider.generate("Explain osmosis")
+
+        self.assertEqual(inner.calls, 3)
+        stats = provider.cache.stats()
+        self.assertEqual(stats["bypassed"], 2)
+        self.assertEqual(stats["features"]["qa"]["bypassed"], 1)
+        self.assertEqual(stats["features"]["summary"]["hits"], 1)
+
+    def test_disk_tier_survives_a_new_memory_tier(self):
+        from services.llm.response_cache import CachingProvider, LLMResponseCache, _DiskTier
+
+        with tempfile.TemporaryDirectory() as directory:
+            inner = _CountingProvider()
+            CachingProvider(inner, LLMResponseCache(backend=_DiskTier(directory, 1024 * 1024))).generate("Explain osmosis")
+            restarted = CachingProvider(inner, LLMResponseCache(backend=_DiskTier(directory, 1024 * 1024)))
+            answer = restarted.generate("Explain osmosis")
+
+            self.assertEqual(answer, "answer 1 to Explain osmosis")
+            self.assertEqual(inner.calls, 1)
+            self.assertEqual(restarted.cache.stats()["backend_hits"], 1)
+
+    def test_fallback_responses_and_rejected_responses_are_not_stored(self):
+        from services.llm.factory import LLMProviderManager
+        from services.llm.response_cache import CachingProvider, LLMResponseCache, llm_cache_accept
+
+        class _FailingProvider(_CountingProvider):
+            name = "primary"
+
+            def generate(self, prompt, *, max_output_tokens=800, response_mime_type="application/json"):
+                self.calls += 1
+                raise RuntimeError("primary down")
+
+        primary, fallback = _FailingProvider(), _CountingProvider()
+        provider = CachingProvider(LLMProviderManager(primary, fallback), LLMResponseCache())
+        provider.generate("Explain osmosis")
+        asyncio.run(provider.agenerate("Explain osmosis"))
+        self.assertEqual((primary.calls, fallback.calls), (2, 2))
+
+        inner, provider = self._provider()
+        with llm_cache_accept(lambda response: response.endswith("valid")):
+            provider.generate("Explain osmosis")
+            provider.generate("Explain osmosis")
+        self.assertEqual(inner.calls, 2)
+        self.assertEqual(provider.cache.stats()["rejected"], 2)
+        self.assertEqual(provider.cache.stats()["stores"], 0)
+
+    def test_create_provider_wraps_only_when_enabled(self):
+        from services.llm import factory
+
+        factory._PROVIDER_CACHE.clear()
+        with patch.dict(os.environ, {"LLM_PROVIDER": "ollama", "LLM_CACHE_ENABLED": "true"}, clear=False):
+            provider = factory.create_provider()
+        self.assertEqual(provider.__class__.__name__, "CachingProvider")
+        self.assertEqual(provider.inner.__class__.__name__, "OllamaProvider")
+        self.assertEqual(provider.name, "ollama")
+        factory._PROVIDER_CACHE.clear()
+
+
+if __name__ == "__main__":
+    unittest.main()
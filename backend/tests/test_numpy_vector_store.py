@@ -0,0 +1,136 @@
+import hashlib
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from services.rag import ingestion, vectordb
+from services.rag.numpy_store import NumpyVectorCollection
+
+
+def _vector(text, dim=8):
+    seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _add(collection, document_id, texts):
+    collection.upsert(
+        ids=[f"{document_id}::{text}" for text in texts],
+        embeddings=np.stack([_vector(text) for text in texts]),
+        documents=list(texts),
+        metadatas=[{"document_id": document_id, "chunk_id": index} for index, text in enumerate(texts)],
+    )
+
+
+class NumpyVectorCollectionTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.collection = NumpyVectorCollection(self.directory)
+
+    def test_query_matches_brute_force_squared_l2(self):
+        texts = [f"chunk {index}" for index in range(40)]
+        _add(self.collection, "doc-a", texts[:25])
+        _add(self.collection, "doc-b", texts[25:])
+        query = _vector("question")
+
+        result = self.collection.query(query, n_results=5)
+
+        expected = sorted(((float(np.sum((_vector(text) - query) ** 2)), text) for text in texts))[:5]
+        self.assertEqual(result["documents"][0], [text for _, text in expected])
+        np.testing.assert_allclose(result["distances"][0], [distance for distance, _ in expected], rtol=1e-5)
+
+    def test_document_filter_only_scores_that_documents_rows(self):
+        _add(self.collection, "doc-a", ["alpha", "beta", "gamma"])
+        _add(self.collection, "doc-b", ["delta", "epsilon"])
+
+        result = self.collection.query(_vector("alpha"), n_results=5, where={"document_id": "doc-b"})
+
+        self.assertEqual(sorted(result["documents"][0]), ["delta", "epsilon"])
+        self.assertEqual(self.collection._candidate_ranges({"document_id": "doc-b"}), [(3, 5)])
+
+    def test_reupserting_part_of_a_document_keeps_its_rows_contiguous(self):
+        _add(self.collection, "doc-a", ["alpha", "beta"])
+        _add(self.collection, "doc-b", ["gamma"])
+        self.collection.upsert(
+            ids=["doc-a::beta"],
+            embeddings=_vector("beta revised")[None, :],
+            documents=["beta revised"],
+            metadatas=[{"document_id": "doc-a", "chunk_id": 1}],
+        )
+
+        stored = self.collection.get(where={"document_id": "doc-a"})
+        self.assertEqual(stored["documents"], ["alpha", "beta revised"])
+        self.assertEqual(self.collection._candidate_ranges({"document_id": "doc-a"}), [(3, 5)])
+        self.assertEqual(self.collection.stats()["dead_rows"], 2)
+        top = self.collection.query(_vector("beta revised"), n_results=1)
+        self.assertEqual(top["ids"][0], ["doc-a::beta"])
+        self.assertAlmostEqual(top["distances"][0][0], 0.0, places=5)
+
+    def test_other_instances_see_writes_and_compaction_keeps_results(self):
+        _add(self.collection, "doc-a", ["alpha", "beta"])
+        _add(self.collection, "doc-b", ["gamma", "delta"])
+        reader = NumpyVectorCollection(self.directory)
+        self.assertEqual(reader.count(), 4)
+
+        self.collection.delete(where={"document_id": "doc-a"})
+        self.collection.delete(ids=["doc-b::gamma"])
+
+        self.assertEqual(reader.query(_vector("alpha"), n_results=5)["documents"][0], ["delta"])
+        self.assertEqual(self.collection.compact(), 3)
+        self.assertEqual(self.collection.stats()["rows"], 1)
+        self.assertEqual(reader.query(_vector("alpha"), n_results=5)["documents"][0], ["delta"])
+        self.assertEqual(reader.get(where={"document_id": "doc-a"})["ids"], [])
+
+
+class NumpyBackendIngestionTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patches = [
+            patch.object(vectordb, "VECTOR_BACKEND", "numpy"),
+            patch.object(vectordb, "NUMPY_STORE_PATH", directory.name),
+            patch.object(vectordb, "_COLLECTION", None),
+            patch.object(vectordb, "_CLIENT", None),
+            patch.object(ingestion, "embed_documents", side_effect=lambda chunks: np.stack([_vector(chunk["text"]) for chunk in chunks])),
+            patch.object(ingestion, "get_chunk_store", return_value=None),
+            patch.object(ingestion, "get_lexical_index", return_value=None),
+            patch.object(ingestion.cache, "invalidate_document_cache"),
+        ]
+        for item in patches:
+            item.start()
+            self.addCleanup(item.stop)
+
+    def _ingest(self, document_id, texts):
+        chunks = [{"chunk_id": index, "text": text, "start": 0, "end": len(text)} for index, text in enumerate(texts)]
+        with patch.object(ingestion, "chunk_text", return_value=chunks):
+            return ingestion.ingest_document(document_id, f"{document_id}.txt", "text", "placeholder")
+
+    def test_incremental_reingestion_and_document_search(self):
+        self._ingest("doc-a", ["cell membrane", "osmosis", "diffusion"])
+        self._ingest("doc-b", ["osmosis"])
+
+        result = self._ingest("doc-a", ["cell membrane", "osmosis revised", "diffusion"])
+
+        self.assertEqual((result["added_chunks"], result["reused_chunks"], result["deleted_chunks"]), (1, 2, 1))
+        hits = vectordb.search(_vector("osmosis"), top_k=3, document_id="doc-a")
+        self.assertEqual({hit["metadata"]["document_id"] for hit in hits}, {"doc-a"})
+        self.assertEqual(sorted(hit["text"] for hit in hits), ["cell membrane", "diffusion", "osmosis revised"])
+        self.assertEqual(vectordb.search(_vector("osmosis"), top_k=1)[0]["score"], 1.0)
+        self.assertEqual(vectordb.health_check()["provider"], "numpy")
+
+
+if __name__ == "__main__":
+    unittest.main()
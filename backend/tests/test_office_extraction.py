@@ -0,0 +1,82 @@
+import io
+import sys
+import unittest
+import zipfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from services.rag.benchmark import synthetic_docx, synthetic_pptx
+from utils.extractors import extract_docx_text, extract_pptx_text, iter_docx_paragraphs
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+A = 'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"'
+
+
+def _archive(parts):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, xml in parts.items():
+            archive.writestr(name, xml)
+    return buffer.getvalue()
+
+
+class DocxExtractionTests(unittest.TestCase):
+    def test_runs_join_within_paragraphs_and_headings_start_sections(self):
+        data = _archive(
+            {
+                "word/document.xml": (
+                    f"<w:document {W}><w:body>"
+                    '<w:p><w:pPr><w:pStyle w:val="Heading1"/></w:pPr><w:r><w:t>Cells</w:t></w:r></w:p>'
+                    "<w:p><w:r><w:t>Cells are </w:t></w:r><w:r><w:t>small.</w:t></w:r></w:p>"
+                    '<w:p><w:pPr><w:pStyle w:val="Heading2"/></w:pPr><w:r><w:t>Osmosis</w:t></w:r></w:p>'
+                    "<w:tbl><w:tr><w:tc><w:p><w:r><w:t>Water</w:t></w:r><w:r><w:tab/><w:t>moves</w:t></w:r></w:p></w:tc></w:tr></w:tbl>"
+                    "</w:body></w:document>"
+                )
+            }
+        )
+
+        self.assertEqual(extract_docx_text(data), "Cells\nCells are small.\n\nOsmosis\nWater moves")
+
+    def test_malformed_xml_keeps_text_read_before_the_error(self):
+        data = _archive({"word/document.xml": f"<w:document {W}><w:body><w:p><w:r><w:t>Kept</w:t></w:r></w:p><w:p>"})
+        self.assertEqual(extract_docx_text(data), "Kept")
+        self.assertEqual(extract_docx_text(b"not a zip"), "")
+
+    def test_large_document_streams_every_paragraph(self):
+        paragraphs = list(iter_docx_paragraphs(synthetic_docx(2000)))
+        self.assertEqual(len(paragraphs), 2000 + 80)
+        self.assertTrue(paragraphs[0][1])
+
+
+class PptxExtractionTests(unittest.TestCase):
+    def _slide(self, *lines):
+        return f"<p:sld {A} xmlns:p=\"p\"><a:p><a:r><a:t>{'</a:t></a:r></a:p><a:p><a:r><a:t>'.join(lines)}</a:t></a:r></a:p></p:sld>"
+
+    def test_slides_are_ordered_numerically_and_separated_by_blank_lines(self):
+        data = _archive(
+            {
+                "ppt/slides/slide10.xml": self._slide("Ten"),
+                "ppt/slides/slide2.xml": self._slide("Two", "Second line"),
+                "ppt/slides/slide1.xml": self._slide("One"),
+                "ppt/slides/_rels/slide1.xml.rels": "<Relationships/>",
+            }
+        )
+
+        self.assertEqual(extract_pptx_text(data), "One\n\nTwo\nSecond line\n\nTen")
+
+    def test_unparseable_slide_is_skipped(self):
+        data = _archive({"ppt/slides/slide1.xml": "<broken", "ppt/slides/slide2.xml": self._slide("Two")})
+        self.assertEqual(extract_pptx_text(data), "Two")
+
+    def test_synthetic_deck_extracts_every_slide(self):
+        self.assertEqual(extract_pptx_text(synthetic_pptx(30, paragraphs_per_slide=2)).count("\n\n"), 29)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from services.rag import ingestion
+from services.rag.chunking import chunk_text
+from utils import extractors
+
+
+def _build_pdf(page_texts):
+    """A minimal PDF with one Helvetica text line per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in page_texts:
+        content = f"BT /F1 12 Tf 72 712 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    output = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return output
+
+
+class PdfPageStreamingTests(unittest.TestCase):
+    def setUp(self):
+        self.pages = [f"Page {number} covers topic {number}" for number in range(1, 7)]
+        self.pdf = _build_pdf(self.pages)
+
+    def test_serial_pages_are_yielded_lazily_in_order(self):
+        stream = extractors.iter_pdf_pages(self.pdf, workers=1)
+        self.assertEqual(next(stream), self.pages[0])
+        self.assertEqual(list(stream), self.pages[1:])
+        self.assertEqual(extractors.extract_pdf_text(self.pdf), "\n".join(self.pages))
+
+    def test_process_pool_preserves_page_order(self):
+        self.addCleanup(lambda: extractors._PDF_POOL and extractors._discard_pdf_pool(extractors._PDF_POOL))
+        pages = list(extractors.iter_pdf_pages(self.pdf, workers=2, parallel_min_pages=2))
+        self.assertEqual(pages, self.pages)
+
+    def test_pages_in_flight_survive_another_extraction_discarding_the_pool(self):
+        self.addCleanup(lambda: extractors._PDF_POOL and extractors._discard_pdf_pool(extractors._PDF_POOL))
+        stream = extractors.iter_pdf_pages(self.pdf, workers=2, parallel_min_pages=2)
+        self.assertEqual(next(stream), self.pages[0])
+
+        # What a concurrent extraction does when one of its own pages times out.
+        extractors._discard_pdf_pool(extractors._PDF_POOL)
+
+        self.assertEqual(list(stream), self.pages[1:])
+
+    def test_unreadable_pdf_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            list(extractors.iter_pdf_pages(b"not a pdf"))
+
+
+class StreamingIngestionTests(unittest.TestCase):
+    def test_chunks_are_embedded_while_pages_are_still_arriving(self):
+        embedding_started = threading.Event()
+        overlapped = []
+
+        def pages():
+            for number in range(4):
+                if number == 3:
+                    overlapped.append(embedding_started.wait(timeout=5))
+                yield f"Paragraph {number}. " + f"word{number} " * 60
+
+        def fake_embed(chunks, hashes):
+            embedding_started.set()
+            return np.ones((len(chunks), 3), dtype=np.float32), 0
+
+        def fake_index(document_id, filename, source_type, chunks, started_at, prepared, prepared_shared):
+            return {"success": True, "number_of_chunks": len(chunks), "prepared": len(prepared)}
+
+        with patch.object(ingestion, "STREAM_WINDOW_CHARS", 400), patch.object(ingestion.vectordb, "initialize"), patch.object(
+            ingestion.vectordb, "get_document_chunks", return_value={}
+        ), patch.object(ingestion, "_embed_with_store", side_effect=fake_embed), patch.object(
+            ingestion, "_index_chunks", side_effect=fake_index
+        ), patch.object(ingestion, "chunk_text", side_effect=lambda text: chunk_text(text, chunk_size=200, chunk_overlap=20)):
+            result = ingestion.ingest_pages("doc-1", "book.pdf", "pdf", pages())
+
+        self.assertEqual(overlapped, [True])
+        self.assertTrue(result["success"])
+        self.assertEqual(result["pages"], 4)
+        self.assertEqual(result["prepared"], result["number_of_chunks"])
+
+    def test_short_documents_are_not_indexed(self):
+        with patch.object(ingestion.vectordb, "initialize"), patch.object(ingestion.vectordb, "get_document_chunks", return_value={}), patch.object(
+            ingestion, "_index_chunks"
+        ) as index_chunks:
+            result = ingestion.ingest_pages("doc-1", "tiny.pdf", "pdf", iter(["Too short"]), min_characters=100)
+
+        self.assertFalse(result["success"])
+        index_chunks.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
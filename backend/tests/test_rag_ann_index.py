@@ -0,0 +1,114 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from services.rag.ann_index import IVFIndex
+from services.rag.numpy_store import NumpyVectorCollection
+
+
+def _clustered(count, seed, dim=16, clusters=12):
+    rng = np.random.default_rng(seed)
+    centres = np.random.default_rng(0).standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, count)] + 0.2 * rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _exact(vectors, query, k, alive=None):
+    distances = np.sum((vectors - query) ** 2, axis=1)
+    if alive is not None:
+        distances[~alive] = np.inf
+    return np.argsort(distances)[:k].tolist()
+
+
+class IVFIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.vectors = _clustered(2000, seed=1)
+        self.queries = _clustered(20, seed=2)
+        self.index = IVFIndex.build(self.vectors, nlist=24)
+
+    def test_recall_grows_with_nprobe_and_probing_every_list_is_exact(self):
+        def recall(nprobe):
+            hits = sum(
+                len(set(self.index.search(query, 10, nprobe, self.vectors)[0].tolist()) & set(_exact(self.vectors, query, 10)))
+                for query in self.queries
+            )
+            return hits / (10 * len(self.queries))
+
+        self.assertLessEqual(recall(1), recall(4))
+        self.assertGreaterEqual(recall(4), 0.9)
+        self.assertEqual(recall(24), 1.0)
+
+    def test_save_load_and_incremental_insert(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.index.save(directory)
+            loaded = IVFIndex.load(directory)
+        query = self.queries[0]
+        self.assertEqual(loaded.search(query, 5, 4, self.vectors)[0].tolist(), self.index.search(query, 5, 4, self.vectors)[0].tolist())
+
+        extra = np.vstack([self.vectors, query[None, :]])
+        loaded.add(query[None, :])
+        self.assertEqual(loaded.search(query, 1, 1, extra)[0].tolist(), [2000])
+        self.assertIsNone(IVFIndex.load("/nonexistent/ivf"))
+
+    def test_unassigned_rows_are_scanned_and_tombstones_skipped(self):
+        query = self.queries[0]
+        extra = np.vstack([self.vectors, query[None, :]])
+        self.assertEqual(self.index.search(query, 1, 1, extra)[0].tolist(), [2000])
+
+        alive = np.ones(len(self.vectors), dtype=bool)
+        nearest = _exact(self.vectors, query, 1)[0]
+        alive[nearest] = False
+        rows, _ = self.index.search(query, 3, 24, self.vectors, alive=alive)
+        self.assertNotIn(nearest, rows.tolist())
+        self.assertEqual(rows.tolist(), _exact(self.vectors, query, 3, alive))
+
+
+class NumpyStoreAnnTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.collection = NumpyVectorCollection(self.directory, ann="ivf", ann_min_rows=600, nlist=16, nprobe=16, compact_dead_rows=1)
+        self.vectors = _clustered(1000, seed=3)
+
+    def _add(self, document, rows):
+        self.collection.upsert(
+            ids=[f"chunk-{row}" for row in rows],
+            embeddings=self.vectors[rows],
+            documents=[f"text {row}" for row in rows],
+            metadatas=[{"document_id": document} for _ in rows],
+        )
+
+    def test_index_is_built_once_large_enough_and_kept_in_sync(self):
+        self._add("doc-0", list(range(0, 500)))
+        self.assertIsNone(self.collection.stats()["ann"])
+        self._add("doc-1", list(range(500, 800)))
+        self.assertEqual(self.collection.stats()["ann"]["trained_rows"], 800)
+
+        self._add("doc-2", list(range(800, 1000)))
+        query = self.vectors[950]
+        self.assertEqual(self.collection.query(query, n_results=1)["ids"][0], ["chunk-950"])
+
+        self.collection.delete(where={"document_id": "doc-0"})
+        alive = np.arange(1000) >= 500
+        expected = [f"chunk-{row}" for row in _exact(self.vectors, self.vectors[10], 5, alive)]
+        self.assertEqual(self.collection.stats()["rows"], 500)
+        self.assertEqual(self.collection.query(self.vectors[10], n_results=5)["ids"][0], expected)
+
+        reopened = NumpyVectorCollection(self.directory, ann="ivf", ann_min_rows=600, nprobe=16)
+        self.assertEqual(reopened.query(self.vectors[10], n_results=5)["ids"][0], expected)
+        self.assertEqual(reopened.stats()["ann"]["nlist"], 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
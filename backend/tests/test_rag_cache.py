@@ -0,0 +1,200 @@
+import sys
+import unittest
+from collections import OrderedDict
+from pathlib import Path
+from unittest.mock import patch
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from services.rag import cache
+
+
+class _FakeRedis:
+    """The handful of Redis commands the cache uses, with the tag-invalidation script emulated."""
+
+    def __init__(self):
+        self.values = {}
+        self.sets = {}
+        self.commands = []
+
+    def get(self, key):
+        self.commands.append("get")
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member)
+
+    def expire(self, key, seconds):
+        pass
+
+    def delete(self, *keys):
+        return sum(self.values.pop(key, None) is not None for key in keys)
+
+    def pipeline(self, transaction=True):
+        fake = self
+
+        class _Pipeline:
+            def __init__(self):
+                self.calls = []
+
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+            def execute(self):
+                fake.commands.append("pipeline")
+                return [getattr(fake, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+        return _Pipeline()
+
+    def eval(self, script, numkeys, *keys):
+        assert script == cache._INVALIDATE_TAGS_SCRIPT
+        self.commands.append("eval")
+        return sum(self.delete(*self.sets.pop(tag, set())) for tag in keys[:numkeys])
+
+
+class _CacheTestCase(unittest.TestCase):
+    redis_client = None
+
+    def setUp(self):
+        patches = [
+            patch.object(cache, "_local_cache", OrderedDict()),
+            patch.object(cache, "_local_tags", {}),
+            patch.dict(cache._stats, {name: 0 for name in cache._stats}),
+            patch.object(cache, "_get_redis_client", return_value=self.redis_client),
+        ]
+        for item in patches:
+            item.start()
+            self.addCleanup(item.stop)
+
+
+class LocalCacheTests(_CacheTestCase):
+    def test_invalidation_only_drops_that_documents_and_global_entries(self):
+        cache.set_cache("a", ["chunk a"], tags=["doc-a"])
+        cache.set_cache("b", ["chunk b"], tags=["doc-b"])
+        cache.set_cache("all", ["chunk a", "chunk b"], tags=[cache.GLOBAL_TAG])
+
+        cache.invalidate_document_cache("doc-a")
+
+        self.assertIsNone(cache.get_cache("a"))
+        self.assertIsNone(cache.get_cache("all"))
+        self.assertEqual(cache.get_cache("b"), ["chunk b"])
+        self.assertEqual(cache.get_cache_stats()["invalidated_entries"], 2)
+        self.assertEqual(set(cache._local_tags), {"doc-b"})
+
+    def test_empty_values_expire_sooner_and_the_l1_is_bounded(self):
+        with patch.object(cache.time, "time", return_value=1000.0):
+            cache.set_cache("empty", [], tags=["doc-a"])
+        with patch.object(cache.time, "time", return_value=1000.0 + cache.NEGATIVE_TTL_SECONDS):
+            self.assertIsNone(cache.get_cache("empty"))
+
+        with patch.object(cache, "_L1_MAX_ENTRIES", 2):
+            for key in ("one", "two", "three"):
+                cache.set_cache(key, [key], tags=["doc-a"])
+        self.assertIsNone(cache.get_cache("one"))
+        self.assertEqual(len(cache._local_tags["doc-a"]), 2)
+
+
+class RedisCacheTests(_CacheTestCase):
+    redis_client = _FakeRedis()
+
+    def setUp(self):
+        self.redis_client.__init__()
+        super().setUp()
+
+    def test_entries_are_tagged_in_one_pipeline_and_invalidated_by_tag(self):
+        cache.set_cache("a", ["chunk a"], tags=["doc-a"])
+        cache.set_cache("b", ["chunk b"], tags=["doc-b"])
+
+        cache.invalidate_document_cache("doc-a")
+
+        self.assertEqual(self.redis_client.commands, ["pipeline", "pipeline", "eval"])
+        self.assertEqual(set(self.redis_client.values), {"rag_cache:b"})
+        self.assertNotIn("rag_cache_tag:doc-a", self.redis_client.sets)
+        self.assertIsNone(cache.get_cache("a"))
+
+    def test_l1_serves_repeat_reads_and_remembers_misses(self):
+        self.redis_client.values["rag_cache:shared"] = '{"tags": ["doc-a"], "value": ["from another worker"]}'
+        self.redis_client.values["rag_cache:legacy"] = '["untagged entry"]'
+
+        self.assertEqual(cache.get_cache("shared"), ["from another worker"])
+        self.assertEqual(cache.get_cache("shared"), ["from another worker"])
+        self.assertIsNone(cache.get_cache("missing"))
+        self.assertIsNone(cache.get_cache("missing"))
+        self.assertIsNone(cache.get_cache("legacy"))
+
+        self.assertEqual(self.redis_client.commands, ["get", "get", "get"])
+        stats = cache.get_cache_stats()
+        self.assertEqual((stats["l1_hits"], stats["l1_negative_hits"], stats["redis_hits"]), (1, 1, 1))
+
+        cache.invalidate_document_cache("doc-a")
+        self.assertNotIn("rag_cache:shared", cache._local_cache)
+
+
+class _UnreachableRedis(_FakeRedis):
+    def __init__(self):
+        super().__init__()
+        self.down = True
+
+    def get(self, key):
+        if self.down:
+            self.commands.append("get")
+            raise cache.redis.exceptions.ConnectionError("connection refused")
+        return super().get(key)
+
+
+@unittest.skipIf(cache.redis is None, "redis is not installed")
+class RedisClientTests(unittest.TestCase):
+    def setUp(self):
+        self.client = _UnreachableRedis()
+        patches = [
+            patch.object(cache, "_local_cache", OrderedDict()),
+            patch.object(cache, "_local_tags", {}),
+            patch.object(cache, "_REDIS_URL", "redis://cache:6379/0"),
+            patch.object(cache, "_redis_client", None),
+            patch.dict(cache._breaker, {"failures": 0, "open_until": 0.0, "trips": 0, "skipped": 0}),
+            patch.object(cache.redis.Redis, "from_url", return_value=self.client),
+        ]
+        for item in patches:
+            item.start()
+            self.addCleanup(item.stop)
+
+    def test_one_pooled_client_is_built_lazily_and_reused(self):
+        self.client.down = False
+        cache.set_cache("a", ["chunk a"], tags=["doc-a"])
+        cache.invalidate_cache("a")
+        cache.get_cache("a")
+
+        cache.redis.Redis.from_url.assert_called_once()
+        self.assertEqual(cache.redis.Redis.from_url.call_args.kwargs["max_connections"], cache._REDIS_MAX_CONNECTIONS)
+        self.assertEqual(self.client.commands, ["pipeline", "get"])
+
+    def test_circuit_opens_after_repeated_failures_and_probes_after_the_cool_down(self):
+        with patch.object(cache.time, "monotonic", return_value=100.0):
+            for _ in range(cache._REDIS_FAILURE_THRESHOLD):
+                self.assertIsNone(cache.get_cache("missing"))
+            cache.set_cache("a", ["chunk a"], tags=["doc-a"])
+            self.assertEqual(cache.get_cache("a"), ["chunk a"])
+            self.assertEqual(cache.get_cache_stats()["redis"]["circuit"], "open")
+        self.assertEqual(len(self.client.commands), cache._REDIS_FAILURE_THRESHOLD)
+
+        later = 100.0 + cache._REDIS_COOLDOWN_SECONDS
+        with patch.object(cache.time, "monotonic", return_value=later):
+            self.assertIsNone(cache.get_cache("still-down"))
+            self.assertEqual(cache.get_cache_stats()["redis"]["trips"], 2)
+        with patch.object(cache.time, "monotonic", return_value=later + cache._REDIS_COOLDOWN_SECONDS):
+            self.client.down = False
+            self.assertIsNone(cache.get_cache("back"))
+            stats = cache.get_cache_stats()["redis"]
+        self.assertEqual((stats["circuit"], stats["consecutive_failures"]), ("closed", 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
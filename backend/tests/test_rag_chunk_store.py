@@ -0,0 +1,54 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from services.rag.chunk_store import ChunkEmbeddingStore
+
+
+class ChunkEmbeddingStoreTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = ChunkEmbeddingStore(f"{directory.name}/chunks.sqlite3")
+
+    def test_embeddings_are_scoped_by_namespace(self):
+        self.store.put_many("minilm:torch", {"h1": np.array([0.5, 0.25])})
+
+        self.assertEqual(self.store.get_many("minilm:torch", ["h1", "h2"])["h1"].tolist(), [0.5, 0.25])
+        self.assertEqual(self.store.get_many("minilm:onnx-int8", ["h1"]), {})
+        self.assertEqual(self.store.stats()["embedding_hits"], 1)
+
+    def test_embedding_is_freed_with_its_last_reference(self):
+        self.store.put_many("ns", {"shared": np.zeros(2), "only-a": np.zeros(2)})
+        self.store.set_document_refs("a", ["shared", "only-a"])
+        self.store.set_document_refs("b", ["shared"])
+        self.assertEqual(self.store.refcount("shared"), 2)
+
+        self.assertEqual(self.store.release_document("a"), 1)
+        self.assertEqual(set(self.store.get_many("ns", ["shared", "only-a"])), {"shared"})
+
+        self.assertEqual(self.store.release_document("b"), 1)
+        self.assertEqual(self.store.stats()["embeddings"], 0)
+
+    def test_stats_report_dedup_ratio(self):
+        self.store.set_document_refs("a", ["h1", "h2"])
+        self.store.set_document_refs("b", ["h1", "h2"])
+        self.store.set_document_refs("c", ["h1"])
+
+        stats = self.store.stats()
+        self.assertEqual((stats["documents"], stats["references"], stats["unique_chunks"]), (3, 5, 2))
+        self.assertEqual(stats["dedup_ratio"], 2.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
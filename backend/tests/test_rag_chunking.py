@@ -0,0 +1,89 @@
+import sys
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from services.rag.chunking import PAGE_BREAK, chunk_text, count_tokens
+
+NOTES = (
+    "# Cells\n\n"
+    "Cells are the basic unit of life. They divide by mitosis! Some cells are \"large.\" Others are small.\n\n"
+    "Chapter 2 Energy\n"
+    "Plants capture light in chloroplasts. This powers photosynthesis.\n"
+    "- Light reactions happen in thylakoids.\n"
+    "- The Calvin cycle fixes carbon."
+)
+
+
+class StructureAwareChunkingTests(unittest.TestCase):
+    def assertOffsetsMatch(self, text, chunks):
+        for chunk in chunks:
+            self.assertEqual(chunk["text"], text[chunk["start"]:chunk["end"]].replace(PAGE_BREAK, "\n"))
+
+    def test_headings_and_pages_start_new_chunks(self):
+        text = NOTES + PAGE_BREAK + "Page two begins with a full sentence. " * 3
+
+        chunks = chunk_text(text, chunk_size=200, chunk_overlap=60)
+
+        self.assertEqual([chunk["text"].split("\n")[0][:16] for chunk in chunks], ["# Cells", "Chapter 2 Energy", "Page two begins "])
+        self.assertTrue(chunks[0]["text"].endswith("Others are small."))
+        self.assertOffsetsMatch(text, chunks)
+
+    def test_overlap_is_whole_sentences_within_a_section(self):
+        text = " ".join(f"Sentence {index} is about osmosis." for index in range(30))
+
+        chunks = chunk_text(text, chunk_size=150, chunk_overlap=60)
+
+        for previous, following in zip(chunks, chunks[1:]):
+            self.assertTrue(following["text"].startswith("Sentence "))
+            self.assertTrue(previous["text"].endswith("osmosis."))
+            self.assertLess(following["start"], previous["end"])
+            self.assertLessEqual(previous["end"] - following["start"], 60)
+        self.assertTrue(all(len(chunk["text"]) <= 150 for chunk in chunks))
+
+    def test_long_sentences_are_split_between_words_and_repeats_keep_their_offsets(self):
+        text = "\n\n".join(["A very long sentence " + "with many words " * 40 + "ends here."] * 3)
+
+        chunks = chunk_text(text, chunk_size=120, chunk_overlap=20)
+
+        self.assertTrue(all(len(chunk["text"]) <= 120 for chunk in chunks))
+        self.assertTrue(all(not chunk["text"].startswith(" ") and not chunk["text"].endswith(" ") for chunk in chunks))
+        self.assertEqual([chunk["start"] for chunk in chunks], sorted(chunk["start"] for chunk in chunks))
+        self.assertEqual(chunks[-1]["end"], len(text))
+        self.assertOffsetsMatch(text, chunks)
+
+    def test_sizes_can_be_measured_in_tokens(self):
+        text = " ".join(f"Photosynthesis, step {index}: light is absorbed." for index in range(50))
+
+        chunks = chunk_text(text, chunk_size=40, chunk_overlap=10, unit="tokens")
+
+        self.assertEqual(count_tokens("Photosynthesis, step 1: light is absorbed."), 9)
+        self.assertTrue(all(count_tokens(chunk["text"]) <= 40 for chunk in chunks))
+        self.assertGreater(len(chunks), 10)
+        with self.assertRaises(ValueError):
+            chunk_text(text, chunk_size=40, chunk_overlap=10, unit="words")
+        with self.assertRaises(ValueError):
+            chunk_text(text, chunk_size=40, chunk_overlap=40)
+
+    def test_long_unbroken_words_respect_the_token_budget(self):
+        blob = "QUJD" * 1250
+        text = f"See the attached data. {blob} It ends here, with a-b-c-d-e-f-g-h-i-j-k-l-m-n-o-p."
+
+        chunks = chunk_text(text, chunk_size=40, chunk_overlap=10, unit="tokens")
+        dense = chunk_text("-".join("x" * 10 for _ in range(30)), chunk_size=12, chunk_overlap=2, unit="tokens")
+
+        self.assertGreater(count_tokens(blob), 1000)
+        self.assertTrue(all(count_tokens(chunk["text"]) <= 40 for chunk in chunks))
+        self.assertTrue(all(len(chunk["text"]) <= 40 * 4 for chunk in chunks))
+        self.assertTrue(all(count_tokens(chunk["text"]) <= 12 for chunk in dense))
+        self.assertOffsetsMatch(text, chunks)
+
+
+if __name__ == "__main__":
+    unittest.main()
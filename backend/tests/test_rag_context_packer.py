@@ -0,0 +1,104 @@
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from services.llm.config import get_context_token_budget
+from services.rag import context_packer, generation
+from services.rag.chunking import chunk_text
+from services.rag.context_packer import estimate_tokens, pack_chunks, truncate_text
+
+SOURCE = " ".join(f"Sentence {index} explains how cells use energy from glucose." for index in range(40))
+
+
+def _retrieved(document_id="doc-1", order=None):
+    chunks = chunk_text(SOURCE, chunk_size=300, chunk_overlap=100)
+    order = order if order is not None else range(len(chunks))
+    return [
+        {"text": chunks[index]["text"], "score": round(0.9 - rank * 0.05, 2), "metadata": {"document_id": document_id, "chunk_id": index}}
+        for rank, index in enumerate(order)
+    ]
+
+
+class PackChunksTests(unittest.TestCase):
+    def test_adjacent_chunks_merge_in_source_order_without_their_overlap(self):
+        retrieved = _retrieved(order=[2, 0, 1])
+
+        packed, context, info = pack_chunks(retrieved, budget_tokens=10000)
+
+        self.assertEqual([item["metadata"]["chunk_id"] for item in packed], [0, 1, 2])
+        self.assertTrue(SOURCE.startswith(context))
+        self.assertEqual(info["merged_runs"], 1)
+        self.assertGreater(info["overlap_tokens_removed"], 0)
+        self.assertLess(info["tokens"], info["input_tokens"])
+
+    def test_budget_keeps_the_best_chunks_and_orders_runs_by_score(self):
+        retrieved = _retrieved(order=[5, 1, 6, 2, 9])
+        budget = estimate_tokens(retrieved[0]["text"]) * 3
+
+        packed, context, info = pack_chunks(retrieved, budget_tokens=budget)
+
+        self.assertEqual([item["metadata"]["chunk_id"] for item in packed], [5, 6, 1])
+        self.assertLessEqual(info["tokens"], budget)
+        self.assertEqual(info["chunks_dropped"], 2)
+        self.assertTrue(context.startswith(retrieved[0]["text"]))
+
+    def test_oversized_best_chunk_is_cut_at_a_sentence_boundary(self):
+        packed, context, _ = pack_chunks([{"text": SOURCE, "score": 1.0}], budget_tokens=30)
+
+        self.assertEqual(len(packed), 1)
+        self.assertTrue(context.endswith("glucose."))
+        self.assertLessEqual(len(context), 120)
+        self.assertEqual(truncate_text("One two three four five six", 12), "One two")
+
+    def test_token_sized_overlaps_longer_than_400_characters_are_removed(self):
+        chunks = chunk_text(SOURCE, chunk_size=300, chunk_overlap=100, unit="tokens")
+        retrieved = [{"text": chunk["text"], "score": 0.5, "metadata": {"document_id": "doc-1", "chunk_id": index}} for index, chunk in enumerate(chunks[:2])]
+        window = 100 * context_packer._MAX_CHARS_PER_CHUNK_TOKEN
+
+        with patch.object(context_packer, "_MAX_OVERLAP_CHARS", window):
+            overlap = context_packer.overlap_length(chunks[0]["text"], chunks[1]["text"])
+            _, context, _ = pack_chunks(retrieved, budget_tokens=10000)
+
+        self.assertGreater(overlap, 400)
+        self.assertTrue(SOURCE.startswith(context))
+
+    def test_gemini_service_does_not_import_the_rag_package(self):
+        script = "import sys, services.gemini_service; print(any(name.startswith('services.rag') for name in sys.modules))"
+        result = subprocess.run([sys.executable, "-c", script], cwd=BACKEND_ROOT, capture_output=True, text=True, check=True)
+
+        self.assertEqual(result.stdout.strip(), "False")
+
+
+class ContextBudgetTests(unittest.TestCase):
+    def test_provider_and_feature_settings_take_precedence(self):
+        with patch.dict(os.environ, {"LLM_CONTEXT_TOKENS": "2000", "OLLAMA_CONTEXT_TOKENS": "800", "OLLAMA_CONTEXT_TOKENS_SUMMARY": "1200"}):
+            self.assertEqual(get_context_token_budget("ollama", "summary"), 1200)
+            self.assertEqual(get_context_token_budget("local", "qa"), 800)
+            self.assertEqual(get_context_token_budget("gemini", "qa"), 2000)
+        with patch.dict(os.environ, {}, clear=True):
+            self.assertEqual(get_context_token_budget("gemini", "qa"), 1500)
+
+    @patch("services.rag.generation.retrieve_chunks", return_value=_retrieved(order=[0, 1, 2]))
+    def test_generation_sends_the_packed_context(self, _):
+        with patch("services.rag.generation.create_provider") as mock_create_provider:
+            mock_create_provider.return_value.generate.return_value = "From glucose."
+            _, metadata = generation.generate_answer(question="Where does energy come from?", document_id="doc-1", top_k=3)
+
+        prompt = mock_create_provider.return_value.generate.call_args.args[0]
+        self.assertEqual(prompt.count("Sentence 3 explains"), 1)
+        self.assertEqual(metadata["context"]["chunks_packed"], 3)
+        self.assertGreater(metadata["context"]["overlap_tokens_removed"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import importlib.util
+import os
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from services.rag.embedding_backends import OnnxEmbeddingBackend, create_backend, get_backend_name
+
+_HAS_ONNX_STACK = all(importlib.util.find_spec(name) for name in ("onnxruntime", "tokenizers", "huggingface_hub", "sentence_transformers"))
+
+
+class _FakeTokenizer:
+    def encode_batch(self, texts):
+        longest = max(len(text.split()) for text in texts)
+        encodings = []
+        for text in texts:
+            ids = [len(word) for word in text.split()]
+            padding = longest - len(ids)
+            encodings.append(SimpleNamespace(ids=ids + [0] * padding, attention_mask=[1] * len(ids) + [0] * padding))
+        return encodings
+
+
+class _FakeSession:
+    def get_inputs(self):
+        return [SimpleNamespace(name="input_ids"), SimpleNamespace(name="attention_mask"), SimpleNamespace(name="token_type_ids")]
+
+    def run(self, outputs, feeds):
+        self.feeds = feeds
+        ids = feeds["input_ids"].astype(np.float32)
+        # Padding positions get a large value so that unmasked pooling would be visibly wrong.
+        padded = np.where(feeds["attention_mask"] == 0, 100.0, ids)
+        return [np.stack([padded, np.ones_like(padded)], axis=-1)]
+
+
+class EmbeddingBackendTests(unittest.TestCase):
+    def test_onnx_backend_mean_pools_over_the_attention_mask_and_normalizes(self):
+        session = _FakeSession()
+        backend = OnnxEmbeddingBackend(session=session, tokenizer=_FakeTokenizer(), batch_size=2)
+
+        vectors = backend.encode(["abc abcde", "ab", "abcd abcd abcd"])
+
+        expected = np.array([[4.0, 1.0], [2.0, 1.0], [4.0, 1.0]])
+        expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+        np.testing.assert_allclose(vectors, expected, rtol=1e-6)
+        self.assertEqual(vectors.dtype, np.float32)
+        self.assertIn("token_type_ids", session.feeds)
+
+    def test_backend_is_selected_from_the_environment(self):
+        with patch.dict(os.environ, {"RAG_EMBED_BACKEND": "onnx-int8"}, clear=False):
+            self.assertEqual(get_backend_name(), "onnx-int8")
+            with patch("services.rag.embedding_backends.OnnxEmbeddingBackend") as backend_class:
+                create_backend()
+        self.assertEqual(backend_class.call_args.kwargs["name"], "onnx-int8")
+        with patch.dict(os.environ, {"RAG_EMBED_BACKEND": "tensorflow"}, clear=False):
+            self.assertEqual(get_backend_name(), "torch")
+
+    @unittest.skipUnless(_HAS_ONNX_STACK, "onnxruntime and sentence-transformers are required for the parity check")
+    def test_onnx_backends_agree_with_torch_vectors(self):
+        from services.rag.benchmark import compare_embedding_backends
+
+        agreement = compare_embedding_backends("torch", ["onnx", "onnx-int8"])
+
+        self.assertGreater(agreement["onnx"], 0.999)
+        self.assertGreater(agreement["onnx-int8"], 0.97)
+
+
+if __name__ == "__main__":
+    unittest.main()
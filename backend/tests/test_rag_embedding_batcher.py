@@ -0,0 +1,94 @@
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from services.rag.embedding_batcher import EmbeddingBatcher
+
+
+class _FakeModel:
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def encode(self, texts, normalize_embeddings=True, convert_to_numpy=True):
+        with self._lock:
+            self.calls.append(list(texts))
+        return np.array([[float(len(text)), 1.0] for text in texts], dtype=np.float32)
+
+
+class EmbeddingBatcherTests(unittest.TestCase):
+    def test_concurrent_requests_share_encode_calls(self):
+        model = _FakeModel()
+        batcher = EmbeddingBatcher(model.encode, max_batch_size=64, max_wait_ms=50)
+        texts = ["a" * (index + 1) for index in range(16)]
+        results = {}
+        barrier = threading.Barrier(len(texts))
+
+        def embed(text):
+            barrier.wait()
+            results[text] = batcher.embed([text])
+
+        threads = [threading.Thread(target=embed, args=(text,)) for text in texts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        for text in texts:
+            self.assertEqual(results[text].shape, (1, 2))
+            self.assertEqual(results[text][0][0], len(text))
+        self.assertLess(len(model.calls), len(texts))
+        stats = batcher.stats()
+        self.assertEqual(stats["requests"], len(texts))
+        self.assertEqual(stats["batch_size"]["count"], len(model.calls))
+        self.assertEqual(stats["request_latency_ms"]["count"], len(texts))
+
+    def test_batches_respect_max_batch_size(self):
+        model = _FakeModel()
+        batcher = EmbeddingBatcher(model.encode, max_batch_size=4, max_wait_ms=20)
+        futures = [batcher.submit([f"text {index}", f"more {index}"]) for index in range(5)]
+        oversized = batcher.submit([f"chunk {index}" for index in range(10)])
+
+        for future in futures:
+            self.assertEqual(future.result(5).shape, (2, 2))
+        self.assertEqual(oversized.result(5).shape, (10, 2))
+        self.assertTrue(all(len(call) <= 4 for call in model.calls[:-1]))
+        self.assertEqual(len(model.calls[-1]), 10)
+
+    def test_encode_errors_reach_every_caller_in_the_batch(self):
+        def failing(texts):
+            raise RuntimeError("model unavailable")
+
+        batcher = EmbeddingBatcher(failing, max_wait_ms=1)
+        with self.assertRaisesRegex(RuntimeError, "model unavailable"):
+            batcher.embed(["question"])
+
+    def test_embed_query_and_documents_go_through_the_batcher(self):
+        from services.rag import embeddings
+
+        model = _FakeModel()
+        with patch.object(embeddings, "load_model", return_value=model), patch.object(embeddings, "_BATCHING_ENABLED", True), patch.object(
+            embeddings, "_BATCHER", EmbeddingBatcher(embeddings._encode, max_wait_ms=1)
+        ):
+            query = embeddings.embed_query("what is osmosis")
+            documents = embeddings.embed_documents([{"text": "one"}, "three"])
+            stats = embeddings.get_embedding_stats()
+
+        self.assertEqual(query.tolist(), [15.0, 1.0])
+        self.assertEqual(documents.tolist(), [[3.0, 1.0], [5.0, 1.0]])
+        self.assertEqual(stats["requests"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
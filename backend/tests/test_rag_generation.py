@@ -23,6 +23,16 @@ class RagGenerationTests(unittest.TestCase):
         self.assertEqual(metadata["retrieved_chunk_count"], 0)
         mock_retrieve.assert_called_once()
 
+    @patch("services.rag.generation.retrieve_chunks")
+    def test_generate_answer_accepts_inline_source_text(self, mock_retrieve):
+        with patch("services.rag.generation.create_provider") as mock_create_provider:
+            mock_create_provider.return_value.generate.return_value = "Osmosis moves water."
+            answer, metadata = generation.generate_answer(question="What is osmosis?", source_text="Osmosis moves water across membranes.")
+
+        self.assertEqual(answer, "Osmosis moves water.")
+        self.assertEqual(metadata["retrieved_chunk_count"], 1)
+        mock_retrieve.assert_not_called()
+
 
 if __name__ == "__main__":
     unittest.main()
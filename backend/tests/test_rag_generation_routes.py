@@ -28,6 +28,35 @@ class RagGenerationRouteTests(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(response, {"summary": "RAG summary"})
         mock_generate_summary.assert_called_once_with("source text")
 
+    async def test_study_set_route_awaits_async_rag_generation(self):
+        from backend.routes import generate as generate_routes
+
+        async def fake_get_source_text_from_request(request):
+            return "source text", {"difficulty": "medium"}
+
+        async def fake_summary(source_text):
+            return {"summary": "RAG summary"}, {"feature": "summary"}
+
+        async def fake_mcqs(source_text):
+            return [{"question": "Q?", "options": ["A", "B", "C", "D"], "answer": "A", "explanation": "E", "topic": ""}], {"feature": "mcq"}
+
+        async def fake_flashcards(source_text):
+            return [{"front": "F", "back": "B", "topic": "T"}], {"feature": "flashcard"}
+
+        with patch.object(generate_routes, "get_source_text_from_request", side_effect=fake_get_source_text_from_request), patch.object(
+            generate_routes, "_get_cached_generation_payload", return_value=None
+        ), patch.object(generate_routes, "_set_cached_generation_payload", return_value=None), patch.object(
+            generate_routes, "agenerate_summary_from_rag", side_effect=fake_summary
+        ), patch.object(generate_routes, "agenerate_mcqs_from_rag", side_effect=fake_mcqs), patch.object(
+            generate_routes, "agenerate_flashcards_from_rag", side_effect=fake_flashcards
+        ):
+            response = await generate_routes.generate_study_set(object())
+
+        self.assertEqual(response["summary"], "RAG summary")
+        self.assertEqual(response["mcqs"][0]["topic"], "General")
+        self.assertEqual(response["flashcards"][0]["front"], "F")
+        self.assertTrue(response["mcqSetId"])
+
     async def test_tool_route_uses_the_rag_generation_engine_for_summary(self):
         from backend.routes import tools as tools_routes
 
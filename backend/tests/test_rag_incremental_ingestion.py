@@ -0,0 +1,172 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from services.rag import ingestion, vectordb
+from services.rag.chunk_store import ChunkEmbeddingStore
+
+
+class _FakeCollection:
+    def __init__(self):
+        self.rows = {}
+
+    def upsert(self, ids, documents, embeddings, metadatas):
+        for chunk_id, document, embedding, metadata in zip(ids, documents, embeddings, metadatas):
+            self.rows[chunk_id] = {"document": document, "embedding": embedding, "metadata": dict(metadata)}
+
+    def get(self, where=None, include=None):
+        ids = [chunk_id for chunk_id, row in self.rows.items() if row["metadata"]["document_id"] == where["document_id"]]
+        return {"ids": ids, "metadatas": [self.rows[chunk_id]["metadata"] for chunk_id in ids]}
+
+    def update(self, ids, metadatas):
+        for chunk_id, metadata in zip(ids, metadatas):
+            self.rows[chunk_id]["metadata"] = dict(metadata)
+
+    def delete(self, ids=None, where=None):
+        if where is not None:
+            ids = [chunk_id for chunk_id, row in self.rows.items() if row["metadata"]["document_id"] == where["document_id"]]
+        for chunk_id in ids or []:
+            self.rows.pop(chunk_id, None)
+
+
+def _chunks(texts):
+    return [{"chunk_id": index, "text": text, "start": 0, "end": len(text)} for index, text in enumerate(texts)]
+
+
+class IncrementalIngestionTests(unittest.TestCase):
+    def setUp(self):
+        self.collection = _FakeCollection()
+        self.embedded = []
+        patches = [
+            patch.object(vectordb, "_COLLECTION", self.collection),
+            patch.object(vectordb, "_CLIENT", object()),
+            patch.object(ingestion, "embed_documents", side_effect=self._embed),
+            patch.object(ingestion, "get_chunk_store", return_value=None),
+            patch.object(ingestion, "get_lexical_index", return_value=None),
+            patch.object(ingestion.cache, "invalidate_document_cache"),
+        ]
+        for item in patches:
+            item.start()
+            self.addCleanup(item.stop)
+
+    def _embed(self, chunks):
+        self.embedded.extend(chunk["text"] for chunk in chunks)
+        return np.ones((len(chunks), 3), dtype=np.float32)
+
+    def _ingest(self, texts):
+        with patch.object(ingestion, "chunk_text", return_value=_chunks(texts)):
+            return ingestion.ingest_document("doc-1", "notes.txt", "text", "placeholder")
+
+    def test_reingesting_an_edited_document_only_embeds_changed_chunks(self):
+        first = self._ingest(["alpha", "beta", "gamma"])
+        self.assertEqual((first["added_chunks"], first["reused_chunks"], first["deleted_chunks"]), (3, 0, 0))
+
+        self.embedded.clear()
+        second = self._ingest(["alpha", "beta revised", "gamma", "delta"])
+
+        self.assertTrue(second["success"])
+        self.assertEqual(second["number_of_chunks"], 4)
+        self.assertEqual((second["added_chunks"], second["reused_chunks"], second["deleted_chunks"]), (2, 2, 1))
+        self.assertEqual(self.embedded, ["beta revised", "delta"])
+        stored = sorted((row["metadata"]["chunk_id"], row["document"]) for row in self.collection.rows.values())
+        self.assertEqual(stored, [(0, "alpha"), (1, "beta revised"), (2, "gamma"), (3, "delta")])
+        self.assertTrue(all(row["metadata"]["total_chunks"] == 4 for row in self.collection.rows.values()))
+
+    def test_unchanged_document_is_not_embedded_or_invalidated(self):
+        self._ingest(["alpha", "alpha", "beta"])
+        self.embedded.clear()
+        ingestion.cache.invalidate_document_cache.reset_mock()
+
+        result = self._ingest(["alpha", "alpha", "beta"])
+
+        self.assertEqual((result["added_chunks"], result["reused_chunks"], result["deleted_chunks"]), (0, 3, 0))
+        self.assertEqual(self.embedded, [])
+        self.assertEqual(len(self.collection.rows), 3)
+        ingestion.cache.invalidate_document_cache.assert_not_called()
+
+    def test_legacy_index_ids_are_replaced(self):
+        vectordb.add_documents(_chunks(["alpha"]), np.ones((1, 3)), "doc-1", "notes.txt", "text")
+        self.assertIn("doc-1::chunk::0", self.collection.rows)
+
+        result = self._ingest(["alpha"])
+
+        self.assertEqual((result["added_chunks"], result["deleted_chunks"]), (1, 1))
+        self.assertNotIn("doc-1::chunk::0", self.collection.rows)
+
+
+class SharedChunkEmbeddingTests(IncrementalIngestionTests):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = ChunkEmbeddingStore(f"{directory.name}/chunks.sqlite3")
+        store_patch = patch.object(ingestion, "get_chunk_store", return_value=self.store)
+        store_patch.start()
+        self.addCleanup(store_patch.stop)
+
+    def _ingest_as(self, document_id, texts):
+        with patch.object(ingestion, "chunk_text", return_value=_chunks(texts)):
+            return ingestion.ingest_document(document_id, f"{document_id}.pptx", "pptx", "placeholder")
+
+    def test_same_slides_under_another_document_are_embedded_once(self):
+        self._ingest_as("upload-a", ["cell membrane", "osmosis"])
+        self.embedded.clear()
+
+        result = self._ingest_as("upload-b", ["cell membrane", "osmosis", "diffusion"])
+
+        self.assertEqual(self.embedded, ["diffusion"])
+        self.assertEqual((result["added_chunks"], result["shared_embeddings"]), (3, 2))
+        self.assertEqual(len(self.collection.rows), 5)
+        self.assertEqual(self.store.stats()["dedup_ratio"], round(5 / 3, 4))
+
+    def test_removing_a_document_keeps_embeddings_still_referenced(self):
+        self._ingest_as("upload-a", ["cell membrane", "osmosis"])
+        self._ingest_as("upload-b", ["cell membrane"])
+
+        ingestion.remove_document("upload-a")
+
+        self.assertEqual([row["metadata"]["document_id"] for row in self.collection.rows.values()], ["upload-b"])
+        stats = self.store.stats()
+        self.assertEqual((stats["references"], stats["embeddings"]), (1, 1))
+        self.embedded.clear()
+        self._ingest_as("upload-c", ["cell membrane"])
+        self.assertEqual(self.embedded, [])
+
+    def test_reaping_an_upload_removes_its_document(self):
+        from routes import generate  # noqa: F401  (registers the upload delete listeners)
+        from services import upload_registry
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        registry = upload_registry.UploadRegistry(f"{directory.name}/uploads.sqlite3", directory.name, ttl_seconds=100)
+        for listener in upload_registry._DELETE_LISTENERS:
+            registry.add_delete_listener(listener)
+        file_id = "a" * 32
+        path = f"{directory.name}/{file_id}__slides.pptx"
+        with open(path, "wb") as handle:
+            handle.write(b"deck")
+        registry.register(file_id, "slides.pptx", path, 4, "digest")
+        self._ingest_as(file_id, ["cell membrane", "osmosis"])
+        self._ingest_as("upload-b", ["cell membrane"])
+        self.assertEqual(self.store.refcount(vectordb.chunk_content_hash("cell membrane")), 2)
+
+        self.assertEqual(registry.reap(now=10 ** 12), 1)
+
+        self.assertEqual([row["metadata"]["document_id"] for row in self.collection.rows.values()], ["upload-b"])
+        self.assertEqual(self.store.refcount(vectordb.chunk_content_hash("cell membrane")), 1)
+        self.assertEqual(self.store.stats()["embeddings"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from services.rag import ingestion, retriever, vectordb
+from services.rag.lexical_index import LexicalIndex
+
+
+def _entry(chunk_id, text, document_id="doc-1", source_type="pdf"):
+    return chunk_id, text, {"document_id": document_id, "source_type": source_type}
+
+
+class LexicalIndexTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.index = LexicalIndex(f"{directory.name}/lexical.sqlite3")
+
+    def test_bm25_prefers_rare_terms_and_shorter_chunks(self):
+        self.index.add_chunks("doc-1", [
+            _entry("c1", "Cells divide by mitosis. Mitosis has four phases."),
+            _entry("c2", "Cells need energy. Cells make proteins. Cells grow and cells move about."),
+            _entry("c3", "Meiosis produces gametes."),
+        ])
+
+        results = self.index.search("cells mitosis", top_k=3)
+
+        self.assertEqual([item["metadata"]["document_id"] for item in results], ["doc-1", "doc-1"])
+        self.assertTrue(results[0]["text"].startswith("Cells divide by mitosis"))
+        self.assertGreater(results[0]["score"], results[1]["score"])
+        self.assertEqual(self.index.search("the and with", top_k=3), [])
+
+    def test_queries_are_partitioned_by_document_and_filtered(self):
+        self.index.add_chunks("doc-1", [_entry("a1", "osmosis across membranes")])
+        self.index.add_chunks("doc-2", [_entry("b1", "osmosis in plant roots", "doc-2", "pptx"), _entry("b2", "root hair cells", "doc-2", "pptx")])
+
+        scoped = self.index.search("osmosis roots", top_k=5, document_id="doc-2")
+        filtered = self.index.search("osmosis", top_k=5, where={"source_type": "pdf"})
+
+        self.assertEqual([item["text"] for item in scoped], ["osmosis in plant roots"])
+        self.assertEqual([item["text"] for item in filtered], ["osmosis across membranes"])
+
+    def test_incremental_updates_keep_statistics_consistent(self):
+        self.index.add_chunks("doc-1", [_entry("a1", "alpha beta"), _entry("a2", "gamma delta")])
+        self.index.add_chunks("doc-1", [_entry("a2", "gamma delta epsilon")])
+        self.index.delete_chunks(["a1"])
+        self.index.update_metadata(["a2"], [{"document_id": "doc-1", "source_type": "docx"}])
+
+        self.assertEqual(self.index.stats()["chunks"], 1)
+        self.assertEqual(self.index.search("alpha", top_k=5), [])
+        self.assertEqual(self.index.search("epsilon", top_k=5)[0]["metadata"]["source_type"], "docx")
+
+        self.index.delete_document("doc-1")
+        self.assertEqual(self.index.stats(), {"documents": 0, "chunks": 0, "average_chunk_tokens": 0.0})
+
+
+class ReciprocalRankFusionTests(unittest.TestCase):
+    def test_chunks_ranked_by_both_retrievers_come_first(self):
+        vector = [{"text": "a", "score": 0.9}, {"text": "b", "score": 0.8}, {"text": "c", "score": 0.7}]
+        lexical = [{"text": "d", "score": 12.0}, {"text": "c", "score": 9.0}]
+
+        with patch.object(retriever, "HYBRID_KEYWORD_WEIGHT", 1.0), patch.object(retriever, "RRF_K", 60):
+            merged = retriever._merge_hybrid_results(vector, lexical, top_k=3)
+
+        self.assertEqual([item["text"] for item in merged], ["c", "a", "d"])
+        self.assertAlmostEqual(merged[0]["score"], round((1 / 63 + 1 / 62) / (2 / 61), 4))
+        self.assertEqual((merged[0]["vector_score"], merged[0]["lexical_score"]), (0.7, 9.0))
+
+    def test_min_score_and_bm25_floor_apply_before_fusion(self):
+        vector = [{"text": "weak", "score": 0.01}, {"text": "strong", "score": 0.6}]
+        lexical = [{"text": "noise", "score": 0.2}, {"text": "keyword", "score": 4.0}]
+
+        with patch.object(retriever, "HYBRID_KEYWORD_WEIGHT", 0.35), patch.object(retriever, "HYBRID_MIN_LEXICAL_SCORE", 1.0):
+            merged = retriever._merge_hybrid_results(vector, lexical, top_k=5, min_score=0.15)
+
+        self.assertEqual([item["text"] for item in merged], ["strong", "keyword"])
+        self.assertEqual(merged[1]["vector_score"], 0.0)
+
+
+class IngestionKeepsLexicalIndexInSyncTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.index = LexicalIndex(f"{directory.name}/lexical.sqlite3")
+        patches = [
+            patch.object(vectordb, "VECTOR_BACKEND", "numpy"),
+            patch.object(vectordb, "NUMPY_STORE_PATH", f"{directory.name}/vectors"),
+            patch.object(vectordb, "_COLLECTION", None),
+            patch.object(vectordb, "_CLIENT", None),
+            patch.object(ingestion, "embed_documents", side_effect=lambda chunks: np.ones((len(chunks), 3), dtype=np.float32)),
+            patch.object(ingestion, "get_chunk_store", return_value=None),
+            patch.object(ingestion, "get_lexical_index", return_value=self.index),
+            patch.object(ingestion.cache, "invalidate_document_cache"),
+        ]
+        for item in patches:
+            item.start()
+            self.addCleanup(item.stop)
+
+    def _ingest(self, texts):
+        chunks = [{"chunk_id": index, "text": text, "start": 0, "end": len(text)} for index, text in enumerate(texts)]
+        with patch.object(ingestion, "chunk_text", return_value=chunks):
+            return ingestion.ingest_document("doc-1", "notes.txt", "text", "placeholder")
+
+    def test_reingestion_and_removal_update_the_index(self):
+        self._ingest(["photosynthesis in leaves", "cellular respiration"])
+        self._ingest(["photosynthesis in leaves", "fermentation without oxygen", "cellular respiration"])
+
+        self.assertEqual([item["metadata"]["chunk_id"] for item in self.index.search("respiration", top_k=5)], [2])
+        self.assertEqual(self.index.search("fermentation", top_k=5)[0]["metadata"]["total_chunks"], 3)
+
+        ingestion.remove_document("doc-1")
+        self.assertEqual(self.index.stats()["chunks"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
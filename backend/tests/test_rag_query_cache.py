@@ -0,0 +1,79 @@
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from services.rag.query_cache import QueryEmbeddingCache
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+
+class QueryEmbeddingCacheTests(unittest.TestCase):
+    def test_normalized_variants_share_one_entry(self):
+        cache = QueryEmbeddingCache(max_entries=4)
+        cache.set("What is  Osmosis?", np.array([0.25, 0.5], dtype=np.float32))
+
+        vector = cache.get("  what is osmosis? ")
+        self.assertEqual(vector.dtype, np.float32)
+        self.assertEqual(vector.tolist(), [0.25, 0.5])
+        self.assertIsNone(cache.get("what is diffusion?"))
+        self.assertEqual(cache.stats()["hit_rate"], 0.5)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = QueryEmbeddingCache(max_entries=2)
+        cache.set("a", np.zeros(2))
+        cache.set("b", np.zeros(2))
+        cache.get("a")
+        cache.set("c", np.zeros(2))
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+
+    def test_redis_tier_stores_raw_float32_bytes(self):
+        redis_client = _FakeRedis()
+        QueryEmbeddingCache(redis_client=redis_client).set("osmosis", np.array([1.0, 2.0], dtype=np.float32))
+
+        self.assertEqual(list(redis_client.values.values()), [np.array([1.0, 2.0], dtype=np.float32).tobytes()])
+        fresh = QueryEmbeddingCache(redis_client=redis_client)
+        self.assertEqual(fresh.get("Osmosis").tolist(), [1.0, 2.0])
+        self.assertEqual(fresh.stats()["redis_hits"], 1)
+
+    def test_embed_query_encodes_repeated_questions_once(self):
+        from services.rag import embeddings
+
+        calls = []
+
+        def fake_embed_text(text):
+            calls.append(text)
+            return np.array([0.1, 0.2], dtype=np.float32)
+
+        with patch.object(embeddings, "embed_text", side_effect=fake_embed_text), patch(
+            "services.rag.embeddings.get_query_embedding_cache", return_value=QueryEmbeddingCache()
+        ):
+            first = embeddings.embed_query("What is osmosis?")
+            second = embeddings.embed_query("what is   osmosis?")
+
+        np.testing.assert_array_equal(first, second)
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from services.rag import generation, reranker
+
+
+class _OverlapCrossEncoder:
+    """Scores a pair by how many question words the passage contains."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.pairs_seen = 0
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        time.sleep(self.delay)
+        self.pairs_seen += len(pairs)
+        return [float(len(set(question.lower().split()) & set(text.lower().split())) * 2 - 3) for question, text in pairs]
+
+
+def _candidates():
+    texts = [
+        "The mitochondria is an organelle found in most cells and is the subject of many exam questions.",
+        "Plants take in carbon dioxide through stomata on the underside of their leaves.",
+        "Osmosis moves water across a membrane.",
+        "Ribosomes build proteins from amino acids using messenger RNA as a template.",
+        "Water crosses the cell membrane by osmosis toward higher solute concentration.",
+        "Enzymes lower the activation energy of reactions.",
+    ]
+    return [{"text": text, "score": round(0.9 - index * 0.05, 2), "metadata": {"chunk_id": index}} for index, text in enumerate(texts)]
+
+
+class RerankTests(unittest.TestCase):
+    def setUp(self):
+        self.model = _OverlapCrossEncoder()
+        patches = [
+            patch.object(reranker, "RERANK_ENABLED", True),
+            patch.object(reranker, "RERANK_TOP_K", 2),
+            patch.object(reranker, "RERANK_BATCH_SIZE", 2),
+            patch.object(reranker, "_MODEL", self.model),
+            patch.dict(reranker._STATS, {"reranked": 0, "skipped": {}, "pair_ms": None, "measured_at": None, "probes": 0, "prompt_tokens_saved": 0}),
+        ]
+        for item in patches:
+            item.start()
+            self.addCleanup(item.stop)
+
+    def test_keeps_the_best_candidates_and_reports_saved_prompt_tokens(self):
+        candidates = _candidates()
+
+        selected, info = reranker.rerank("how does water cross a membrane by osmosis", candidates, top_k=4)
+
+        self.assertEqual([item["metadata"]["chunk_id"] for item in selected], [4, 2])
+        self.assertEqual(selected[1]["retrieval_score"], 0.8)
+        self.assertGreater(selected[0]["score"], selected[1]["score"])
+        baseline = sum(reranker.estimate_tokens(item["text"]) for item in candidates[:4])
+        self.assertEqual(info["baseline_prompt_tokens"], baseline)
+        self.assertEqual(info["prompt_tokens_saved"], baseline - info["prompt_tokens"])
+        self.assertGreater(info["prompt_tokens_saved"], 0)
+        self.assertEqual((info["applied"], info["scored"], info["kept"]), (True, 6, 2))
+        self.assertEqual(reranker.get_reranker_stats()["reranked"], 1)
+
+    def test_skips_when_the_latency_estimate_exceeds_the_budget(self):
+        reranker._STATS["pair_ms"] = 50.0
+
+        selected, info = reranker.rerank("osmosis", _candidates(), top_k=3, budget_ms=100)
+
+        self.assertEqual(info["reason"], "over_budget")
+        self.assertEqual([item["metadata"]["chunk_id"] for item in selected], [0, 1, 2])
+        self.assertEqual(info["prompt_tokens_saved"], 0)
+        self.assertEqual(self.model.pairs_seen, 0)
+
+    def test_a_stale_over_budget_estimate_is_probed_once_per_interval(self):
+        reranker._STATS["pair_ms"] = 50.0
+        reranker._STATS["measured_at"] = time.monotonic() - reranker.RERANK_PROBE_SECONDS - 1
+
+        _, probe = reranker.rerank("water osmosis membrane", _candidates(), top_k=2, budget_ms=100)
+        _, skipped = reranker.rerank("water osmosis membrane", _candidates(), top_k=2, budget_ms=100)
+
+        self.assertTrue(probe["applied"])
+        self.assertEqual(skipped["reason"], "over_budget")
+        self.assertLess(reranker._STATS["pair_ms"], 50.0)
+        self.assertEqual(reranker.get_reranker_stats()["probes"], 1)
+
+    def test_warm_up_records_the_latency_of_a_warm_batch(self):
+        with patch.object(reranker, "load_model", return_value=self.model):
+            reranker.warm_up()
+
+        self.assertEqual(self.model.pairs_seen, 2 * len(reranker._WARMUP_PAIRS))
+        self.assertIsNotNone(reranker._STATS["pair_ms"])
+        self.assertIsNotNone(reranker._STATS["measured_at"])
+
+    def test_stops_between_batches_when_the_budget_runs_out(self):
+        self.model.delay = 0.03
+
+        _, partial = reranker.rerank("water osmosis membrane", _candidates(), top_k=2, budget_ms=40)
+        reranker._STATS["pair_ms"] = None
+        _, exhausted = reranker.rerank("water osmosis membrane", _candidates(), top_k=4, started_at=time.perf_counter() - 0.01, budget_ms=45)
+
+        self.assertEqual((partial["applied"], partial["scored"]), (True, 2))
+        self.assertEqual(exhausted["reason"], "budget_exhausted")
+        self.assertIsNotNone(reranker.get_reranker_stats()["pair_ms"])
+
+    def test_disabled_or_questionless_calls_return_plain_top_k(self):
+        self.assertEqual(reranker.rerank("", _candidates(), top_k=2), (_candidates()[:2], None))
+        with patch.object(reranker, "RERANK_ENABLED", False):
+            self.assertEqual(reranker.candidate_count(5), 5)
+            self.assertIsNone(reranker.rerank("osmosis", _candidates(), top_k=2)[1])
+        self.assertEqual(reranker.candidate_count(5), reranker.RERANK_CANDIDATES)
+
+
+class GenerationRerankTests(unittest.TestCase):
+    @patch.object(reranker, "RERANK_ENABLED", True)
+    @patch.object(reranker, "RERANK_CANDIDATES", 6)
+    @patch.object(reranker, "RERANK_TOP_K", 2)
+    @patch.object(reranker, "_MODEL", _OverlapCrossEncoder())
+    @patch.dict(reranker._STATS, {"reranked": 0, "skipped": {}, "pair_ms": None, "measured_at": None, "probes": 0, "prompt_tokens_saved": 0})
+    @patch("services.rag.generation.retrieve_chunks", return_value=_candidates())
+    def test_answer_uses_reranked_context_and_reports_it(self, mock_retrieve):
+        with patch("services.rag.generation.create_provider") as mock_create_provider:
+            mock_create_provider.return_value.generate.return_value = "By osmosis."
+            answer, metadata = generation.generate_answer(question="how does water cross a membrane", document_id="doc-1", top_k=4)
+
+        self.assertEqual(answer, "By osmosis.")
+        self.assertEqual(mock_retrieve.call_args.kwargs["top_k"], 6)
+        prompt = mock_create_provider.return_value.generate.call_args.args[0]
+        self.assertIn("Water crosses the cell membrane", prompt)
+        self.assertNotIn("Ribosomes", prompt)
+        self.assertEqual(metadata["retrieved_chunk_count"], 2)
+        self.assertTrue(metadata["rerank"]["applied"])
+        self.assertGreater(metadata["rerank"]["prompt_tokens_saved"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from services.rag import retriever, vectordb
+from services.rag.numpy_store import NumpyVectorCollection
+
+
+class _UnfilteredCollection:
+    """Ignores ``where`` like an approximate index whose candidates are mostly other documents."""
+
+    def __init__(self, metadatas):
+        self.metadatas = metadatas
+        self.requests = []
+
+    def query(self, query_embeddings, n_results, include=None, where=None):
+        self.requests.append(n_results)
+        selected = self.metadatas[:n_results]
+        return {
+            "documents": [[f"chunk {index}" for index in range(len(selected))]],
+            "metadatas": [selected],
+            "distances": [[0.1 * index for index in range(len(selected))]],
+        }
+
+
+class _PagedCollection:
+    """Chroma-style ``get`` with limit/offset, ``update`` and collection metadata."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.metadata = {"hnsw:space": "l2"}
+        self.gets = 0
+
+    def get(self, include=None, limit=None, offset=0):
+        self.gets += 1
+        ids = sorted(self.rows)[offset:offset + limit]
+        return {"ids": ids, "metadatas": [dict(self.rows[chunk_id]) for chunk_id in ids]}
+
+    def update(self, ids, metadatas):
+        for chunk_id, metadata in zip(ids, metadatas):
+            self.rows[chunk_id] = metadata
+
+    def modify(self, metadata):
+        self.metadata = metadata
+
+
+class BuildWhereTests(unittest.TestCase):
+    def test_filters_combine_into_a_chroma_where_clause(self):
+        self.assertIsNone(vectordb.build_where())
+        self.assertEqual(vectordb.build_where(document_id="doc-1"), {"document_id": "doc-1"})
+        self.assertEqual(
+            vectordb.build_where(document_id="doc-1", source_type=["pdf", "docx"], uploaded_after="2024-03-01T00:00:00Z"),
+            {
+                "$and": [
+                    {"document_id": "doc-1"},
+                    {"source_type": {"$in": ["pdf", "docx"]}},
+                    {"upload_ts": {"$gte": 1709251200}},
+                ]
+            },
+        )
+
+    def test_chunk_metadata_carries_a_numeric_upload_time(self):
+        metadata = vectordb.chunk_metadata("doc-1", "notes.pdf", "pdf", "2024-03-01T00:00:00Z", 0, 1, "hash")
+        self.assertEqual(metadata["upload_ts"], 1709251200)
+        where = vectordb.build_where(uploaded_after=1709251200, uploaded_before="2024-03-02T00:00:00")
+        self.assertTrue(vectordb.matches_where(metadata, where))
+        self.assertFalse(vectordb.matches_where(metadata, vectordb.build_where(uploaded_after="2024-03-01T00:00:01Z")))
+
+
+    def test_chunks_stored_without_upload_ts_are_filtered_by_upload_time(self):
+        legacy = {"document_id": "doc-1", "upload_time": "2024-03-01T00:00:00Z"}
+
+        self.assertTrue(vectordb.matches_where(legacy, vectordb.build_where(uploaded_after="2024-02-01T00:00:00Z")))
+        self.assertFalse(vectordb.matches_where(legacy, vectordb.build_where(uploaded_before="2024-02-01T00:00:00Z")))
+
+    def test_backfill_gives_legacy_chunks_an_upload_ts_once(self):
+        collection = _PagedCollection(
+            {
+                "a": {"document_id": "doc-1", "upload_time": "2024-03-01T00:00:00Z"},
+                "b": {"document_id": "doc-1", "upload_time": "2024-03-02T00:00:00Z", "upload_ts": 1709337600},
+                "c": {"document_id": "doc-2", "upload_time": "2024-03-03T00:00:00Z"},
+            }
+        )
+
+        self.assertEqual(vectordb.backfill_upload_ts(collection, batch_size=2), 2)
+        self.assertEqual(collection.rows["a"]["upload_ts"], 1709251200)
+        self.assertEqual(collection.rows["c"]["upload_ts"], 1709424000)
+        self.assertEqual(vectordb.backfill_upload_ts(collection, batch_size=2), 0)
+        self.assertEqual(collection.gets, 3)
+
+
+class FilteredSearchTests(unittest.TestCase):
+    def _search(self, collection, **filters):
+        with patch.object(vectordb, "_COLLECTION", collection), patch.object(vectordb, "_CLIENT", object()):
+            return vectordb.search(np.ones(3, dtype=np.float32), top_k=3, **filters)
+
+    def test_short_filtered_results_are_overfetched(self):
+        metadatas = [{"document_id": "other"}] * 10 + [{"document_id": "mine"}] * 5
+        collection = _UnfilteredCollection(metadatas)
+
+        results = self._search(collection, document_id="mine")
+
+        self.assertEqual([item["metadata"]["document_id"] for item in results], ["mine"] * 3)
+        self.assertEqual(collection.requests, [3, 12, 48])
+
+    def test_overfetch_stops_when_the_store_has_no_more_candidates(self):
+        collection = _UnfilteredCollection([{"document_id": "other"}] * 4 + [{"document_id": "mine"}])
+
+        results = self._search(collection, document_id="mine")
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(collection.requests, [3, 12, 48])
+
+    def test_numpy_store_applies_document_and_metadata_filters(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        collection = NumpyVectorCollection(directory.name)
+        rng = np.random.default_rng(7)
+        for document_id, source_type, upload_time in (
+            ("doc-a", "pdf", "2024-01-10T00:00:00Z"),
+            ("doc-b", "pptx", "2024-02-10T00:00:00Z"),
+            ("doc-c", "pdf", "2024-03-10T00:00:00Z"),
+        ):
+            collection.upsert(
+                ids=[f"{document_id}::{index}" for index in range(20)],
+                embeddings=rng.standard_normal((20, 3)).astype(np.float32),
+                documents=[f"{document_id} chunk {index}" for index in range(20)],
+                metadatas=[vectordb.chunk_metadata(document_id, "f", source_type, upload_time, index, 20, "h") for index in range(20)],
+            )
+
+        with patch.object(vectordb, "VECTOR_BACKEND", "numpy"):
+            by_document = self._search(collection, document_id="doc-b")
+            by_type_and_window = self._search(collection, source_type="pdf", uploaded_after="2024-02-01T00:00:00Z")
+
+        self.assertEqual({item["metadata"]["document_id"] for item in by_document}, {"doc-b"})
+        self.assertEqual(len(by_type_and_window), 3)
+        self.assertEqual({item["metadata"]["document_id"] for item in by_type_and_window}, {"doc-c"})
+
+
+class RetrieverFilterTests(unittest.TestCase):
+    def test_filters_reach_the_vector_query_and_the_cache_key(self):
+        with patch.object(retriever, "embed_query", return_value=np.ones(3)), patch.object(
+            retriever.cache, "get_cache", return_value=None
+        ), patch.object(retriever.cache, "set_cache") as set_cache, patch.object(
+            retriever.vectordb, "search", return_value=[{"text": "a", "score": 0.9, "metadata": {"document_id": "doc-1", "source_type": "pdf"}}]
+        ) as search:
+            first = retriever.retrieve_chunks("what is osmosis?", top_k=2, document_id="doc-1", source_type="pdf")
+            retriever.retrieve_chunks("what is osmosis?", top_k=2, document_id="doc-1", source_type="docx")
+
+        self.assertEqual(len(first), 1)
+        self.assertEqual(search.call_args_list[0].kwargs["document_id"], "doc-1")
+        self.assertEqual(search.call_args_list[0].kwargs["source_type"], "pdf")
+        first_key, second_key = (call.args[0] for call in set_cache.call_args_list)
+        self.assertNotEqual(first_key, second_key)
+        self.assertEqual(set_cache.call_args_list[1].args[1], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import json
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from services.startup import FAILED, READY, SKIPPED, StartupOrchestrator, lazy_import
+
+
+class StartupWarmupTests(unittest.TestCase):
+    def test_background_warmup_records_status_and_timing(self):
+        orchestrator = StartupOrchestrator()
+        calls = []
+        orchestrator.register("fast", lambda: calls.append("fast"))
+        orchestrator.register("broken", lambda: (_ for _ in ()).throw(RuntimeError("not installed")))
+        orchestrator.register("ignored", lambda: calls.append("ignored"))
+
+        self.assertFalse(orchestrator.readiness()["ready"])
+        orchestrator.start_background_warmup(names=["fast", "broken"]).join(5)
+
+        readiness = orchestrator.readiness()
+        self.assertTrue(readiness["ready"])
+        self.assertEqual(calls, ["fast"])
+        self.assertEqual(readiness["warm"], ["fast"])
+        self.assertEqual(readiness["failed"], ["broken"])
+        self.assertEqual(readiness["components"]["fast"]["status"], READY)
+        self.assertIsNotNone(readiness["components"]["fast"]["duration_ms"])
+        self.assertEqual(readiness["components"]["broken"]["status"], FAILED)
+        self.assertEqual(readiness["components"]["broken"]["error"], "not installed")
+        self.assertEqual(readiness["components"]["ignored"]["status"], SKIPPED)
+
+    def test_failed_required_component_keeps_the_app_unready(self):
+        orchestrator = StartupOrchestrator()
+        orchestrator.register("vectordb", lambda: (_ for _ in ()).throw(RuntimeError("disk full")), required=True)
+        orchestrator.register("gtts", lambda: (_ for _ in ()).throw(RuntimeError("not installed")))
+
+        orchestrator.warm_all()
+
+        readiness = orchestrator.readiness()
+        self.assertFalse(readiness["ready"])
+        self.assertEqual(readiness["failed"], ["gtts", "vectordb"])
+        self.assertEqual(readiness["failed_required"], ["vectordb"])
+
+    def test_components_are_warmed_only_once(self):
+        orchestrator = StartupOrchestrator()
+        calls = []
+        orchestrator.register("embeddings", lambda: calls.append(1))
+
+        self.assertTrue(orchestrator.warm("embeddings"))
+        self.assertTrue(orchestrator.warm("embeddings"))
+        self.assertEqual(len(calls), 1)
+
+    def test_lazy_import_returns_none_for_missing_modules(self):
+        self.assertIsNone(lazy_import("module_that_does_not_exist_here"))
+        self.assertIs(lazy_import("json"), json)
+
+    def test_readiness_endpoint_returns_503_until_components_are_warm(self):
+        from routes import system
+
+        orchestrator = StartupOrchestrator()
+        orchestrator.register("vectordb", lambda: None)
+        with patch("routes.system.get_readiness", side_effect=orchestrator.readiness):
+            pending = system.get_readiness_status()
+            orchestrator.warm_all()
+            warm = system.get_readiness_status()
+
+        self.assertEqual(pending.status_code, 503)
+        self.assertEqual(warm.status_code, 200)
+        self.assertEqual(json.loads(warm.body)["warm"], ["vectordb"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from services import extracted_text_cache
+from services.upload_registry import UploadRegistry
+
+
+class UploadRegistryTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.index_path = os.path.join(self.directory, "uploads.sqlite3")
+
+    def _store(self, registry, file_id, filename, size=10):
+        path = os.path.join(self.directory, f"{file_id}__{filename}")
+        with open(path, "wb") as handle:
+            handle.write(b"x" * size)
+        registry.register(file_id, filename, path, size, "digest")
+        return path
+
+    def test_lookup_survives_restart_and_records_mime(self):
+        path = self._store(UploadRegistry(self.index_path, self.directory), "a" * 32, "notes.pdf")
+
+        reopened = UploadRegistry(self.index_path, self.directory)
+        self.assertEqual(reopened.resolve("a" * 32), path)
+        self.assertEqual(reopened.get("a" * 32)["mime"], "application/pdf")
+        self.assertEqual(reopened.resolve("b" * 32), "")
+
+    def test_missing_file_is_dropped_from_the_index(self):
+        registry = UploadRegistry(self.index_path, self.directory)
+        os.remove(self._store(registry, "a" * 32, "notes.txt"))
+
+        self.assertEqual(registry.resolve("a" * 32), "")
+        self.assertEqual(registry.stats()["uploads"], 0)
+
+    def test_existing_upload_files_are_imported(self):
+        legacy = os.path.join(self.directory, f"{'c' * 32}__slides.pptx")
+        with open(legacy, "wb") as handle:
+            handle.write(b"deck")
+        with open(os.path.join(self.directory, "generation_cache.sqlite3"), "wb") as handle:
+            handle.write(b"not an upload")
+
+        registry = UploadRegistry(self.index_path, self.directory)
+        self.assertEqual(registry.import_directory(), 1)
+        self.assertEqual(registry.import_directory(), 0)
+        self.assertEqual(registry.get("c" * 32)["filename"], "slides.pptx")
+
+    def test_existing_files_are_imported_in_the_background_and_on_lookup(self):
+        early, late = "d" * 32, "e" * 32
+        for file_id in (early, late):
+            with open(os.path.join(self.directory, f"{file_id}__notes.txt"), "wb") as handle:
+                handle.write(b"notes")
+        registry = UploadRegistry(self.index_path, self.directory)
+
+        self.assertEqual(registry.get(early)["sha256"], extracted_text_cache.hash_file(os.path.join(self.directory, f"{early}__notes.txt")))
+        registry.start_reaper(0, import_existing=True).join(5)
+
+        self.assertEqual(registry.stats()["uploads"], 2)
+        self.assertTrue(registry.resolve(late).endswith("__notes.txt"))
+
+    def test_reaper_applies_ttl_then_quota_and_notifies_listeners(self):
+        registry = UploadRegistry(self.index_path, self.directory, ttl_seconds=100, quota_bytes=25)
+        deleted = []
+        registry.add_delete_listener(lambda record: deleted.append(record["file_id"]))
+        stale = self._store(registry, "1" * 32, "old.txt")
+        registry._connect().execute("UPDATE uploads SET last_access = last_access - 1000 WHERE file_id = ?", ("1" * 32,))
+        older = self._store(registry, "2" * 32, "a.txt", size=20)
+        registry._connect().execute("UPDATE uploads SET last_access = last_access - 10 WHERE file_id = ?", ("2" * 32,))
+        newest = self._store(registry, "3" * 32, "b.txt", size=20)
+
+        self.assertEqual(registry.reap(), 2)
+
+        self.assertEqual(deleted, ["1" * 32, "2" * 32])
+        self.assertFalse(os.path.exists(stale) or os.path.exists(older))
+        self.assertEqual(registry.resolve("3" * 32), newest)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BACKEND_ROOT = REPO_ROOT / "backend"
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services import upload_stream
+from services.upload_stream import UploadTooLarge, save_stream
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+class SaveStreamTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    async def test_stream_is_written_and_hashed_incrementally(self):
+        path = os.path.join(self.directory, "upload.txt")
+
+        size, digest = await save_stream(_chunks(b"lecture ", b"notes"), path)
+
+        self.assertEqual((size, digest), (13, hashlib.sha256(b"lecture notes").hexdigest()))
+        with open(path, "rb") as handle:
+            self.assertEqual(handle.read(), b"lecture notes")
+
+    async def test_oversized_stream_stops_early_and_leaves_no_file(self):
+        pulled = []
+
+        async def body():
+            for index in range(10):
+                pulled.append(index)
+                yield b"x" * 4
+
+        with self.assertRaises(UploadTooLarge):
+            await save_stream(body(), os.path.join(self.directory, "big.bin"), max_bytes=10)
+
+        self.assertEqual(pulled, [0, 1, 2])
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+class UploadRouteTests(unittest.TestCase):
+    def setUp(self):
+        from routes import generate
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.indexed = []
+        patches = [
+            patch.object(generate, "TEMP_UPLOAD_DIR", self.directory),
+            patch.object(generate, "register_upload"),
+            patch.object(generate, "_index_uploaded_document", side_effect=lambda *args: self.indexed.append(args)),
+            patch.object(upload_stream, "UPLOAD_CHUNK_BYTES", 4),
+        ]
+        for item in patches:
+            item.start()
+            self.addCleanup(item.stop)
+        app = FastAPI()
+        app.include_router(generate.router)
+        self.client = TestClient(app)
+        self.generate = generate
+
+    def test_multipart_upload_is_stored_registered_and_indexed(self):
+        response = self.client.post("/api/source/upload", files={"file": ("notes.txt", b"Osmosis moves water.", "text/plain")})
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["fileName"], body["size"]), ("notes.txt", 20))
+        stored = os.path.join(self.directory, f"{body['fileId']}__notes.txt")
+        self.generate.register_upload.assert_called_once_with(
+            body["fileId"], "notes.txt", stored, 20, hashlib.sha256(b"Osmosis moves water.").hexdigest()
+        )
+        self.assertEqual(self.indexed[0][1:], ("notes.txt", "text", "Osmosis moves water."))
+
+    def test_raw_stream_upload_is_stored_registered_and_indexed(self):
+        response = self.client.post(
+            "/api/source/upload/stream?filename=notes.txt", content=b"Osmosis moves water.", headers={"Content-Type": "text/plain"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        stored = os.path.join(self.directory, f"{body['fileId']}__notes.txt")
+        self.generate.register_upload.assert_called_once_with(
+            body["fileId"], "notes.txt", stored, 20, hashlib.sha256(b"Osmosis moves water.").hexdigest()
+        )
+        self.assertEqual(self.indexed[0][1:], ("notes.txt", "text", "Osmosis moves water."))
+
+    def test_raw_stream_upload_enforces_the_size_limit(self):
+        with patch.object(upload_stream, "UPLOAD_MAX_BYTES", 8):
+            response = self.client.post("/api/source/upload/stream?filename=big.txt", content=iter([b"x" * 4] * 5))
+
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_declared_oversized_body_is_rejected_before_parsing(self):
+        with patch.object(upload_stream, "UPLOAD_MAX_BYTES", 8):
+            response = self.client.post("/api/source/upload", files={"file": ("big.txt", b"x" * 64, "text/plain")})
+
+        self.assertEqual(response.status_code, 413)
+
+
+if __name__ == "__main__":
+    unittest.main()
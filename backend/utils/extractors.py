@@ -1,64 +1,130 @@
 import io
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
 import zipfile
 import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, Optional, Union
 
+logger = logging.getLogger(__name__)
 
-def extract_pptx_text(data):
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))) or 1)
+PDF_PAGE_TIMEOUT_SECONDS = float(os.getenv("PDF_PAGE_TIMEOUT_SECONDS", "30") or 30)
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16") or 16)
+
+
+_SLIDE_NAME = re.compile(r"^ppt/slides/slide(\d+)\.xml$")
+_HEADING_STYLES = ("heading", "title")
+
+
+def _local_name(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _open_archive(source):
+    return zipfile.ZipFile(source if isinstance(source, str) else io.BytesIO(source))
+
+
+def _iter_xml_paragraphs(stream):
+    """Yield ``(text, style)`` for each ``w:p``/``a:p`` paragraph of an OOXML part.
+
+    Parsed with ``iterparse``; every paragraph is removed from the tree once read, so memory
+    stays bounded by the largest paragraph rather than the whole part.
+    """
+    stack = []
+    paragraphs = []
+    names = {}
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+        name = names.get(element.tag)
+        if name is None:
+            name = names[element.tag] = _local_name(element.tag)
+        if event == "start":
+            stack.append(element)
+            if name == "p":
+                paragraphs.append({"parts": [], "style": ""})
+            continue
+
+        stack.pop()
+        current = paragraphs[-1] if paragraphs else None
+        if name == "t":
+            if current is not None and element.text:
+                current["parts"].append(element.text)
+        elif name == "tab":
+            if current is not None:
+                current["parts"].append(" ")
+        elif name in ("br", "cr"):
+            if current is not None:
+                current["parts"].append("\n")
+        elif name == "pStyle":
+            if current is not None:
+                current["style"] = next((value for key, value in element.attrib.items() if _local_name(key) == "val"), "")
+        elif name == "p":
+            paragraph = paragraphs.pop()
+            text = "".join(paragraph["parts"]).strip()
+            if text:
+                yield text, paragraph["style"]
+            element.clear()
+            if stack:
+                stack[-1].remove(element)
+
+
+def iter_pptx_slides(source):
+    """Yield the text of each slide in slide order, one line per paragraph."""
     try:
-        with zipfile.ZipFile(io.BytesIO(data)) as archive:
-            slide_files = [
-                name
+        with _open_archive(source) as archive:
+            slide_files = sorted(
+                (int(match.group(1)), name)
                 for name in archive.namelist()
-                if name.startswith("ppt/slides/slide") and name.endswith(".xml")
-            ]
-            if not slide_files:
-                return ""
-
-            def slide_index(name):
-                match = __import__("re").search(r"slide(\d+)\.xml$", name)
-                return int(match.group(1)) if match else 0
-
-            slide_files.sort(key=slide_index)
-            slides_text = []
-            for slide_name in slide_files:
-                xml_bytes = archive.read(slide_name)
+                for match in [_SLIDE_NAME.match(name)]
+                if match
+            )
+            for _, slide_name in slide_files:
                 try:
-                    root = ET.fromstring(xml_bytes)
+                    with archive.open(slide_name) as stream:
+                        lines = [text for text, _ in _iter_xml_paragraphs(stream)]
                 except ET.ParseError:
                     continue
-
-                chunks = []
-                for node in root.iter():
-                    if node.tag.endswith("}t") and node.text:
-                        text = node.text.strip()
-                        if text:
-                            chunks.append(text)
-                if chunks:
-                    slides_text.append(" ".join(chunks))
-            return "\n".join(slides_text).strip()
+                if lines:
+                    yield "\n".join(lines)
     except zipfile.BadZipFile:
-        return ""
+        return
 
 
-def extract_docx_text(data):
+def iter_docx_paragraphs(source):
+    """Yield ``(text, is_heading)`` for each non-empty paragraph of ``word/document.xml``."""
     try:
-        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        with _open_archive(source) as archive:
             if "word/document.xml" not in archive.namelist():
-                return ""
-            xml_bytes = archive.read("word/document.xml")
-            try:
-                root = ET.fromstring(xml_bytes)
-            except ET.ParseError:
-                return ""
-            chunks = []
-            for node in root.iter():
-                if node.tag.endswith("}t") and node.text:
-                    text = node.text.strip()
-                    if text:
-                        chunks.append(text)
-            return "\n".join(chunks).strip()
+                return
+            with archive.open("word/document.xml") as stream:
+                try:
+                    for text, style in _iter_xml_paragraphs(stream):
+                        yield text, style.lower().startswith(_HEADING_STYLES)
+                except ET.ParseError as exc:
+                    logger.warning("DOCX document.xml is malformed; keeping the text read so far: %s", exc)
     except zipfile.BadZipFile:
-        return ""
+        return
+
+
+def extract_pptx_text(data):
+    """Slides are separated by a blank line and paragraphs by a newline, so the chunker splits on slides first."""
+    return "\n\n".join(iter_pptx_slides(data)).strip()
+
+
+def extract_docx_text(data):
+    """Paragraphs are separated by a newline, with a blank line before each heading to mark sections."""
+    lines = []
+    for text, is_heading in iter_docx_paragraphs(data):
+        if is_heading and lines:
+            lines.append("")
+        lines.append(text)
+    return "\n".join(lines).strip()
 
 
 def extract_txt_text(data):
@@ -70,23 +136,172 @@ def extract_txt_text(data):
     return ""
 
 
-def extract_pdf_text(data):
+def _load_pdf_reader():
     try:
         from PyPDF2 import PdfReader
     except ImportError as exc:
         raise ValueError("PDF text extraction requires PyPDF2. Install it in the backend environment.") from exc
+    return PdfReader
+
 
+def _open_pdf(source):
+    PdfReader = _load_pdf_reader()
     try:
-        reader = PdfReader(io.BytesIO(data))
+        return PdfReader(source if isinstance(source, str) else io.BytesIO(source))
     except Exception as exc:
         raise ValueError("Unable to read PDF file") from exc
 
-    chunks = []
-    for page in reader.pages:
+
+def _page_text(page):
+    try:
+        return (page.extract_text() or "").strip()
+    except Exception:
+        return ""
+
+
+# Reader kept by each pool worker so consecutive pages of one file are not re-parsed.
+_WORKER_READER = None
+
+
+def _extract_pdf_page(path, index):
+    global _WORKER_READER
+    if _WORKER_READER is None or _WORKER_READER[0] != path:
+        _WORKER_READER = (path, _load_pdf_reader()(path))
+    return _page_text(_WORKER_READER[1].pages[index])
+
+
+_PDF_POOL = None
+_PDF_POOL_LOCK = threading.Lock()
+
+
+def _get_pdf_pool():
+    global _PDF_POOL
+    with _PDF_POOL_LOCK:
+        if _PDF_POOL is None:
+            # spawn: forking a threaded server process is unsafe.
+            _PDF_POOL = ProcessPoolExecutor(max_workers=max(1, PDF_EXTRACT_WORKERS), mp_context=multiprocessing.get_context("spawn"))
+        return _PDF_POOL
+
+
+def _discard_pdf_pool(pool):
+    """Drop a pool whose worker is stuck on a page; the next extraction starts a fresh one.
+
+    Other extractions sharing the pool lose their in-flight pages and resubmit them to the new pool.
+    """
+    global _PDF_POOL
+    with _PDF_POOL_LOCK:
+        if _PDF_POOL is pool:
+            _PDF_POOL = None
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+
+def _renew_pdf_pool(pool):
+    """Return the shared pool to use after ``pool`` broke or was shut down."""
+    global _PDF_POOL
+    with _PDF_POOL_LOCK:
+        if _PDF_POOL is pool:
+            _PDF_POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+    return _get_pdf_pool()
+
+
+def _finished(future):
+    return future.done() and not future.cancelled() and future.exception() is None
+
+
+def _iter_pdf_pages_parallel(path, page_count, workers, page_timeout):
+    pending = deque()
+    next_index = 0
+    retried = set()
+    pool = _get_pdf_pool()
+
+    def submit(index):
+        nonlocal pool
+        try:
+            return pool.submit(_extract_pdf_page, path, index)
+        except (BrokenProcessPool, RuntimeError):
+            # Another extraction discarded the shared pool ("cannot schedule new futures after shutdown").
+            pool = _renew_pdf_pool(pool)
+            return pool.submit(_extract_pdf_page, path, index)
+
+    while pending or next_index < page_count:
+        # Keep at most two pages per worker in flight so results are yielded in order with bounded memory.
+        while next_index < page_count and len(pending) < workers * 2:
+            pending.append((next_index, submit(next_index)))
+            next_index += 1
+        index, future = pending.popleft()
         try:
-            text = page.extract_text() or ""
-        except Exception:
-            text = ""
-        if text.strip():
-            chunks.append(text.strip())
-    return "\n".join(chunks).strip()
+            text = future.result(timeout=page_timeout)
+        except FutureTimeoutError:
+            logger.warning("PDF page %s timed out after %.0fs; skipping it", index + 1, page_timeout)
+            _discard_pdf_pool(pool)
+            pool = _get_pdf_pool()
+            pending = deque((item_index, submit(item_index)) for item_index, _ in pending)
+            continue
+        except (BrokenProcessPool, CancelledError) as exc:
+            # The pool went away under this page, usually because another extraction's page timed
+            # out. Resubmit everything in flight; a page that breaks the pool twice is skipped.
+            pool = _renew_pdf_pool(pool)
+            if index in retried:
+                logger.warning("PDF page %s failed to extract twice (%s); skipping it", index + 1, exc.__class__.__name__)
+            else:
+                retried.add(index)
+                pending.appendleft((index, future))
+            pending = deque((item_index, item if _finished(item) else submit(item_index)) for item_index, item in pending)
+            continue
+        except Exception as exc:
+            logger.warning("PDF page %s failed to extract: %s", index + 1, exc)
+            continue
+        if text:
+            yield text
+
+
+def iter_pdf_pages(
+    source: Union[bytes, str],
+    workers: Optional[int] = None,
+    page_timeout: Optional[float] = None,
+    parallel_min_pages: Optional[int] = None,
+) -> Iterator[str]:
+    """Yield the text of each non-empty PDF page, in page order, as soon as it is extracted.
+
+    ``source`` is the PDF bytes or a file path. Documents with at least ``parallel_min_pages``
+    pages are extracted by a shared process pool of ``workers`` processes; a page that takes
+    longer than ``page_timeout`` seconds is skipped.
+    """
+    workers = PDF_EXTRACT_WORKERS if workers is None else max(1, int(workers))
+    page_timeout = PDF_PAGE_TIMEOUT_SECONDS if page_timeout is None else float(page_timeout)
+    parallel_min_pages = PDF_PARALLEL_MIN_PAGES if parallel_min_pages is None else int(parallel_min_pages)
+
+    reader = _open_pdf(source)
+    page_count = len(reader.pages)
+    if workers <= 1 or page_count < parallel_min_pages:
+        for page in reader.pages:
+            text = _page_text(page)
+            if text:
+                yield text
+        return
+
+    del reader
+    spooled = None
+    if not isinstance(source, str):
+        # Workers open the file themselves instead of each receiving a copy of the bytes.
+        handle = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+        with handle:
+            handle.write(source)
+        spooled = source = handle.name
+    try:
+        yield from _iter_pdf_pages_parallel(source, page_count, workers, page_timeout)
+    finally:
+        if spooled:
+            try:
+                os.remove(spooled)
+            except OSError:
+                pass
+
+
+def extract_pdf_text(data):
+    return "\n".join(iter_pdf_pages(data)).strip()
@@ -0,0 +1,27 @@
+import math
+import re
+
+# Rough prompt-token estimate; close enough for English text with BPE tokenizers.
+CHARS_PER_TOKEN = 4
+
+_SENTENCE_END = re.compile(r"[.!?][\"')\]]*\s|\n")
+
+
+def estimate_tokens(text: str) -> int:
+    return int(math.ceil(len(str(text or "")) / CHARS_PER_TOKEN))
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    """Cut ``text`` to at most ``max_chars``, ending at a sentence boundary when one is near the end.
+
+    Falls back to the last word boundary, so a cut never lands mid-word.
+    """
+    text = str(text or "")
+    if len(text) <= max_chars:
+        return text
+    head = text[:max_chars]
+    sentence_ends = [match.end() for match in _SENTENCE_END.finditer(head)]
+    if sentence_ends and sentence_ends[-1] >= max_chars // 2:
+        return head[:sentence_ends[-1]].rstrip()
+    space = head.rfind(" ")
+    return (head[:space] if space >= max_chars // 2 else head).rstrip()
@@ -234,9 +234,12 @@ function UploadPage({ user }) {
       setTextValue("");
       resetGeneratedOutputs();
       try {
-        const formData = new FormData();
-        formData.append("file", file);
-        const response = await fetch(`${API_BASE}/api/source/upload`, { method: "POST", body: formData });
+        // Raw body: the server writes the file to disk as it arrives, without multipart spooling.
+        const response = await fetch(`${API_BASE}/api/source/upload/stream?filename=${encodeURIComponent(file.name)}`, {
+          method: "POST",
+          headers: { "Content-Type": file.type || "application/octet-stream" },
+          body: file,
+        });
         const data = await response.json().catch(() => ({}));
         if (!response.ok) {
           throw new Error(data?.error || "Failed to store uploaded file");